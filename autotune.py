@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Adaptive concurrency autotuner for batch conversions.
+
+Runs several FFmpeg conversions side by side and tunes the number of
+parallel workers, and the encoder threads given to each, from the
+throughput FFmpeg reports in its progress stream. The best settings found
+are remembered per host and conversion profile so the next batch starts
+from them.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from batch_converter import BatchConverter, BatchResult, remove_placeholder
+from ffmpeg_utils import get_data_dir, get_host_key
+from mts_converter import DEFAULT_CRF, DEFAULT_PRESET
+
+
+# File (inside the data directory) holding remembered tuning results
+TUNING_FILE = 'tuning.json'
+
+# Seconds of steady-state throughput measured before each tuning decision
+DEFAULT_WINDOW = 30.0
+
+# Relative throughput gain required to keep moving in the same direction
+DEFAULT_TOLERANCE = 0.05
+
+
+class TuningStore:
+    """Remembers the best worker/thread settings per host and profile.
+
+    Attributes:
+        path: Path to the JSON file backing the store.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        """Initialize TuningStore.
+
+        Args:
+            path: Optional JSON file path. Defaults to TUNING_FILE in the
+                  per-user data directory.
+        """
+        self.path = Path(path) if path else Path(get_data_dir()) / TUNING_FILE
+
+    def _load(self) -> Dict:
+        """Load the whole store, tolerating a missing or corrupt file."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, profile: str) -> Optional[Dict]:
+        """Get remembered settings for a profile on this host.
+
+        Args:
+            profile: Conversion profile key.
+
+        Returns:
+            Dictionary with 'workers', 'threads' and 'throughput', or None
+            if nothing has been remembered yet.
+        """
+        return self._load().get(get_host_key(), {}).get(profile)
+
+    def save(self, profile: str, workers: int, threads: int, throughput: float):
+        """Remember settings for a profile on this host.
+
+        Args:
+            profile: Conversion profile key.
+            workers: Number of parallel FFmpeg processes.
+            threads: Encoder threads per process.
+            throughput: Aggregate speed (x realtime) measured with them.
+        """
+        data = self._load()
+        data.setdefault(get_host_key(), {})[profile] = {
+            'workers': workers,
+            'threads': threads,
+            'throughput': round(throughput, 3),
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+
+class ThroughputTuner:
+    """Hill-climbs the worker count until aggregate throughput plateaus.
+
+    Each measurement window reports the aggregate speed of all running
+    conversions. While throughput improves by more than the tolerance the
+    tuner keeps adding workers (or removing them, if adding did not help
+    at the starting point); once it stops improving it settles on the best
+    configuration seen. Encoder threads are rebalanced so that
+    workers * threads covers the CPU count.
+
+    Attributes:
+        cpu_count: Number of CPUs to share between workers.
+        max_workers: Upper bound on parallel workers.
+        workers: Current worker count.
+        settled: True once the best configuration has been found.
+        best_workers: Worker count with the best measured throughput.
+        best_throughput: Best measured throughput, or None.
+    """
+
+    def __init__(
+        self,
+        cpu_count: int,
+        start_workers: int = 1,
+        max_workers: Optional[int] = None,
+        tolerance: float = DEFAULT_TOLERANCE
+    ):
+        """Initialize ThroughputTuner.
+
+        Args:
+            cpu_count: Number of CPUs to share between workers.
+            start_workers: Worker count to measure first.
+            max_workers: Upper bound on parallel workers (default: cpu_count).
+            tolerance: Relative gain needed to count as an improvement.
+        """
+        self.cpu_count = max(1, cpu_count)
+        self.max_workers = max(1, max_workers or self.cpu_count)
+        self.workers = min(max(1, start_workers), self.max_workers)
+        self.tolerance = tolerance
+        self.settled = False
+        self.best_workers = self.workers
+        self.best_throughput: Optional[float] = None
+        self._start_workers = self.workers
+        self._direction = 1
+        self._tried_down = False
+
+    @property
+    def threads(self) -> int:
+        """Encoder threads per worker for the current worker count."""
+        return max(1, self.cpu_count // self.workers)
+
+    def record(self, throughput: float) -> bool:
+        """Record the throughput measured for the current configuration.
+
+        Args:
+            throughput: Aggregate speed measured over one window.
+
+        Returns:
+            True if the worker count changed as a result.
+        """
+        if self.settled:
+            return False
+
+        previous = self.workers
+        if (self.best_throughput is None or
+                throughput > self.best_throughput * (1 + self.tolerance)):
+            self.best_throughput = throughput
+            self.best_workers = self.workers
+            self._step()
+        elif (self._direction == 1 and not self._tried_down and
+                self.best_workers == self._start_workers and self._start_workers > 1):
+            # Adding a worker at the starting point did not help; try fewer
+            self._direction = -1
+            self._tried_down = True
+            self.workers = self.best_workers
+            self._step()
+        else:
+            self.workers = self.best_workers
+            self.settled = True
+
+        return self.workers != previous
+
+    def _step(self):
+        """Move one worker in the current direction, settling at the bounds."""
+        candidate = self.workers + self._direction
+        if 1 <= candidate <= self.max_workers:
+            self.workers = candidate
+        elif self._direction == 1 and not self._tried_down and self._start_workers > 1:
+            self._direction = -1
+            self._tried_down = True
+            self.workers = self.best_workers
+            self._step()
+        else:
+            self.workers = self.best_workers
+            self.settled = True
+
+
+class AdaptiveBatchConverter(BatchConverter):
+    """BatchConverter that runs files in parallel with self-tuned concurrency.
+
+    Workers report FFmpeg statistics through convert_video's stats callback.
+    The aggregate speed of all running conversions is averaged over a
+    measurement window and fed to a ThroughputTuner, which decides how many
+    conversions run at once and how many encoder threads each new one gets.
+
+    Attributes:
+        max_workers: Upper bound on parallel conversions.
+        window: Measurement window length in seconds.
+        poll_interval: Seconds between throughput samples.
+        store: TuningStore used to remember the best settings.
+        tuner: ThroughputTuner of the last batch, or None.
+    """
+
+    def __init__(
+        self,
+        *args,
+        max_workers: Optional[int] = None,
+        window: float = DEFAULT_WINDOW,
+        poll_interval: float = 1.0,
+        store: Optional[TuningStore] = None,
+        **kwargs
+    ):
+        """Initialize AdaptiveBatchConverter.
+
+        Args:
+            *args: Positional arguments for BatchConverter.
+            max_workers: Upper bound on parallel conversions (default: CPUs).
+            window: Measurement window length in seconds.
+            poll_interval: Seconds between throughput samples.
+            store: Optional TuningStore (default: store in the data directory).
+            **kwargs: Keyword arguments for BatchConverter.
+        """
+        super().__init__(*args, **kwargs)
+        self.max_workers = max_workers
+        self.window = window
+        self.poll_interval = poll_interval
+        self.store = store if store is not None else TuningStore()
+        self.tuner: Optional[ThroughputTuner] = None
+
+    def profile_key(self) -> str:
+        """Get the profile key the tuning result is remembered under.
+
+        Returns:
+            String combining the settings that drive encode cost.
+        """
+        options = self._conversion_options()
+        return "|".join(str(part) for part in (
+            self.timestamp_mode,
+            self.resolution,
+            self.overlay_engine,
+            self.scaler,
+            'deint' if self.deinterlace else 'prog',
+            options.get('preset') or DEFAULT_PRESET,
+            options.get('crf') if options.get('crf') is not None else DEFAULT_CRF,
+        ))
+
+    def convert_batch(self, files: List[Path]) -> List[BatchResult]:
+        """Convert a batch of MTS files with adaptive parallelism.
+
+        Args:
+            files: List of paths to MTS files to convert.
+
+        Returns:
+            List of BatchResult objects, one per input file, in input order.
+        """
+        total = len(files)
+        results: List[Optional[BatchResult]] = [None] * total
+        cpu_count = os.cpu_count() or 1
+        profile = self.profile_key()
+        remembered = self.store.get(profile)
+
+        self.tuner = tuner = ThroughputTuner(
+            cpu_count,
+            start_workers=remembered['workers'] if remembered else 1,
+            max_workers=min(self.max_workers or cpu_count, max(1, total))
+        )
+
+        lock = threading.Lock()
+        speeds: Dict[int, float] = {}
+        running: Dict[int, threading.Thread] = {}
+        pending = list(enumerate(files))
+        completed = 0
+        window_start = time.monotonic()
+        samples: List[float] = []
+        self._start_staging(files)
+
+        def run_job(index: int, input_file: Path, output_file: Path, threads: int):
+            def on_stats(stats):
+                if 'speed' in stats:
+                    with lock:
+                        speeds[index] = stats['speed']
+
+            results[index] = self._convert_file(
+                input_file, output_file, threads=threads, stats_callback=on_stats
+            )
+            if not results[index].success:
+                remove_placeholder(output_file)
+            with lock:
+                speeds.pop(index, None)
+
+        while pending or running:
+            # Dispatch up to the tuner's worker count
+            while pending and len(running) < tuner.workers:
+                index, input_file = pending[0]
+                output_file = self._get_output_path(input_file)
+                space_error = self._reserve_space(input_file, output_file)
+                if space_error and running:
+                    # Hold until a running job finishes and its estimate
+                    # is replaced by the real size
+                    break
+                pending.pop(0)
+                if space_error:
+                    results[index] = BatchResult(
+                        input_file=input_file,
+                        output_file=None,
+                        success=False,
+                        error=space_error
+                    )
+                    completed += 1
+                    if self.progress_callback:
+                        self.progress_callback(completed, total, input_file)
+                    continue
+                # Reserve the name so parallel jobs never pick the same output
+                output_file.touch()
+                thread = threading.Thread(
+                    target=run_job,
+                    args=(index, input_file, output_file, tuner.threads),
+                    daemon=True
+                )
+                running[index] = thread
+                thread.start()
+
+            time.sleep(self.poll_interval)
+
+            # Only measure while every worker slot is busy
+            with lock:
+                if len(speeds) >= tuner.workers:
+                    samples.append(sum(speeds.values()))
+
+            if time.monotonic() - window_start >= self.window:
+                if samples and not tuner.settled:
+                    tuner.record(sum(samples) / len(samples))
+                window_start = time.monotonic()
+                samples = []
+
+            for index, thread in list(running.items()):
+                if not thread.is_alive():
+                    thread.join()
+                    del running[index]
+                    completed += 1
+                    if self.progress_callback:
+                        self.progress_callback(completed, total, files[index])
+
+        if tuner.best_throughput is not None:
+            self.store.save(
+                profile,
+                tuner.best_workers,
+                max(1, cpu_count // tuner.best_workers),
+                tuner.best_throughput
+            )
+
+        self.results = list(results)
+        self._finish_batch(self.results)
+        return self.results
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Clip metadata from the AVCHD navigation files of a card.
+
+Next to the clips in BDMV/STREAM, an AVCHD card has a clip information
+file per clip (BDMV/CLIPINF/*.CPI) and playlists (BDMV/PLAYLIST/*.MPL).
+Together they are a few kilobytes and hold what would otherwise take a
+read of every clip:
+
+    - each clip's presentation start and end time, so its duration;
+    - the playback order of the clips, and which clips continue the
+      previous one seamlessly (a recording spanned over several files);
+    - the recording date and time of every scene, in the playlist's
+      extension data, one per entry mark.
+
+The clip and playlist structures are the Blu-ray ones (times on a 45 kHz
+clock). The camera's extension data layout is not published, so the
+recording times are taken from the BCD date/time records in it, matched
+to the playlist's entry marks, and cross-checked against the DPM
+timestamp of the first and last dated clip (extract_avchd_timestamp).
+If they disagree, only the durations and order are used and every clip's
+timestamp comes from its DPM record as before.
+
+Usage:
+    python avchd_index.py <card, AVCHD or BDMV folder>
+"""
+
+import struct
+import sys
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from mts_converter import extract_avchd_timestamp
+
+
+# Presentation times in clip and playlist files run on a 45 kHz clock
+CLOCK_RATE = 45000
+
+# Play item connection conditions meaning "continues the previous item
+# seamlessly" (a recording spanned over several clips)
+SEAMLESS_CONNECTIONS = (5, 6)
+
+# Playlist mark type of a scene (recording) start
+ENTRY_MARK = 1
+
+# Allowed difference (seconds) between a playlist recording time and the
+# clip's DPM timestamp; DPM records have one-second resolution
+CROSS_CHECK_TOLERANCE = 2.0
+
+# Folder names of an AVCHD tree, searched below a card or AVCHD folder
+BDMV_LOCATIONS = (('BDMV',), ('AVCHD', 'BDMV'), ('PRIVATE', 'AVCHD', 'BDMV'))
+
+
+@dataclass
+class PlayItem:
+    """One clip reference in a playlist.
+
+    Attributes:
+        clip_name: Five-digit clip name (e.g. '00001').
+        in_time: Start of the played range (45 kHz ticks).
+        out_time: End of the played range (45 kHz ticks).
+        connection_condition: How the item joins the previous one
+                              (5 or 6: seamlessly).
+    """
+    clip_name: str
+    in_time: int
+    out_time: int
+    connection_condition: int
+
+
+@dataclass
+class PlayListMark:
+    """One mark in a playlist.
+
+    Attributes:
+        mark_type: ENTRY_MARK for a scene start.
+        play_item: Index of the play item the mark is in.
+        time: Mark position (45 kHz ticks, on the play item's clock).
+    """
+    mark_type: int
+    play_item: int
+    time: int
+
+
+@dataclass
+class AvchdClip:
+    """Metadata of one clip of an AVCHD tree.
+
+    Attributes:
+        name: Five-digit clip name.
+        path: Path to the clip's MTS file.
+        duration: Duration in seconds.
+        recorded: Recording time of the clip's first frame, or None if
+                  the navigation files do not give it.
+        recording: Index of the recording the clip belongs to; clips of a
+                   spanned recording share it.
+    """
+    name: str
+    path: Path
+    duration: float
+    recorded: Optional[datetime]
+    recording: int
+
+
+def _check_magic(data: bytes, magic: bytes):
+    """Raise ValueError unless data starts with the given type indicator."""
+    if len(data) < 40 or data[:4] != magic:
+        raise ValueError(f"Not a {magic.decode()} file")
+
+
+def parse_clip_info(data: bytes) -> float:
+    """Get a clip's duration from its clip information (.CPI) file.
+
+    Args:
+        data: Contents of the .CPI file.
+
+    Returns:
+        Duration in seconds: the sum of the presentation ranges of the
+        clip's STC sequences.
+
+    Raises:
+        ValueError: If the data is not a clip information file.
+    """
+    _check_magic(data, b'HDMV')
+    try:
+        (sequence_info,) = struct.unpack_from('>I', data, 8)
+        pos = sequence_info + 5
+        atc_count = data[pos]
+        pos += 1
+        ticks = 0
+        for _ in range(atc_count):
+            stc_count = data[pos + 4]
+            pos += 6
+            for _ in range(stc_count):
+                start, end = struct.unpack_from('>II', data, pos + 6)
+                ticks += (end - start) % 2 ** 32
+                pos += 14
+    except (IndexError, struct.error):
+        raise ValueError("Truncated clip information file")
+    return ticks / CLOCK_RATE
+
+
+def find_bcd_dates(data: bytes) -> List[datetime]:
+    """Find BCD-encoded date/time records (YYYY MM DD hh mm ss).
+
+    Args:
+        data: Bytes to search.
+
+    Returns:
+        Valid dates in the order found, without overlaps.
+    """
+    dates = []
+    pos = 0
+    while pos + 7 <= len(data):
+        record = data[pos:pos + 7]
+        if record[0] in (0x19, 0x20) and all((b >> 4) < 10 and (b & 0x0F) < 10 for b in record):
+            digits = [(b >> 4) * 10 + (b & 0x0F) for b in record]
+            year = digits[0] * 100 + digits[1]
+            try:
+                if 1990 <= year <= 2100:
+                    dates.append(datetime(year, *digits[2:]))
+                    pos += 7
+                    continue
+            except ValueError:
+                pass
+        pos += 1
+    return dates
+
+
+def parse_playlist(data: bytes) -> Tuple[List[PlayItem], List[PlayListMark], List[datetime]]:
+    """Parse a playlist (.MPL) file.
+
+    Args:
+        data: Contents of the .MPL file.
+
+    Returns:
+        Tuple of (play items, marks, recording dates from the extension
+        data in the order stored).
+
+    Raises:
+        ValueError: If the data is not a playlist file.
+    """
+    _check_magic(data, b'MPLS')
+    try:
+        playlist_start, mark_start, extension_start = struct.unpack_from('>III', data, 8)
+
+        (item_count,) = struct.unpack_from('>H', data, playlist_start + 6)
+        pos = playlist_start + 10
+        items = []
+        for _ in range(item_count):
+            (length,) = struct.unpack_from('>H', data, pos)
+            clip_name = data[pos + 2:pos + 7].decode('ascii')
+            (flags,) = struct.unpack_from('>H', data, pos + 11)
+            in_time, out_time = struct.unpack_from('>II', data, pos + 14)
+            items.append(PlayItem(clip_name, in_time, out_time, flags & 0x0F))
+            pos += 2 + length
+
+        (mark_count,) = struct.unpack_from('>H', data, mark_start + 4)
+        marks = []
+        for index in range(mark_count):
+            pos = mark_start + 6 + index * 14
+            mark_type, play_item, time = struct.unpack_from('>BHI', data, pos + 1)
+            marks.append(PlayListMark(mark_type, play_item, time))
+    except (UnicodeDecodeError, struct.error):
+        raise ValueError("Truncated playlist file")
+
+    dates = find_bcd_dates(data[extension_start:]) if extension_start else []
+    return items, marks, dates
+
+
+def _child(directory: Path, name: str) -> Optional[Path]:
+    """Find a child of a directory by case-insensitive name."""
+    exact = directory / name
+    if exact.exists():
+        return exact
+    try:
+        for item in directory.iterdir():
+            if item.name.upper() == name:
+                return item
+    except OSError:
+        pass
+    return None
+
+
+def find_bdmv_dir(path: Path) -> Optional[Path]:
+    """Find the BDMV folder of an AVCHD tree.
+
+    Args:
+        path: Card root, PRIVATE, AVCHD or BDMV folder, or BDMV/STREAM.
+
+    Returns:
+        Path to the BDMV folder if it has STREAM, CLIPINF and PLAYLIST
+        subfolders, otherwise None.
+    """
+    path = Path(path)
+    candidates = []
+    if path.name.upper() == 'STREAM':
+        candidates.append(path.parent)
+    if path.name.upper() == 'BDMV':
+        candidates.append(path)
+    if path.name.upper() == 'PRIVATE':
+        candidates.append(path / 'AVCHD' / 'BDMV')
+    for parts in BDMV_LOCATIONS:
+        candidate = path
+        for part in parts:
+            candidate = _child(candidate, part) if candidate is not None else None
+        candidates.append(candidate)
+
+    for candidate in candidates:
+        if candidate is not None and candidate.is_dir() and all(
+            _child(candidate, sub) is not None for sub in ('STREAM', 'CLIPINF', 'PLAYLIST')
+        ):
+            return candidate
+    return None
+
+
+def get_stream_dir(bdmv_dir: Path) -> Optional[Path]:
+    """Get the folder holding the MTS clips of an AVCHD tree.
+
+    Args:
+        bdmv_dir: BDMV folder (see find_bdmv_dir).
+
+    Returns:
+        Path to the STREAM folder, or None if it is missing.
+    """
+    return _child(Path(bdmv_dir), 'STREAM')
+
+
+def _list_files(directory: Optional[Path], suffix: str) -> Dict[str, Path]:
+    """Map upper-case file stems to paths for files with a suffix (any case)."""
+    files = {}
+    if directory is None:
+        return files
+    try:
+        for item in sorted(directory.iterdir()):
+            if item.suffix.upper() == suffix and item.is_file():
+                files[item.stem.upper()] = item
+    except OSError:
+        pass
+    return files
+
+
+def _dates_agree(clips: List[AvchdClip]) -> bool:
+    """Cross-check playlist recording times against DPM timestamps.
+
+    Checks the first and the last clip with a recording time.
+    """
+    dated = [clip for clip in clips if clip.recorded is not None]
+    for clip in (dated[:1] + dated[-1:] if len(dated) > 1 else dated):
+        dpm = extract_avchd_timestamp(clip.path)
+        if dpm is not None and abs((dpm - clip.recorded).total_seconds()) > CROSS_CHECK_TOLERANCE:
+            return False
+    return True
+
+
+def read_avchd_index(bdmv_dir: Path) -> List[AvchdClip]:
+    """Read the clips of an AVCHD tree from its navigation files.
+
+    Args:
+        bdmv_dir: BDMV folder (see find_bdmv_dir).
+
+    Returns:
+        AvchdClip objects in playback order, for clips whose MTS file
+        exists. Clips with an unreadable .CPI file are skipped.
+    """
+    bdmv_dir = Path(bdmv_dir)
+    streams = _list_files(get_stream_dir(bdmv_dir), '.MTS')
+    clip_infos = _list_files(_child(bdmv_dir, 'CLIPINF'), '.CPI')
+    playlists = _list_files(_child(bdmv_dir, 'PLAYLIST'), '.MPL')
+
+    durations: Dict[str, float] = {}
+    for name, path in clip_infos.items():
+        try:
+            durations[name] = parse_clip_info(path.read_bytes())
+        except (OSError, ValueError):
+            pass
+
+    clips: Dict[str, AvchdClip] = {}
+    recording = -1
+    for playlist in playlists.values():
+        try:
+            items, marks, dates = parse_playlist(playlist.read_bytes())
+        except (OSError, ValueError):
+            continue
+
+        # Dates belong to the entry marks; extra leading dates describe
+        # the playlist itself
+        entries = [mark for mark in marks if mark.mark_type == ENTRY_MARK]
+        start_times: Dict[int, datetime] = {}
+        if entries and len(dates) >= len(entries):
+            for mark, date in zip(entries, dates[-len(entries):]):
+                if 0 <= mark.play_item < len(items):
+                    item = items[mark.play_item]
+                    offset = (mark.time - item.in_time) / CLOCK_RATE
+                    start_times.setdefault(mark.play_item, date - timedelta(seconds=offset))
+
+        previous = None
+        for index, item in enumerate(items):
+            name = item.clip_name.upper()
+            duration = durations.get(name, (item.out_time - item.in_time) / CLOCK_RATE)
+            continues = previous is not None and item.connection_condition in SEAMLESS_CONNECTIONS
+            recorded = start_times.get(index)
+            if recorded is None and continues and previous.recorded is not None:
+                recorded = previous.recorded + timedelta(seconds=previous.duration)
+            if not continues:
+                recording += 1
+            clip = AvchdClip(name, streams.get(name), duration, recorded, recording)
+            previous = clip
+            if name in streams and name not in clips:
+                clips[name] = clip
+
+    ordered = list(clips.values())
+    if not _dates_agree(ordered):
+        for clip in ordered:
+            clip.recorded = None
+    return ordered
+
+
+_index_cache: Dict[Tuple[Path, int], Dict[Path, AvchdClip]] = {}
+_index_lock = threading.Lock()
+
+
+def get_avchd_index(bdmv_dir: Path) -> Dict[Path, AvchdClip]:
+    """Get the clips of an AVCHD tree by MTS path, cached.
+
+    The cache is refreshed when the PLAYLIST folder changes.
+
+    Args:
+        bdmv_dir: BDMV folder (see find_bdmv_dir).
+
+    Returns:
+        Dictionary mapping each resolved MTS path to its AvchdClip, in
+        playback order.
+    """
+    bdmv_dir = Path(bdmv_dir).resolve()
+    try:
+        stamp = _child(bdmv_dir, 'PLAYLIST').stat().st_mtime_ns
+    except (AttributeError, OSError):
+        return {}
+    key = (bdmv_dir, stamp)
+    with _index_lock:
+        if key not in _index_cache:
+            _index_cache[key] = {
+                clip.path.resolve(): clip for clip in read_avchd_index(bdmv_dir)
+            }
+        return _index_cache[key]
+
+
+def lookup_clip(input_file) -> Optional[AvchdClip]:
+    """Get the navigation-file metadata of a clip inside an AVCHD tree.
+
+    Args:
+        input_file: Path to an MTS file.
+
+    Returns:
+        AvchdClip, or None if the file is not in an AVCHD tree or the tree
+        does not list it.
+    """
+    path = Path(input_file)
+    if path.parent.name.upper() != 'STREAM':
+        return None
+    bdmv_dir = find_bdmv_dir(path.parent)
+    if bdmv_dir is None:
+        return None
+    return get_avchd_index(bdmv_dir).get(path.resolve())
+
+
+def main():
+    """Print the clips of an AVCHD tree with their metadata."""
+    if len(sys.argv) != 2:
+        print("Usage: python avchd_index.py <card, AVCHD or BDMV folder>")
+        sys.exit(1)
+
+    bdmv_dir = find_bdmv_dir(Path(sys.argv[1]))
+    if bdmv_dir is None:
+        print(f"No AVCHD tree found in {sys.argv[1]}")
+        sys.exit(1)
+
+    for clip in read_avchd_index(bdmv_dir):
+        recorded = clip.recorded.strftime('%Y-%m-%d %H:%M:%S') if clip.recorded else 'unknown'
+        print(f"  {clip.path.name:<12} recording {clip.recording + 1:>3}  "
+              f"{clip.duration:>9.2f}s  {recorded}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,16 +3,44 @@
 Batch converter module for processing multiple MTS files.
 
 Provides BatchConverter class for batch conversion operations,
-BatchResult dataclass for tracking conversion results, and
-BatchProgress callback type for progress updates.
+TwoTierBatchConverter for proxy-first scheduling, BatchResult dataclass
+for tracking conversion results, and BatchProgress callback type for
+progress updates.
 """
 
+import re
+import threading
+import time
+from collections import deque
 from dataclasses import dataclass
 from glob import glob
 from pathlib import Path
-from typing import Callable, List, Optional
-
-from mts_converter import convert_video, DEFAULT_POSITION, DEFAULT_RESOLUTION, get_unique_output_path
+from typing import Callable, Dict, List, Optional
+
+from avchd_index import find_bdmv_dir, get_avchd_index, get_stream_dir
+from batch_plan import ThroughputModel
+from conversion_cache import cache_key, ConversionCache, link_or_copy
+from footage_catalog import FootageCatalog, record_results
+from input_prefetch import DEFAULT_PREFETCH_BUDGET_GB, InputPrefetcher
+from mp4_verify import VerificationResult, verify_outputs
+from resource_governor import DispatchThrottle
+from ts_integrity import IntegrityReport, STATUS_CORRUPT, check_files, get_report
+from mts_converter import (
+    build_extra_outputs,
+    convert_video,
+    DEFAULT_AUDIO_CODEC,
+    DEFAULT_OUTPUT_FORMAT,
+    DEFAULT_OVERLAY_ENGINE,
+    DEFAULT_POSITION,
+    DEFAULT_RESOLUTION,
+    DEFAULT_SCALER,
+    DEFAULT_TIMESTAMP_MODE,
+    get_range_length,
+    get_unique_output_path,
+    OUTPUT_EXTENSIONS
+)
+from scratch_staging import DEFAULT_SCRATCH_LIMIT_GB, ScratchStager
+from space_planner import SpacePlanner
 
 
 # Type alias for progress callback
@@ -29,11 +57,19 @@ class BatchResult:
         output_file: Path to the output MP4 file, or None if conversion failed.
         success: Whether the conversion succeeded.
         error: Error message if conversion failed, None otherwise.
+        tier: 'proxy' or 'archive' in two-tier batches, None otherwise.
+        cached: True if the output was reused instead of encoded.
+        verification: Output check result when verification is enabled.
+        preflight: Input check result when pre-flight checks are enabled.
     """
     input_file: Path
     output_file: Optional[Path]
     success: bool
     error: Optional[str]
+    tier: Optional[str] = None
+    cached: bool = False
+    verification: Optional[VerificationResult] = None
+    preflight: Optional[IntegrityReport] = None
 
 
 class BatchConverter:
@@ -44,6 +80,23 @@ class BatchConverter:
         output_dir: Optional directory for output files.
         position: Timestamp overlay position.
         resolution: Output resolution preset.
+        timestamp_mode: 'burn-in' or 'subtitle' timestamp mode.
+        audio_codec: Audio handling ('aac' or 'copy').
+        overlay_engine: Burn-in renderer ('drawtext' or 'sprite').
+        scaler: Scaler algorithm for resolution presets.
+        deinterlace: Whether to deinterlace before scaling.
+        filter_threads: Thread count for FFmpeg filtering, or None.
+        font_size: Font size for the timestamp text.
+        clock_index: Whether to follow camera clock restarts within files.
+        verify: Whether to check every output's MP4 structure after the batch.
+        cache: ConversionCache used to skip repeated conversions, or None.
+        scratch_dir: Local directory outputs are encoded to before being
+                     moved to their destination, or None.
+        scratch_limit_gb: Staged gigabytes allowed to wait for transfer.
+        prefetch: Whether upcoming inputs are copied to local disk ahead of use.
+        prefetch_budget_gb: Gigabytes of prefetched copies held at once.
+        space_planner: SpacePlanner checking free space before each job, or None.
+        throughput_model: ThroughputModel learning conversion speed, or None.
         results: List of BatchResult objects from conversions.
     """
 
@@ -52,7 +105,36 @@ class BatchConverter:
         progress_callback: Optional[BatchProgress] = None,
         output_dir: Optional[Path] = None,
         position: Optional[str] = None,
-        resolution: Optional[str] = None
+        resolution: Optional[str] = None,
+        timestamp_mode: Optional[str] = None,
+        audio_codec: Optional[str] = None,
+        overlay_engine: Optional[str] = None,
+        scaler: Optional[str] = None,
+        deinterlace: bool = False,
+        filter_threads: Optional[int] = None,
+        font_size: int = 32,
+        clock_index: bool = False,
+        verify: bool = False,
+        cache: Optional[ConversionCache] = None,
+        scratch_dir: Optional[Path] = None,
+        scratch_limit_gb: Optional[float] = None,
+        prefetch: bool = False,
+        prefetch_budget_gb: Optional[float] = None,
+        space_planner: Optional[SpacePlanner] = None,
+        throughput_model: Optional[ThroughputModel] = None,
+        extra_outputs: Optional[List[str]] = None,
+        output_format: Optional[str] = None,
+        hls_ladder: Optional[List[str]] = None,
+        hls_segment_type: Optional[str] = None,
+        checkpoint: bool = False,
+        checkpoint_segment_seconds: Optional[float] = None,
+        governor: Optional[str] = None,
+        throttle: Optional[DispatchThrottle] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        preflight: Optional[str] = None,
+        catalog: Optional[FootageCatalog] = None,
+        chapters: bool = False
     ):
         """Initialize BatchConverter.
 
@@ -63,13 +145,163 @@ class BatchConverter:
                         output files are saved next to input files.
             position: Timestamp position (default: DEFAULT_POSITION).
             resolution: Output resolution preset (default: DEFAULT_RESOLUTION).
+            timestamp_mode: Timestamp mode (default: DEFAULT_TIMESTAMP_MODE).
+            audio_codec: Audio handling (default: DEFAULT_AUDIO_CODEC).
+            overlay_engine: Burn-in renderer (default: DEFAULT_OVERLAY_ENGINE).
+            scaler: Scaler algorithm (default: DEFAULT_SCALER).
+            deinterlace: Deinterlace before scaling (default: False).
+            filter_threads: FFmpeg filter thread count (default: FFmpeg decides).
+            font_size: Font size for the timestamp text (default: 32).
+            clock_index: Scan whole files so the timestamp follows camera
+                         clock restarts (default: False).
+            verify: Check each output's MP4 boxes (moov, tracks, duration
+                    against the source) once the batch has run. Outputs
+                    that fail are reported as failed (default: False).
+            cache: Optional ConversionCache. When given, clips converted
+                   before with the same settings, and duplicate clips
+                   within a batch, are not encoded again. Ignored when
+                   extra_outputs are requested.
+            scratch_dir: Optional local directory (e.g. an SSD) to encode
+                         to. Finished files are moved to their destination
+                         on a background thread while the next file
+                         encodes (default: encode in place).
+            scratch_limit_gb: Staged gigabytes allowed to wait for transfer
+                              before new encodes are held back (default:
+                              DEFAULT_SCRATCH_LIMIT_GB).
+            prefetch: Copy the next inputs to local disk (scratch_dir, or
+                      the system temp directory) with large sequential
+                      reads while the current file encodes, for sources
+                      on card readers or network shares (default: False).
+            prefetch_budget_gb: Gigabytes of prefetched copies held at once
+                                (default: DEFAULT_PREFETCH_BUDGET_GB).
+            space_planner: Optional SpacePlanner. When given, each job's
+                           output size is predicted before it starts;
+                           jobs that do not fit the output (and scratch)
+                           volume are held or moved to the end of the
+                           batch, and fail without encoding if they
+                           still do not fit.
+            throughput_model: Optional ThroughputModel. When given, every
+                              successful conversion is timed and its
+                              speed remembered for batch time estimates.
+            extra_outputs: Optional EXTRA_OUTPUT_PRESETS names written from
+                           the same decode as each output (proxy, original,
+                           thumbnails, storyboard), next to the output.
+            output_format: 'mp4' (default) or 'hls'. HLS outputs are a
+                           playlist plus segments, so they are encoded in
+                           place (no scratch staging), are not cached and
+                           are not verified.
+            hls_ladder: Optional resolution presets for HLS renditions.
+            hls_segment_type: HLS segment type (default: fmp4).
+            checkpoint: Encode burned-in MP4s in segments kept next to the
+                        output, so a batch that is interrupted or cancelled
+                        resumes each file where it stopped (default: False).
+            checkpoint_segment_seconds: Segment length for checkpoint
+                                        (default: DEFAULT_SEGMENT_SECONDS).
+            governor: Optional GOVERNORS name. FFmpeg then runs at lower
+                      CPU and disk priority with capped threads and memory
+                      (default: no governor).
+            throttle: Optional DispatchThrottle. When given, each job waits
+                      to start while the machine's load or memory use is
+                      too high.
+            start: Optional range start applied to every file: a media
+                   offset or '@' and a recording time (see time_range).
+            end: Optional range end, in the same forms.
+            preflight: Optional PREFLIGHT_MODES entry. All files of a batch
+                       are checked in parallel before the first encode and
+                       corrupt ones fail without being converted; 'repair'
+                       converts damaged files from a repaired copy.
+            catalog: Optional FootageCatalog. Each converted file is
+                     recorded with its output when the batch finishes.
+            chapters: If True, MP4 outputs get a chapter per minute of
+                      recording time and a timecode track.
         """
         self.progress_callback = progress_callback
         self.output_dir = output_dir
         self.position = position if position is not None else DEFAULT_POSITION
         self.resolution = resolution if resolution is not None else DEFAULT_RESOLUTION
+        self.timestamp_mode = timestamp_mode if timestamp_mode is not None else DEFAULT_TIMESTAMP_MODE
+        self.audio_codec = audio_codec if audio_codec is not None else DEFAULT_AUDIO_CODEC
+        self.overlay_engine = overlay_engine if overlay_engine is not None else DEFAULT_OVERLAY_ENGINE
+        self.scaler = scaler if scaler is not None else DEFAULT_SCALER
+        self.deinterlace = deinterlace
+        self.filter_threads = filter_threads
+        self.font_size = font_size
+        self.clock_index = clock_index
+        self.verify = verify
+        self.cache = cache
+        self.scratch_dir = scratch_dir
+        self.scratch_limit_gb = (
+            scratch_limit_gb if scratch_limit_gb is not None else DEFAULT_SCRATCH_LIMIT_GB
+        )
+        self._stager: Optional[ScratchStager] = None
+        self.prefetch = prefetch
+        self.prefetch_budget_gb = (
+            prefetch_budget_gb if prefetch_budget_gb is not None else DEFAULT_PREFETCH_BUDGET_GB
+        )
+        self._prefetcher: Optional[InputPrefetcher] = None
+        self.space_planner = space_planner
+        self._reservations: Dict[Path, list] = {}
+        self.throughput_model = throughput_model
+        self.extra_outputs = list(extra_outputs or [])
+        self.output_format = output_format if output_format is not None else DEFAULT_OUTPUT_FORMAT
+        self.hls_ladder = hls_ladder
+        self.hls_segment_type = hls_segment_type
+        self.checkpoint = checkpoint
+        self.checkpoint_segment_seconds = checkpoint_segment_seconds
+        self.governor = governor
+        self.throttle = throttle
+        self.start = start
+        self.end = end
+        self.preflight = preflight
+        self._preflight_reports: Dict[Path, IntegrityReport] = {}
+        self.catalog = catalog
+        self.chapters = chapters
         self.results: List[BatchResult] = []
 
+    def _conversion_options(self) -> dict:
+        """Get the keyword arguments passed to convert_video for each file.
+
+        Returns:
+            Dictionary of convert_video keyword arguments.
+        """
+        options = {
+            'font_size': self.font_size,
+            'position': self.position,
+            'resolution': self.resolution,
+            'timestamp_mode': self.timestamp_mode,
+            'audio_codec': self.audio_codec,
+            'overlay_engine': self.overlay_engine,
+            'scaler': self.scaler,
+            'deinterlace': self.deinterlace,
+            'filter_threads': self.filter_threads,
+            'clock_index': self.clock_index,
+        }
+        if self.extra_outputs:
+            options['extra_outputs'] = list(self.extra_outputs)
+        if self.output_format != DEFAULT_OUTPUT_FORMAT:
+            options['output_format'] = self.output_format
+            options['hls_ladder'] = self.hls_ladder
+            options['hls_segment_type'] = self.hls_segment_type
+        if self.checkpoint:
+            options['checkpoint'] = True
+            options['checkpoint_segment_seconds'] = self.checkpoint_segment_seconds
+        if self.governor:
+            options['governor'] = self.governor
+        if self.start is not None:
+            options['start'] = self.start
+        if self.end is not None:
+            options['end'] = self.end
+        if self.preflight:
+            options['preflight'] = self.preflight
+        if self.chapters:
+            options['chapters'] = True
+        return options
+
+    @property
+    def _single_file_output(self) -> bool:
+        """Whether each conversion writes one output file (not HLS segments)."""
+        return self.output_format == DEFAULT_OUTPUT_FORMAT
+
     def _get_output_path(self, input_file: Path) -> Path:
         """Determine the output path for a given input file.
 
@@ -79,7 +311,147 @@ class BatchConverter:
         Returns:
             Path for the output MP4 file, handling conflicts if needed.
         """
-        return get_unique_output_path(input_file, self.output_dir)
+        return get_unique_output_path(
+            input_file, self.output_dir, extension=OUTPUT_EXTENSIONS[self.output_format]
+        )
+
+    def _convert_file(self, input_file: Path, output_file: Path, **overrides) -> BatchResult:
+        """Convert one file and wrap the outcome in a BatchResult.
+
+        Args:
+            input_file: Path to the input MTS file.
+            output_file: Path for the output MP4 file.
+            **overrides: convert_video keyword arguments overriding or
+                         extending the batch-wide conversion options.
+
+        Returns:
+            BatchResult for the conversion. Exceptions are captured as
+            failed results.
+        """
+        report = self._preflight_reports.get(input_file)
+        if report is None and self.preflight:
+            report = get_report(input_file)
+        if report is not None and report.status == STATUS_CORRUPT:
+            return BatchResult(
+                input_file=input_file,
+                output_file=None,
+                success=False,
+                error="Pre-flight check failed: " + "; ".join(report.problems),
+                preflight=report
+            )
+        if self.throttle is not None:
+            self.throttle.wait(overrides.get('cancel_event'))
+        options = self._conversion_options()
+        options.update(overrides)
+        stager = self._stager
+        target = stager.stage(output_file) if stager is not None else output_file
+        prefetcher = self._prefetcher
+        source = prefetcher.acquire(input_file) if prefetcher is not None else input_file
+
+        try:
+            run_options = dict(options)
+            if options.get('extra_outputs'):
+                # Extras are named after the final output, not the staged file
+                run_options['extra_outputs'] = build_extra_outputs(
+                    output_file, options['extra_outputs'],
+                    font_size=options['font_size'], position=options['position']
+                )
+            if source != input_file:
+                run_options['source_file'] = str(input_file)
+            started = time.monotonic()
+            success = convert_video(
+                str(source),
+                str(target),
+                **run_options
+            )
+
+            if success and self.throughput_model is not None:
+                self.throughput_model.observe(input_file, options, time.monotonic() - started)
+
+            if success and self.space_planner is not None and self._single_file_output:
+                self.space_planner.observe(input_file, options, target)
+            if success and stager is not None:
+                stager.submit(target, output_file)
+            elif stager is not None:
+                stager.discard(target, output_file)
+
+            if success:
+                return BatchResult(
+                    input_file=input_file,
+                    output_file=output_file,
+                    success=True,
+                    error=None,
+                    preflight=report
+                )
+            return BatchResult(
+                input_file=input_file,
+                output_file=None,
+                success=False,
+                error="Conversion failed",
+                preflight=report
+            )
+        except Exception as e:
+            if stager is not None:
+                stager.discard(target, output_file)
+            return BatchResult(
+                input_file=input_file,
+                output_file=None,
+                success=False,
+                error=str(e),
+                preflight=report
+            )
+        finally:
+            if prefetcher is not None:
+                prefetcher.release(input_file)
+            token = self._reservations.pop(output_file, None)
+            if token is not None:
+                self.space_planner.release(token)
+
+    def _reserve_space(self, input_file: Path, output_file: Path, **overrides) -> Optional[str]:
+        """Check that a job's predicted output fits, and hold space for it.
+
+        The output volume must fit the output plus staged files still
+        waiting for transfer; with scratch staging the scratch volume must
+        fit it too. If scratch space is short, pending transfers are waited
+        for before giving up. The space is held until _convert_file()
+        finishes the job.
+
+        Args:
+            input_file: Path to the input MTS file.
+            output_file: Path for the output MP4 file.
+            **overrides: convert_video keyword arguments of the job.
+
+        Returns:
+            None if the job fits (or no planner is set), otherwise a
+            message describing the shortfall.
+        """
+        planner = self.space_planner
+        if planner is None:
+            return None
+        options = self._conversion_options()
+        options.update(overrides)
+        try:
+            size = planner.estimate(input_file, options)
+        except OSError:
+            # Unreadable input: leave it to the conversion to report
+            return None
+
+        directories = [output_file.parent]
+        if self._stager is not None:
+            directories.append(self._stager.scratch_dir)
+
+        def check():
+            committed = {output_file.parent: self._stager.pending_bytes} if self._stager else None
+            return planner.check(directories, size, committed)
+
+        error = check()
+        if error and self._stager is not None and self._stager.pending_bytes:
+            # Hold the job until staged outputs have left the scratch volume
+            self._stager.finish()
+            error = check()
+        if error is None:
+            self._reservations[output_file] = planner.reserve(directories, size)
+        return error
 
     def convert_batch(self, files: List[Path]) -> List[BatchResult]:
         """Convert a batch of MTS files to MP4 format.
@@ -92,48 +464,458 @@ class BatchConverter:
         """
         self.results = []
         total = len(files)
+        self._start_staging(files)
+        self._check_inputs(files)
+
+        # Fingerprint everything up front so duplicates are known before encoding.
+        # A cached or duplicate output has no sidecars, so extras always encode.
+        use_cache = self.cache is not None and self._single_file_output and not self.extra_outputs
+        keys = self._cache_keys(files) if use_cache else {}
+        first_results: Dict[str, BatchResult] = {}
+        results: List[Optional[BatchResult]] = [None] * total
+        pending = deque(enumerate(files))
+        deferred = set()
+
+        while pending:
+            index, input_file = pending.popleft()
+            key = keys.get(input_file)
+            if key in first_results:
+                result = self._reuse_result(input_file, first_results[key])
+            else:
+                result = self._cached_result(input_file, key) if key else None
+                if result is None:
+                    output_file = self._get_output_path(input_file)
+                    space_error = self._reserve_space(input_file, output_file)
+                    if space_error and pending and index not in deferred:
+                        # Run the jobs that fit first and retry this one last
+                        deferred.add(index)
+                        pending.append((index, input_file))
+                        continue
+                    if space_error:
+                        result = BatchResult(
+                            input_file=input_file,
+                            output_file=None,
+                            success=False,
+                            error=space_error
+                        )
+                    else:
+                        result = self._convert_file(input_file, output_file)
+                    if key and result.success:
+                        self.cache.store(key, result.output_file)
+                if key:
+                    first_results[key] = result
+
+            results[index] = result
+            self.results.append(result)
+
+            if self.progress_callback:
+                self.progress_callback(len(self.results), total, input_file)
 
-        for index, input_file in enumerate(files, start=1):
-            output_file = self._get_output_path(input_file)
+        # Report in input order even if jobs were deferred
+        self.results = results
+        self._finish_batch(self.results)
+        return self.results
+
+    def _start_staging(self, schedule: List[Path]):
+        """Start the scratch stager and input prefetcher for a batch, if enabled.
 
+        Args:
+            schedule: Input files in the order they will be converted.
+        """
+        if self.scratch_dir is not None and self._stager is None and self._single_file_output:
+            self._stager = ScratchStager(self.scratch_dir, self.scratch_limit_gb)
+        if self.prefetch and self._prefetcher is None:
+            self._prefetcher = InputPrefetcher(
+                schedule, self.scratch_dir, self.prefetch_budget_gb
+            )
+
+    def _check_inputs(self, files: List[Path]):
+        """Check the packet structure of a batch's inputs in parallel, if enabled.
+
+        Runs before the first encode, so corrupt files are known before any
+        encoder time is spent. Files added later are checked when they run.
+
+        Args:
+            files: Input files of the batch.
+        """
+        if not self.preflight:
+            return
+        self._preflight_reports = dict(zip(files, check_files(files)))
+
+    def _finish_batch(self, results: List[Optional[BatchResult]]):
+        """Drop prefetched inputs, wait for staged outputs, then verify.
+
+        Results whose transfer failed are marked as failed. Outputs that
+        pass are then recorded in the catalog, if one is set.
+
+        Args:
+            results: BatchResult objects of the batch (None entries are
+                     skipped).
+        """
+        if self._prefetcher is not None:
+            self._prefetcher.close()
+            self._prefetcher = None
+        if self._stager is not None:
+            stager, self._stager = self._stager, None
+            stager.close()
+            for result in results:
+                if result is not None and result.success and result.output_file in stager.errors:
+                    result.success = False
+                    result.error = stager.errors[result.output_file]
+                    result.output_file = None
+        self._verify_results(results)
+        if self.catalog is not None:
+            record_results(self.catalog, results)
+
+    def _verify_results(self, results: List[Optional[BatchResult]]):
+        """Verify successful outputs in parallel and record the outcome.
+
+        Does nothing unless verification is enabled. Results whose output
+        fails verification are marked as failed.
+
+        Args:
+            results: BatchResult objects of the batch (None entries are
+                     skipped).
+        """
+        if not self.verify:
+            return
+        checked = [
+            r for r in results
+            if r is not None and r.success and r.output_file and r.output_file.suffix == '.mp4'
+        ]
+        ranged = self.start is not None or self.end is not None
+        verifications = verify_outputs(
+            (
+                r.output_file, r.input_file,
+                self.timestamp_mode == 'subtitle' and r.tier != 'proxy',
+                # Ranged outputs are checked against the range, not the clip
+                get_range_length(r.input_file, self.start, self.end,
+                                 clock_index=self.clock_index) if ranged else None
+            )
+            for r in checked
+        )
+        for result, verification in zip(checked, verifications):
+            result.verification = verification
+            if not verification.ok:
+                result.success = False
+                result.error = "Verification failed: " + "; ".join(verification.problems)
+
+    def _cache_keys(self, files: List[Path]) -> Dict[Path, str]:
+        """Compute cache keys for files that can be fingerprinted.
+
+        Args:
+            files: List of paths to MTS files.
+
+        Returns:
+            Dictionary mapping each readable file to its cache key.
+        """
+        options = self._conversion_options()
+        keys = {}
+        for input_file in files:
             try:
-                success = convert_video(
-                    str(input_file),
-                    str(output_file),
-                    position=self.position,
-                    resolution=self.resolution
-                )
+                keys[input_file] = cache_key(input_file, options)
+            except OSError:
+                # Unreadable files are left to fail in the conversion
+                pass
+        return keys
 
-                if success:
-                    result = BatchResult(
-                        input_file=input_file,
-                        output_file=output_file,
-                        success=True,
-                        error=None
-                    )
-                else:
-                    result = BatchResult(
-                        input_file=input_file,
-                        output_file=None,
-                        success=False,
-                        error="Conversion failed"
-                    )
-            except Exception as e:
+    def _cached_result(self, input_file: Path, key: str) -> Optional[BatchResult]:
+        """Reuse a previous output for a cache key, if one exists.
+
+        Args:
+            input_file: Path to the input MTS file.
+            key: The file's cache key.
+
+        Returns:
+            BatchResult for the reused output, or None on a cache miss.
+        """
+        cached_output = self.cache.lookup(key)
+        if cached_output is None:
+            return None
+        return self._reuse_result(
+            input_file,
+            BatchResult(input_file=input_file, output_file=cached_output, success=True, error=None)
+        )
+
+    def _reuse_result(self, input_file: Path, source: BatchResult) -> BatchResult:
+        """Give input_file the output of an identical conversion.
+
+        An output already in this file's output directory and named after
+        it (a same-named clip from another card) is shared as is;
+        otherwise it is hardlinked (or copied) to the file's own output
+        path.
+
+        Args:
+            input_file: Path to the input MTS file.
+            source: Result of the identical conversion.
+
+        Returns:
+            BatchResult for input_file.
+        """
+        if not source.success:
+            return BatchResult(
+                input_file=input_file,
+                output_file=None,
+                success=False,
+                error=f"Duplicate of {source.input_file.name}, which failed",
+                cached=True
+            )
+
+        output_dir = self.output_dir if self.output_dir is not None else input_file.parent
+        output_file = source.output_file
+        try:
+            if (output_file.parent.resolve() != Path(output_dir).resolve()
+                    or not _is_named_after(output_file, input_file)):
+                if self._stager is not None:
+                    error = self._stager.wait(source.output_file)
+                    if error:
+                        raise OSError(error)
+                output_file = self._get_output_path(input_file)
+                link_or_copy(source.output_file, output_file)
+        except OSError as e:
+            return BatchResult(
+                input_file=input_file,
+                output_file=None,
+                success=False,
+                error=str(e)
+            )
+        return BatchResult(
+            input_file=input_file,
+            output_file=output_file,
+            success=True,
+            error=None,
+            cached=True
+        )
+
+
+# Proxy settings for two-tier batches: small, fast review copies
+PROXY_RESOLUTION = '480p'
+PROXY_PRESET = 'ultrafast'
+PROXY_CRF = 28
+PROXY_SUFFIX = '_proxy'
+
+
+class TwoTierBatchConverter(BatchConverter):
+    """Produces fast review proxies for every file before archive encodes.
+
+    Every file gets two jobs: an ultrafast low-resolution proxy with the
+    timestamp overlay, and the full-quality archive encode. All pending
+    proxies run before any archive encode, and archive encodes run below
+    normal OS priority. Files added with add_files() while a batch is
+    running jump the queue: a running archive encode is interrupted, its
+    partial output deleted, and it is re-queued to run again later. Once
+    the last job has been taken the batch stops accepting files, so files
+    added while it finishes up are left to the caller.
+
+    Attributes:
+        proxy_resolution: Resolution preset for proxies.
+        proxy_preset: x264 preset for proxies.
+        proxy_crf: x264 CRF for proxies.
+    """
+
+    def __init__(
+        self,
+        *args,
+        proxy_resolution: str = PROXY_RESOLUTION,
+        proxy_preset: str = PROXY_PRESET,
+        proxy_crf: int = PROXY_CRF,
+        **kwargs
+    ):
+        """Initialize TwoTierBatchConverter.
+
+        Args:
+            *args: Positional arguments for BatchConverter.
+            proxy_resolution: Resolution preset for proxies (default: 480p).
+            proxy_preset: x264 preset for proxies (default: ultrafast).
+            proxy_crf: x264 CRF for proxies (default: 28).
+            **kwargs: Keyword arguments for BatchConverter.
+        """
+        super().__init__(*args, **kwargs)
+        self.proxy_resolution = proxy_resolution
+        self.proxy_preset = proxy_preset
+        self.proxy_crf = proxy_crf
+        self._lock = threading.Lock()
+        self._proxy_queue: deque = deque()
+        self._archive_queue: deque = deque()
+        self._interrupt = threading.Event()
+        self._running_tier: Optional[str] = None
+        self._cancelled = False
+        self._accepting = False
+        self._total = 0
+
+    def add_files(self, files: List[Path]) -> bool:
+        """Queue files for conversion, preempting a running archive encode.
+
+        Safe to call from another thread while convert_batch is running.
+
+        Args:
+            files: List of paths to MTS files to add.
+
+        Returns:
+            True if the files were queued, False if no batch is taking
+            jobs any more (the batch has run out of jobs or was cancelled).
+        """
+        with self._lock:
+            if not self._accepting:
+                return False
+            for input_file in files:
+                self._proxy_queue.append(input_file)
+                self._archive_queue.append(input_file)
+                self._total += 2
+            if files and self._running_tier == 'archive':
+                self._interrupt.set()
+            return True
+
+    def cancel(self):
+        """Stop the batch: drop queued jobs and kill the running one."""
+        with self._lock:
+            self._cancelled = True
+            self._accepting = False
+            self._proxy_queue.clear()
+            self._archive_queue.clear()
+            self._interrupt.set()
+
+    def _next_job(self):
+        """Pop the next job, proxies first.
+
+        Returns:
+            Tuple of (tier, input_file), or None when both queues are empty;
+            add_files() then no longer accepts files.
+        """
+        with self._lock:
+            self._interrupt.clear()
+            if self._proxy_queue:
+                self._running_tier = 'proxy'
+                return 'proxy', self._proxy_queue.popleft()
+            if self._archive_queue:
+                self._running_tier = 'archive'
+                return 'archive', self._archive_queue.popleft()
+            self._running_tier = None
+            self._accepting = False
+            return None
+
+    def convert_batch(self, files: List[Path]) -> List[BatchResult]:
+        """Convert a batch in two tiers: all proxies, then archive encodes.
+
+        Args:
+            files: List of paths to MTS files to convert.
+
+        Returns:
+            List of BatchResult objects with tier set, in completion order.
+            Preempted archive encodes are re-run and reported once.
+        """
+        self.results = []
+        with self._lock:
+            self._cancelled = False
+            self._accepting = True
+            self._total = 0
+        # Proxies run first, then archive encodes, in file order
+        self._start_staging(files + files)
+        self._check_inputs(files)
+        self.add_files(files)
+
+        while True:
+            job = self._next_job()
+            if job is None:
+                break
+            tier, input_file = job
+
+            if tier == 'proxy':
+                output_file = get_unique_output_path(input_file, self.output_dir, PROXY_SUFFIX)
+                overrides = {
+                    'resolution': self.proxy_resolution,
+                    'timestamp_mode': 'burn-in',
+                    'preset': self.proxy_preset,
+                    'crf': self.proxy_crf,
+                    'extra_outputs': None,
+                    'output_format': DEFAULT_OUTPUT_FORMAT,
+                }
+            else:
+                output_file = self._get_output_path(input_file)
+                overrides = {'low_priority': True}
+
+            space_error = self._reserve_space(input_file, output_file, **overrides)
+            if space_error:
                 result = BatchResult(
                     input_file=input_file,
                     output_file=None,
                     success=False,
-                    error=str(e)
+                    error=space_error
+                )
+            else:
+                result = self._convert_file(
+                    input_file, output_file,
+                    cancel_event=self._interrupt,
+                    **overrides
                 )
 
+            if not result.success and self._interrupt.is_set():
+                _delete_partial(output_file)
+                with self._lock:
+                    if self._cancelled:
+                        break
+                    if tier == 'archive':
+                        # Preempted by newly added files: run it again later
+                        self._archive_queue.appendleft(input_file)
+                        continue
+
+            result.tier = tier
             self.results.append(result)
 
             if self.progress_callback:
-                self.progress_callback(index, total, input_file)
+                self.progress_callback(len(self.results), self._total, input_file)
 
+        with self._lock:
+            self._running_tier = None
+            self._accepting = False
+        self._finish_batch(self.results)
         return self.results
 
 
+def _is_named_after(output_file: Path, input_file: Path) -> bool:
+    """Check whether an output carries an input's name.
+
+    Args:
+        output_file: Path of the output.
+        input_file: Path of the input.
+
+    Returns:
+        True if the output is named like get_unique_output_path() names
+        the input's outputs ('clip.mp4' or 'clip (1).mp4').
+    """
+    pattern = re.escape(input_file.stem) + r'( \(\d+\))?'
+    return re.fullmatch(pattern, output_file.stem) is not None
+
+
+def remove_placeholder(output_file: Path):
+    """Delete an empty reserved output file left by a failed conversion.
+
+    Parallel schedulers touch an output path to reserve its name before
+    the conversion starts; a failed job leaves it empty.
+
+    Args:
+        output_file: Reserved output path.
+    """
+    try:
+        if output_file.exists() and output_file.stat().st_size == 0:
+            output_file.unlink()
+    except OSError:
+        pass
+
+
+def _delete_partial(output_file: Path):
+    """Delete a partially written output file, ignoring errors.
+
+    Args:
+        output_file: Path of the interrupted output.
+    """
+    try:
+        if output_file.exists():
+            output_file.unlink()
+    except OSError:
+        pass
+
+
 def discover_files(paths: List[str]) -> List[Path]:
     """Discover MTS files from a list of paths, directories, or glob patterns.
 
@@ -143,8 +925,11 @@ def discover_files(paths: List[str]) -> List[Path]:
     Returns:
         List of Path objects pointing to existing MTS files.
         Files are deduplicated and only include .mts/.MTS files.
+        A directory holding an AVCHD tree (card root, AVCHD, BDMV or
+        STREAM folder) yields its clips in playlist order.
     """
-    discovered: set[Path] = set()
+    # Dictionary keys keep discovery order while deduplicating
+    discovered: Dict[Path, None] = {}
 
     for path_str in paths:
         path = Path(path_str)
@@ -152,18 +937,25 @@ def discover_files(paths: List[str]) -> List[Path]:
         if path.is_file():
             # Direct file path
             if _is_mts_file(path):
-                discovered.add(path.resolve())
+                discovered[path.resolve()] = None
         elif path.is_dir():
+            bdmv_dir = find_bdmv_dir(path)
+            if bdmv_dir is not None:
+                # AVCHD card: playback order from the playlists, then any
+                # clips the playlists do not list
+                for clip_path in get_avchd_index(bdmv_dir):
+                    discovered[clip_path] = None
+                path = get_stream_dir(bdmv_dir)
             # Directory - find all MTS files within
-            for item in path.iterdir():
+            for item in sorted(path.iterdir()):
                 if item.is_file() and _is_mts_file(item):
-                    discovered.add(item.resolve())
+                    discovered[item.resolve()] = None
         else:
             # Try as glob pattern
             for match in glob(path_str):
                 match_path = Path(match)
                 if match_path.is_file() and _is_mts_file(match_path):
-                    discovered.add(match_path.resolve())
+                    discovered[match_path.resolve()] = None
 
     return list(discovered)
 
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Batch time estimates learned from earlier conversions.
+
+ThroughputModel remembers, per host and conversion profile, how fast
+conversions ran (in multiples of realtime). plan_batch() combines that
+with each clip's duration into per-file and total time estimates, and
+EtaTracker turns the plan into a live ETA that is corrected against the
+actual pace as files finish.
+"""
+
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from ffmpeg_utils import get_data_dir, get_host_key
+from mts_converter import (
+    DEFAULT_OVERLAY_ENGINE,
+    DEFAULT_PRESET,
+    DEFAULT_RESOLUTION,
+    DEFAULT_TIMESTAMP_MODE,
+    get_range_length
+)
+from space_planner import estimate_source_duration
+
+
+# File (inside the data directory) holding observed conversion speeds
+THROUGHPUT_FILE = 'throughput.json'
+
+# Burn-in speed (x realtime) assumed for a profile with no history, by
+# resolution preset
+DEFAULT_SPEEDS = {
+    'original': 1.0,
+    '1080p': 1.0,
+    '720p': 2.0,
+    '480p': 4.0,
+}
+
+# Speed assumed for subtitle mode, which copies the video stream
+SUBTITLE_SPEED = 40.0
+
+# Weight of a new observation in the speed history (moving average)
+HISTORY_WEIGHT = 0.3
+
+# Conversions shorter than this (seconds) are not timed reliably enough
+# to learn from
+MIN_OBSERVED_SECONDS = 1.0
+
+
+def throughput_profile(options: Dict) -> str:
+    """Get the history key for a set of convert_video options.
+
+    Args:
+        options: convert_video keyword arguments.
+
+    Returns:
+        String combining the settings that drive conversion speed.
+    """
+    return "|".join([
+        options.get('timestamp_mode') or DEFAULT_TIMESTAMP_MODE,
+        options.get('resolution') or DEFAULT_RESOLUTION,
+        options.get('overlay_engine') or DEFAULT_OVERLAY_ENGINE,
+        options.get('preset') or DEFAULT_PRESET,
+        'deint' if options.get('deinterlace') else 'prog',
+    ])
+
+
+def format_duration(seconds: float) -> str:
+    """Format a duration as H:MM:SS.
+
+    Args:
+        seconds: Duration in seconds.
+
+    Returns:
+        Formatted string, e.g. '1:02:03'.
+    """
+    seconds = int(round(max(0.0, seconds)))
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+class ThroughputModel:
+    """Remembers conversion speed per host and profile.
+
+    Attributes:
+        path: Path to the JSON file backing the model.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        """Initialize ThroughputModel.
+
+        Args:
+            path: Optional JSON file path. Defaults to THROUGHPUT_FILE in
+                  the per-user data directory.
+        """
+        self.path = Path(path) if path else Path(get_data_dir()) / THROUGHPUT_FILE
+        self._durations: Dict[Path, float] = {}
+
+    def _load(self) -> Dict:
+        """Load the whole model, tolerating a missing or corrupt file."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, profile: str) -> Optional[float]:
+        """Get the learned speed for a profile on this host.
+
+        Args:
+            profile: Key from throughput_profile().
+
+        Returns:
+            Speed in multiples of realtime, or None if nothing has been
+            observed yet.
+        """
+        entry = self._load().get(get_host_key(), {}).get(profile)
+        return entry['speed'] if entry else None
+
+    def speed(self, options: Dict) -> float:
+        """Get the expected speed for a set of options.
+
+        Args:
+            options: convert_video keyword arguments.
+
+        Returns:
+            Learned speed, or the default for the timestamp mode and
+            resolution if none has been learned.
+        """
+        learned = self.get(throughput_profile(options))
+        if learned is not None:
+            return learned
+        if (options.get('timestamp_mode') or DEFAULT_TIMESTAMP_MODE) == 'subtitle':
+            return SUBTITLE_SPEED
+        return DEFAULT_SPEEDS.get(options.get('resolution') or DEFAULT_RESOLUTION, 1.0)
+
+    def duration(self, input_file: Path) -> Optional[float]:
+        """Get a clip's duration, cached.
+
+        Args:
+            input_file: Path to the MTS file.
+
+        Returns:
+            Duration in seconds, or None if the file cannot be read.
+        """
+        input_file = Path(input_file)
+        if input_file not in self._durations:
+            try:
+                self._durations[input_file] = estimate_source_duration(input_file)
+            except OSError:
+                return None
+        return self._durations[input_file]
+
+    def converted_duration(self, input_file: Path, options: Dict) -> Optional[float]:
+        """Get how many seconds of a clip a conversion encodes.
+
+        Args:
+            input_file: Path to the MTS file.
+            options: convert_video keyword arguments; a start or end
+                     limits the conversion to that range.
+
+        Returns:
+            Seconds of video, or None if unknown.
+        """
+        duration = self.duration(input_file)
+        if options.get('start') is None and options.get('end') is None:
+            return duration
+        return get_range_length(
+            input_file, options.get('start'), options.get('end'), duration or 0.0,
+            clock_index=options.get('clock_index', False)
+        )
+
+    def record(self, profile: str, speed: float):
+        """Fold an observed speed into the profile's average on this host.
+
+        Args:
+            profile: Key from throughput_profile().
+            speed: Observed speed in multiples of realtime.
+        """
+        data = self._load()
+        host = data.setdefault(get_host_key(), {})
+        entry = host.get(profile)
+        if entry:
+            # Early samples count fully until the average has settled
+            weight = max(HISTORY_WEIGHT, 1.0 / (entry['samples'] + 1))
+            speed = entry['speed'] * (1 - weight) + speed * weight
+            samples = entry['samples'] + 1
+        else:
+            samples = 1
+        host[profile] = {'speed': round(speed, 3), 'samples': samples}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+    def observe(self, input_file: Path, options: Dict, elapsed: float):
+        """Learn from a finished conversion.
+
+        Args:
+            input_file: Path to the MTS file.
+            options: convert_video keyword arguments used.
+            elapsed: Wall-clock seconds the conversion took.
+        """
+        duration = self.converted_duration(input_file, options)
+        if duration and elapsed >= MIN_OBSERVED_SECONDS:
+            self.record(throughput_profile(options), duration / elapsed)
+
+
+@dataclass
+class FilePlan:
+    """Time estimate for one file of a batch.
+
+    Attributes:
+        input_file: Path to the MTS file.
+        duration: Seconds of video to convert: the clip, or its range (0
+                  if unreadable).
+        speed: Expected conversion speed (x realtime).
+        learned: True if speed comes from history rather than a default.
+        seconds: Expected conversion time in seconds.
+    """
+    input_file: Path
+    duration: float
+    speed: float
+    learned: bool
+    seconds: float
+
+
+def plan_batch(files: List[Path], options: Dict, model: ThroughputModel) -> List[FilePlan]:
+    """Estimate the conversion time of every file in a batch.
+
+    Args:
+        files: MTS files in batch order.
+        options: convert_video keyword arguments of the batch.
+        model: ThroughputModel supplying the expected speed.
+
+    Returns:
+        List of FilePlan objects, one per file.
+    """
+    speed = model.speed(options)
+    learned = model.get(throughput_profile(options)) is not None
+    plans = []
+    for input_file in files:
+        duration = model.converted_duration(input_file, options) or 0.0
+        plans.append(FilePlan(Path(input_file), duration, speed, learned, duration / speed))
+    return plans
+
+
+class EtaTracker:
+    """Live estimate of the time left in a batch.
+
+    The plan's estimates are scaled by how long the finished files actually
+    took compared with their estimates, so the ETA corrects itself as the
+    batch runs. Between completions the ETA counts down.
+    """
+
+    def __init__(self, plans: List[FilePlan]):
+        """Initialize EtaTracker and start its clock.
+
+        Args:
+            plans: FilePlan objects from plan_batch().
+        """
+        self._predicted = {plan.input_file: plan.seconds for plan in plans}
+        self._done: set = set()
+        self._start = time.monotonic()
+        self._estimate = sum(self._predicted.values())
+        self._estimated_at = self._start
+
+    def file_done(self, input_file: Path):
+        """Record that a file has finished and correct the estimate.
+
+        Args:
+            input_file: File that finished (successfully or not).
+        """
+        self._done.add(Path(input_file))
+        now = time.monotonic()
+        done_predicted = sum(s for f, s in self._predicted.items() if f in self._done)
+        left_predicted = sum(s for f, s in self._predicted.items() if f not in self._done)
+        pace = (now - self._start) / done_predicted if done_predicted > 0 else 1.0
+        self._estimate = left_predicted * pace
+        self._estimated_at = now
+
+    def remaining(self) -> float:
+        """Get the estimated seconds left in the batch.
+
+        Returns:
+            Seconds left, counting down from the last correction.
+        """
+        return max(0.0, self._estimate - (time.monotonic() - self._estimated_at))
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the MTS converter FFmpeg pipelines.
+
+Generates synthetic AVCHD-like source clips with FFmpeg and measures the
+encoding throughput of alternative timestamp overlay strategies. Encoded
+output is discarded (null muxer) so the numbers reflect decode, filter and
+encode cost only.
+
+Usage:
+    python benchmark.py overlay [--seconds 20] [--sizes 1080p 720p]
+    python benchmark.py filters [--seconds 20] [--sizes 1080p 720p 480p]
+    python benchmark.py startup
+"""
+
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from ffmpeg_utils import get_ffmpeg_path, check_ffmpeg_available, get_subprocess_flags
+from font_resolver import get_font_file, get_fontfile_option
+from mts_converter import (
+    RESOLUTION_PRESETS,
+    OVERLAY_ENGINES,
+    build_burn_in_command,
+    build_drawtext_filter,
+    build_video_filter
+)
+
+
+# Source frame rate for synthetic clips (AVCHD 1080i50 / 720p50)
+SOURCE_FPS = 50
+
+# Fixed recording time used for the overlay in every benchmark run
+BENCHMARK_FILMING_TIME = datetime(2024, 12, 15, 14, 35, 0)
+
+# FFmpeg launches timed per variant by the startup benchmark
+STARTUP_RUNS = 10
+
+
+def make_source_clip(directory, size, seconds):
+    """Generate a synthetic H.264 MPEG-TS clip for benchmarking.
+
+    Args:
+        directory: Directory to write the clip into.
+        size: Resolution preset name ('1080p', '720p', ...).
+        seconds: Clip duration in seconds.
+
+    Returns:
+        Path to the generated .MTS file.
+    """
+    width, height = RESOLUTION_PRESETS[size]
+    clip = Path(directory) / f"source_{size}.MTS"
+    subprocess.run(
+        [
+            get_ffmpeg_path(),
+            "-v", "error",
+            "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate={SOURCE_FPS}",
+            "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=48000",
+            "-t", str(seconds),
+            "-c:v", "libx264", "-preset", "ultrafast", "-g", "25",
+            "-c:a", "ac3",
+            "-f", "mpegts",
+            "-y", str(clip)
+        ],
+        check=True,
+        creationflags=get_subprocess_flags()
+    )
+    return clip
+
+
+def to_null_output(cmd):
+    """Rewrite a conversion command to discard its output.
+
+    Args:
+        cmd: FFmpeg command whose last argument is the output path.
+
+    Returns:
+        New command writing to the null muxer instead of an MP4 file.
+    """
+    result = list(cmd[:-1])
+    if "-movflags" in result:
+        index = result.index("-movflags")
+        del result[index:index + 2]
+    return result + ["-f", "null", "-"]
+
+
+def time_command(cmd):
+    """Run an FFmpeg command and measure its wall-clock time.
+
+    Args:
+        cmd: FFmpeg command as a list of arguments.
+
+    Returns:
+        Elapsed time in seconds.
+
+    Raises:
+        subprocess.CalledProcessError: If FFmpeg fails.
+    """
+    start = time.perf_counter()
+    subprocess.run(
+        cmd,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        check=True,
+        creationflags=get_subprocess_flags()
+    )
+    return time.perf_counter() - start
+
+
+def print_table(rows, frames):
+    """Print benchmark results relative to the first row of each group.
+
+    Args:
+        rows: List of (group, variant, elapsed_seconds) tuples.
+        frames: Number of frames encoded per run.
+    """
+    print(f"\n{'Source':<8} {'Variant':<24} {'Time (s)':>9} {'FPS':>8} {'Speedup':>8}")
+    print("-" * 61)
+    baselines = {}
+    for group, variant, elapsed in rows:
+        baseline = baselines.setdefault(group, elapsed)
+        print(
+            f"{group:<8} {variant:<24} {elapsed:>9.2f} "
+            f"{frames / elapsed:>8.1f} {baseline / elapsed:>7.2f}x"
+        )
+
+
+def benchmark_overlay(sizes, seconds, work_dir):
+    """Compare the drawtext and sprite overlay engines.
+
+    Args:
+        sizes: Source resolution preset names to test.
+        seconds: Clip duration in seconds.
+        work_dir: Scratch directory for source clips.
+
+    Returns:
+        List of (group, variant, elapsed_seconds) tuples.
+    """
+    ffmpeg = get_ffmpeg_path()
+    rows = []
+    for size in sizes:
+        clip = make_source_clip(work_dir, size, seconds)
+        for engine in OVERLAY_ENGINES:
+            cmd = build_burn_in_command(
+                ffmpeg, clip, "out.mp4", BENCHMARK_FILMING_TIME,
+                overlay_engine=engine
+            )
+            rows.append((size, engine, time_command(to_null_output(cmd))))
+    return rows
+
+
+def benchmark_filters(sizes, seconds, work_dir):
+    """Compare drawing before scaling with the cost-aware filter graph.
+
+    A 1080p source is converted to each output preset in `sizes` with the
+    legacy drawtext-then-scale chain, the scale-first graph, and the
+    scale-first graph with the fast_bilinear scaler.
+
+    Args:
+        sizes: Output resolution preset names to test.
+        seconds: Clip duration in seconds.
+        work_dir: Scratch directory for source clips.
+
+    Returns:
+        List of (group, variant, elapsed_seconds) tuples.
+    """
+    ffmpeg = get_ffmpeg_path()
+    clip = make_source_clip(work_dir, '1080p', seconds)
+    rows = []
+    for size in sizes:
+        legacy = build_burn_in_command(ffmpeg, clip, "out.mp4", BENCHMARK_FILMING_TIME, resolution=size)
+        legacy[legacy.index("-vf") + 1] = build_video_filter(
+            build_drawtext_filter(BENCHMARK_FILMING_TIME), size
+        )
+        rows.append((size, "draw-then-scale", time_command(to_null_output(legacy))))
+
+        for label, scaler in (("scale-first", None), ("scale-first fast", "fast_bilinear")):
+            cmd = build_burn_in_command(
+                ffmpeg, clip, "out.mp4", BENCHMARK_FILMING_TIME,
+                resolution=size, scaler=scaler
+            )
+            rows.append((size, label, time_command(to_null_output(cmd))))
+    return rows
+
+
+def benchmark_startup(sizes, seconds, work_dir):
+    """Compare per-launch FFmpeg latency with and without an explicit font.
+
+    Each run renders the timestamp onto a single tiny frame, so the time
+    is FFmpeg startup plus drawtext initialisation. Without a fontfile,
+    drawtext loads fontconfig on every launch; with the resolved font it
+    opens the file directly. The median of STARTUP_RUNS launches is
+    reported.
+
+    Args:
+        sizes: Unused (the frame is tiny).
+        seconds: Unused (one frame per launch).
+        work_dir: Unused.
+
+    Returns:
+        List of (group, variant, elapsed_seconds) tuples.
+    """
+    ffmpeg = get_ffmpeg_path()
+    font_file = get_font_file()
+    with_font = build_drawtext_filter(BENCHMARK_FILMING_TIME, font_file=font_file)
+    variants = [("fontconfig lookup", with_font.replace(get_fontfile_option(font_file), "", 1))]
+    if font_file:
+        variants.append(("resolved fontfile", with_font))
+    else:
+        print("No font file resolved; only the fontconfig lookup is timed.")
+
+    rows = []
+    for label, drawtext in variants:
+        cmd = [
+            ffmpeg, "-v", "error",
+            "-f", "lavfi", "-i", "color=c=black:s=320x180:d=0.04",
+            "-vf", drawtext, "-frames:v", "1", "-f", "null", "-"
+        ]
+        times = sorted(time_command(cmd) for _ in range(STARTUP_RUNS))
+        rows.append(("startup", label, times[len(times) // 2]))
+    return rows
+
+
+BENCHMARKS = {
+    'overlay': benchmark_overlay,
+    'filters': benchmark_filters,
+    'startup': benchmark_startup,
+}
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Benchmark MTS converter FFmpeg pipelines')
+    parser.add_argument('benchmark', choices=list(BENCHMARKS.keys()))
+    parser.add_argument('--seconds', type=int, default=20, help='Source clip length (default: 20)')
+    parser.add_argument(
+        '--sizes',
+        nargs='+',
+        default=['1080p', '720p'],
+        choices=[name for name, dims in RESOLUTION_PRESETS.items() if dims],
+        help='Resolutions to test: source sizes for overlay, output '
+             'presets for filters (default: 1080p 720p)'
+    )
+    args = parser.parse_args()
+
+    available, _, _ = check_ffmpeg_available()
+    if not available:
+        print("Error: FFmpeg is not installed or not in PATH.")
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory(prefix='mts_bench_') as work_dir:
+        rows = BENCHMARKS[args.benchmark](args.sizes, args.seconds, work_dir)
+
+    # Startup runs render one frame each
+    frames = 1 if args.benchmark == 'startup' else args.seconds * SOURCE_FPS
+    print_table(rows, frames)
+
+
+if __name__ == "__main__":
+    main()
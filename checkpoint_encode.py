@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Checkpointed encoding of long recordings.
+
+A burned-in conversion of a two-hour clip is a single FFmpeg run; if the
+process dies or is cancelled part way through, everything encoded so far
+is lost. In checkpointed mode the video is encoded in fixed-length
+segments instead, each starting on a keyframe and with the clock offset
+to its position in the recording. Finished segments are kept in a work
+directory next to the output, and a later run for the same clip and
+settings skips them. Once every segment is done they are joined without
+re-encoding and the audio is added from the source in one pass.
+
+At most one segment of work is lost by an interruption.
+"""
+
+import hashlib
+import json
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from mts_converter import (
+    AUDIO_CODECS,
+    DEFAULT_AUDIO_CODEC,
+    get_chapters_input_args,
+    get_creation_time_args,
+    get_navigation_args
+)
+
+
+# Length of each encoded segment in seconds: the most work an interruption
+# can lose
+DEFAULT_SEGMENT_SECONDS = 300
+
+# Folder (inside the output directory) holding the work directories
+CHECKPOINT_DIR = '.checkpoints'
+
+# File names of finished and in-progress segments inside a work directory
+PART_NAME = 'part_{:05d}.mp4'
+PARTIAL_PREFIX = 'partial_'
+CONCAT_LIST = 'segments.txt'
+
+# Settings that change how fast segments are encoded, not what they hold;
+# left out of the work directory key so a retuned run still resumes
+RUNTIME_SETTINGS = ('threads', 'filter_threads')
+
+
+def get_checkpoint_dir(input_path: Path, output_dir: Path, settings: Dict) -> Path:
+    """Get the work directory of a clip's checkpointed conversion.
+
+    The directory is named after the clip's identity (path, size and
+    modification time) and the conversion settings, not the output name,
+    so a restarted batch finds it even if the output gets another name.
+
+    Args:
+        input_path: Path to the original MTS file, not a prefetched or
+                    repaired copy of it.
+        output_dir: Directory the output is written to.
+        settings: JSON-serializable conversion settings. RUNTIME_SETTINGS
+                  are ignored.
+
+    Returns:
+        Path of the work directory (not created).
+
+    Raises:
+        OSError: If the input cannot be read.
+    """
+    input_path = Path(input_path)
+    stat = input_path.stat()
+    settings = {k: v for k, v in settings.items() if k not in RUNTIME_SETTINGS}
+    identity = json.dumps(
+        [str(input_path.resolve()), stat.st_size, stat.st_mtime_ns, settings],
+        sort_keys=True, default=str
+    )
+    digest = hashlib.sha256(identity.encode('utf-8')).hexdigest()[:16]
+    return Path(output_dir) / CHECKPOINT_DIR / f"{input_path.stem}-{digest}"
+
+
+def plan_segments(duration: float, segment_seconds: float) -> List[Tuple[float, Optional[float]]]:
+    """Split a recording into segments.
+
+    Args:
+        duration: Recording duration in seconds.
+        segment_seconds: Segment length in seconds.
+
+    Returns:
+        List of (start, length) tuples. The last segment's length is None:
+        it runs to the end, so no frames are lost to a rounded duration.
+    """
+    count = max(1, -int(-duration // segment_seconds))
+    return [
+        (index * segment_seconds, segment_seconds if index + 1 < count else None)
+        for index in range(count)
+    ]
+
+
+def get_part_path(work_dir: Path, index: int) -> Path:
+    """Get the path of a finished segment.
+
+    Args:
+        work_dir: Work directory of the conversion.
+        index: Segment number.
+
+    Returns:
+        Path of the segment file.
+    """
+    return Path(work_dir) / PART_NAME.format(index)
+
+
+def get_partial_path(work_dir: Path, index: int) -> Path:
+    """Get the path a segment is encoded to before it counts as finished.
+
+    Args:
+        work_dir: Work directory of the conversion.
+        index: Segment number.
+
+    Returns:
+        Path of the in-progress segment file.
+    """
+    return Path(work_dir) / (PARTIAL_PREFIX + PART_NAME.format(index))
+
+
+def write_concat_list(work_dir: Path, count: int) -> Path:
+    """Write the FFmpeg concat demuxer list of a conversion's segments.
+
+    Args:
+        work_dir: Work directory of the conversion.
+        count: Number of segments.
+
+    Returns:
+        Path of the list file.
+    """
+    list_path = Path(work_dir) / CONCAT_LIST
+    lines = [f"file '{PART_NAME.format(index)}'" for index in range(count)]
+    list_path.write_text("\n".join(lines) + "\n", encoding='utf-8')
+    return list_path
+
+
+def build_concat_command(ffmpeg, list_path, input_path, output_path,
+                         audio_codec=DEFAULT_AUDIO_CODEC, start_time=None, duration=None,
+                         filming_time=None, chapters_path=None, timecode=None):
+    """Build the FFmpeg command joining the segments into the output.
+
+    The video segments are copied, not re-encoded. The audio is taken from
+    the source in one pass, so there are no gaps at segment joins.
+
+    Args:
+        ffmpeg: Path to the ffmpeg executable.
+        list_path: Concat list from write_concat_list.
+        input_path: Path to the input MTS file (audio source).
+        output_path: Path for the output MP4 file.
+        audio_codec: Key into AUDIO_CODECS.
+        start_time: Optional media offset of the encoded range; the audio
+                    is cut to the same range.
+        duration: Optional length of the encoded range.
+        filming_time: Optional datetime of the first frame, stored as the
+                      output's creation time.
+        chapters_path: Optional chapter file (see write_chapter_metadata).
+        timecode: Optional start timecode for a tmcd track.
+
+    Returns:
+        FFmpeg command as a list of arguments.
+    """
+    audio_range = ["-ss", str(start_time)] if start_time else []
+    if duration:
+        audio_range += ["-t", str(duration)]
+    return [
+        ffmpeg,
+        "-f", "concat", "-safe", "0", "-i", str(list_path),
+        *audio_range, "-i", str(input_path),
+        *get_chapters_input_args(chapters_path),
+        "-map", "0:v", "-map", "1:a?",
+        "-c:v", "copy",
+        *AUDIO_CODECS[audio_codec],
+        *get_creation_time_args(filming_time),
+        *get_navigation_args(2 if chapters_path else None, timecode),
+        "-movflags", "+faststart",
+        "-y", str(output_path)
+    ]
+
+
+def remove_checkpoint(work_dir: Path):
+    """Delete a finished conversion's work directory.
+
+    The checkpoint folder is removed too once it is empty.
+
+    Args:
+        work_dir: Work directory of the conversion.
+    """
+    work_dir = Path(work_dir)
+    shutil.rmtree(work_dir, ignore_errors=True)
+    try:
+        work_dir.parent.rmdir()
+    except OSError:
+        pass
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Whole-file camera clock index for MTS files.
+
+AVCHD cameras write the recording time (a 'DPM' SEI record) into every
+GOP. When a file contains several recordings, for example after a bad
+concatenation or clips joined on the camera, the clock jumps part way
+through and "first timestamp + playback time" is no longer right.
+
+This module memory-maps the file, finds every DPM record with chunked
+find() calls, pairs each one with the PTS of the PES packet carrying it,
+and reduces the result to clock segments: media offsets at which the
+camera clock restarts. The scan is a memchr-speed search plus a few
+header reads per GOP, so it runs at close to disk speed.
+
+Usage:
+    python clock_index.py clip.MTS
+"""
+
+import mmap
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from mts_converter import parse_dpm_timestamp
+
+
+# Marker and record length of the DPM timestamp (see extract_avchd_timestamp)
+DPM_MARKER = b'DPM'
+DPM_RECORD_SIZE = 14
+
+# Bytes searched per find() call
+SCAN_CHUNK_SIZE = 16 * 1024 * 1024
+
+# MPEG-TS packet layouts: (packet size, offset of the 0x47 sync byte).
+# AVCHD .MTS files use 192-byte packets with a 4-byte timecode prefix.
+TS_SYNC_BYTE = 0x47
+PACKET_LAYOUTS = ((192, 4), (188, 0), (204, 0))
+
+# Packets walked back from a DPM record to find its PES header
+MAX_PES_BACKTRACK = 256
+
+# PES timestamps run on a 90 kHz clock and wrap at 33 bits
+PTS_CLOCK = 90000
+PTS_WRAP = 2 ** 33
+
+# A PTS jump larger than this is treated as a discontinuity, which FFmpeg
+# splices out of the output timeline (its default dts_delta_threshold)
+DISCONTINUITY_THRESHOLD = 10.0
+
+# Clock disagreement (seconds) that starts a new segment. DPM records only
+# have one-second resolution.
+CLOCK_TOLERANCE = 2.0
+
+
+@dataclass
+class ClockEntry:
+    """One DPM record found in the file.
+
+    Attributes:
+        offset: Byte offset of the record.
+        pts: Presentation time in seconds of the carrying PES packet, or
+             None if it could not be determined.
+        wall_clock: Recording time stored in the record.
+    """
+    offset: int
+    pts: Optional[float]
+    wall_clock: datetime
+
+
+@dataclass
+class ClockSegment:
+    """A stretch of media where the camera clock runs continuously.
+
+    Attributes:
+        start: Media offset in seconds where the segment starts.
+        wall_clock: Camera clock at the start of the segment.
+    """
+    start: float
+    wall_clock: datetime
+
+
+def find_markers(data, marker: bytes = DPM_MARKER,
+                 chunk_size: int = SCAN_CHUNK_SIZE) -> Iterator[int]:
+    """Yield the offsets of every occurrence of marker in data.
+
+    The buffer is searched chunk by chunk; each window overlaps the next
+    chunk by len(marker) - 1 bytes so markers spanning a chunk boundary are
+    found exactly once.
+
+    Args:
+        data: bytes, bytearray or mmap to search.
+        marker: Byte string to find.
+        chunk_size: Bytes searched per window.
+
+    Yields:
+        Offsets of marker, in increasing order.
+    """
+    size = len(data)
+    overlap = len(marker) - 1
+    for chunk_start in range(0, size, chunk_size):
+        chunk_end = min(chunk_start + chunk_size, size)
+        window_end = min(chunk_end + overlap, size)
+        pos = data.find(marker, chunk_start, window_end)
+        while pos != -1 and pos < chunk_end:
+            yield pos
+            pos = data.find(marker, pos + 1, window_end)
+
+
+def detect_packet_layout(data) -> Optional[Tuple[int, int]]:
+    """Detect the transport stream packet size and sync byte offset.
+
+    Args:
+        data: Start of the file (bytes or mmap).
+
+    Returns:
+        Tuple of (packet_size, sync_offset), or None if data does not look
+        like an MPEG transport stream.
+    """
+    for packet_size, sync_offset in PACKET_LAYOUTS:
+        positions = [sync_offset + k * packet_size for k in range(5)]
+        if positions[-1] < len(data) and all(data[p] == TS_SYNC_BYTE for p in positions):
+            return packet_size, sync_offset
+    return None
+
+
+def _parse_pts(header) -> float:
+    """Decode a 5-byte PES PTS field into seconds."""
+    value = (
+        ((header[0] >> 1) & 0x07) << 30 |
+        header[1] << 22 |
+        (header[2] >> 1) << 15 |
+        header[3] << 7 |
+        header[4] >> 1
+    )
+    return value / PTS_CLOCK
+
+
+def read_pes_start(data, start: int) -> Optional[Tuple[int, Optional[float]]]:
+    """Read the PES header starting in the TS packet at start.
+
+    Args:
+        data: File contents.
+        start: Offset of the TS packet's sync byte.
+
+    Returns:
+        Tuple of (stream_id, pts_seconds or None), or None if the packet
+        does not start a PES packet.
+    """
+    if data[start] != TS_SYNC_BYTE or not data[start + 1] & 0x40:
+        return None
+    payload = start + 4
+    adaptation = (data[start + 3] >> 4) & 0x03
+    if adaptation & 0x02:
+        payload += 1 + data[start + 4]
+    if not adaptation & 0x01:
+        return None
+    pes = data[payload:payload + 14]
+    if len(pes) < 9 or pes[:3] != b'\x00\x00\x01':
+        return None
+    if len(pes) < 14 or not pes[7] & 0x80:
+        return pes[3], None
+    return pes[3], _parse_pts(pes[9:14])
+
+
+def _packet_pes_pts(data, start: int) -> Optional[float]:
+    """Get the PTS of a PES packet starting in the TS packet at start.
+
+    Returns:
+        PTS in seconds, or None if the packet does not start a PES packet
+        with a PTS.
+    """
+    pes = read_pes_start(data, start)
+    return pes[1] if pes else None
+
+
+def iter_pes_starts(data, layout: Tuple[int, int], begin: int = 0,
+                    end: Optional[int] = None) -> Iterator[Tuple[int, Optional[float]]]:
+    """Yield the PES headers starting between two byte offsets.
+
+    Args:
+        data: File contents.
+        layout: (packet_size, sync_offset) from detect_packet_layout.
+        begin: Byte offset to start at (rounded up to a packet).
+        end: Byte offset to stop at (default: end of data).
+
+    Yields:
+        Tuples of (stream_id, pts_seconds or None).
+    """
+    packet_size, sync_offset = layout
+    end = len(data) if end is None else min(end, len(data))
+    first = max(0, -(-(begin - sync_offset) // packet_size))
+    for start in range(sync_offset + first * packet_size, end - packet_size + sync_offset + 1,
+                       packet_size):
+        pes = read_pes_start(data, start)
+        if pes is not None:
+            yield pes
+
+
+def find_record_pts(data, offset: int, layout: Tuple[int, int]) -> Optional[float]:
+    """Find the PTS of the PES packet that carries the byte at offset.
+
+    Walks back over TS packets of the same PID until the one starting the
+    PES packet is found.
+
+    Args:
+        data: File contents.
+        offset: Byte offset inside the PES payload.
+        layout: (packet_size, sync_offset) from detect_packet_layout.
+
+    Returns:
+        PTS in seconds, or None if it cannot be determined.
+    """
+    packet_size, sync_offset = layout
+    index = (offset - sync_offset) // packet_size
+    start = sync_offset + index * packet_size
+    if start < 0 or data[start] != TS_SYNC_BYTE:
+        return None
+    pid = ((data[start + 1] & 0x1F) << 8) | data[start + 2]
+
+    for _ in range(MAX_PES_BACKTRACK):
+        if start < 0:
+            break
+        if data[start] == TS_SYNC_BYTE and ((data[start + 1] & 0x1F) << 8 | data[start + 2]) == pid:
+            pts = _packet_pes_pts(data, start)
+            if pts is not None:
+                return pts
+        start -= packet_size
+    return None
+
+
+def scan_buffer(data) -> List[ClockEntry]:
+    """Index every DPM record in a buffer.
+
+    Args:
+        data: File contents (bytes or mmap).
+
+    Returns:
+        List of ClockEntry objects in file order.
+    """
+    layout = detect_packet_layout(data)
+    entries = []
+    for offset in find_markers(data):
+        wall_clock = parse_dpm_timestamp(data[offset:offset + DPM_RECORD_SIZE])
+        if wall_clock is None:
+            # Marker split across packets, or 'DPM' bytes in coded video
+            continue
+        pts = find_record_pts(data, offset, layout) if layout else None
+        entries.append(ClockEntry(offset, pts, wall_clock))
+    return entries
+
+
+def scan_file(input_file) -> List[ClockEntry]:
+    """Index every DPM record in a file using a memory map.
+
+    Args:
+        input_file: Path to the MTS file.
+
+    Returns:
+        List of ClockEntry objects in file order (empty if the file is
+        empty or unreadable).
+    """
+    try:
+        with open(input_file, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return scan_buffer(data)
+    except (OSError, ValueError):
+        # ValueError: empty files cannot be mapped
+        return []
+
+
+def build_clock_segments(entries: List[ClockEntry]) -> List[ClockSegment]:
+    """Reduce DPM records to segments of continuous camera clock.
+
+    PTS values are turned into output media time the way FFmpeg does:
+    wrap-arounds are unwrapped and discontinuities (jumps backwards or by
+    more than DISCONTINUITY_THRESHOLD) are spliced out. A new segment starts
+    wherever the camera clock disagrees with the running clock by more than
+    CLOCK_TOLERANCE.
+
+    Args:
+        entries: ClockEntry objects in file order.
+
+    Returns:
+        List of ClockSegment objects ordered by start; empty if no record
+        has a PTS.
+    """
+    segments: List[ClockSegment] = []
+    media_time = 0.0
+    step = 0.0
+    previous_pts = None
+
+    for entry in entries:
+        if entry.pts is None:
+            continue
+        if previous_pts is not None:
+            delta = entry.pts - previous_pts
+            if delta < -PTS_WRAP / PTS_CLOCK / 2:
+                delta += PTS_WRAP / PTS_CLOCK
+            if delta < 0 or delta > DISCONTINUITY_THRESHOLD:
+                # Assume one GOP duration across the splice
+                delta = step
+            else:
+                step = delta
+            media_time += delta
+        previous_pts = entry.pts
+
+        if segments:
+            current = segments[-1]
+            expected = current.wall_clock + timedelta(seconds=media_time - current.start)
+            if abs((entry.wall_clock - expected).total_seconds()) <= CLOCK_TOLERANCE:
+                continue
+        segments.append(ClockSegment(round(media_time, 3), entry.wall_clock))
+
+    return segments
+
+
+def get_clock_segments(input_file) -> List[ClockSegment]:
+    """Scan a file and return its camera clock segments.
+
+    Args:
+        input_file: Path to the MTS file.
+
+    Returns:
+        List of ClockSegment objects; a single segment means the clock is
+        continuous.
+    """
+    return build_clock_segments(scan_file(input_file))
+
+
+def main():
+    """Print the clock segments of a file and the scan throughput."""
+    if len(sys.argv) != 2:
+        print("Usage: python clock_index.py <input.mts>")
+        sys.exit(1)
+
+    input_file = Path(sys.argv[1])
+    start = time.perf_counter()
+    entries = scan_file(input_file)
+    elapsed = time.perf_counter() - start
+    segments = build_clock_segments(entries)
+
+    size_mb = input_file.stat().st_size / (1024 * 1024)
+    print(f"Scanned {size_mb:.1f} MB in {elapsed:.2f}s "
+          f"({size_mb / max(elapsed, 1e-9):.0f} MB/s), {len(entries)} DPM records")
+    for segment in segments:
+        print(f"  {segment.start:>10.3f}s  {segment.wall_clock.strftime('%Y-%m-%d %H:%M:%S')}")
+
+
+if __name__ == "__main__":
+    main()
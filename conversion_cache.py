@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of finished conversions.
+
+A clip is identified by a cheap fingerprint: its size, its DPM recording
+timestamp and a hash of its first and last megabyte. Combined with a hash
+of the conversion settings this gives a cache key. When a key has been
+converted before and its output still exists, the output is hardlinked (or
+copied, across filesystems) instead of encoding the clip again.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Optional
+
+from ffmpeg_utils import get_data_dir
+from mts_converter import extract_avchd_timestamp
+
+
+# File (inside the data directory) mapping cache keys to outputs
+CACHE_FILE = 'conversion_cache.json'
+
+# Bytes hashed at the start and at the end of each clip
+FINGERPRINT_CHUNK = 1024 * 1024
+
+# Bump when output for the same settings changes (e.g. new filter graph)
+CACHE_VERSION = 1
+
+
+def fingerprint_file(input_file: Path, chunk_size: int = FINGERPRINT_CHUNK) -> str:
+    """Compute a cheap content fingerprint of an MTS file.
+
+    Reads at most two chunks, so fingerprinting a multi-gigabyte clip costs
+    about as much as opening it.
+
+    Args:
+        input_file: Path to the MTS file.
+        chunk_size: Bytes hashed at the head and at the tail.
+
+    Returns:
+        Hex digest combining size, DPM timestamp, head and tail.
+    """
+    input_file = Path(input_file)
+    size = input_file.stat().st_size
+    timestamp = extract_avchd_timestamp(str(input_file))
+
+    digest = hashlib.sha256()
+    digest.update(str(size).encode())
+    digest.update(timestamp.isoformat().encode() if timestamp else b'-')
+    with open(input_file, 'rb') as f:
+        digest.update(f.read(chunk_size))
+        if size > chunk_size:
+            f.seek(max(chunk_size, size - chunk_size))
+            digest.update(f.read(chunk_size))
+    return digest.hexdigest()
+
+
+def settings_hash(options: Dict) -> str:
+    """Hash conversion settings in a key-order independent way.
+
+    Args:
+        options: convert_video keyword arguments.
+
+    Returns:
+        Hex digest of the settings and CACHE_VERSION.
+    """
+    payload = json.dumps({'version': CACHE_VERSION, 'options': options}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def cache_key(input_file: Path, options: Dict) -> str:
+    """Get the cache key for converting a file with the given settings.
+
+    Args:
+        input_file: Path to the MTS file.
+        options: convert_video keyword arguments.
+
+    Returns:
+        Cache key string.
+    """
+    return f"{fingerprint_file(input_file)}:{settings_hash(options)}"
+
+
+def link_or_copy(source: Path, destination: Path):
+    """Hardlink source to destination, copying if linking is not possible.
+
+    Args:
+        source: Existing file.
+        destination: New path (must not exist).
+    """
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+class ConversionCache:
+    """Maps cache keys to previously converted output files.
+
+    Attributes:
+        path: Path to the JSON file backing the cache.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        """Initialize ConversionCache.
+
+        Args:
+            path: Optional JSON file path. Defaults to CACHE_FILE in the
+                  per-user data directory.
+        """
+        self.path = Path(path) if path else Path(get_data_dir()) / CACHE_FILE
+
+    def _load(self) -> Dict:
+        """Load the whole cache, tolerating a missing or corrupt file."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def lookup(self, key: str) -> Optional[Path]:
+        """Find a previous output for a cache key.
+
+        Args:
+            key: Cache key from cache_key().
+
+        Returns:
+            Path to the output if it still exists and is not empty,
+            None otherwise.
+        """
+        output = self._load().get(key)
+        if output is None:
+            return None
+        output = Path(output)
+        try:
+            if output.stat().st_size > 0:
+                return output
+        except OSError:
+            pass
+        return None
+
+    def store(self, key: str, output_file: Path):
+        """Remember the output produced for a cache key.
+
+        Args:
+            key: Cache key from cache_key().
+            output_file: Path to the finished output.
+        """
+        data = self._load()
+        data[key] = str(Path(output_file).resolve())
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.path)
@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+Wall-clock excerpts from converted MP4s.
+
+Cuts "the clip from 14:32:10 to 14:35:00" out of a converted MP4 as a
+standalone file in seconds, without re-encoding the recording. Converted
+MP4s carry the recording time of their first frame as their creation
+time (see get_creation_time_args), so recording times map straight to
+media offsets.
+
+By default the range is stream-copied from the keyframe at or before its
+start, so the excerpt may begin up to one GOP (about half a second on
+AVCHD) early. With --accurate it starts and ends on the exact frames:
+only the partial GOPs at the two ends are re-encoded, the whole GOPs in
+between are copied, and the audio is copied from the MP4 in one pass.
+
+Usage:
+    python excerpt.py clip.mp4 14:32:10 14:35:00 [-o out.mp4] [--accurate]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from ffmpeg_utils import get_ffmpeg_path, get_ffprobe_path, get_subprocess_flags
+from mts_converter import (
+    DEFAULT_PRESET,
+    MetadataExtractionError,
+    get_creation_time_args,
+    get_seek_args,
+    get_video_creation_time
+)
+from time_range import WALL_CLOCK_FORMATS, parse_time_spec, resolve_range
+
+
+# Seconds probed beyond each end of the range for keyframes: longer than
+# any GOP a camera or x264 writes
+KEYFRAME_MARGIN = 30.0
+
+# Seek nudge keeping rounded keyframe times on the intended side of a cut
+FRAME_EPSILON = 0.001
+
+# x264 CRF for the re-encoded ends of accurate excerpts: close enough to
+# the copied middle that the joins do not show
+BOUNDARY_CRF = 18
+
+# libx264 profile names by ffprobe profile
+X264_PROFILES = {
+    'Constrained Baseline': 'baseline',
+    'Baseline': 'baseline',
+    'Main': 'main',
+    'High': 'high',
+}
+
+# Default output name, next to the MP4
+EXCERPT_NAME = '{stem}_{start:%H%M%S}-{end:%H%M%S}.mp4'
+
+
+class ExcerptError(Exception):
+    """Raised when an excerpt cannot be cut."""
+    pass
+
+
+@dataclass
+class SourceInfo:
+    """What an excerpt needs to know about the MP4 it is cut from.
+
+    Attributes:
+        duration: Duration in seconds.
+        keyframes: Video keyframe offsets in seconds near the range,
+                   sorted.
+        codec: Video codec name.
+        profile: Video codec profile, if reported.
+        pix_fmt: Video pixel format, if reported.
+    """
+    duration: float
+    keyframes: List[float]
+    codec: str = 'h264'
+    profile: Optional[str] = None
+    pix_fmt: Optional[str] = None
+
+
+@dataclass
+class ExcerptPart:
+    """One piece of an accurate excerpt.
+
+    Attributes:
+        start: Media offset of the piece in the MP4.
+        end: Media offset where the piece ends.
+        encode: True to re-encode the piece, False to copy it.
+    """
+    start: float
+    end: float
+    encode: bool
+
+
+def recording_time_arg(value):
+    """Validate a recording time argument ('@' optional).
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is not a time of day or
+            a date and time.
+    """
+    spec = value if value.startswith('@') else '@' + value
+    try:
+        parse_time_spec(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return spec
+
+
+def probe_source(input_path: Path, start: float, end: float) -> SourceInfo:
+    """Read the duration, video format and keyframes around a range.
+
+    Only packet headers are read, from the stretch of the file around
+    the range, so this takes well under a second on any length of MP4.
+
+    Args:
+        input_path: Path to the MP4 file.
+        start: Range start in seconds.
+        end: Range end in seconds.
+
+    Returns:
+        SourceInfo object.
+
+    Raises:
+        ExcerptError: If ffprobe fails or the file has no video.
+    """
+    low = max(0.0, start - KEYFRAME_MARGIN)
+    cmd = [
+        get_ffprobe_path(),
+        "-v", "error",
+        "-select_streams", "v:0",
+        "-read_intervals", f"{low}%{end + KEYFRAME_MARGIN}",
+        "-show_entries", "packet=pts_time,flags:format=start_time,duration"
+                         ":stream=codec_name,profile,pix_fmt",
+        "-of", "json",
+        str(input_path)
+    ]
+    try:
+        result = subprocess.run(
+            cmd, capture_output=True, text=True, creationflags=get_subprocess_flags()
+        )
+        info = json.loads(result.stdout or '{}')
+    except (OSError, ValueError) as e:
+        raise ExcerptError(f"Could not read '{input_path}': {e}")
+    if not info.get('streams'):
+        raise ExcerptError(f"'{input_path}' has no video stream.")
+
+    stream = info['streams'][0]
+    media_start = float(info.get('format', {}).get('start_time') or 0.0)
+    keyframes = sorted(
+        float(packet['pts_time']) - media_start
+        for packet in info.get('packets', [])
+        if 'K' in packet.get('flags', '') and packet.get('pts_time') not in (None, 'N/A')
+    )
+    return SourceInfo(
+        duration=float(info.get('format', {}).get('duration') or 0.0),
+        keyframes=keyframes,
+        codec=stream.get('codec_name', ''),
+        profile=stream.get('profile'),
+        pix_fmt=stream.get('pix_fmt')
+    )
+
+
+def find_copy_start(keyframes: List[float], start: float) -> float:
+    """Get the keyframe a stream copy of a range starts at.
+
+    Args:
+        keyframes: Sorted keyframe offsets.
+        start: Range start.
+
+    Returns:
+        Offset of the last keyframe at or before start (0 if none).
+    """
+    before = [k for k in keyframes if k <= start + FRAME_EPSILON]
+    return before[-1] if before else 0.0
+
+
+def plan_accurate_parts(keyframes: List[float], start: float, end: float) -> List[ExcerptPart]:
+    """Split a range into re-encoded ends and a copied middle.
+
+    The middle runs from the first keyframe at or after start to the last
+    keyframe at or before end; the partial GOPs on either side are
+    re-encoded.
+    A range within a single GOP is re-encoded whole.
+
+    Args:
+        keyframes: Sorted keyframe offsets.
+        start: Range start.
+        end: Range end.
+
+    Returns:
+        List of ExcerptPart objects covering [start, end) in order.
+    """
+    inside = [k for k in keyframes if start - FRAME_EPSILON <= k <= end + FRAME_EPSILON]
+    if len(inside) < 2:
+        return [ExcerptPart(start, end, encode=True)]
+
+    copy_start, copy_end = inside[0], min(inside[-1], end)
+    parts = []
+    if copy_start > start + FRAME_EPSILON:
+        parts.append(ExcerptPart(start, copy_start, encode=True))
+    parts.append(ExcerptPart(copy_start, copy_end, encode=False))
+    if copy_end < end - FRAME_EPSILON:
+        parts.append(ExcerptPart(copy_end, end, encode=True))
+    return parts
+
+
+def build_copy_command(ffmpeg, input_path, output_path, start, duration, recorded):
+    """Build the FFmpeg command stream-copying a range into a new MP4.
+
+    Args:
+        ffmpeg: Path to the ffmpeg executable.
+        input_path: Path to the MP4 file.
+        output_path: Path for the excerpt.
+        start: Media offset of the first copied keyframe.
+        duration: Optional length in seconds (None: to the end).
+        recorded: Recording time of the excerpt's first frame.
+
+    Returns:
+        FFmpeg command as a list of arguments.
+    """
+    return [
+        ffmpeg,
+        *get_seek_args(start + FRAME_EPSILON if start else None, duration),
+        "-i", str(input_path),
+        "-map", "0:v:0", "-map", "0:a?", "-map", "0:s?",
+        "-c", "copy",
+        "-avoid_negative_ts", "make_zero",
+        *get_creation_time_args(recorded),
+        "-movflags", "+faststart",
+        "-y", str(output_path)
+    ]
+
+
+def build_part_command(ffmpeg, input_path, part_path, part: ExcerptPart, source: SourceInfo):
+    """Build the FFmpeg command writing one video-only piece of an accurate excerpt.
+
+    Pieces are MPEG-TS, so each carries its own H.264 parameter sets and
+    the re-encoded ends join the camera's copied GOPs cleanly.
+
+    Args:
+        ffmpeg: Path to the ffmpeg executable.
+        input_path: Path to the MP4 file.
+        part_path: Path for the piece.
+        part: ExcerptPart to write.
+        source: SourceInfo of the MP4.
+
+    Returns:
+        FFmpeg command as a list of arguments.
+    """
+    if part.encode:
+        # Decoding seek: keep the frame at part.start, drop the one before
+        seek = max(0.0, part.start - FRAME_EPSILON)
+        codec_args = ["-c:v", "libx264", "-preset", DEFAULT_PRESET, "-crf", str(BOUNDARY_CRF)]
+        if source.profile in X264_PROFILES:
+            codec_args += ["-profile:v", X264_PROFILES[source.profile]]
+        if source.pix_fmt:
+            codec_args += ["-pix_fmt", source.pix_fmt]
+    else:
+        # Copying seek: land on the keyframe at part.start, not the one before
+        seek = part.start + FRAME_EPSILON
+        codec_args = ["-c:v", "copy", "-bsf:v", "h264_mp4toannexb"]
+    return [
+        ffmpeg,
+        *get_seek_args(seek or None, part.end - seek - FRAME_EPSILON),
+        "-i", str(input_path),
+        "-map", "0:v:0", "-an", "-sn",
+        *codec_args,
+        "-f", "mpegts",
+        "-y", str(part_path)
+    ]
+
+
+def build_join_command(ffmpeg, list_path, input_path, output_path, start, duration, recorded):
+    """Build the FFmpeg command joining the pieces and adding the audio.
+
+    Args:
+        ffmpeg: Path to the ffmpeg executable.
+        list_path: Concat demuxer list of the pieces.
+        input_path: Path to the MP4 file (audio and subtitle source).
+        output_path: Path for the excerpt.
+        start: Media offset of the range.
+        duration: Length of the range.
+        recorded: Recording time of the excerpt's first frame.
+
+    Returns:
+        FFmpeg command as a list of arguments.
+    """
+    return [
+        ffmpeg,
+        "-f", "concat", "-safe", "0", "-i", str(list_path),
+        *get_seek_args(start, duration), "-i", str(input_path),
+        "-map", "0:v", "-map", "1:a?", "-map", "1:s?",
+        "-c:v", "copy", "-c:a", "copy", "-c:s", "mov_text",
+        *get_creation_time_args(recorded),
+        "-movflags", "+faststart",
+        "-y", str(output_path)
+    ]
+
+
+def _run(cmd):
+    """Run an FFmpeg command quietly.
+
+    Raises:
+        ExcerptError: If FFmpeg cannot be started or fails.
+    """
+    try:
+        result = subprocess.run(
+            cmd, capture_output=True, text=True, creationflags=get_subprocess_flags()
+        )
+    except OSError as e:
+        raise ExcerptError(f"Could not run FFmpeg: {e}")
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        raise ExcerptError(f"FFmpeg failed: {lines[-1] if lines else result.returncode}")
+
+
+def get_excerpt_path(input_path: Path, start: datetime, end: datetime) -> Path:
+    """Get the default output path of an excerpt (next to the MP4)."""
+    return input_path.with_name(EXCERPT_NAME.format(stem=input_path.stem, start=start, end=end))
+
+
+def cut_excerpt(input_path, start: str, end: str, output_path=None, accurate: bool = False,
+                recorded: Optional[datetime] = None) -> Tuple[Path, datetime, float]:
+    """Cut a recording-time range out of a converted MP4.
+
+    Args:
+        input_path: Path to the MP4 file.
+        start: Range start: a time of day or date and time, optionally
+               prefixed with '@' (see time_range).
+        end: Range end, in the same forms.
+        output_path: Optional path for the excerpt (default: EXCERPT_NAME
+                     next to the MP4).
+        accurate: If True, start and end on the exact frames, re-encoding
+                  the partial GOPs at the ends.
+        recorded: Recording time of the MP4's first frame, for MP4s that
+                  do not carry it (default: read from the MP4).
+
+    Returns:
+        Tuple of (excerpt path, recording time of its first frame, its
+        duration in seconds).
+
+    Raises:
+        ExcerptError: If the range is outside the recording or FFmpeg fails.
+    """
+    input_path = Path(input_path)
+    if not input_path.is_file():
+        raise ExcerptError(f"'{input_path}' not found.")
+    if recorded is None:
+        try:
+            recorded = get_video_creation_time(str(input_path))
+        except MetadataExtractionError as e:
+            raise ExcerptError(f"{e} Pass its recording start with --recorded.")
+
+    start, end = (value if value.startswith('@') else '@' + value for value in (start, end))
+    # Resolve without the duration first: the probe needs the offsets
+    try:
+        offset, length = resolve_range(start, end, recorded)
+        source = probe_source(input_path, offset, offset + (length or 0.0))
+        offset, length = resolve_range(start, end, recorded, source.duration)
+    except ValueError as e:
+        raise ExcerptError(str(e))
+    stop = offset + length if length is not None else source.duration
+
+    if output_path is None:
+        output_path = get_excerpt_path(
+            input_path, recorded + timedelta(seconds=offset), recorded + timedelta(seconds=stop)
+        )
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    ffmpeg = get_ffmpeg_path()
+
+    if not accurate:
+        copy_start = find_copy_start(source.keyframes, offset)
+        first = recorded + timedelta(seconds=copy_start)
+        _run(build_copy_command(
+            ffmpeg, input_path, output_path, copy_start,
+            stop - copy_start if length is not None else None, first
+        ))
+        return output_path, first, stop - copy_start
+
+    if source.codec != 'h264':
+        raise ExcerptError(f"Frame-accurate excerpts need H.264 video, not {source.codec}.")
+    parts = plan_accurate_parts(source.keyframes, offset, stop)
+    with tempfile.TemporaryDirectory(prefix='.excerpt-', dir=output_path.parent) as work_dir:
+        lines = []
+        for index, part in enumerate(parts):
+            part_path = Path(work_dir) / f"part_{index:02d}.ts"
+            _run(build_part_command(ffmpeg, input_path, part_path, part, source))
+            lines.append(f"file '{part_path.name}'")
+        list_path = Path(work_dir) / 'parts.txt'
+        list_path.write_text("\n".join(lines) + "\n", encoding='utf-8')
+        first = recorded + timedelta(seconds=offset)
+        _run(build_join_command(
+            ffmpeg, list_path, input_path, output_path, offset, stop - offset, first
+        ))
+    return output_path, first, stop - offset
+
+
+def main():
+    """Main entry point for cutting excerpts."""
+    parser = argparse.ArgumentParser(
+        description='Cut a recording-time range out of a converted MP4 without re-encoding it'
+    )
+    parser.add_argument('input', help='Converted MP4 file')
+    parser.add_argument('start', type=recording_time_arg,
+                        help="Recording time to start at: HH:MM[:SS] or 'YYYY-MM-DD HH:MM[:SS]'")
+    parser.add_argument('end', type=recording_time_arg, help='Recording time to end at')
+    parser.add_argument('-o', '--output', default=None, help='Output file (default: next to the input)')
+    parser.add_argument(
+        '--accurate',
+        action='store_true',
+        help='Start and end on the exact frames, re-encoding only the partial '
+             'GOPs at the two ends (default: start at the keyframe before start)'
+    )
+    parser.add_argument(
+        '--recorded',
+        default=None,
+        help="Recording time of the MP4's first frame, for MP4s converted "
+             "without one: 'YYYY-MM-DD HH:MM[:SS]'"
+    )
+    args = parser.parse_args()
+
+    recorded = None
+    if args.recorded:
+        for fmt in WALL_CLOCK_FORMATS:
+            try:
+                recorded = datetime.strptime(args.recorded, fmt)
+                break
+            except ValueError:
+                pass
+        else:
+            parser.error(f"invalid --recorded time '{args.recorded}'")
+
+    try:
+        output_path, first, duration = cut_excerpt(
+            args.input, args.start, args.end, args.output, args.accurate, recorded
+        )
+    except ExcerptError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(f"Wrote {output_path}: {duration:.1f}s from {first:%Y-%m-%d %H:%M:%S}")
+
+
+if __name__ == "__main__":
+    main()
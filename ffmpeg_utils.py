@@ -3,9 +3,11 @@
 FFmpeg utilities for locating bundled or system FFmpeg executables.
 
 Supports both development (system PATH) and PyInstaller frozen builds.
+Also locates the per-user data directory used for local state.
 """
 
 import os
+import socket
 import sys
 import subprocess
 
@@ -22,6 +24,39 @@ def get_base_path():
         return os.path.dirname(os.path.abspath(__file__))
 
 
+def get_data_dir():
+    """Get the per-user directory for converter state (tuning, history).
+
+    Uses %LOCALAPPDATA%\\MTS_Converter on Windows and
+    $XDG_DATA_HOME/mts_converter (default ~/.local/share) elsewhere. The
+    MTS_CONVERTER_DATA_DIR environment variable overrides both.
+
+    Returns:
+        Path string of the data directory. The directory is created if it
+        does not exist.
+    """
+    data_dir = os.environ.get('MTS_CONVERTER_DATA_DIR')
+    if not data_dir:
+        if sys.platform == 'win32':
+            base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+            data_dir = os.path.join(base, 'MTS_Converter')
+        else:
+            base = os.environ.get('XDG_DATA_HOME') or os.path.expanduser('~/.local/share')
+            data_dir = os.path.join(base, 'mts_converter')
+    os.makedirs(data_dir, exist_ok=True)
+    return data_dir
+
+
+def get_host_key():
+    """Get the key identifying this machine in per-host local state.
+
+    Returns:
+        Host name combined with the CPU count, so a hardware change on the
+        same host starts learning afresh.
+    """
+    return f"{socket.gethostname()}/{os.cpu_count() or 1}cpu"
+
+
 def find_executable(name):
     """
     Find an executable by name, checking bundled location first.
@@ -94,8 +129,39 @@ def check_ffmpeg_available():
         return False, ffmpeg, ffprobe
 
 
-def get_subprocess_flags():
-    """Get platform-specific subprocess creation flags."""
+# POSIX niceness applied to low-priority FFmpeg processes
+LOW_PRIORITY_NICENESS = 10
+
+
+def get_subprocess_flags(low_priority=False):
+    """Get platform-specific subprocess creation flags.
+
+    Args:
+        low_priority: If True, start the process below normal priority
+                      (Windows only; see get_preexec_fn for POSIX).
+    """
     if sys.platform == 'win32':
-        return subprocess.CREATE_NO_WINDOW
+        flags = subprocess.CREATE_NO_WINDOW
+        if low_priority:
+            flags |= subprocess.BELOW_NORMAL_PRIORITY_CLASS
+        return flags
     return 0
+
+
+def _lower_priority():
+    """Lower the scheduling priority of the current (child) process."""
+    os.nice(LOW_PRIORITY_NICENESS)
+
+
+def get_preexec_fn(low_priority=False):
+    """Get the POSIX pre-exec hook for a subprocess.
+
+    Args:
+        low_priority: If True, the child is reniced before exec.
+
+    Returns:
+        Callable for subprocess.Popen's preexec_fn, or None.
+    """
+    if low_priority and sys.platform != 'win32':
+        return _lower_priority
+    return None
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Font resolution for the burned-in timestamp.
+
+Without a fontfile option, FFmpeg's drawtext asks fontconfig for a font
+on every launch. fontconfig then loads its configuration and cache, and
+on a fresh Windows machine it rebuilds the cache first, which can take
+minutes before the first frame is encoded. The converter instead resolves
+a font file once, remembers the path in the data directory and passes it
+to drawtext explicitly, so FFmpeg never consults fontconfig.
+
+Fonts are looked for in this order:
+
+1. The MTS_CONVERTER_FONT environment variable
+2. A .ttf/.otf file in the 'fonts' folder next to the program (bundled
+   into frozen builds)
+3. The path remembered from an earlier run, if the file still exists
+4. Well-known system fonts for the platform
+5. fc-match, where fontconfig is installed
+
+Usage:
+    python font_resolver.py           Show the resolved font
+    python font_resolver.py --warm    Also pre-warm the fontconfig cache
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from ffmpeg_utils import get_base_path, get_data_dir, get_ffmpeg_path, get_subprocess_flags
+
+
+# Environment variable naming a font file to use instead of resolution
+FONT_ENV_VAR = 'MTS_CONVERTER_FONT'
+
+# Folder next to the program holding bundled fonts
+BUNDLED_FONT_DIR = 'fonts'
+FONT_EXTENSIONS = ('.ttf', '.otf', '.ttc')
+
+# File (inside the data directory) remembering the resolved font
+FONT_CACHE_FILE = 'font.json'
+
+# Sans-serif fonts with clear digits, by platform, most preferred first
+SYSTEM_FONTS = {
+    'win32': [
+        r'{windir}\Fonts\arial.ttf',
+        r'{windir}\Fonts\segoeui.ttf',
+        r'{windir}\Fonts\tahoma.ttf',
+        r'{windir}\Fonts\verdana.ttf',
+    ],
+    'darwin': [
+        '/System/Library/Fonts/Supplemental/Arial.ttf',
+        '/Library/Fonts/Arial.ttf',
+        '/System/Library/Fonts/Helvetica.ttc',
+        '/System/Library/Fonts/SFNS.ttf',
+    ],
+    'linux': [
+        '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+        '/usr/share/fonts/dejavu/DejaVuSans.ttf',
+        '/usr/share/fonts/TTF/DejaVuSans.ttf',
+        '/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf',
+        '/usr/share/fonts/liberation/LiberationSans-Regular.ttf',
+        '/usr/share/fonts/truetype/noto/NotoSans-Regular.ttf',
+        '/usr/share/fonts/noto/NotoSans-Regular.ttf',
+    ],
+}
+
+# Seconds allowed for fc-match and for the fontconfig warm-up run
+FC_MATCH_TIMEOUT = 10
+WARM_TIMEOUT = 600
+
+_resolved: Optional[str] = None
+_resolve_lock = threading.Lock()
+
+
+def _usable(path) -> bool:
+    """Check whether a font path exists and can be written into a filter.
+
+    Paths containing a single quote cannot be quoted in a filter graph.
+    """
+    return bool(path) and "'" not in str(path) and os.path.isfile(path)
+
+
+def get_system_font_candidates() -> List[str]:
+    """Get the well-known system font paths for this platform.
+
+    Returns:
+        List of candidate font file paths, most preferred first.
+    """
+    platform_key = 'linux' if sys.platform.startswith('linux') else sys.platform
+    windir = os.environ.get('WINDIR', r'C:\Windows')
+    return [path.format(windir=windir) for path in SYSTEM_FONTS.get(platform_key, [])]
+
+
+def find_bundled_font() -> Optional[str]:
+    """Find a font bundled next to the program.
+
+    Returns:
+        Path of the first font file in BUNDLED_FONT_DIR (by name), or None.
+    """
+    font_dir = Path(get_base_path()) / BUNDLED_FONT_DIR
+    if not font_dir.is_dir():
+        return None
+    fonts = sorted(p for p in font_dir.iterdir() if p.suffix.lower() in FONT_EXTENSIONS)
+    for font in fonts:
+        if _usable(font):
+            return str(font)
+    return None
+
+
+def find_fontconfig_font() -> Optional[str]:
+    """Ask fontconfig for its default sans-serif font.
+
+    Returns:
+        Font file path, or None if fc-match is missing or fails.
+    """
+    fc_match = shutil.which('fc-match')
+    if fc_match is None:
+        return None
+    try:
+        result = subprocess.run(
+            [fc_match, '--format=%{file}', 'sans-serif'],
+            capture_output=True, text=True, timeout=FC_MATCH_TIMEOUT,
+            creationflags=get_subprocess_flags()
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    path = result.stdout.strip()
+    return path if result.returncode == 0 and _usable(path) else None
+
+
+def _read_cached_font() -> Optional[str]:
+    """Read the remembered font path, if the file still exists."""
+    try:
+        with open(os.path.join(get_data_dir(), FONT_CACHE_FILE), encoding='utf-8') as f:
+            path = json.load(f).get('path')
+    except (OSError, ValueError, AttributeError):
+        return None
+    return path if _usable(path) else None
+
+
+def _write_cached_font(path: str):
+    """Remember a resolved font path (best effort)."""
+    try:
+        with open(os.path.join(get_data_dir(), FONT_CACHE_FILE), 'w', encoding='utf-8') as f:
+            json.dump({'path': path}, f)
+    except OSError:
+        pass
+
+
+def find_font() -> Optional[str]:
+    """Look for a font without using the remembered path.
+
+    Returns:
+        Font file path, or None if no font was found.
+    """
+    override = os.environ.get(FONT_ENV_VAR)
+    if _usable(override):
+        return override
+    bundled = find_bundled_font()
+    if bundled:
+        return bundled
+    for candidate in get_system_font_candidates():
+        if _usable(candidate):
+            return candidate
+    return find_fontconfig_font()
+
+
+def get_font_file() -> Optional[str]:
+    """Get the font file for the timestamp, resolving it at most once.
+
+    The environment override and bundled fonts always win. Otherwise the
+    path remembered in the data directory is used while the file exists,
+    and a new resolution is remembered for later runs.
+
+    Returns:
+        Font file path, or None to leave the choice to fontconfig.
+    """
+    global _resolved
+    with _resolve_lock:
+        if _resolved and _usable(_resolved):
+            return _resolved
+        override = os.environ.get(FONT_ENV_VAR)
+        path = (
+            (override if _usable(override) else None)
+            or find_bundled_font()
+            or _read_cached_font()
+        )
+        if path is None:
+            path = find_font()
+            if path is not None:
+                _write_cached_font(path)
+        _resolved = path
+        return path
+
+
+def clear_font_cache():
+    """Forget the resolved font, in memory and in the data directory."""
+    global _resolved
+    with _resolve_lock:
+        _resolved = None
+        try:
+            os.remove(os.path.join(get_data_dir(), FONT_CACHE_FILE))
+        except OSError:
+            pass
+
+
+def escape_font_path(path: str) -> str:
+    """Quote a font path for a drawtext option.
+
+    Backslashes become forward slashes (FFmpeg accepts them on Windows)
+    and the drive colon is escaped from the option parser.
+
+    Args:
+        path: Font file path.
+
+    Returns:
+        Quoted option value, e.g. 'C\\:/Windows/Fonts/arial.ttf'.
+    """
+    return "'" + str(path).replace('\\', '/').replace(':', '\\:') + "'"
+
+
+def get_fontfile_option(font_file: Optional[str] = None) -> str:
+    """Get the drawtext fontfile option for the resolved font.
+
+    Args:
+        font_file: Font path to use (default: get_font_file()).
+
+    Returns:
+        'fontfile=...:' ready to prefix the other drawtext options, or ''
+        if no font was found.
+    """
+    font_file = font_file or get_font_file()
+    if not font_file:
+        return ''
+    return f"fontfile={escape_font_path(font_file)}:"
+
+
+def warm_font_cache(ffmpeg: Optional[str] = None) -> float:
+    """Build the fontconfig cache ahead of the first conversion.
+
+    Runs fc-cache where it is installed and one tiny drawtext render with
+    FFmpeg's own fontconfig, which builds the cache a fresh Windows
+    machine would otherwise build during the first conversion. Only
+    needed when no font file can be resolved; meant for install scripts.
+
+    Args:
+        ffmpeg: Path to the ffmpeg executable (default: get_ffmpeg_path()).
+
+    Returns:
+        Seconds the warm-up took.
+    """
+    started = time.perf_counter()
+    fc_cache = shutil.which('fc-cache')
+    commands = [[fc_cache]] if fc_cache else []
+    commands.append([
+        ffmpeg or get_ffmpeg_path(), '-v', 'error',
+        '-f', 'lavfi', '-i', 'color=c=black:s=64x64:d=0.04',
+        '-vf', "drawtext=text='0'", '-frames:v', '1', '-f', 'null', '-'
+    ])
+    for cmd in commands:
+        try:
+            subprocess.run(
+                cmd, capture_output=True, timeout=WARM_TIMEOUT,
+                creationflags=get_subprocess_flags()
+            )
+        except (OSError, subprocess.SubprocessError):
+            pass
+    return time.perf_counter() - started
+
+
+def main():
+    """Main entry point: show the resolved font, optionally pre-warm."""
+    parser = argparse.ArgumentParser(description='Resolve the timestamp font')
+    parser.add_argument(
+        '--warm',
+        action='store_true',
+        help='Pre-warm the fontconfig cache (for install scripts)'
+    )
+    parser.add_argument(
+        '--refresh',
+        action='store_true',
+        help='Forget the remembered font and resolve it again'
+    )
+    args = parser.parse_args()
+
+    if args.refresh:
+        clear_font_cache()
+    font_file = get_font_file()
+    if font_file:
+        print(f"Timestamp font: {font_file}")
+    else:
+        print("No font file found; FFmpeg will ask fontconfig on every launch.")
+        print(f"Put a .ttf file in '{BUNDLED_FONT_DIR}' or set {FONT_ENV_VAR}.")
+    if args.warm:
+        print(f"fontconfig cache warmed in {warm_font_cache():.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,566 @@
+#!/usr/bin/env python3
+"""
+Wall-clock catalog of recorded footage.
+
+Answers "what footage exists of 2024-12-15 between 14:20 and 14:50,
+across all cameras" without opening any clip. Every clip converted with
+--catalog, or found by a scan, is recorded in a SQLite database in the
+per-user data directory: its source and output paths, the camera folder
+it came from, when its recording started and ended, and checksums.
+
+Recording times are the camera's wall clock (the DPM timestamp, or the
+AVCHD playlist's recording time) and the end is the start plus the clip's
+duration, read from the AVCHD navigation files or the stream's first and
+last PTS, so building the catalog needs no FFmpeg and no decoding.
+
+Clips are found by overlap: a clip matches when it starts before the end
+of the range and ends after its start. An index on (start, end) and the
+length of the longest clip bound the search to the clips starting in
+[range start - longest clip, range end], so a lookup touches only the
+matching clips and their neighbours however large the catalog grows.
+
+Usage:
+    python footage_catalog.py scan <folders or files> [...]
+    python footage_catalog.py query "2024-12-15 14:20" 14:50 [--camera NAME]
+    python footage_catalog.py status
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from avchd_index import lookup_clip
+from conversion_cache import fingerprint_file
+from ffmpeg_utils import get_data_dir
+from mp4_verify import get_source_summary
+from mts_converter import extract_avchd_timestamp
+from time_range import TIME_OF_DAY_FORMATS, WALL_CLOCK_FORMATS
+
+
+# Database file (inside the data directory)
+CATALOG_FILE = 'catalog.db'
+
+# Recording times are stored as seconds of the camera's wall clock since
+# this epoch (no time zone: cameras record local time)
+CLOCK_EPOCH = datetime(1970, 1, 1)
+
+# Folders of an AVCHD tree; a clip's camera folder is the one above them
+AVCHD_FOLDERS = ('STREAM', 'BDMV', 'AVCHD', 'PRIVATE')
+
+# Clips read at once while scanning
+DEFAULT_SCAN_WORKERS = 8
+
+# Bytes read per block when hashing an output
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Accepted date formats for a whole-day query
+DATE_FORMATS = ('%Y-%m-%d',)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS clips (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source_path TEXT NOT NULL UNIQUE,
+    output_path TEXT,
+    camera TEXT NOT NULL,
+    start_time REAL NOT NULL,
+    end_time REAL NOT NULL,
+    duration REAL NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    source_checksum TEXT NOT NULL,
+    output_checksum TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_clips_interval ON clips (start_time, end_time);
+CREATE INDEX IF NOT EXISTS idx_clips_camera ON clips (camera, start_time, end_time);
+CREATE INDEX IF NOT EXISTS idx_clips_duration ON clips (duration);
+"""
+
+_UPSERT = """
+INSERT INTO clips (source_path, output_path, camera, start_time, end_time, duration,
+                   size, mtime_ns, source_checksum, output_checksum, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (source_path) DO UPDATE SET
+    output_path = COALESCE(excluded.output_path, clips.output_path),
+    camera = excluded.camera,
+    start_time = excluded.start_time,
+    end_time = excluded.end_time,
+    duration = excluded.duration,
+    size = excluded.size,
+    mtime_ns = excluded.mtime_ns,
+    source_checksum = excluded.source_checksum,
+    output_checksum = COALESCE(excluded.output_checksum, clips.output_checksum),
+    updated_at = excluded.updated_at
+"""
+
+
+@dataclass
+class CatalogClip:
+    """One clip in the catalog.
+
+    Attributes:
+        source_path: Path to the source MTS file.
+        output_path: Path to its converted output, if converted.
+        camera: Camera (card) folder the clip came from.
+        start: Recording time of the first frame.
+        end: Recording time at the end of the clip.
+        source_checksum: Fingerprint of the source (size, DPM time and a
+                         hash of its first and last megabyte).
+        output_checksum: SHA-256 of the output, if converted.
+    """
+    source_path: Path
+    output_path: Optional[Path]
+    camera: str
+    start: datetime
+    end: datetime
+    source_checksum: str
+    output_checksum: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        """Clip duration in seconds."""
+        return (self.end - self.start).total_seconds()
+
+    def offsets(self, start: datetime, end: datetime) -> Tuple[float, float]:
+        """Get the part of the clip that falls in a time range.
+
+        Args:
+            start: Range start.
+            end: Range end.
+
+        Returns:
+            Tuple of (from, to) media offsets in seconds into the clip.
+        """
+        first = max(0.0, (start - self.start).total_seconds())
+        last = min(self.duration, (end - self.start).total_seconds())
+        return first, last
+
+
+def to_clock_seconds(when: datetime) -> float:
+    """Convert a recording time to catalog seconds (see CLOCK_EPOCH)."""
+    return (when - CLOCK_EPOCH).total_seconds()
+
+
+def from_clock_seconds(seconds: float) -> datetime:
+    """Convert catalog seconds back to a recording time."""
+    return CLOCK_EPOCH + timedelta(seconds=seconds)
+
+
+def get_camera_folder(source_path) -> str:
+    """Get the camera folder a clip came from.
+
+    For a clip in an AVCHD tree this is the folder holding the tree (the
+    copied card); otherwise it is the clip's own folder.
+
+    Args:
+        source_path: Path to the MTS file.
+
+    Returns:
+        Folder name ('' for a clip at a filesystem root).
+    """
+    folder = Path(source_path).parent
+    while folder.name.upper() in AVCHD_FOLDERS and folder.parent != folder:
+        folder = folder.parent
+    return folder.name
+
+
+def hash_file(path, block_size: int = HASH_BLOCK_SIZE) -> str:
+    """Compute the SHA-256 of a file.
+
+    Args:
+        path: Path to the file.
+        block_size: Bytes read per block.
+
+    Returns:
+        Hex digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_recording_span(source_path) -> Optional[Tuple[datetime, float]]:
+    """Read when a clip's recording started and how long it is.
+
+    Uses the AVCHD navigation files where the clip is in an AVCHD tree,
+    otherwise the DPM timestamp and the stream's first and last PTS.
+
+    Args:
+        source_path: Path to the MTS file.
+
+    Returns:
+        Tuple of (recording start, duration in seconds), or None if the
+        clip has no recording time.
+    """
+    clip = lookup_clip(source_path)
+    start = clip.recorded if clip is not None and clip.recorded else None
+    if start is None:
+        start = extract_avchd_timestamp(str(source_path))
+    if start is None:
+        return None
+    if clip is not None and clip.duration > 0:
+        duration = clip.duration
+    else:
+        duration = get_source_summary(source_path)[0] or 0.0
+    return start, duration
+
+
+def parse_query_time(value: str, day: Optional[datetime] = None) -> datetime:
+    """Parse a query bound.
+
+    Args:
+        value: Date and time ('2024-12-15 14:20[:SS]'), or a time of day
+               ('14:50[:SS]') when day is given.
+        day: Date for a time of day (the range start's).
+
+    Returns:
+        datetime.
+
+    Raises:
+        ValueError: If the value cannot be parsed.
+    """
+    text = value.strip()
+    for fmt in WALL_CLOCK_FORMATS + DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            pass
+    if day is not None:
+        for fmt in TIME_OF_DAY_FORMATS:
+            try:
+                return datetime.combine(day.date(), datetime.strptime(text, fmt).time())
+            except ValueError:
+                pass
+    raise ValueError(
+        f"Invalid time '{value}'. Use 'YYYY-MM-DD HH:MM[:SS]', or HH:MM[:SS] for the end"
+    )
+
+
+def _row_to_clip(row) -> CatalogClip:
+    """Build a CatalogClip from a database row."""
+    return CatalogClip(
+        source_path=Path(row['source_path']),
+        output_path=Path(row['output_path']) if row['output_path'] else None,
+        camera=row['camera'],
+        start=from_clock_seconds(row['start_time']),
+        end=from_clock_seconds(row['end_time']),
+        source_checksum=row['source_checksum'],
+        output_checksum=row['output_checksum']
+    )
+
+
+class FootageCatalog:
+    """SQLite catalog of clips by recording time.
+
+    Every operation opens its own connection, so a FootageCatalog can be
+    shared between threads and processes.
+
+    Attributes:
+        path: Path to the SQLite database.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        """Initialize FootageCatalog, creating the database if needed.
+
+        Args:
+            path: Optional database path. Defaults to CATALOG_FILE in the
+                  per-user data directory.
+        """
+        self.path = Path(path) if path else Path(get_data_dir()) / CATALOG_FILE
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection with row access by name for one transaction.
+
+        The transaction is committed (or rolled back on error) and the
+        connection closed when the block exits.
+        """
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _read_entry(self, source_path: Path, output_path: Optional[Path] = None) -> Optional[tuple]:
+        """Read a clip's catalog row values from disk.
+
+        Returns:
+            Values for _UPSERT, or None if the clip has no recording time.
+        """
+        span = read_recording_span(source_path)
+        if span is None:
+            return None
+        start, duration = span
+        stat = source_path.stat()
+        return (
+            str(source_path),
+            str(output_path) if output_path else None,
+            get_camera_folder(source_path),
+            to_clock_seconds(start),
+            to_clock_seconds(start) + duration,
+            duration,
+            stat.st_size,
+            stat.st_mtime_ns,
+            fingerprint_file(source_path),
+            hash_file(output_path) if output_path and output_path.is_file() else None,
+            time.time()
+        )
+
+    def record(self, source_path, output_path=None) -> bool:
+        """Add or update a clip, with the output it was converted to.
+
+        Args:
+            source_path: Path to the source MTS file.
+            output_path: Optional path to its converted output. An existing
+                         output is kept when this is None.
+
+        Returns:
+            True if the clip was recorded, False if it has no recording time.
+
+        Raises:
+            OSError: If the source (or output) cannot be read.
+        """
+        source_path = Path(source_path).resolve()
+        output_path = Path(output_path).resolve() if output_path else None
+        entry = self._read_entry(source_path, output_path)
+        if entry is None:
+            return False
+        with self._connect() as conn:
+            conn.execute(_UPSERT, entry)
+        return True
+
+    def scan(self, paths, max_workers: int = DEFAULT_SCAN_WORKERS,
+             force: bool = False) -> Tuple[int, int, int]:
+        """Add every MTS file below some folders (or given directly).
+
+        Clips already in the catalog with the same size and modification
+        time are skipped unless force is set.
+
+        Args:
+            paths: Folders (searched recursively) and MTS files.
+            max_workers: Clips read at once.
+            force: Re-read clips that look unchanged.
+
+        Returns:
+            Tuple of (recorded, unchanged, unreadable or undated) counts.
+        """
+        clips = []
+        for path in map(Path, paths):
+            if path.is_dir():
+                clips.extend(p for p in sorted(path.rglob('*')) if p.suffix.lower() == '.mts')
+            elif path.suffix.lower() == '.mts' and path.is_file():
+                clips.append(path)
+        clips = list(dict.fromkeys(p.resolve() for p in clips))
+
+        with self._connect() as conn:
+            known = {
+                row['source_path']: (row['size'], row['mtime_ns'])
+                for row in conn.execute("SELECT source_path, size, mtime_ns FROM clips")
+            }
+        todo = []
+        for clip in clips:
+            stat = clip.stat()
+            if force or known.get(str(clip)) != (stat.st_size, stat.st_mtime_ns):
+                todo.append(clip)
+
+        def read(clip):
+            try:
+                return self._read_entry(clip)
+            except OSError:
+                return None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            entries = list(executor.map(read, todo))
+        recorded = [entry for entry in entries if entry is not None]
+        with self._connect() as conn:
+            conn.executemany(_UPSERT, recorded)
+        return len(recorded), len(clips) - len(todo), len(todo) - len(recorded)
+
+    def query(self, start: datetime, end: datetime, camera: Optional[str] = None) -> List[CatalogClip]:
+        """Find the clips recorded during a time range.
+
+        Args:
+            start: Range start.
+            end: Range end.
+            camera: Optional camera folder to limit the search to.
+
+        Returns:
+            CatalogClip objects overlapping the range, by recording start.
+        """
+        low, high = to_clock_seconds(start), to_clock_seconds(end)
+        with self._connect() as conn:
+            longest = conn.execute("SELECT MAX(duration) FROM clips").fetchone()[0] or 0.0
+            sql = ("SELECT * FROM clips WHERE start_time >= ? AND start_time < ? "
+                   "AND end_time > ?")
+            params = [low - longest, high, low]
+            if camera is not None:
+                sql += " AND camera = ?"
+                params.append(camera)
+            rows = conn.execute(sql + " ORDER BY start_time, camera", params).fetchall()
+        return [_row_to_clip(row) for row in rows]
+
+    def count(self) -> int:
+        """Get the number of clips in the catalog."""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM clips").fetchone()[0]
+
+    def get_cameras(self) -> List[str]:
+        """Get the camera folders in the catalog, sorted by name."""
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute("SELECT DISTINCT camera FROM clips ORDER BY camera")]
+
+
+def record_results(catalog: FootageCatalog, results) -> int:
+    """Record the finished conversions of a batch in a catalog.
+
+    Failed conversions and proxies are skipped. Cataloguing is best
+    effort: a clip that cannot be read or recorded is left out without
+    failing its conversion.
+
+    Args:
+        catalog: FootageCatalog to record in.
+        results: BatchResult objects (None entries are skipped).
+
+    Returns:
+        Number of clips recorded.
+    """
+    recorded = 0
+    for result in results:
+        if result is None or not result.success or result.tier == 'proxy':
+            continue
+        try:
+            recorded += catalog.record(result.input_file, result.output_file)
+        except (OSError, sqlite3.Error):
+            pass
+    return recorded
+
+
+def _format_offset(seconds: float) -> str:
+    """Format a media offset as H:MM:SS."""
+    return str(timedelta(seconds=round(seconds)))
+
+
+def print_query(clips: List[CatalogClip], start: datetime, end: datetime):
+    """Print the clips found for a time range as a table.
+
+    Args:
+        clips: Result of FootageCatalog.query.
+        start: Range start.
+        end: Range end.
+    """
+    print(f"{len(clips)} clip(s) recorded between {start:%Y-%m-%d %H:%M:%S} "
+          f"and {end:%Y-%m-%d %H:%M:%S}")
+    if not clips:
+        return
+    width = max(len(clip.camera) for clip in clips)
+    for clip in clips:
+        first, last = clip.offsets(start, end)
+        print(f"  {clip.camera:<{width}}  {clip.start:%Y-%m-%d %H:%M:%S} - {clip.end:%H:%M:%S}  "
+              f"[{_format_offset(first)}-{_format_offset(last)} in clip]  {clip.source_path}")
+        if clip.output_path:
+            print(f"  {'':<{width}}  output: {clip.output_path}")
+
+
+def main():
+    """Main entry point for scanning and querying the catalog."""
+    parser = argparse.ArgumentParser(description='Footage catalog by recording time')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    scan_parser = subparsers.add_parser('scan', help='Add the clips below folders to the catalog')
+    scan_parser.add_argument('paths', nargs='+', help='Folders (searched recursively) or MTS files')
+    scan_parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Re-read clips already in the catalog'
+    )
+
+    query_parser = subparsers.add_parser('query', help='Find the footage of a time range')
+    query_parser.add_argument('start', help="Range start, e.g. '2024-12-15 14:20'")
+    query_parser.add_argument(
+        'end',
+        nargs='?',
+        default=None,
+        help="Range end: date and time, or a time on the start's day (default: "
+             "the end of the start's day when start is a date, else the start)"
+    )
+    query_parser.add_argument('--camera', default=None, help='Only this camera folder')
+    query_parser.add_argument('--json', action='store_true', help='Print the clips as JSON')
+
+    subparsers.add_parser('status', help='Show the catalog size and cameras')
+
+    args = parser.parse_args()
+    catalog = FootageCatalog()
+
+    if args.command == 'status':
+        cameras = catalog.get_cameras()
+        print(f"Catalog: {catalog.path}")
+        print(f"{catalog.count()} clip(s) from {len(cameras)} camera folder(s)")
+        for camera in cameras:
+            print(f"  {camera}")
+        return
+
+    if args.command == 'scan':
+        started = time.perf_counter()
+        recorded, unchanged, skipped = catalog.scan(args.paths, force=args.force)
+        print(f"Recorded {recorded} clip(s), {unchanged} unchanged, {skipped} without a "
+              f"recording time or unreadable ({time.perf_counter() - started:.1f}s)")
+        return
+
+    try:
+        start = parse_query_time(args.start)
+        if args.end is not None:
+            end = parse_query_time(args.end, start)
+        elif len(args.start.strip()) <= len('YYYY-MM-DD'):
+            end = start + timedelta(days=1)
+        else:
+            end = start
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(2)
+    if end < start:
+        print("Error: the range ends before it starts.")
+        sys.exit(2)
+
+    started = time.perf_counter()
+    # A single instant matches the clips running at that moment
+    clips = catalog.query(start, max(end, start + timedelta(microseconds=1)), args.camera)
+    elapsed = time.perf_counter() - started
+
+    if args.json:
+        print(json.dumps([
+            {
+                'camera': clip.camera,
+                'start': clip.start.isoformat(),
+                'end': clip.end.isoformat(),
+                'offsets': clip.offsets(start, end),
+                'source': str(clip.source_path),
+                'output': str(clip.output_path) if clip.output_path else None,
+                'source_checksum': clip.source_checksum,
+                'output_checksum': clip.output_checksum,
+            }
+            for clip in clips
+        ], indent=2))
+        return
+    print_query(clips, start, end)
+    print(f"(searched {catalog.count()} clips in {elapsed * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Segmented HLS output for streaming converted footage.
+
+A multi-gigabyte MP4 served over HTTP has to be fetched up to its index
+before a player can seek it. HLS output writes the video as short segments
+listed in an .m3u8 playlist instead, so playback starts once the first
+segment has arrived and a seek fetches only the segment it lands in.
+
+Keyframes are forced at every segment boundary (and scene-cut keyframes
+are turned off), so every segment has the same length and starts with a
+keyframe, and all renditions of a ladder switch at the same points.
+"""
+
+from pathlib import Path
+from typing import List, Optional
+
+from mts_converter import (
+    AUDIO_CODECS,
+    DEFAULT_AUDIO_CODEC,
+    DEFAULT_CRF,
+    DEFAULT_HLS_SEGMENT_TYPE,
+    DEFAULT_PRESET,
+    HLS_SEGMENT_SECONDS,
+    HLS_SEGMENT_TYPES,
+    OutputSpec,
+    build_output_chain,
+    build_split_graph,
+    get_seek_args
+)
+
+
+# File extension of media segments by segment type
+SEGMENT_EXTENSIONS = {
+    'fmp4': '.m4s',
+    'mpegts': '.ts',
+}
+
+
+def get_rendition_names(ladder: List[str]) -> List[str]:
+    """Get the names of a ladder's renditions, as used in file names.
+
+    Args:
+        ladder: Resolution presets, highest first.
+
+    Returns:
+        One name per rendition ('original' for no scaling).
+    """
+    return [resolution or 'original' for resolution in ladder]
+
+
+def get_segment_pattern(playlist_path: Path, segment_type: str, rendition: Optional[str] = None) -> str:
+    """Get the FFmpeg file pattern of a playlist's media segments.
+
+    Args:
+        playlist_path: Path of the .m3u8 playlist.
+        segment_type: One of HLS_SEGMENT_TYPES.
+        rendition: Optional rendition field ('%v' for a ladder).
+
+    Returns:
+        Segment path pattern next to the playlist, e.g. 'clip_00001.m4s'.
+    """
+    playlist_path = Path(playlist_path)
+    stem = playlist_path.stem if rendition is None else f"{playlist_path.stem}_{rendition}"
+    return str(playlist_path.with_name(f"{stem}_%05d{SEGMENT_EXTENSIONS[segment_type]}"))
+
+
+def build_hls_command(ffmpeg, input_path, playlist_path, filming_time, font_size=32,
+                      position=None, resolution=None, ladder=None, segment_type=None,
+                      segment_seconds=HLS_SEGMENT_SECONDS, audio_codec=None, scaler=None,
+                      deinterlace=False, filter_threads=None, threads=None, preset=None,
+                      crf=None, clock_segments=None, has_audio=True, start_time=None,
+                      duration=None):
+    """Build the FFmpeg command writing a timestamped HLS output.
+
+    A single rendition writes a media playlist at playlist_path. A ladder
+    decodes once, splits the frames into one scaled and timestamped branch
+    per rendition and writes a master playlist at playlist_path that lists
+    one media playlist per rendition (e.g. 'clip_720p.m3u8').
+
+    Args:
+        ffmpeg: Path to the ffmpeg executable.
+        input_path: Path to the input MTS file.
+        playlist_path: Path of the .m3u8 playlist to write.
+        filming_time: datetime of the first frame of the recording.
+        font_size: Timestamp font size at FONT_REFERENCE_HEIGHT.
+        position: Timestamp position name.
+        resolution: Resolution preset of a single rendition.
+        ladder: Optional list of resolution presets, one per rendition.
+        segment_type: One of HLS_SEGMENT_TYPES (default: fMP4).
+        segment_seconds: Segment length in seconds.
+        audio_codec: Audio handling (see AUDIO_CODECS).
+        scaler: Optional scaler algorithm from SCALERS.
+        deinterlace: If True, deinterlace once before scaling.
+        filter_threads: Optional thread count for the filter graph.
+        threads: Encoder thread count (default: all cores).
+        preset: x264 preset (default: DEFAULT_PRESET).
+        crf: x264 CRF (default: DEFAULT_CRF).
+        clock_segments: Optional list of clock segments.
+        has_audio: Whether the source has an audio stream. Each rendition
+                   of a ladder carries its own copy of it.
+        start_time: Optional media offset to seek to on the input side.
+        duration: Optional length in seconds to convert.
+
+    Returns:
+        FFmpeg command as a list of arguments.
+
+    Raises:
+        ValueError: If segment_type is not in HLS_SEGMENT_TYPES.
+    """
+    if segment_type is None:
+        segment_type = DEFAULT_HLS_SEGMENT_TYPE
+    if segment_type not in HLS_SEGMENT_TYPES:
+        raise ValueError(
+            f"Invalid segment type '{segment_type}'. "
+            f"Valid options: {', '.join(HLS_SEGMENT_TYPES)}"
+        )
+    playlist_path = Path(playlist_path)
+    # Repeated presets would write to the same files
+    renditions = list(dict.fromkeys(ladder)) if ladder else [resolution]
+
+    chains = [
+        build_output_chain(
+            OutputSpec(str(playlist_path), resolution=rendition, font_size=font_size,
+                       position=position),
+            filming_time, scaler, clock_segments
+        )
+        for rendition in renditions
+    ]
+
+    thread_args = []
+    if filter_threads:
+        thread_args = ["-filter_complex_threads", str(filter_threads)]
+
+    cmd = [ffmpeg, *thread_args, *get_seek_args(start_time, duration), "-i", str(input_path),
+           "-filter_complex", build_split_graph(chains, deinterlace)]
+    for index in range(len(renditions)):
+        cmd += ["-map", f"[o{index}]"]
+        if len(renditions) == 1:
+            cmd += ["-map", "0:a?"]
+        elif has_audio:
+            cmd += ["-map", "0:a:0"]
+
+    cmd += [
+        "-c:v", "libx264",
+        "-preset", preset or DEFAULT_PRESET,
+        "-crf", str(crf if crf is not None else DEFAULT_CRF),
+        "-threads", str(threads or 0),
+        # Every segment starts on a keyframe; scene cuts add none in between
+        "-force_key_frames", f"expr:gte(t,n_forced*{segment_seconds})",
+        "-sc_threshold", "0",
+        *AUDIO_CODECS[audio_codec or DEFAULT_AUDIO_CODEC],
+        "-f", "hls",
+        "-hls_time", str(segment_seconds),
+        "-hls_playlist_type", "vod",
+        "-hls_flags", "independent_segments",
+        "-hls_segment_type", segment_type,
+    ]
+
+    if len(renditions) == 1:
+        if segment_type == 'fmp4':
+            cmd += ["-hls_fmp4_init_filename", f"{playlist_path.stem}_init.mp4"]
+        cmd += ["-hls_segment_filename", get_segment_pattern(playlist_path, segment_type),
+                "-y", str(playlist_path)]
+        return cmd
+
+    streams = []
+    for index, name in enumerate(get_rendition_names(renditions)):
+        audio = f"a:{index}," if has_audio else ""
+        streams.append(f"v:{index},{audio}name:{name}")
+    if segment_type == 'fmp4':
+        cmd += ["-hls_fmp4_init_filename", f"{playlist_path.stem}_%v_init.mp4"]
+    cmd += [
+        "-var_stream_map", " ".join(streams),
+        "-master_pl_name", playlist_path.name,
+        "-hls_segment_filename", get_segment_pattern(playlist_path, segment_type, '%v'),
+        "-y", str(playlist_path.with_name(f"{playlist_path.stem}_%v.m3u8"))
+    ]
+    return cmd
+
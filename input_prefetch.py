@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Input prefetching for batches read from slow sources.
+
+When clips sit on an SD card reader or SMB share, FFmpeg's demuxer stalls
+on small reads and the encode slows down. InputPrefetcher copies the next
+files of a batch to local disk with large sequential reads while the
+current file encodes, so the encoder reads its input from fast storage.
+
+Copies are limited by a byte budget and deleted once the file has been
+used. A file that does not fit the budget at all is read through once
+instead, so the OS page cache holds what it can of it.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+
+# Default bound on prefetched copies held on local disk (GB)
+DEFAULT_PREFETCH_BUDGET_GB = 8
+
+# Files copied ahead of the one being converted
+DEFAULT_PREFETCH_DEPTH = 2
+
+# Read size for prefetch copies; large reads keep card readers and SMB
+# shares streaming instead of seeking
+PREFETCH_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class InputPrefetcher:
+    """Copies upcoming batch inputs to local disk in the background.
+
+    The prefetcher follows a schedule: the input files in the order the
+    batch will use them. Each acquire() moves the window forward, and the
+    background thread copies the next depth files of the window.
+
+    Attributes:
+        prefetch_dir: Private directory holding the copies.
+        budget_bytes: Maximum bytes of copies held at once.
+        depth: Number of files copied ahead.
+        used_bytes: Bytes of copies currently held.
+    """
+
+    def __init__(
+        self,
+        files: List[Path],
+        local_dir: Optional[Path] = None,
+        budget_gb: float = DEFAULT_PREFETCH_BUDGET_GB,
+        depth: int = DEFAULT_PREFETCH_DEPTH,
+        chunk_size: int = PREFETCH_CHUNK_SIZE
+    ):
+        """Initialize InputPrefetcher and start its copy thread.
+
+        Args:
+            files: Input files in the order they will be acquired. A file
+                   may appear more than once.
+            local_dir: Local directory for copies (default: system temp
+                       directory). A private subdirectory is created in it.
+            budget_gb: Maximum gigabytes of copies held at once
+                       (default: DEFAULT_PREFETCH_BUDGET_GB).
+            depth: Files copied ahead of the current one
+                   (default: DEFAULT_PREFETCH_DEPTH).
+            chunk_size: Read size in bytes (default: PREFETCH_CHUNK_SIZE).
+        """
+        if local_dir is not None:
+            Path(local_dir).mkdir(parents=True, exist_ok=True)
+        self.prefetch_dir = Path(tempfile.mkdtemp(prefix='prefetch_', dir=local_dir))
+        self.budget_bytes = int(budget_gb * 1024 ** 3)
+        self.depth = depth
+        self.chunk_size = chunk_size
+        self.used_bytes = 0
+        self._schedule = [Path(f) for f in files]
+        self._next = 0
+        self._started = False
+        self._copies: Dict[Path, Path] = {}
+        self._sizes: Dict[Path, int] = {}
+        self._count = 0
+        self._in_use: Dict[Path, int] = {}
+        self._skipped: Set[Path] = set()
+        self._copying: Optional[Path] = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._prefetch_loop, daemon=True)
+        self._thread.start()
+
+    def acquire(self, input_file: Path) -> Path:
+        """Get the path to read an input from and advance the window.
+
+        Waits if the file is being copied right now.
+
+        Args:
+            input_file: Input file about to be converted.
+
+        Returns:
+            Path of the local copy, or input_file if it was not prefetched.
+            Pass the same input_file to release() when done.
+        """
+        input_file = Path(input_file)
+        with self._condition:
+            self._advance(input_file)
+            while self._copying == input_file:
+                self._condition.wait()
+            self._in_use[input_file] = self._in_use.get(input_file, 0) + 1
+            self._prune()
+            self._condition.notify_all()
+            return self._copies.get(input_file, input_file)
+
+    def release(self, input_file: Path):
+        """Mark an acquired input as done, deleting its copy if not needed soon.
+
+        Args:
+            input_file: File passed to acquire().
+        """
+        input_file = Path(input_file)
+        with self._condition:
+            count = self._in_use.get(input_file, 0) - 1
+            if count > 0:
+                self._in_use[input_file] = count
+            else:
+                self._in_use.pop(input_file, None)
+            self._prune()
+            self._condition.notify_all()
+
+    def close(self):
+        """Stop prefetching and delete every copy."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+        shutil.rmtree(self.prefetch_dir, ignore_errors=True)
+        self._copies.clear()
+        self._sizes.clear()
+        self.used_bytes = 0
+
+    def _advance(self, input_file: Path):
+        """Move the window past the next schedule entry for input_file."""
+        self._started = True
+        for index in range(self._next, len(self._schedule)):
+            if self._schedule[index] == input_file:
+                self._next = index + 1
+                return
+
+    def _window(self) -> List[Path]:
+        """Get the upcoming files that should be held locally."""
+        start = self._next if self._started else 1
+        return self._schedule[start:start + self.depth]
+
+    def _prune(self):
+        """Delete copies that are neither in use nor coming up soon."""
+        window = self._window()
+        for input_file in list(self._copies):
+            if input_file not in self._in_use and input_file not in window:
+                self.used_bytes -= self._sizes.pop(input_file)
+                _remove(self._copies.pop(input_file))
+
+    def _next_target(self) -> Optional[Path]:
+        """Pick the next file of the window that still needs fetching."""
+        for input_file in self._window():
+            if input_file not in self._copies and input_file not in self._skipped:
+                return input_file
+        return None
+
+    def _prefetch_loop(self):
+        """Copy window files to local disk until closed."""
+        while True:
+            with self._condition:
+                while True:
+                    if self._closed:
+                        return
+                    target = self._next_target()
+                    if target is not None:
+                        try:
+                            size = target.stat().st_size
+                        except OSError:
+                            self._skipped.add(target)
+                            continue
+                        # Wait for room unless the file could never fit
+                        if size > self.budget_bytes or self.used_bytes + size <= self.budget_bytes:
+                            break
+                    self._condition.wait()
+                copy = None
+                if size <= self.budget_bytes:
+                    # Only real copies make acquire() wait; a page cache
+                    # read-through is not worth waiting for
+                    self._copying = target
+                    self.used_bytes += size
+                    self._count += 1
+                    copy = self.prefetch_dir / f"{self._count}_{target.name}"
+
+            completed = self._copy(target, copy)
+
+            with self._condition:
+                self._copying = None
+                if copy is not None:
+                    if completed:
+                        self._copies[target] = copy
+                        self._sizes[target] = size
+                    else:
+                        self.used_bytes -= size
+                        _remove(copy)
+                if not completed or copy is None:
+                    self._skipped.add(target)
+                self._prune()
+                self._condition.notify_all()
+
+    def _copy(self, source: Path, destination: Optional[Path]) -> bool:
+        """Read source sequentially, writing it to destination if given.
+
+        With no destination the data is read and discarded, which leaves
+        it in the OS page cache.
+
+        Returns:
+            True if the whole file was read (and written).
+        """
+        buffer = bytearray(self.chunk_size)
+        view = memoryview(buffer)
+        try:
+            with open(source, 'rb', buffering=0) as src:
+                if hasattr(os, 'posix_fadvise'):
+                    os.posix_fadvise(src.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                with (open(destination, 'wb') if destination else open(os.devnull, 'wb')) as dst:
+                    while not self._closed:
+                        count = src.readinto(buffer)
+                        if not count:
+                            return True
+                        dst.write(view[:count])
+        except OSError:
+            pass
+        return False
+
+
+def _remove(path: Path):
+    """Delete a file, ignoring errors.
+
+    Args:
+        path: File to delete.
+    """
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
@@ -0,0 +1,664 @@
+#!/usr/bin/env python3
+"""
+Persistent job queue shared by the CLI, GUI and headless workers.
+
+Jobs live in a SQLite database in the per-user data directory, so every
+front end on the machine submits into, and consumes from, the same queue.
+Workers lease jobs one at a time. Leases are only granted while fewer than
+the configured number of jobs are running machine-wide, so the CPU is never
+oversubscribed however many front ends are submitting. A lease that is not
+renewed (crashed worker) expires and the job is retried, up to the job's
+max_attempts.
+
+Usage:
+    python job_queue.py worker [--workers N]
+    python job_queue.py status
+    python job_queue.py set-concurrency N
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from batch_converter import BatchResult, remove_placeholder
+from ffmpeg_utils import get_data_dir
+from mts_converter import (
+    check_ffmpeg,
+    convert_video,
+    DEFAULT_OUTPUT_FORMAT,
+    get_unique_output_path,
+    OUTPUT_EXTENSIONS
+)
+from resource_governor import create_throttle, DispatchThrottle, GOVERNORS
+
+
+# Database file (inside the data directory)
+QUEUE_FILE = 'jobs.db'
+
+# Job states
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+FINISHED_STATES = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+# Defaults for leasing and retries
+DEFAULT_CONCURRENCY = 1
+DEFAULT_LEASE_SECONDS = 60.0
+DEFAULT_MAX_ATTEMPTS = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    input_file TEXT NOT NULL,
+    output_dir TEXT,
+    output_file TEXT,
+    options TEXT NOT NULL DEFAULT '{}',
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    lease_owner TEXT,
+    lease_expires REAL,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_dispatch ON jobs (status, priority DESC, id);
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+@dataclass
+class Job:
+    """A conversion job stored in the queue.
+
+    Attributes:
+        id: Job id.
+        input_file: Path to the source MTS file.
+        output_dir: Output directory, or None for next to the source.
+        output_file: Output path once the job has completed.
+        options: convert_video keyword arguments.
+        priority: Higher priorities are leased first.
+        status: One of the JOB_* states.
+        attempts: Number of failed attempts so far.
+        max_attempts: Attempts allowed before the job is marked failed.
+        error: Last error message, if any.
+    """
+    id: int
+    input_file: Path
+    output_dir: Optional[Path]
+    output_file: Optional[Path]
+    options: Dict = field(default_factory=dict)
+    priority: int = 0
+    status: str = JOB_QUEUED
+    attempts: int = 0
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    error: Optional[str] = None
+
+    def to_result(self) -> BatchResult:
+        """Convert the job's outcome to a BatchResult.
+
+        Returns:
+            BatchResult describing the job.
+        """
+        success = self.status == JOB_DONE
+        error = None
+        if not success:
+            error = self.error or f"Job {self.status}"
+        return BatchResult(
+            input_file=self.input_file,
+            output_file=self.output_file if success else None,
+            success=success,
+            error=error
+        )
+
+
+def _row_to_job(row) -> Job:
+    """Build a Job from a database row."""
+    return Job(
+        id=row['id'],
+        input_file=Path(row['input_file']),
+        output_dir=Path(row['output_dir']) if row['output_dir'] else None,
+        output_file=Path(row['output_file']) if row['output_file'] else None,
+        options=json.loads(row['options']),
+        priority=row['priority'],
+        status=row['status'],
+        attempts=row['attempts'],
+        max_attempts=row['max_attempts'],
+        error=row['error']
+    )
+
+
+class JobQueue:
+    """SQLite-backed prioritized job queue with leases and retries.
+
+    Every operation opens its own connection, so a JobQueue can be shared
+    between threads and any number of processes can use the same file.
+
+    Attributes:
+        path: Path to the SQLite database.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        """Initialize JobQueue, creating the database if needed.
+
+        Args:
+            path: Optional database path. Defaults to QUEUE_FILE in the
+                  per-user data directory.
+        """
+        self.path = Path(path) if path else Path(get_data_dir()) / QUEUE_FILE
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with contextlib.closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection in autocommit mode with row access by name."""
+        conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def get_concurrency(self) -> int:
+        """Get the machine-wide number of jobs allowed to run at once."""
+        with contextlib.closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT value FROM settings WHERE key = 'concurrency'"
+            ).fetchone()
+        return int(row['value']) if row else DEFAULT_CONCURRENCY
+
+    def set_concurrency(self, concurrency: int):
+        """Set the machine-wide number of jobs allowed to run at once.
+
+        Args:
+            concurrency: Maximum concurrently running jobs (at least 1).
+        """
+        with contextlib.closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO settings (key, value) VALUES ('concurrency', ?)",
+                (str(max(1, concurrency)),)
+            )
+
+    def enqueue(
+        self,
+        input_file: Path,
+        output_dir: Optional[Path] = None,
+        options: Optional[Dict] = None,
+        priority: int = 0,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    ) -> int:
+        """Add a conversion job to the queue.
+
+        Args:
+            input_file: Path to the source MTS file.
+            output_dir: Optional output directory (default: next to source).
+            options: convert_video keyword arguments (JSON-serializable).
+            priority: Higher priorities are leased first (default: 0).
+            max_attempts: Attempts allowed before the job is marked failed.
+
+        Returns:
+            The new job id.
+        """
+        now = time.time()
+        with contextlib.closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (input_file, output_dir, options, priority, max_attempts,"
+                " created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    str(Path(input_file).resolve()),
+                    str(output_dir) if output_dir else None,
+                    json.dumps(options or {}),
+                    priority,
+                    max_attempts,
+                    now,
+                    now
+                )
+            )
+            return cursor.lastrowid
+
+    def lease(self, owner: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Job]:
+        """Lease the highest-priority queued job, if a run slot is free.
+
+        Expired leases are reclaimed first and count as a failed attempt.
+
+        Args:
+            owner: Identifier of the leasing worker.
+            lease_seconds: Lease duration; renew() before it runs out.
+
+        Returns:
+            The leased Job, or None if the queue is empty or the machine is
+            already running its configured number of jobs.
+        """
+        concurrency = self.get_concurrency()
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "UPDATE jobs SET attempts = attempts + 1, error = 'Lease expired',"
+                " status = CASE WHEN attempts + 1 < max_attempts THEN ? ELSE ? END,"
+                " lease_owner = NULL, lease_expires = NULL, updated_at = ?"
+                " WHERE status = ? AND lease_expires < ?",
+                (JOB_QUEUED, JOB_FAILED, now, JOB_RUNNING, now)
+            )
+            running = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ?", (JOB_RUNNING,)
+            ).fetchone()[0]
+            row = None
+            if running < concurrency:
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY priority DESC, id LIMIT 1",
+                    (JOB_QUEUED,)
+                ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, lease_owner = ?, lease_expires = ?,"
+                    " updated_at = ? WHERE id = ?",
+                    (JOB_RUNNING, owner, now + lease_seconds, now, row['id'])
+                )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        if row is None:
+            return None
+        job = _row_to_job(row)
+        job.status = JOB_RUNNING
+        return job
+
+    def renew(self, job_id: int, owner: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        """Extend a lease held by owner.
+
+        Returns:
+            True if the lease was still held and has been extended.
+        """
+        now = time.time()
+        with contextlib.closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ?"
+                " WHERE id = ? AND lease_owner = ? AND status = ?",
+                (now + lease_seconds, now, job_id, owner, JOB_RUNNING)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id: int, owner: str, output_file: Path):
+        """Mark a leased job as done.
+
+        Args:
+            job_id: Job id.
+            owner: Worker holding the lease.
+            output_file: Path of the converted file.
+        """
+        self._finish(job_id, owner, JOB_DONE, output_file=str(output_file))
+
+    def fail(self, job_id: int, owner: str, error: str):
+        """Record a failed attempt; the job is retried until max_attempts.
+
+        Args:
+            job_id: Job id.
+            owner: Worker holding the lease.
+            error: Error message.
+        """
+        now = time.time()
+        with contextlib.closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET attempts = attempts + 1, error = ?,"
+                " status = CASE WHEN attempts + 1 < max_attempts THEN ? ELSE ? END,"
+                " lease_owner = NULL, lease_expires = NULL, updated_at = ?"
+                " WHERE id = ? AND lease_owner = ?",
+                (error, JOB_QUEUED, JOB_FAILED, now, job_id, owner)
+            )
+
+    def release(self, job_id: int, owner: str):
+        """Return a leased job to the queue without counting an attempt.
+
+        Args:
+            job_id: Job id.
+            owner: Worker holding the lease.
+        """
+        self._finish(job_id, owner, JOB_QUEUED)
+
+    def _finish(self, job_id: int, owner: str, status: str, output_file: Optional[str] = None):
+        """Move a leased job to a new state and clear its lease."""
+        with contextlib.closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, output_file = COALESCE(?, output_file),"
+                " lease_owner = NULL, lease_expires = NULL, updated_at = ?"
+                " WHERE id = ? AND lease_owner = ?",
+                (status, output_file, time.time(), job_id, owner)
+            )
+
+    def cancel(self, job_ids: List[int]) -> int:
+        """Cancel jobs that have not started yet.
+
+        Args:
+            job_ids: Ids of the jobs to cancel.
+
+        Returns:
+            Number of jobs cancelled.
+        """
+        if not job_ids:
+            return 0
+        placeholders = ",".join("?" * len(job_ids))
+        with contextlib.closing(self._connect()) as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET status = ?, updated_at = ?"
+                f" WHERE status = ? AND id IN ({placeholders})",
+                (JOB_CANCELLED, time.time(), JOB_QUEUED, *job_ids)
+            )
+            return cursor.rowcount
+
+    def get_jobs(self, job_ids: List[int]) -> List[Job]:
+        """Get jobs by id, in the order given.
+
+        Args:
+            job_ids: Job ids to look up.
+
+        Returns:
+            List of Job objects (unknown ids are skipped).
+        """
+        if not job_ids:
+            return []
+        placeholders = ",".join("?" * len(job_ids))
+        with contextlib.closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT * FROM jobs WHERE id IN ({placeholders})", tuple(job_ids)
+            ).fetchall()
+        jobs = {row['id']: _row_to_job(row) for row in rows}
+        return [jobs[job_id] for job_id in job_ids if job_id in jobs]
+
+    def all_finished(self, job_ids: List[int]) -> bool:
+        """Check whether every given job has reached a final state."""
+        return all(job.status in FINISHED_STATES for job in self.get_jobs(job_ids))
+
+    def counts(self) -> Dict[str, int]:
+        """Get the number of jobs in each state."""
+        with contextlib.closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"
+            ).fetchall()
+        return {row['status']: row['n'] for row in rows}
+
+
+# Callback invoked when a worker finishes a job: callback(job, result)
+JobDone = Callable[[Job, BatchResult], None]
+
+# Callback invoked with FFmpeg progress of a running job: callback(job, stats)
+JobStats = Callable[[Job, Dict], None]
+
+
+class QueueWorker:
+    """Leases jobs from a JobQueue and converts them one at a time.
+
+    Attributes:
+        queue: The shared JobQueue.
+        owner: Unique identifier used for leases.
+        poll_interval: Seconds to wait when no job can be leased.
+        lease_seconds: Lease duration; renewed in the background.
+        on_job_done: Optional JobDone callback.
+        on_job_stats: Optional JobStats callback.
+        governor: Optional GOVERNORS name applied to every job run here.
+        throttle: Optional DispatchThrottle checked before each lease.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        owner: Optional[str] = None,
+        poll_interval: float = 2.0,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        on_job_done: Optional[JobDone] = None,
+        governor: Optional[str] = None,
+        throttle: Optional[DispatchThrottle] = None,
+        on_job_stats: Optional[JobStats] = None
+    ):
+        """Initialize QueueWorker.
+
+        Args:
+            queue: The shared JobQueue.
+            owner: Optional lease owner id (default: host, pid and a
+                   random id unique to this worker).
+            poll_interval: Seconds to wait when no job can be leased.
+            lease_seconds: Lease duration.
+            on_job_done: Optional callback(job, result) after each job.
+            governor: Optional GOVERNORS name. It overrides the governor a
+                      job was queued with: the machine running the job
+                      decides how much of it the job may use.
+            throttle: Optional DispatchThrottle. While the machine is busy,
+                      no job is leased, so other machines can take it.
+            on_job_stats: Optional callback(job, stats) with the FFmpeg
+                          progress stats of the running job (see
+                          convert_video's stats_callback).
+        """
+        self.queue = queue
+        self.owner = owner or (
+            f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:12]}"
+        )
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.on_job_done = on_job_done
+        self.governor = governor
+        self.throttle = throttle
+        self.on_job_stats = on_job_stats
+
+    def run_job(self, job: Job, stop_event: Optional[threading.Event] = None) -> Optional[BatchResult]:
+        """Convert a leased job and record the outcome in the queue.
+
+        Args:
+            job: Leased Job.
+            stop_event: Optional event; setting it kills the conversion and
+                        releases the job back to the queue.
+
+        Returns:
+            BatchResult, or None if the job was released because of a stop.
+        """
+        extension = OUTPUT_EXTENSIONS[job.options.get('output_format') or DEFAULT_OUTPUT_FORMAT]
+        output_file = get_unique_output_path(job.input_file, job.output_dir, extension=extension)
+        # Reserve the name so concurrent workers never pick the same output
+        output_file.touch()
+
+        renewing = threading.Event()
+
+        def heartbeat():
+            while not renewing.wait(self.lease_seconds / 3):
+                self.queue.renew(job.id, self.owner, self.lease_seconds)
+
+        heartbeat_thread = threading.Thread(target=heartbeat, daemon=True)
+        heartbeat_thread.start()
+        options = dict(job.options)
+        if self.governor:
+            options['governor'] = self.governor
+        if self.on_job_stats:
+            options['stats_callback'] = lambda stats: self.on_job_stats(job, stats)
+        try:
+            try:
+                success = convert_video(
+                    str(job.input_file),
+                    str(output_file),
+                    cancel_event=stop_event,
+                    **options
+                )
+                error = None if success else "Conversion failed"
+            except Exception as e:
+                success = False
+                error = str(e)
+        finally:
+            renewing.set()
+            heartbeat_thread.join()
+
+        if success:
+            self.queue.complete(job.id, self.owner, output_file)
+            job.status, job.output_file = JOB_DONE, output_file
+        else:
+            remove_placeholder(output_file)
+            if stop_event is not None and stop_event.is_set():
+                self.queue.release(job.id, self.owner)
+                return None
+            self.queue.fail(job.id, self.owner, error)
+            job.error = error
+
+        result = BatchResult(
+            input_file=job.input_file,
+            output_file=output_file if success else None,
+            success=success,
+            error=error
+        )
+        if self.on_job_done:
+            self.on_job_done(job, result)
+        return result
+
+    def run(
+        self,
+        job_ids: Optional[List[int]] = None,
+        stop_event: Optional[threading.Event] = None,
+        exit_when_idle: bool = False
+    ):
+        """Process jobs until told to stop.
+
+        Args:
+            job_ids: If given, return once all of these jobs are finished.
+            stop_event: Optional event that stops the worker; a running
+                        conversion is killed and its job released.
+            exit_when_idle: If True, return when no job can be leased.
+        """
+        while not (stop_event is not None and stop_event.is_set()):
+            if job_ids is not None and self.queue.all_finished(job_ids):
+                return
+            if self.throttle is not None:
+                self.throttle.wait(stop_event)
+            job = self.queue.lease(self.owner, self.lease_seconds)
+            if job is None:
+                if exit_when_idle:
+                    return
+                if stop_event is not None:
+                    stop_event.wait(self.poll_interval)
+                else:
+                    time.sleep(self.poll_interval)
+                continue
+            self.run_job(job, stop_event)
+
+
+def run_workers(queue: JobQueue, count: int, **run_kwargs) -> None:
+    """Run several QueueWorkers in threads until they all return.
+
+    Args:
+        queue: The shared JobQueue.
+        count: Number of workers to start.
+        **run_kwargs: Keyword arguments for QueueWorker (poll_interval,
+                      on_job_done, on_job_stats, governor, throttle) and
+                      QueueWorker.run (job_ids, stop_event, exit_when_idle).
+    """
+    worker_keys = (
+        'poll_interval', 'lease_seconds', 'on_job_done', 'on_job_stats', 'governor', 'throttle'
+    )
+    worker_kwargs = {k: v for k, v in run_kwargs.items() if k in worker_keys}
+    loop_kwargs = {k: v for k, v in run_kwargs.items() if k not in worker_keys}
+
+    threads = []
+    for _ in range(max(1, count)):
+        worker = QueueWorker(queue, **worker_kwargs)
+        thread = threading.Thread(target=worker.run, kwargs=loop_kwargs, daemon=True)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+
+
+def main():
+    """Main entry point for the headless worker and queue administration."""
+    parser = argparse.ArgumentParser(description='MTS converter shared job queue')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    worker_parser = subparsers.add_parser('worker', help='Process queued jobs until interrupted')
+    worker_parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Worker threads (default: the configured concurrency)'
+    )
+    worker_parser.add_argument(
+        '--governor',
+        choices=list(GOVERNORS),
+        default=None,
+        help='Run FFmpeg at lower CPU and disk priority with fewer threads and '
+             'less memory, overriding the setting jobs were queued with'
+    )
+    worker_parser.add_argument(
+        '--max-load',
+        dest='max_load',
+        type=float,
+        default=None,
+        help='Lease no job while the 1-minute load average per CPU core is above this'
+    )
+    worker_parser.add_argument(
+        '--min-free-memory',
+        dest='min_free_memory',
+        type=float,
+        default=None,
+        help='Lease no job while less than this many MB of memory are free'
+    )
+    subparsers.add_parser('status', help='Show job counts and concurrency')
+    concurrency_parser = subparsers.add_parser(
+        'set-concurrency', help='Set how many jobs may run at once on this machine'
+    )
+    concurrency_parser.add_argument('concurrency', type=int)
+
+    args = parser.parse_args()
+    queue = JobQueue()
+
+    if args.command == 'status':
+        print(f"Concurrency: {queue.get_concurrency()}")
+        for status, count in sorted(queue.counts().items()):
+            print(f"  {status}: {count}")
+        return
+
+    if args.command == 'set-concurrency':
+        queue.set_concurrency(args.concurrency)
+        print(f"Concurrency set to {queue.get_concurrency()}")
+        return
+
+    if not check_ffmpeg():
+        print("Error: FFmpeg is not installed or not in PATH.")
+        sys.exit(1)
+
+    stop_event = threading.Event()
+    count = args.workers or queue.get_concurrency()
+    print(f"Worker started ({count} thread(s)). Press Ctrl+C to stop.")
+    thread = threading.Thread(
+        target=run_workers,
+        args=(queue, count),
+        kwargs={
+            'stop_event': stop_event,
+            'governor': args.governor,
+            'throttle': create_throttle(args.max_load, args.min_free_memory),
+        },
+        daemon=True
+    )
+    thread.start()
+    try:
+        while thread.is_alive():
+            thread.join(0.5)
+    except KeyboardInterrupt:
+        print("\nStopping: running jobs are returned to the queue...")
+        stop_event.set()
+        thread.join()
+
+
+if __name__ == "__main__":
+    main()
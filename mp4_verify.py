@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Fast verification of converted MP4 files.
+
+Reads only the MP4 box headers and the few small boxes that describe the
+movie (ftyp, moov/mvhd, and per track tkhd, mdhd, hdlr and stsz) by
+seeking through the file, so checking an output takes milliseconds
+instead of a full ffprobe or decode. The source duration is taken from
+the first and last PES timestamps of the MTS file, again without
+decoding.
+
+Usage:
+    python mp4_verify.py output.mp4 [source.mts]
+"""
+
+import struct
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+from clock_index import (
+    detect_packet_layout,
+    iter_pes_starts,
+    PTS_CLOCK,
+    PTS_WRAP,
+    TS_SYNC_BYTE
+)
+
+
+# Container boxes descended into while reading the movie structure
+CONTAINER_BOXES = {b'moov', b'trak', b'mdia', b'minf', b'stbl', b'mvex'}
+
+# Leaf boxes read in full (all are a few dozen bytes)
+LEAF_BOX_LIMIT = 256
+
+# Track handler types
+VIDEO_HANDLER = 'vide'
+AUDIO_HANDLER = 'soun'
+SUBTITLE_HANDLERS = ('sbtl', 'text', 'subt')
+
+# Allowed difference between output and source duration, in seconds
+DEFAULT_DURATION_TOLERANCE = 1.0
+
+# Bytes read at each end of a source file to find its first and last PTS
+SOURCE_WINDOW = 4 * 1024 * 1024
+
+# PES stream ids: video, MPEG audio, and private stream 1 (AC-3 in AVCHD)
+VIDEO_STREAM_IDS = range(0xE0, 0xF0)
+AUDIO_STREAM_IDS = set(range(0xC0, 0xE0)) | {0xBD}
+
+
+@dataclass
+class TrackInfo:
+    """Description of one MP4 track.
+
+    Attributes:
+        track_id: Track id from tkhd.
+        handler: Handler type ('vide', 'soun', 'sbtl', ...).
+        duration: Media duration in seconds from mdhd.
+        sample_count: Number of samples from stsz/stz2.
+        width: Display width from tkhd (0 for non-visual tracks).
+        height: Display height from tkhd.
+    """
+    track_id: int = 0
+    handler: str = ''
+    duration: float = 0.0
+    sample_count: int = 0
+    width: int = 0
+    height: int = 0
+
+
+@dataclass
+class Mp4Info:
+    """Structure of an MP4 file.
+
+    Attributes:
+        major_brand: Brand from ftyp, or None if ftyp is missing.
+        has_moov: Whether a moov box was found.
+        has_mdat: Whether an mdat box was found.
+        fragmented: Whether the movie is fragmented (mvex present).
+        timescale: Movie timescale from mvhd.
+        duration: Movie duration in seconds from mvhd (or mehd).
+        tracks: List of TrackInfo objects.
+    """
+    major_brand: Optional[str] = None
+    has_moov: bool = False
+    has_mdat: bool = False
+    fragmented: bool = False
+    timescale: int = 0
+    duration: float = 0.0
+    tracks: List[TrackInfo] = field(default_factory=list)
+
+
+@dataclass
+class VerificationResult:
+    """Outcome of verifying one output file.
+
+    Attributes:
+        ok: True if no problems were found.
+        problems: Human-readable descriptions of what is wrong.
+        duration: Output duration in seconds, if it could be read.
+        source_duration: Source duration in seconds, if known.
+    """
+    ok: bool
+    problems: List[str] = field(default_factory=list)
+    duration: Optional[float] = None
+    source_duration: Optional[float] = None
+
+
+class Mp4FormatError(Exception):
+    """Raised when a file is not a readable MP4 box structure."""
+    pass
+
+
+def iter_boxes(f: BinaryIO, start: int, end: int) -> Iterator[Tuple[bytes, int, int]]:
+    """Iterate over the boxes between two offsets.
+
+    Args:
+        f: File opened in binary mode.
+        start: Offset of the first box header.
+        end: Offset where the enclosing box (or file) ends.
+
+    Yields:
+        Tuples of (box_type, payload_offset, box_end).
+
+    Raises:
+        Mp4FormatError: If a box header is truncated or inconsistent.
+    """
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        header = f.read(8)
+        if len(header) < 8:
+            raise Mp4FormatError(f"Truncated box header at offset {offset}")
+        size, box_type = struct.unpack('>I4s', header)
+        payload = offset + 8
+        if size == 1:
+            large = f.read(8)
+            if len(large) < 8:
+                raise Mp4FormatError(f"Truncated box header at offset {offset}")
+            size = struct.unpack('>Q', large)[0]
+            payload += 8
+        elif size == 0:
+            size = end - offset
+        if size < payload - offset or offset + size > end:
+            raise Mp4FormatError(
+                f"Box '{box_type.decode('latin-1')}' at offset {offset} overruns its container"
+            )
+        yield box_type, payload, offset + size
+        offset += size
+
+
+def _read_leaf(f: BinaryIO, payload: int, box_end: int, limit: int = LEAF_BOX_LIMIT) -> bytes:
+    """Read the start of a leaf box payload."""
+    f.seek(payload)
+    return f.read(min(box_end - payload, limit))
+
+
+def _parse_full_box_times(data: bytes) -> Tuple[int, int]:
+    """Get (timescale, duration) from an mvhd or mdhd payload."""
+    if data[0] == 1:
+        timescale, duration = struct.unpack('>IQ', data[20:32])
+    else:
+        timescale, duration = struct.unpack('>II', data[12:20])
+    return timescale, duration
+
+
+def _parse_tkhd(data: bytes, track: TrackInfo):
+    """Fill track id and dimensions from a tkhd payload."""
+    if data[0] == 1:
+        track.track_id = struct.unpack('>I', data[20:24])[0]
+        dims = data[88:96]
+    else:
+        track.track_id = struct.unpack('>I', data[12:16])[0]
+        dims = data[76:84]
+    if len(dims) == 8:
+        width, height = struct.unpack('>II', dims)
+        track.width, track.height = width >> 16, height >> 16
+
+
+def _walk(f: BinaryIO, start: int, end: int, info: Mp4Info, track: Optional[TrackInfo]):
+    """Recursively collect movie and track information."""
+    for box_type, payload, box_end in iter_boxes(f, start, end):
+        if box_type == b'trak':
+            track = TrackInfo()
+            info.tracks.append(track)
+            _walk(f, payload, box_end, info, track)
+        elif box_type in CONTAINER_BOXES:
+            if box_type == b'mvex':
+                info.fragmented = True
+            _walk(f, payload, box_end, info, track)
+        elif box_type == b'mvhd':
+            info.timescale, duration = _parse_full_box_times(_read_leaf(f, payload, box_end))
+            info.duration = duration / info.timescale if info.timescale else 0.0
+        elif box_type == b'mehd' and not info.duration:
+            data = _read_leaf(f, payload, box_end)
+            if data[0] == 1:
+                duration = struct.unpack('>Q', data[4:12])[0]
+            else:
+                duration = struct.unpack('>I', data[4:8])[0]
+            info.duration = duration / info.timescale if info.timescale else 0.0
+        elif track is not None and box_type == b'tkhd':
+            _parse_tkhd(_read_leaf(f, payload, box_end), track)
+        elif track is not None and box_type == b'mdhd':
+            timescale, duration = _parse_full_box_times(_read_leaf(f, payload, box_end))
+            track.duration = duration / timescale if timescale else 0.0
+        elif track is not None and box_type == b'hdlr':
+            track.handler = _read_leaf(f, payload, box_end)[8:12].decode('latin-1')
+        elif track is not None and box_type in (b'stsz', b'stz2'):
+            track.sample_count = struct.unpack('>I', _read_leaf(f, payload, box_end)[8:12])[0]
+
+
+def read_mp4_info(path) -> Mp4Info:
+    """Read the structure of an MP4 file from its box headers.
+
+    Args:
+        path: Path to the MP4 file.
+
+    Returns:
+        Mp4Info describing the file.
+
+    Raises:
+        Mp4FormatError: If the box structure is invalid or truncated.
+        OSError: If the file cannot be read.
+    """
+    info = Mp4Info()
+    with open(path, 'rb') as f:
+        f.seek(0, 2)
+        size = f.tell()
+        for box_type, payload, box_end in iter_boxes(f, 0, size):
+            if box_type == b'ftyp':
+                info.major_brand = _read_leaf(f, payload, box_end)[:4].decode('latin-1')
+            elif box_type == b'moov':
+                info.has_moov = True
+                _walk(f, payload, box_end, info, None)
+            elif box_type == b'mdat':
+                info.has_mdat = True
+    return info
+
+
+def get_source_summary(input_file, window: int = SOURCE_WINDOW) -> Tuple[Optional[float], bool]:
+    """Estimate a transport stream's duration and whether it has audio.
+
+    Reads a window at each end of the file and compares the earliest video
+    PTS at the start with the latest at the end. Streams with a timestamp
+    discontinuity in between (joined recordings) may give no duration.
+
+    Args:
+        input_file: Path to the MTS file.
+        window: Bytes read at each end.
+
+    Returns:
+        Tuple of (duration in seconds or None, has_audio).
+    """
+    try:
+        with open(input_file, 'rb') as f:
+            head = f.read(window)
+            f.seek(0, 2)
+            size = f.tell()
+            tail_start = max(len(head), size - window)
+            f.seek(tail_start)
+            tail = f.read()
+    except OSError:
+        return None, False
+
+    layout = detect_packet_layout(head)
+    if layout is None:
+        return None, False
+
+    head_pes = list(iter_pes_starts(head, layout))
+    has_audio = any(stream_id in AUDIO_STREAM_IDS for stream_id, _ in head_pes)
+    first = sorted(pts for stream_id, pts in head_pes
+                   if stream_id in VIDEO_STREAM_IDS and pts is not None)
+    last = first
+    # Keep the tail on the packet grid of the whole file
+    packet_size, sync_offset = layout
+    shift = (sync_offset - tail_start) % packet_size
+    if len(tail) > shift and tail[shift] == TS_SYNC_BYTE:
+        last = sorted(pts for stream_id, pts in iter_pes_starts(tail, (packet_size, shift))
+                      if stream_id in VIDEO_STREAM_IDS and pts is not None) or first
+    if len(first) < 2:
+        return None, has_audio
+
+    duration = last[-1] - first[0]
+    if duration < 0:
+        duration += PTS_WRAP / PTS_CLOCK
+    # Add one frame for the last picture
+    frame = min(b - a for a, b in zip(first, first[1:]) if b > a) if first[-1] > first[0] else 0.0
+    duration += frame
+    if duration <= 0 or duration > 24 * 3600:
+        return None, has_audio
+    return duration, has_audio
+
+
+def verify_output(
+    output_file,
+    source_file=None,
+    expect_subtitle: bool = False,
+    expected_duration: Optional[float] = None,
+    tolerance: float = DEFAULT_DURATION_TOLERANCE
+) -> VerificationResult:
+    """Verify a converted MP4 file.
+
+    Checks that the box structure is intact, moov and media data are
+    present, there is a video track with samples, audio is present when
+    the source has audio, a subtitle track is present when expected, and
+    the duration matches the source.
+
+    Args:
+        output_file: Path to the MP4 file.
+        source_file: Optional path to the source MTS file.
+        expect_subtitle: Whether a timestamp subtitle track is expected.
+        expected_duration: Optional duration the output should have, for
+                           outputs of part of the source (default: the
+                           source's duration).
+        tolerance: Allowed duration difference in seconds.
+
+    Returns:
+        VerificationResult for the file.
+    """
+    try:
+        info = read_mp4_info(output_file)
+    except (Mp4FormatError, OSError, struct.error, IndexError) as e:
+        return VerificationResult(ok=False, problems=[f"Unreadable MP4: {e}"])
+
+    problems = []
+    if info.major_brand is None:
+        problems.append("Missing ftyp box")
+    if not info.has_moov:
+        problems.append("Missing moov box")
+    if not info.has_mdat and not info.fragmented:
+        problems.append("Missing mdat box")
+
+    handlers = [track.handler for track in info.tracks]
+    video = [t for t in info.tracks if t.handler == VIDEO_HANDLER]
+    if not video:
+        problems.append("No video track")
+    elif not info.fragmented and not any(t.sample_count for t in video):
+        problems.append("Video track has no samples")
+    if expect_subtitle and not any(h in SUBTITLE_HANDLERS for h in handlers):
+        problems.append("No subtitle track")
+
+    source_duration = None
+    if source_file is not None:
+        source_duration, source_audio = get_source_summary(source_file)
+        if source_audio and AUDIO_HANDLER not in handlers:
+            problems.append("Source has audio but output has no audio track")
+    if expected_duration is not None:
+        expected, what = expected_duration, "range"
+    else:
+        expected, what = source_duration, "source"
+    if expected is not None and info.has_moov:
+        if abs(info.duration - expected) > tolerance:
+            problems.append(
+                f"Duration {info.duration:.2f}s does not match {what} {expected:.2f}s"
+            )
+
+    return VerificationResult(
+        ok=not problems,
+        problems=problems,
+        duration=info.duration if info.has_moov else None,
+        source_duration=source_duration
+    )
+
+
+def verify_outputs(jobs, max_workers: Optional[int] = None, **kwargs) -> List[VerificationResult]:
+    """Verify several outputs in parallel.
+
+    Args:
+        jobs: Iterable of argument tuples for verify_output, such as
+              (output_file, source_file) or (output_file, source_file,
+              expect_subtitle).
+        max_workers: Optional thread count (default: executor default).
+        **kwargs: Keyword arguments for verify_output.
+
+    Returns:
+        List of VerificationResult objects in the order of jobs.
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(verify_output, *job, **kwargs)
+            for job in jobs
+        ]
+        return [future.result() for future in futures]
+
+
+def main():
+    """Verify one output file and print the findings."""
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python mp4_verify.py <output.mp4> [source.mts]")
+        sys.exit(2)
+
+    output_file = Path(sys.argv[1])
+    source_file = Path(sys.argv[2]) if len(sys.argv) == 3 else None
+    result = verify_output(output_file, source_file)
+
+    if result.duration is not None:
+        print(f"Duration: {result.duration:.2f}s")
+    if result.source_duration is not None:
+        print(f"Source duration: {result.source_duration:.2f}s")
+    if result.ok:
+        print("OK")
+    else:
+        for problem in result.problems:
+            print(f"Problem: {problem}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,12 +7,21 @@ overlay that shows when the video was filmed and tracks time as it progresses.
 """
 
 import argparse
+import contextlib
+import io
+import shutil
+import sqlite3
 import subprocess
 import sys
 import os
 import re
-from datetime import datetime
+import tempfile
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from fractions import Fraction
 from pathlib import Path
+from typing import Optional
 
 from ffmpeg_utils import (
     get_ffmpeg_path,
@@ -20,6 +29,16 @@ from ffmpeg_utils import (
     check_ffmpeg_available,
     get_subprocess_flags
 )
+from font_resolver import get_fontfile_option
+from time_range import describe_range, offset_clock, parse_time_spec, resolve_range
+from resource_governor import (
+    GOVERNORS,
+    create_throttle,
+    get_governed_flags,
+    get_governed_preexec_fn,
+    get_governor,
+    govern_command
+)
 
 
 # Module-level paths (set during initialization)
@@ -37,31 +56,34 @@ class MetadataExtractionError(Exception):
     pass
 
 
-def get_unique_output_path(input_path: Path, output_dir: Path = None) -> Path:
+def get_unique_output_path(input_path: Path, output_dir: Path = None, suffix: str = '',
+                           extension: str = '.mp4') -> Path:
     """Get a unique output path that won't overwrite existing files.
 
     Args:
         input_path: Path to the input file.
         output_dir: Optional output directory. If None, uses input file's directory.
+        suffix: Optional text appended to the file stem (e.g. '_proxy').
+        extension: Output file extension (default: '.mp4').
 
     Returns:
-        Path for the output MP4 file with sequential numbering if needed.
+        Path for the output file with sequential numbering if needed.
     """
     if output_dir is None:
         output_dir = input_path.parent
 
     # Base output path
-    base_output = output_dir / input_path.with_suffix('.mp4').name
+    stem = input_path.stem + suffix
+    base_output = output_dir / f"{stem}{extension}"
 
     # If no conflict, use the base name
     if not base_output.exists():
         return base_output
 
     # Find a unique filename with numeric suffix like "filename (1).mp4"
-    stem = input_path.stem
     counter = 1
     while True:
-        candidate = output_dir / f"{stem} ({counter}).mp4"
+        candidate = output_dir / f"{stem} ({counter}){extension}"
         if not candidate.exists():
             return candidate
         counter += 1
@@ -110,6 +132,10 @@ def debug_dpm_bytes(input_file, num_bytes=32):
         return None, None
 
 
+# Bytes searched for the DPM marker at the start of a clip
+DPM_SEARCH_SIZE = 65536
+
+
 def extract_avchd_timestamp(input_file):
     """Extract timestamp from AVCHD/MTS file using DPM marker in SEI data.
 
@@ -137,8 +163,27 @@ def extract_avchd_timestamp(input_file):
     try:
         with open(input_file, 'rb') as f:
             # Read first 64KB - DPM marker is typically in the first few KB
-            data = f.read(65536)
+            data = f.read(DPM_SEARCH_SIZE)
+    except (IOError, OSError):
+        return None
+
+    return parse_dpm_timestamp(data)
+
 
+def parse_dpm_timestamp(data):
+    """Parse the DPM recording timestamp from the first bytes of a clip.
+
+    See extract_avchd_timestamp for the marker layout. Works on any buffer,
+    such as the bytes peeked from a pipe.
+
+    Args:
+        data: Bytes from the start of the MTS stream.
+
+    Returns:
+        datetime object representing the recording timestamp, or None if
+        the DPM marker is not found or cannot be parsed.
+    """
+    try:
         # Search for DPM marker (0x44 0x50 0x4D = 'DPM')
         dpm_marker = b'DPM'
         idx = data.find(dpm_marker)
@@ -179,7 +224,7 @@ def extract_avchd_timestamp(input_file):
 
         return datetime(year, month, day, hour, minute, second)
 
-    except (IOError, OSError, ValueError):
+    except ValueError:
         return None
 
 # Position constants for timestamp overlay
@@ -224,6 +269,386 @@ def build_video_filter(drawtext_filter, resolution='original'):
     return f"{drawtext_filter},{scale_filter}"
 
 
+# Scaler algorithms offered for resolution presets (FFmpeg sws flags).
+# bicubic is FFmpeg's default; fast_bilinear trades sharpness for speed.
+DEFAULT_SCALER = 'bicubic'
+SCALERS = ('bicubic', 'bilinear', 'fast_bilinear', 'lanczos')
+
+# Frame height the font size and margins are specified against. AVCHD
+# sources are 1080 lines, so a 32px label on a 720p output becomes 21px.
+FONT_REFERENCE_HEIGHT = 1080
+
+
+def build_scale_filter(resolution, scaler=None):
+    """Build the scale filter for a resolution preset.
+
+    Args:
+        resolution: Resolution preset name ('original', '1080p', '720p', '480p').
+        scaler: Optional scaler algorithm from SCALERS. None uses FFmpeg's
+                default (bicubic).
+
+    Returns:
+        scale filter string, or None if no scaling is needed.
+    """
+    dims = RESOLUTION_PRESETS.get(resolution) if resolution else None
+    if dims is None:
+        return None
+
+    width, height = dims
+    # Use -2 for height to auto-calculate while keeping even number (required for h264)
+    scale_filter = f"scale={width}:-2"
+    if scaler and scaler != DEFAULT_SCALER:
+        scale_filter += f":flags={scaler}"
+    return scale_filter
+
+
+def get_overlay_scale(resolution):
+    """Get the factor to apply to font size and margins for a resolution.
+
+    Args:
+        resolution: Resolution preset name.
+
+    Returns:
+        Output height divided by FONT_REFERENCE_HEIGHT, or 1.0 when the
+        output is not scaled.
+    """
+    dims = RESOLUTION_PRESETS.get(resolution) if resolution else None
+    if dims is None:
+        return 1.0
+    return dims[1] / FONT_REFERENCE_HEIGHT
+
+
+# Timestamp modes: burn the clock into the video, or stream-copy the video
+# and carry the clock as a toggleable mov_text subtitle track
+DEFAULT_TIMESTAMP_MODE = 'burn-in'
+TIMESTAMP_MODES = ('burn-in', 'subtitle')
+
+# Output formats: a single MP4 file, or HLS segments listed in an .m3u8
+# playlist for streaming (see hls_output)
+DEFAULT_OUTPUT_FORMAT = 'mp4'
+OUTPUT_FORMATS = ('mp4', 'hls')
+OUTPUT_EXTENSIONS = {
+    'mp4': '.mp4',
+    'hls': '.m3u8',
+}
+
+# HLS segments are fMP4 or MPEG-TS, cut every HLS_SEGMENT_SECONDS on a
+# forced keyframe
+DEFAULT_HLS_SEGMENT_TYPE = 'fmp4'
+HLS_SEGMENT_TYPES = ('fmp4', 'mpegts')
+HLS_SEGMENT_SECONDS = 6
+
+# Pre-flight integrity check of the input (see ts_integrity): 'check'
+# rejects corrupt files, 'repair' also converts damaged ones from a copy
+# of their readable packets
+PREFLIGHT_MODES = ('check', 'repair')
+
+# Burn-in overlay engines: drawtext renders the text on every frame, sprite
+# renders each second's label once and composites it with overlay
+DEFAULT_OVERLAY_ENGINE = 'drawtext'
+OVERLAY_ENGINES = ('drawtext', 'sprite')
+
+# x264 encoding defaults for burned-in conversions
+DEFAULT_PRESET = 'medium'
+DEFAULT_CRF = 23
+
+# Audio handling for the output file
+DEFAULT_AUDIO_CODEC = 'aac'
+AUDIO_CODECS = {
+    'aac': ['-c:a', 'aac', '-b:a', '192k'],
+    'copy': ['-c:a', 'copy'],
+}
+
+# MP4 outputs carry the recording time of their first frame as their
+# creation time (see get_creation_time_args)
+CREATION_TIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%fZ'
+
+
+def get_creation_time_args(filming_time):
+    """Get the output options recording when an output's first frame was filmed.
+
+    The excerpt command maps recording times back to media offsets from
+    this tag. Like the camera clock it has no time zone: the wall-clock
+    time is written with a 'Z' suffix, and get_video_creation_time reads
+    it back unchanged.
+
+    Args:
+        filming_time: datetime of the output's first frame, or None.
+
+    Returns:
+        List of FFmpeg output options (empty without a time).
+    """
+    if filming_time is None:
+        return []
+    return ["-metadata", f"creation_time={filming_time.strftime(CREATION_TIME_FORMAT)}"]
+
+
+# Wall-clock navigation in MP4 outputs: a chapter at every CHAPTER_SECONDS
+# mark of the recording clock, titled with its recording time, and a tmcd
+# timecode track starting at the recording time of the first frame
+CHAPTER_SECONDS = 60
+CHAPTER_TITLE_FORMAT = '%Y-%m-%d %H:%M'
+
+# A chapter boundary closer than this to the previous one moves it instead
+# of leaving a sliver of a chapter
+MIN_CHAPTER_SECONDS = 1.0
+
+
+def build_chapter_metadata(filming_time, duration, clock_segments=None,
+                           interval=CHAPTER_SECONDS):
+    """Build an FFmpeg metadata document with a chapter per minute of recording time.
+
+    Chapters start on the recording clock's minute marks, so a player's
+    chapter list reads as the minutes of the day the footage was filmed.
+    The first chapter starts with the media, and a restart of the camera
+    clock starts a new chapter.
+
+    Args:
+        filming_time: datetime of the first frame of the media.
+        duration: Media duration in seconds.
+        clock_segments: Optional list of clock_index.ClockSegment objects.
+        interval: Seconds of recording time per chapter.
+
+    Returns:
+        FFMETADATA document as a string.
+    """
+    spans = [(0.0, filming_time)]
+    for segment in clock_segments or ():
+        if segment.start <= 0:
+            spans[0] = (0.0, segment.wall_clock)
+        elif segment.start < duration:
+            spans.append((segment.start, segment.wall_clock))
+
+    chapters = []
+    for index, (origin, clock) in enumerate(spans):
+        stop = spans[index + 1][0] if index + 1 < len(spans) else duration
+        chapters.append((origin, clock))
+        day_seconds = clock.hour * 3600 + clock.minute * 60 + clock.second + clock.microsecond / 1e6
+        mark = origin + (-day_seconds) % interval
+        while mark < stop - MIN_CHAPTER_SECONDS:
+            label = clock + timedelta(seconds=mark - origin)
+            if mark - chapters[-1][0] < MIN_CHAPTER_SECONDS:
+                chapters[-1] = (chapters[-1][0], label)
+            else:
+                chapters.append((mark, label))
+            mark += interval
+
+    lines = [';FFMETADATA1']
+    for index, (start, label) in enumerate(chapters):
+        end = chapters[index + 1][0] if index + 1 < len(chapters) else duration
+        lines += [
+            '',
+            '[CHAPTER]',
+            'TIMEBASE=1/1000',
+            f'START={round(start * 1000)}',
+            f'END={round(end * 1000)}',
+            f'title={label.strftime(CHAPTER_TITLE_FORMAT)}',
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def write_chapter_metadata(filming_time, duration, directory=None, clock_segments=None):
+    """Write per-minute chapters to a temporary FFMETADATA file.
+
+    Args:
+        filming_time: datetime of the first frame of the media.
+        duration: Media duration in seconds.
+        directory: Optional directory for the temporary file.
+        clock_segments: Optional list of clock segments (see
+                        build_chapter_metadata).
+
+    Returns:
+        Path to the written file. The caller is responsible for deleting it.
+    """
+    fd, path = tempfile.mkstemp(suffix='.txt', prefix='mts_ch_', dir=directory)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(build_chapter_metadata(filming_time, duration, clock_segments))
+    return Path(path)
+
+
+def format_timecode(filming_time, frame_rate):
+    """Format a recording time as the start timecode of a tmcd track.
+
+    NTSC rates (29.97 and 59.94 fps) use drop-frame timecode, which stays
+    in step with the wall clock; integer rates count frames directly.
+
+    Args:
+        filming_time: datetime of the first frame.
+        frame_rate: Frame rate as a Fraction.
+
+    Returns:
+        Timecode string, e.g. '14:35:20;12' (drop-frame) or '14:35:20:12'.
+    """
+    fps = round(float(frame_rate))
+    drop = frame_rate.denominator == 1001 and fps in (30, 60)
+    frame = int(filming_time.microsecond / 1e6 * fps)
+    if drop and filming_time.second == 0 and filming_time.minute % 10:
+        # Drop-frame timecode skips these frame numbers at most minute starts
+        frame = max(frame, fps // 15)
+    return f"{filming_time.strftime('%H:%M:%S')}{';' if drop else ':'}{frame:02d}"
+
+
+def get_video_frame_rate(input_file):
+    """Get a video's frame rate using ffprobe.
+
+    Args:
+        input_file: Path to the video file.
+
+    Returns:
+        Frame rate as a Fraction, or None if it cannot be determined.
+    """
+    ffprobe = FFPROBE_PATH or get_ffprobe_path()
+    try:
+        result = subprocess.run(
+            [
+                ffprobe,
+                "-v", "error",
+                "-select_streams", "v:0",
+                "-show_entries", "stream=avg_frame_rate,r_frame_rate",
+                "-of", "default=noprint_wrappers=1:nokey=1",
+                str(input_file)
+            ],
+            capture_output=True,
+            text=True,
+            creationflags=get_subprocess_flags()
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    for value in result.stdout.split():
+        try:
+            rate = Fraction(value)
+        except (ValueError, ZeroDivisionError):
+            continue
+        if rate > 0:
+            return rate
+    return None
+
+
+@contextlib.contextmanager
+def prepare_navigation(input_path, filming_time, duration, clock_segments=None):
+    """Prepare the chapters and timecode track of a conversion's MP4 output.
+
+    Both are muxed by the conversion's own FFmpeg run: the chapters come
+    from an extra FFMETADATA input and the timecode is an output option.
+
+    Args:
+        input_path: Path to the input MTS file (for its frame rate).
+        filming_time: datetime of the output's first frame.
+        duration: Output duration in seconds (no chapters if unknown).
+        clock_segments: Optional list of clock segments for the chapters.
+
+    Yields:
+        Dictionary of chapters_path and timecode keyword arguments for the
+        command builders. The chapter file is deleted on exit.
+    """
+    navigation = {}
+    if duration and duration > 0:
+        navigation['chapters_path'] = write_chapter_metadata(
+            filming_time, duration, clock_segments=clock_segments
+        )
+    frame_rate = get_video_frame_rate(input_path)
+    if frame_rate is not None:
+        navigation['timecode'] = format_timecode(filming_time, frame_rate)
+    try:
+        yield navigation
+    finally:
+        if 'chapters_path' in navigation:
+            try:
+                navigation['chapters_path'].unlink()
+            except OSError:
+                pass
+
+
+def get_chapters_input_args(chapters_path=None):
+    """Get the input options reading a chapter file (see write_chapter_metadata)."""
+    return ["-f", "ffmetadata", "-i", str(chapters_path)] if chapters_path else []
+
+
+def get_navigation_args(chapters_input=None, timecode=None):
+    """Get the output options adding chapters and a timecode track.
+
+    Args:
+        chapters_input: Index of the chapter file among the command's
+                        inputs, or None for no chapters.
+        timecode: Optional start timecode (see format_timecode). The MP4
+                  muxer writes it as a tmcd track.
+
+    Returns:
+        List of FFmpeg output options.
+    """
+    args = ["-map_chapters", str(chapters_input)] if chapters_input is not None else []
+    if timecode:
+        args += ["-timecode", timecode]
+    return args
+
+
+def _format_srt_time(seconds):
+    """Format a media offset in seconds as an SRT timestamp.
+
+    Args:
+        seconds: Offset from the start of the media in seconds.
+
+    Returns:
+        String in SRT format, e.g. '01:02:03,500'.
+    """
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+
+def build_timestamp_subtitles(filming_time, duration, clock_segments=None):
+    """Build SRT subtitles with one timestamp cue per second.
+
+    Args:
+        filming_time: datetime of the first frame of the recording.
+        duration: Media duration in seconds.
+        clock_segments: Optional list of clock_index.ClockSegment objects.
+                        Each cue then follows the segment it falls in.
+
+    Returns:
+        SRT document as a string. Each cue shows the recording wall-clock
+        time for one second of media.
+    """
+    cues = []
+    total_seconds = int(duration) + (1 if duration % 1 else 0)
+    for index in range(total_seconds):
+        start = float(index)
+        end = min(float(index + 1), duration)
+        origin, clock = 0.0, filming_time
+        for segment in clock_segments or ():
+            if segment.start <= start:
+                origin, clock = segment.start, segment.wall_clock
+        label = (clock + timedelta(seconds=start - origin)).strftime('%Y-%m-%d %H:%M:%S')
+        cues.append(
+            f"{index + 1}\n"
+            f"{_format_srt_time(start)} --> {_format_srt_time(end)}\n"
+            f"{label}\n"
+        )
+    return "\n".join(cues)
+
+
+def write_timestamp_subtitles(filming_time, duration, directory=None, clock_segments=None):
+    """Write timestamp subtitles to a temporary SRT file.
+
+    Args:
+        filming_time: datetime of the first frame of the recording.
+        duration: Media duration in seconds.
+        directory: Optional directory for the temporary file.
+        clock_segments: Optional list of clock segments (see
+                        build_timestamp_subtitles).
+
+    Returns:
+        Path to the written SRT file. The caller is responsible for
+        deleting it.
+    """
+    fd, path = tempfile.mkstemp(suffix='.srt', prefix='mts_ts_', dir=directory)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(build_timestamp_subtitles(filming_time, duration, clock_segments))
+    return Path(path)
+
+
 def get_position_coordinates(position, margin=20):
     """Get FFmpeg x:y coordinate expression for a given position.
 
@@ -261,6 +686,15 @@ def get_position_coordinates(position, margin=20):
     return POSITIONS[position]
 
 
+def _time_spec_arg(value):
+    """Validate a --start/--end value, keeping it as given for later resolution."""
+    try:
+        parse_time_spec(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
+
 def parse_args(args):
     """Parse command-line arguments for batch processing support.
 
@@ -275,7 +709,8 @@ def parse_args(args):
 
     # Check for legacy mode: input.mts output.mp4
     # Legacy mode is when we have exactly 2 args and the second ends with .mp4
-    if len(args) == 2 and args[1].lower().endswith('.mp4'):
+    # (or is '-' to stream to stdout)
+    if len(args) == 2 and (args[1].lower().endswith('.mp4') or args[1] == STDIO_PATH):
         # Legacy single-file mode with explicit output
         result = argparse.Namespace()
         result.input_paths = [args[0]]
@@ -286,6 +721,40 @@ def parse_args(args):
         result.position = DEFAULT_POSITION
         result.resolution = DEFAULT_RESOLUTION
         result.debug_timestamp = False
+        result.timestamp_mode = DEFAULT_TIMESTAMP_MODE
+        result.audio_codec = DEFAULT_AUDIO_CODEC
+        result.overlay_engine = DEFAULT_OVERLAY_ENGINE
+        result.scaler = DEFAULT_SCALER
+        result.deinterlace = False
+        result.filter_threads = None
+        result.autotune = False
+        result.max_workers = None
+        result.two_tier = False
+        result.queue = False
+        result.priority = 0
+        result.cache = False
+        result.clock_index = False
+        result.verify = False
+        result.scratch_dir = None
+        result.scratch_limit = None
+        result.prefetch = False
+        result.prefetch_budget = None
+        result.check_space = False
+        result.plan = False
+        result.also = None
+        result.output_format = DEFAULT_OUTPUT_FORMAT
+        result.hls_ladder = None
+        result.hls_segment_type = DEFAULT_HLS_SEGMENT_TYPE
+        result.checkpoint = False
+        result.checkpoint_segment = None
+        result.governor = None
+        result.max_load = None
+        result.min_free_memory = None
+        result.start = None
+        result.end = None
+        result.preflight = None
+        result.catalog = False
+        result.chapters = False
         return result
 
     parser = argparse.ArgumentParser(
@@ -298,6 +767,7 @@ Examples:
   %(prog)s *.mts                        Convert all MTS files in current dir
   %(prog)s video1.mts video2.mts        Convert multiple files
   %(prog)s ./videos/ -o ./converted/    Convert directory to output folder
+  %(prog)s video.mts -t subtitle        Fast copy with a soft timestamp track
 '''
     )
 
@@ -346,121 +816,1477 @@ Examples:
     )
 
     parser.add_argument(
-        '--debug-timestamp',
-        action='store_true',
-        dest='debug_timestamp',
-        help='Debug mode: dump DPM marker hex bytes for timestamp analysis'
+        '-t', '--timestamp-mode',
+        dest='timestamp_mode',
+        default=DEFAULT_TIMESTAMP_MODE,
+        choices=list(TIMESTAMP_MODES),
+        help='burn-in re-encodes with the clock drawn on the video; subtitle '
+             'stream-copies the video and adds a toggleable timestamp track '
+             f'(default: {DEFAULT_TIMESTAMP_MODE})'
     )
 
-    parsed = parser.parse_args(args)
-    parsed.output_file = None
-    parsed.legacy_mode = False
+    parser.add_argument(
+        '--audio-codec',
+        dest='audio_codec',
+        default=DEFAULT_AUDIO_CODEC,
+        choices=list(AUDIO_CODECS.keys()),
+        help=f'Audio handling: transcode to AAC or copy as-is (default: {DEFAULT_AUDIO_CODEC})'
+    )
 
-    return parsed
+    parser.add_argument(
+        '--overlay-engine',
+        dest='overlay_engine',
+        default=DEFAULT_OVERLAY_ENGINE,
+        choices=list(OVERLAY_ENGINES),
+        help='Burn-in renderer: drawtext on every frame, or sprite to render '
+             f'each second once and overlay it (default: {DEFAULT_OVERLAY_ENGINE})'
+    )
 
+    parser.add_argument(
+        '--scaler',
+        dest='scaler',
+        default=DEFAULT_SCALER,
+        choices=list(SCALERS),
+        help=f'Scaling algorithm for --resolution (default: {DEFAULT_SCALER})'
+    )
 
-def check_ffmpeg():
-    """Check if FFmpeg is installed and available."""
-    global FFMPEG_PATH, FFPROBE_PATH
-    available, ffmpeg, ffprobe = check_ffmpeg_available()
-    if available:
-        FFMPEG_PATH = ffmpeg
-        FFPROBE_PATH = ffprobe
-    return available
+    parser.add_argument(
+        '--deinterlace',
+        action='store_true',
+        dest='deinterlace',
+        help='Deinterlace 1080i footage before scaling'
+    )
 
+    parser.add_argument(
+        '--filter-threads',
+        dest='filter_threads',
+        type=int,
+        default=None,
+        help='Number of threads for FFmpeg filtering (default: FFmpeg decides)'
+    )
 
-def get_video_creation_time(input_file):
-    """Extract the creation/recording time from video metadata.
+    scheduling = parser.add_mutually_exclusive_group()
 
-    Uses AVCHD DPM marker extraction as the primary method (for MTS files
-    from Sony, Panasonic, and other AVCHD cameras), with ffprobe metadata
-    extraction as a fallback.
+    scheduling.add_argument(
+        '--two-tier',
+        action='store_true',
+        dest='two_tier',
+        help='Make fast 480p review proxies (*_proxy.mp4) for every file first, '
+             'then full-quality archive encodes at lower priority'
+    )
 
-    Args:
-        input_file: Path to the video file.
+    scheduling.add_argument(
+        '--autotune',
+        action='store_true',
+        dest='autotune',
+        help='Run files in parallel, tuning workers and threads from measured '
+             'encode speed (remembered per host and settings)'
+    )
 
-    Returns:
-        datetime object representing the recording timestamp.
+    scheduling.add_argument(
+        '--queue',
+        action='store_true',
+        dest='queue',
+        help='Submit files to the shared job queue and help work through it; '
+             'conversions across all front ends respect the machine-wide concurrency'
+    )
 
-    Raises:
-        MetadataExtractionError: If the timestamp cannot be extracted from
-            video metadata. This error is raised instead of falling back to
-            file modification time to ensure timestamp accuracy.
-    """
-    # Primary method: Extract from AVCHD DPM marker (embedded in H.264 SEI data)
-    avchd_timestamp = extract_avchd_timestamp(input_file)
-    if avchd_timestamp is not None:
-        return avchd_timestamp
+    parser.add_argument(
+        '--priority',
+        type=int,
+        default=0,
+        help='Priority of queued jobs with --queue; higher runs first (default: 0)'
+    )
 
-    # Fallback: Try ffprobe creation_time tag
-    ffprobe = FFPROBE_PATH or get_ffprobe_path()
-    try:
-        result = subprocess.run(
-            [
-                ffprobe,
-                "-v", "quiet",
-                "-select_streams", "v:0",
-                "-show_entries", "format_tags=creation_time:stream_tags=creation_time",
-                "-of", "csv=p=0",
-                input_file
-            ],
-            capture_output=True,
-            text=True,
-            creationflags=get_subprocess_flags()
-        )
+    parser.add_argument(
+        '--max-workers',
+        dest='max_workers',
+        type=int,
+        default=None,
+        help='Upper bound on parallel conversions with --autotune (default: CPU count)'
+    )
 
-        output = result.stdout.strip()
-        if output:
-            # Parse the creation time (usually in ISO format)
-            time_str = output.split('\n')[0].strip(',')
-            if time_str:
-                # Handle various date formats
-                for fmt in [
-                    "%Y-%m-%dT%H:%M:%S.%fZ",
-                    "%Y-%m-%dT%H:%M:%SZ",
-                    "%Y-%m-%d %H:%M:%S",
-                    "%Y-%m-%dT%H:%M:%S.%f",
-                    "%Y-%m-%dT%H:%M:%S"
-                ]:
-                    try:
-                        return datetime.strptime(time_str, fmt)
-                    except ValueError:
-                        continue
+    parser.add_argument(
+        '--clock-index',
+        action='store_true',
+        dest='clock_index',
+        help='Scan each whole file for camera clock records so the timestamp follows '
+             'clock restarts in files holding several recordings'
+    )
 
-        # No valid timestamp found in metadata
-        raise MetadataExtractionError(
-            f"Could not extract recording timestamp from metadata in '{input_file}'. "
-            "The file may be corrupted, missing metadata, or not an MTS video file."
-        )
+    parser.add_argument(
+        '--verify',
+        action='store_true',
+        help='Check each output after conversion by reading its MP4 structure '
+             '(moov, tracks, duration against the source); failures are reported'
+    )
 
-    except MetadataExtractionError:
-        # Re-raise our own exception
-        raise
-    except Exception as e:
-        raise MetadataExtractionError(
-            f"Failed to extract recording timestamp from '{input_file}': {e}"
-        )
+    parser.add_argument(
+        '--cache',
+        action='store_true',
+        help='Skip clips converted before with the same settings, and duplicate '
+             'clips within the batch, by linking the existing output (default batch '
+             'mode only)'
+    )
 
+    parser.add_argument(
+        '--scratch-dir',
+        dest='scratch_dir',
+        default=None,
+        help='Encode to this local directory (e.g. an SSD) and move finished files '
+             'to the output directory in the background while the next file encodes'
+    )
 
-def convert_video(input_file, output_file=None, font_size=32, position=None, resolution=None):
-    """
+    parser.add_argument(
+        '--scratch-limit',
+        dest='scratch_limit',
+        type=float,
+        default=None,
+        help='Gigabytes of finished files allowed to wait in --scratch-dir for '
+             'transfer before new encodes are held back (default: 20)'
+    )
+
+    parser.add_argument(
+        '--prefetch',
+        action='store_true',
+        help='Copy the next input files to local disk (--scratch-dir or the temp '
+             'directory) while the current one encodes; for card readers and network shares'
+    )
+
+    parser.add_argument(
+        '--prefetch-budget',
+        dest='prefetch_budget',
+        type=float,
+        default=None,
+        help='Gigabytes of prefetched copies held on local disk at once (default: 8)'
+    )
+
+    parser.add_argument(
+        '--check-space',
+        action='store_true',
+        dest='check_space',
+        help='Predict each output\'s size before starting it and hold or postpone jobs '
+             'that would not fit on the output (or scratch) volume'
+    )
+
+    parser.add_argument(
+        '--also',
+        action='append',
+        choices=EXTRA_OUTPUT_PRESETS,
+        default=None,
+        help='Write another output from the same decode (repeatable): a 480p proxy '
+             '(*_proxy.mp4), the original stream-copied (*_original.mp4), thumbnail '
+             'sheets (*_sheet_NNN.jpg) or a WebVTT storyboard (*_storyboard.vtt)'
+    )
+
+    parser.add_argument(
+        '--output-format',
+        dest='output_format',
+        choices=OUTPUT_FORMATS,
+        default=DEFAULT_OUTPUT_FORMAT,
+        help='mp4 (default) writes one MP4 file; hls writes short segments listed in '
+             'an .m3u8 playlist, for playback from a web server that starts immediately'
+    )
+
+    parser.add_argument(
+        '--hls-ladder',
+        dest='hls_ladder',
+        nargs='+',
+        choices=list(RESOLUTION_PRESETS.keys()),
+        default=None,
+        help='With --output-format hls, encode one rendition per resolution (e.g. '
+             '720p 480p) from a single decode and write a master playlist'
+    )
+
+    parser.add_argument(
+        '--hls-segment-type',
+        dest='hls_segment_type',
+        choices=HLS_SEGMENT_TYPES,
+        default=DEFAULT_HLS_SEGMENT_TYPE,
+        help='HLS segment container: fmp4 (default) or mpegts for older players'
+    )
+
+    parser.add_argument(
+        '--checkpoint',
+        action='store_true',
+        help='Encode in segments kept next to the output, so a conversion that is '
+             'interrupted resumes where it stopped when run again'
+    )
+
+    parser.add_argument(
+        '--checkpoint-segment',
+        dest='checkpoint_segment',
+        type=float,
+        default=None,
+        help='Segment length in seconds for --checkpoint: the most work an '
+             'interruption can lose (default: 300)'
+    )
+
+    parser.add_argument(
+        '--governor',
+        choices=list(GOVERNORS),
+        default=None,
+        help='Share the machine: run FFmpeg at lower CPU and disk priority with '
+             'fewer threads and less memory. background: half the cores; '
+             'idle: a quarter of the cores, only spare CPU and disk time'
+    )
+
+    parser.add_argument(
+        '--max-load',
+        dest='max_load',
+        type=float,
+        default=None,
+        help='Hold new encodes while the 1-minute load average per CPU core is '
+             'above this (e.g. 0.9; not available on Windows)'
+    )
+
+    parser.add_argument(
+        '--min-free-memory',
+        dest='min_free_memory',
+        type=float,
+        default=None,
+        help='Hold new encodes while less than this many MB of memory are free'
+    )
+
+    parser.add_argument(
+        '--start',
+        type=_time_spec_arg,
+        default=None,
+        help='Convert from this point on: a media offset (90, 1:30, 1:02:30) or '
+             '@ and the recording time (@14:35:20 or "@2024-07-04 14:35:20")'
+    )
+
+    parser.add_argument(
+        '--end',
+        type=_time_spec_arg,
+        default=None,
+        help='Convert up to this point, in the same forms as --start'
+    )
+
+    parser.add_argument(
+        '--preflight',
+        choices=PREFLIGHT_MODES,
+        default=None,
+        help='Check each file\'s MPEG-TS packets before encoding and skip corrupt '
+             'ones. check: convert damaged but readable files as they are; repair: '
+             'convert them from a copy of their readable packets (kept in a '
+             '"repaired" folder next to the output)'
+    )
+
+    parser.add_argument(
+        '--catalog',
+        action='store_true',
+        help='Record each converted file in the footage catalog by recording '
+             'time (search it with: python footage_catalog.py query)'
+    )
+
+    parser.add_argument(
+        '--chapters',
+        action='store_true',
+        help='Add a chapter at every minute of recording time and a timecode '
+             'track starting at the recording time, so players and editors can '
+             'jump to a time of day (MP4 output)'
+    )
+
+    parser.add_argument(
+        '--plan',
+        action='store_true',
+        help='Dry run: print the expected conversion time of each file and the '
+             'whole batch, from conversion speeds learned on this machine'
+    )
+
+    parser.add_argument(
+        '--debug-timestamp',
+        action='store_true',
+        dest='debug_timestamp',
+        help='Debug mode: dump DPM marker hex bytes for timestamp analysis'
+    )
+
+    parsed = parser.parse_args(args)
+    if parsed.cache and (parsed.autotune or parsed.two_tier):
+        parser.error("--cache works with the default batch mode only, "
+                     "not with --autotune or --two-tier")
+    if parsed.queue:
+        # Queued jobs run in whichever process leases them, one at a time
+        unsupported = [flag for flag, value in (
+            ('--cache', parsed.cache),
+            ('--scratch-dir', parsed.scratch_dir),
+            ('--prefetch', parsed.prefetch),
+            ('--check-space', parsed.check_space),
+            ('--verify', parsed.verify),
+        ) if value]
+        if unsupported:
+            parser.error(f"--queue cannot be combined with {', '.join(unsupported)}")
+    parsed.output_file = None
+    parsed.legacy_mode = False
+
+    return parsed
+
+
+def check_ffmpeg():
+    """Check if FFmpeg is installed and available."""
+    global FFMPEG_PATH, FFPROBE_PATH
+    available, ffmpeg, ffprobe = check_ffmpeg_available()
+    if available:
+        FFMPEG_PATH = ffmpeg
+        FFPROBE_PATH = ffprobe
+    return available
+
+
+def get_video_creation_time(input_file):
+    """Extract the creation/recording time from video metadata.
+
+    Uses AVCHD DPM marker extraction as the primary method (for MTS files
+    from Sony, Panasonic, and other AVCHD cameras), with ffprobe metadata
+    extraction as a fallback.
+
+    Args:
+        input_file: Path to the video file.
+
+    Returns:
+        datetime object representing the recording timestamp.
+
+    Raises:
+        MetadataExtractionError: If the timestamp cannot be extracted from
+            video metadata. This error is raised instead of falling back to
+            file modification time to ensure timestamp accuracy.
+    """
+    # Clips on an AVCHD card: the playlists give the time without opening
+    # the clip (cross-checked against DPM when the card is indexed)
+    from avchd_index import lookup_clip
+    clip = lookup_clip(input_file)
+    if clip is not None and clip.recorded is not None:
+        return clip.recorded
+
+    # Primary method: Extract from AVCHD DPM marker (embedded in H.264 SEI data)
+    avchd_timestamp = extract_avchd_timestamp(input_file)
+    if avchd_timestamp is not None:
+        return avchd_timestamp
+
+    # Fallback: Try ffprobe creation_time tag
+    ffprobe = FFPROBE_PATH or get_ffprobe_path()
+    try:
+        result = subprocess.run(
+            [
+                ffprobe,
+                "-v", "quiet",
+                "-select_streams", "v:0",
+                "-show_entries", "format_tags=creation_time:stream_tags=creation_time",
+                "-of", "csv=p=0",
+                input_file
+            ],
+            capture_output=True,
+            text=True,
+            creationflags=get_subprocess_flags()
+        )
+
+        output = result.stdout.strip()
+        if output:
+            # Parse the creation time (usually in ISO format)
+            time_str = output.split('\n')[0].strip(',')
+            if time_str:
+                # Handle various date formats
+                for fmt in [
+                    "%Y-%m-%dT%H:%M:%S.%fZ",
+                    "%Y-%m-%dT%H:%M:%SZ",
+                    "%Y-%m-%d %H:%M:%S",
+                    "%Y-%m-%dT%H:%M:%S.%f",
+                    "%Y-%m-%dT%H:%M:%S"
+                ]:
+                    try:
+                        return datetime.strptime(time_str, fmt)
+                    except ValueError:
+                        continue
+
+        # No valid timestamp found in metadata
+        raise MetadataExtractionError(
+            f"Could not extract recording timestamp from metadata in '{input_file}'. "
+            "The file may be corrupted, missing metadata, or not an MTS video file."
+        )
+
+    except MetadataExtractionError:
+        # Re-raise our own exception
+        raise
+    except Exception as e:
+        raise MetadataExtractionError(
+            f"Failed to extract recording timestamp from '{input_file}': {e}"
+        )
+
+
+def get_video_duration(input_file):
+    """Get video duration in seconds using ffprobe.
+
+    Args:
+        input_file: Path to the video file.
+
+    Returns:
+        Duration in seconds, or 0.0 if duration cannot be determined.
+    """
+    ffprobe = FFPROBE_PATH or get_ffprobe_path()
+    try:
+        result = subprocess.run(
+            [
+                ffprobe,
+                "-v", "error",
+                "-show_entries", "format=duration",
+                "-of", "default=noprint_wrappers=1:nokey=1",
+                str(input_file)
+            ],
+            capture_output=True,
+            text=True,
+            creationflags=get_subprocess_flags()
+        )
+        return float(result.stdout.strip())
+    except (ValueError, TypeError, OSError, subprocess.SubprocessError):
+        return 0.0
+
+
+def parse_ffmpeg_stats(line):
+    """Parse the statistics from an FFmpeg progress line.
+
+    FFmpeg reports progress as e.g.
+    'frame=  100 fps= 25 q=28.0 size=  512kB time=00:00:04.00 bitrate=... speed=1.5x'.
+
+    Args:
+        line: A line of FFmpeg stderr output.
+
+    Returns:
+        Dictionary with any of the keys 'fps', 'speed' and 'time' (media
+        seconds encoded so far) found in the line. Empty if the line is
+        not a progress line.
+    """
+    stats = {}
+    match = re.search(r'fps=\s*(\d+\.?\d*)', line)
+    if match:
+        stats['fps'] = float(match.group(1))
+    match = re.search(r'speed=\s*(\d+\.?\d*)x', line)
+    if match:
+        stats['speed'] = float(match.group(1))
+    match = re.search(r'time=(\d+):(\d+):(\d+\.?\d*)', line)
+    if match:
+        hours, minutes, seconds = match.groups()
+        stats['time'] = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    return stats
+
+
+# Input/output name meaning stdin/stdout, as is customary for CLI tools
+STDIO_PATH = '-'
+
+# Chunk size for copying streams to and from FFmpeg
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+# MP4 flags for output that is written front to back to a pipe: no moov
+# atom at the end to seek back to, each keyframe starts a new fragment
+FRAGMENTED_MOVFLAGS = 'frag_keyframe+empty_moov+default_base_moof'
+
+
+class PeekedStream:
+    """Binary input stream whose first bytes have been read ahead.
+
+    The head is inspected (for the DPM timestamp) and then fed to FFmpeg
+    together with the rest of the stream, so nothing touches the disk.
+
+    Attributes:
+        stream: The underlying binary stream.
+        head: Bytes read ahead from the stream.
+    """
+
+    def __init__(self, stream, peek_size=DPM_SEARCH_SIZE):
+        """Initialize PeekedStream, reading up to peek_size bytes.
+
+        Args:
+            stream: Readable binary stream (file object or pipe).
+            peek_size: Number of bytes to read ahead.
+        """
+        self.stream = stream
+        chunks = []
+        remaining = peek_size
+        # Pipes may return short reads; keep going until full or EOF
+        while remaining > 0:
+            chunk = stream.read(remaining)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        self.head = b''.join(chunks)
+
+    def feed(self, pipe):
+        """Write the head and the rest of the stream to pipe, then close it.
+
+        Args:
+            pipe: Writable binary pipe (FFmpeg's stdin).
+        """
+        try:
+            pipe.write(self.head)
+            shutil.copyfileobj(self.stream, pipe, STREAM_CHUNK_SIZE)
+        except (BrokenPipeError, OSError, ValueError):
+            # FFmpeg exited early or was killed; it reports the error itself
+            pass
+        finally:
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+
+def _is_stream(target):
+    """Check whether an input or output argument is a stream, not a path."""
+    return target == STDIO_PATH or hasattr(target, 'read') or hasattr(target, 'write')
+
+
+def _copy_stream(source, destination):
+    """Copy FFmpeg's stdout to a file object without a file descriptor."""
+    shutil.copyfileobj(source, destination, STREAM_CHUNK_SIZE)
+    destination.flush()
+
+
+def _run_ffmpeg(cmd, output_path, stats_callback=None, cancel_event=None, low_priority=False,
+                input_stream=None, output_stream=None, governor=None):
+    """Run an FFmpeg command, echoing its progress line to the console.
+
+    Args:
+        cmd: Full FFmpeg command as a list of arguments.
+        output_path: Path of the file being written (for the status message).
+        stats_callback: Optional callable receiving the parse_ffmpeg_stats
+                        dictionary for each progress line. When given, the
+                        progress line is not echoed, so several conversions
+                        can run side by side.
+        cancel_event: Optional threading.Event. When set, FFmpeg is killed
+                      and the conversion reports failure.
+        low_priority: If True, run FFmpeg below normal OS priority.
+        input_stream: Optional PeekedStream fed to FFmpeg's stdin (the
+                      command must read 'pipe:0').
+        output_stream: Optional binary stream receiving FFmpeg's stdout (the
+                       command must write 'pipe:1'). Streams with a file
+                       descriptor are handed to FFmpeg directly.
+        governor: Optional GOVERNORS name; FFmpeg then runs at the
+                  profile's CPU and I/O priority with capped threads and
+                  x264 lookahead (see resource_governor).
+
+    Returns:
+        True if FFmpeg exited successfully, False otherwise.
+    """
+    workers = []
+    try:
+        profile = get_governor(governor)
+        if profile is not None:
+            cmd = govern_command(cmd, profile)
+        if input_stream is None and output_stream is None:
+            # Run FFmpeg with progress output
+            process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                universal_newlines=True,
+                creationflags=get_governed_flags(profile, low_priority),
+                preexec_fn=get_governed_preexec_fn(profile, low_priority)
+            )
+            progress = process.stdout
+        else:
+            # Streams carry media on stdin/stdout, so progress comes from stderr
+            stdout = None
+            if output_stream is not None:
+                stdout = subprocess.PIPE
+                try:
+                    output_stream.fileno()
+                    output_stream.flush()
+                    stdout = output_stream
+                except (AttributeError, OSError, ValueError):
+                    pass
+            process = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE if input_stream is not None else subprocess.DEVNULL,
+                stdout=stdout,
+                stderr=subprocess.PIPE,
+                creationflags=get_governed_flags(profile, low_priority),
+                preexec_fn=get_governed_preexec_fn(profile, low_priority)
+            )
+            if input_stream is not None:
+                workers.append(threading.Thread(
+                    target=input_stream.feed, args=(process.stdin,), daemon=True
+                ))
+            if stdout is subprocess.PIPE:
+                workers.append(threading.Thread(
+                    target=_copy_stream, args=(process.stdout, output_stream), daemon=True
+                ))
+            for worker in workers:
+                worker.start()
+            progress = io.TextIOWrapper(process.stderr, errors='replace')
+
+        # Show progress
+        for line in progress:
+            if cancel_event is not None and cancel_event.is_set():
+                process.kill()
+                break
+            if "frame=" in line or "time=" in line:
+                if stats_callback is not None:
+                    stats = parse_ffmpeg_stats(line)
+                    if stats:
+                        stats_callback(stats)
+                else:
+                    # Extract progress info
+                    print(f"\r{line.strip()[:80]}", end="", flush=True)
+
+        process.wait()
+        for worker in workers:
+            worker.join()
+
+        if cancel_event is not None and cancel_event.is_set():
+            print(f"\n\nInterrupted: {output_path}")
+            return False
+
+        if process.returncode == 0:
+            print(f"\n\nSuccess! Output saved to: {output_path}")
+            return True
+        else:
+            print(f"\n\nError: FFmpeg returned code {process.returncode}")
+            return False
+
+    except Exception as e:
+        print(f"\n\nError during conversion: {e}")
+        return False
+
+
+def get_seek_args(start_time=None, duration=None):
+    """Get the input options converting only part of a file.
+
+    Placed before -i, -ss makes the demuxer jump to the keyframe before
+    start_time instead of decoding everything up to it; the frames between
+    that keyframe and start_time are decoded and dropped (stream copies
+    start at the keyframe). Output timestamps start at zero at start_time.
+
+    Args:
+        start_time: Optional media offset in seconds.
+        duration: Optional length in seconds.
+
+    Returns:
+        List of FFmpeg input options (empty for the whole file).
+    """
+    args = ["-ss", str(start_time)] if start_time else []
+    if duration:
+        args += ["-t", str(duration)]
+    return args
+
+
+def build_subtitle_command(ffmpeg, input_path, subtitle_path, output_path,
+                           audio_codec=DEFAULT_AUDIO_CODEC, start_time=None, duration=None,
+                           filming_time=None, chapters_path=None, timecode=None):
+    """Build the FFmpeg command for the stream-copy subtitle mode.
+
+    The H.264 video is copied untouched into MP4, the audio is copied or
+    transcoded, and the timestamp cues are muxed as a mov_text track.
+
+    Args:
+        ffmpeg: Path to the ffmpeg executable.
+        input_path: Path to the input MTS file.
+        subtitle_path: Path to the SRT file with timestamp cues.
+        output_path: Path for the output MP4 file.
+        audio_codec: Key into AUDIO_CODECS ('aac' or 'copy').
+        start_time: Optional media offset to seek to on the input side.
+        duration: Optional length in seconds to copy.
+        filming_time: Optional datetime of the first copied frame, stored
+                      as the output's creation time.
+        chapters_path: Optional chapter file (see write_chapter_metadata).
+        timecode: Optional start timecode for a tmcd track.
+
+    Returns:
+        FFmpeg command as a list of arguments.
+    """
+    return [
+        ffmpeg,
+        *get_seek_args(start_time, duration),
+        "-i", str(input_path),
+        "-i", str(subtitle_path),
+        *get_chapters_input_args(chapters_path),
+        "-map", "0:v:0",
+        "-map", "0:a?",
+        "-map", "1:0",
+        "-c:v", "copy",
+        *AUDIO_CODECS[audio_codec],
+        "-c:s", "mov_text",
+        "-metadata:s:s:0", "title=Recording time",
+        "-disposition:s:0", "default",
+        *get_creation_time_args(filming_time),
+        *get_navigation_args(2 if chapters_path else None, timecode),
+        "-movflags", "+faststart",
+        "-y",
+        str(output_path)
+    ]
+
+
+def build_drawtext_filter(filming_time, font_size=32, position=None, coordinates=None,
+                          media_start=0.0, enable=None, font_file=None):
+    """Build the drawtext filter that renders the recording clock.
+
+    Args:
+        filming_time: datetime of the recording at media_start.
+        font_size: Font size for the timestamp text.
+        position: Timestamp position name (default: DEFAULT_POSITION).
+        coordinates: Optional raw x=...:y=... expression overriding position.
+        media_start: Media offset in seconds at which the clock shows
+                     filming_time (default: 0, the first frame).
+        enable: Optional timeline expression limiting when the text is drawn.
+        font_file: Optional font file path (default: the font resolved by
+                   font_resolver). Naming the file spares FFmpeg a
+                   fontconfig lookup on every launch.
+
+    Returns:
+        drawtext filter string.
+    """
+    # Get position coordinates using the utility function
+    pos = coordinates or get_position_coordinates(position)
+
+    # Epoch seconds added to the frame's pts to get the wall clock
+    clock_offset = f"{filming_time.timestamp() - media_start:.3f}"
+    enable_option = f":enable='{enable}'" if enable else ""
+
+    # Build the drawtext filter with dynamic time calculation
+    # The timestamp updates every second as the video plays
+    # We use FFmpeg expression language to calculate current time
+    return (
+        f"drawtext="
+        f"{get_fontfile_option(font_file)}"
+        f"text='%{{pts\\:localtime\\:{clock_offset}\\:%Y-%m-%d %H\\\\\\:%M\\\\\\:%S}}':"
+        f"fontsize={font_size}:"
+        f"fontcolor=white:"
+        f"borderw=2:"
+        f"bordercolor=black:"
+        f"{pos}"
+        f"{enable_option}"
+    )
+
+
+def build_clock_filter(filming_time, font_size=32, coordinates=None, clock_segments=None):
+    """Build the drawtext chain that renders the camera clock.
+
+    Without clock segments this is a single drawtext running from
+    filming_time. With several segments, each gets its own drawtext,
+    enabled only while the media time is inside the segment, so the label
+    follows every restart of the camera clock.
+
+    Args:
+        filming_time: datetime of the first frame of the recording.
+        font_size: Font size for the timestamp text.
+        coordinates: x=...:y=... expression for the text.
+        clock_segments: Optional list of clock_index.ClockSegment objects.
+
+    Returns:
+        Filter chain string.
+    """
+    if not clock_segments or len(clock_segments) < 2:
+        return build_drawtext_filter(filming_time, font_size, coordinates=coordinates)
+
+    filters = []
+    for index, segment in enumerate(clock_segments):
+        if index + 1 == len(clock_segments):
+            enable = f"gte(t,{segment.start})"
+        elif index == 0:
+            # The first segment also covers any frames before its first GOP
+            enable = f"lt(t,{clock_segments[1].start})"
+        else:
+            enable = f"gte(t,{segment.start})*lt(t,{clock_segments[index + 1].start})"
+        filters.append(build_drawtext_filter(
+            segment.wall_clock, font_size,
+            coordinates=coordinates,
+            media_start=segment.start,
+            enable=enable
+        ))
+    return ",".join(filters)
+
+
+def get_sprite_size(font_size):
+    """Get the canvas size for a pre-rendered timestamp label.
+
+    The canvas is sized for 'YYYY-MM-DD HH:MM:SS' plus the 2px border, with
+    some slack for wider fonts.
+
+    Args:
+        font_size: Font size for the timestamp text.
+
+    Returns:
+        Tuple of (width, height), both even.
+    """
+    width = int(font_size * 0.6 * len('0000-00-00 00:00:00')) + 8
+    height = int(font_size * 1.4) + 4
+    return width + width % 2, height + height % 2
+
+
+def get_overlay_coordinates(position, margin=20):
+    """Get FFmpeg overlay x:y expression for a given position.
+
+    Same placement as get_position_coordinates, expressed with the overlay
+    filter's main (W/H) and overlay (w/h) dimensions.
+
+    Args:
+        position: Position name, or None (uses DEFAULT_POSITION).
+        margin: Pixel margin from edges (default: 20).
+
+    Returns:
+        String containing FFmpeg x=...:y=... expression.
+
+    Raises:
+        ValueError: If position is not a valid position name.
+    """
+    return (
+        get_position_coordinates(position, margin)
+        .replace('w-tw', 'W-w')
+        .replace('h-th', 'H-h')
+    )
+
+
+def build_sprite_overlay_graph(filming_time, font_size=32, position=None, base_filters=None,
+                               margin=20, clock_segments=None):
+    """Build a filter graph that composites pre-rendered timestamp sprites.
+
+    Each second's label is rasterized once onto a small transparent canvas
+    running at 1 fps, and the overlay filter blits the current label onto
+    every video frame. The label only changes once per second, so this
+    avoids drawtext formatting and rasterizing the text on every frame.
+
+    Args:
+        filming_time: datetime of the first frame of the recording.
+        font_size: Font size for the timestamp text.
+        position: Timestamp position name (default: DEFAULT_POSITION).
+        base_filters: Optional list of filters (deinterlace, scale) applied
+                      to the video before the label is composited.
+        margin: Pixel margin from the frame edges.
+        clock_segments: Optional list of clock segments (see
+                        build_clock_filter).
+
+    Returns:
+        filter_complex string producing the labelled output '[vout]'.
+    """
+    if position is None:
+        position = DEFAULT_POSITION
+    width, height = get_sprite_size(font_size)
+
+    # Right-align the text within the canvas for right-hand positions so the
+    # edge margin matches the drawtext engine
+    text_x = 'w-tw-2' if position.endswith('right') else '2'
+    label = build_clock_filter(
+        filming_time, font_size, f'x={text_x}:y=(h-th)/2', clock_segments
+    )
+
+    sprite = (
+        f"color=c=black@0.0:s={width}x{height}:r=1,format=rgba,{label}[ts]"
+    )
+    base = f"[0:v]{','.join(base_filters)}[base];" if base_filters else ""
+    source = "[base]" if base_filters else "[0:v]"
+    overlay = f"{source}[ts]overlay={get_overlay_coordinates(position, margin)}:shortest=1[vout]"
+    return f"{base}{sprite};{overlay}"
+
+
+def build_filter_graph(filming_time, font_size=32, position=None, resolution=None,
+                       overlay_engine=DEFAULT_OVERLAY_ENGINE, scaler=None, deinterlace=False,
+                       clock_segments=None):
+    """Build the video filter arguments for a burned-in timestamp.
+
+    Filters are ordered by cost: the optional deinterlacer runs first (it
+    must see the original fields, before any vertical resize), then the
+    frame is scaled down, and only then is the timestamp drawn, so text
+    rendering and overlay work on the smaller output frame. Font size and
+    margins are adjusted so the label looks the same as on a full-size
+    frame.
+
+    Args:
+        filming_time: datetime of the first frame of the recording.
+        font_size: Font size for the timestamp text at FONT_REFERENCE_HEIGHT.
+        position: Timestamp position name (default: DEFAULT_POSITION).
+        resolution: Resolution preset name for optional scaling.
+        overlay_engine: 'drawtext' or 'sprite'.
+        scaler: Optional scaler algorithm from SCALERS.
+        deinterlace: If True, deinterlace with yadif before scaling.
+        clock_segments: Optional list of clock_index.ClockSegment objects
+                        for files whose camera clock restarts.
+
+    Returns:
+        List of FFmpeg arguments (-vf, or -filter_complex with -map).
+    """
+    base_filters = []
+    if deinterlace:
+        base_filters.append("yadif")
+    scale_filter = build_scale_filter(resolution, scaler)
+    if scale_filter:
+        base_filters.append(scale_filter)
+
+    factor = get_overlay_scale(resolution)
+    scaled_font = max(8, round(font_size * factor))
+    margin = max(4, round(20 * factor))
+
+    if overlay_engine == 'sprite':
+        graph = build_sprite_overlay_graph(
+            filming_time, scaled_font, position, base_filters, margin, clock_segments
+        )
+        return ["-filter_complex", graph, "-map", "[vout]", "-map", "0:a?"]
+
+    drawtext_filter = build_clock_filter(
+        filming_time, scaled_font, get_position_coordinates(position, margin), clock_segments
+    )
+    return ["-vf", ",".join(base_filters + [drawtext_filter])]
+
+
+def build_burn_in_command(ffmpeg, input_path, output_path, filming_time, font_size=32,
+                          position=None, resolution=None, audio_codec=DEFAULT_AUDIO_CODEC,
+                          overlay_engine=DEFAULT_OVERLAY_ENGINE, scaler=None,
+                          deinterlace=False, filter_threads=None, threads=None,
+                          preset=None, crf=None, input_format=None, fragmented=False,
+                          clock_segments=None, start_time=None, duration=None, audio=True,
+                          chapters_path=None, timecode=None):
+    """Build the FFmpeg command for a burned-in timestamp conversion.
+
+    Args:
+        ffmpeg: Path to the ffmpeg executable.
+        input_path: Path to the input MTS file.
+        output_path: Path for the output MP4 file.
+        filming_time: datetime of the first frame of the recording.
+        font_size: Font size for the timestamp text.
+        position: Timestamp position name (default: DEFAULT_POSITION).
+        resolution: Resolution preset name for optional scaling.
+        audio_codec: Key into AUDIO_CODECS ('aac' or 'copy').
+        overlay_engine: 'drawtext' draws the text on every frame, 'sprite'
+                        composites labels pre-rendered once per second.
+        scaler: Optional scaler algorithm from SCALERS.
+        deinterlace: If True, deinterlace before scaling.
+        filter_threads: Optional thread count for simple and complex
+                        filter graphs. None leaves FFmpeg's default.
+        threads: Encoder thread count. None or 0 uses all CPU cores.
+        preset: x264 preset (default: DEFAULT_PRESET).
+        crf: x264 constant rate factor (default: DEFAULT_CRF).
+        input_format: Optional demuxer name forced for the input (needed
+                      for pipes, which cannot be probed by extension).
+        fragmented: If True, write fragmented MP4 that needs no seeking,
+                    for output to a pipe.
+        clock_segments: Optional list of clock segments (see
+                        build_filter_graph).
+        start_time: Optional media offset (seconds) to start encoding at.
+                    The clock is not shifted; pass the filming time of the
+                    first encoded frame.
+        duration: Optional number of seconds to encode.
+        audio: If False, leave the audio out.
+        chapters_path: Optional chapter file (see write_chapter_metadata).
+        timecode: Optional start timecode for a tmcd track.
+
+    Returns:
+        FFmpeg command as a list of arguments.
+    """
+    input_args = ["-f", input_format] if input_format else []
+    input_args += get_seek_args(start_time, duration)
+    thread_args = []
+    if filter_threads:
+        thread_args = [
+            "-filter_threads", str(filter_threads),
+            "-filter_complex_threads", str(filter_threads),
+        ]
+
+    filter_args = build_filter_graph(
+        filming_time, font_size, position, resolution,
+        overlay_engine=overlay_engine,
+        scaler=scaler,
+        deinterlace=deinterlace,
+        clock_segments=clock_segments
+    )
+
+    return [
+        ffmpeg,
+        *thread_args,
+        *input_args,
+        "-i", str(input_path),
+        *get_chapters_input_args(chapters_path),
+        *filter_args,
+        "-c:v", "libx264",
+        "-preset", preset or DEFAULT_PRESET,
+        "-crf", str(crf if crf is not None else DEFAULT_CRF),
+        "-threads", str(threads or 0),  # 0 = use all available CPU cores
+        *(AUDIO_CODECS[audio_codec] if audio else ["-an"]),
+        *get_creation_time_args(filming_time),
+        *get_navigation_args(1 if chapters_path else None, timecode),
+        *(["-movflags", FRAGMENTED_MOVFLAGS, "-f", "mp4"] if fragmented
+          else ["-movflags", "+faststart"]),
+        "-y",  # Overwrite output file if exists
+        str(output_path)
+    ]
+
+
+# Outputs a single-decode conversion can produce besides the main MP4:
+# 'video' re-encodes with its own size and overlay, 'copy' stream-copies
+# the original, 'thumbnails' writes contact sheets and 'storyboard' writes
+# sheets plus a WebVTT file for scrubbing previews
+OUTPUT_KINDS = ('video', 'copy', 'thumbnails', 'storyboard')
+
+# Thumbnail sheets: one frame every THUMBNAIL_INTERVAL seconds, scaled to
+# THUMBNAIL_SIZE (AVCHD is 16:9) and tiled THUMBNAIL_TILE per image
+THUMBNAIL_INTERVAL = 10.0
+THUMBNAIL_SIZE = (320, 180)
+THUMBNAIL_TILE = (5, 5)
+
+# Named extra outputs for the CLI and batch options, written next to the
+# main output with these suffixes
+EXTRA_OUTPUT_PRESETS = ('proxy', 'original', 'thumbnails', 'storyboard')
+
+
+@dataclass
+class OutputSpec:
+    """One output of a single-decode multi-output conversion.
+
+    Attributes:
+        path: Output path. For thumbnails, an image pattern with a %d
+              field (e.g. 'clip_sheet_%03d.jpg'); for a storyboard, the
+              .vtt path (sheets are written next to it).
+        kind: One of OUTPUT_KINDS.
+        resolution: Resolution preset for 'video' outputs.
+        font_size: Timestamp font size at FONT_REFERENCE_HEIGHT.
+        position: Timestamp position name (default: DEFAULT_POSITION).
+        burn_in: Whether the timestamp is drawn on this output.
+        preset: x264 preset for 'video' outputs (default: DEFAULT_PRESET).
+        crf: x264 CRF for 'video' outputs (default: DEFAULT_CRF).
+        audio_codec: Audio handling for 'video' outputs, or None for the
+                     conversion's audio codec.
+        interval: Seconds between thumbnails.
+    """
+    path: str
+    kind: str = 'video'
+    resolution: Optional[str] = None
+    font_size: int = 32
+    position: Optional[str] = None
+    burn_in: bool = True
+    preset: Optional[str] = None
+    crf: Optional[int] = None
+    audio_codec: Optional[str] = None
+    interval: float = THUMBNAIL_INTERVAL
+
+
+def build_extra_outputs(output_path, names, font_size=32, position=None):
+    """Expand named extra outputs into OutputSpec objects.
+
+    Args:
+        output_path: Path of the main output; extras are written next to it.
+        names: Iterable of EXTRA_OUTPUT_PRESETS names, or OutputSpec objects
+               (passed through).
+        font_size: Timestamp font size of the conversion.
+        position: Timestamp position of the conversion.
+
+    Returns:
+        List of OutputSpec objects.
+
+    Raises:
+        ValueError: If a name is not in EXTRA_OUTPUT_PRESETS.
+    """
+    output_path = Path(output_path)
+    stem = output_path.with_suffix('')
+    specs = []
+    for name in names:
+        if isinstance(name, OutputSpec):
+            specs.append(name)
+        elif name == 'proxy':
+            specs.append(OutputSpec(f"{stem}_proxy.mp4", resolution='480p', font_size=font_size,
+                                    position=position, preset='veryfast', crf=28))
+        elif name == 'original':
+            specs.append(OutputSpec(f"{stem}_original.mp4", kind='copy'))
+        elif name == 'thumbnails':
+            specs.append(OutputSpec(f"{stem}_sheet_%03d.jpg", kind='thumbnails',
+                                    font_size=font_size, position=position))
+        elif name == 'storyboard':
+            specs.append(OutputSpec(f"{stem}_storyboard.vtt", kind='storyboard',
+                                    font_size=font_size, position=position))
+        else:
+            raise ValueError(
+                f"Invalid extra output '{name}'. "
+                f"Valid options: {', '.join(EXTRA_OUTPUT_PRESETS)}"
+            )
+    return specs
+
+
+def get_sheet_pattern(spec):
+    """Get the image file pattern of a thumbnails or storyboard output.
+
+    Args:
+        spec: OutputSpec of kind 'thumbnails' or 'storyboard'.
+
+    Returns:
+        Path pattern with a %03d field for the sheet number.
+    """
+    path = Path(spec.path)
+    if spec.kind == 'storyboard' or '%' not in path.name:
+        return str(path.with_name(f"{path.stem}_%03d.jpg"))
+    return str(path)
+
+
+def _format_vtt_time(seconds):
+    """Format a media offset in seconds as a WebVTT timestamp.
+
+    Args:
+        seconds: Offset from the start of the media in seconds.
+
+    Returns:
+        String in WebVTT format, e.g. '01:02:03.500'.
+    """
+    return _format_srt_time(seconds).replace(',', '.')
+
+
+def build_storyboard_vtt(duration, sheet_pattern, interval=THUMBNAIL_INTERVAL,
+                         size=THUMBNAIL_SIZE, tile=THUMBNAIL_TILE):
+    """Build the WebVTT file mapping time ranges to storyboard tiles.
+
+    Args:
+        duration: Media duration in seconds.
+        sheet_pattern: Pattern of the sheet images (see get_sheet_pattern).
+        interval: Seconds between thumbnails.
+        size: (width, height) of one thumbnail.
+        tile: (columns, rows) of thumbnails per sheet.
+
+    Returns:
+        WebVTT document as a string. Sheets are referenced by file name,
+        relative to the .vtt file.
+    """
+    width, height = size
+    columns, rows = tile
+    per_sheet = columns * rows
+    sheet_name = Path(sheet_pattern).name
+    cues = []
+    index = 0
+    while index * interval < duration:
+        start = index * interval
+        end = min(duration, start + interval)
+        cell = index % per_sheet
+        x = cell % columns * width
+        y = cell // columns * height
+        image = sheet_name % (index // per_sheet + 1)
+        cues.append(
+            f"{_format_vtt_time(start)} --> {_format_vtt_time(end)}\n"
+            f"{image}#xywh={x},{y},{width},{height}\n"
+        )
+        index += 1
+    return "WEBVTT\n\n" + "\n".join(cues)
+
+
+def _output_overlay(spec, filming_time, frame_height, clock_segments):
+    """Build the drawtext filter of one output, scaled to its frame height.
+
+    Returns:
+        drawtext filter string, or None if the output has no overlay.
+    """
+    if not spec.burn_in:
+        return None
+    factor = frame_height / FONT_REFERENCE_HEIGHT
+    return build_clock_filter(
+        filming_time,
+        max(8, round(spec.font_size * factor)),
+        get_position_coordinates(spec.position, max(4, round(20 * factor))),
+        clock_segments
+    )
+
+
+def build_output_chain(spec, filming_time, scaler=None, clock_segments=None):
+    """Build the filter chain of one decoded output branch.
+
+    Args:
+        spec: OutputSpec of any kind but 'copy'.
+        filming_time: datetime of the first frame of the recording.
+        scaler: Optional scaler algorithm from SCALERS.
+        clock_segments: Optional list of clock segments.
+
+    Returns:
+        Comma-separated filter chain ('null' if the branch is unfiltered).
+
+    Raises:
+        ValueError: If the output kind is not a decoded kind.
+    """
+    if spec.kind == 'video':
+        filters = []
+        scale_filter = build_scale_filter(spec.resolution, scaler)
+        if scale_filter:
+            filters.append(scale_filter)
+        overlay = _output_overlay(
+            spec, filming_time, FONT_REFERENCE_HEIGHT * get_overlay_scale(spec.resolution),
+            clock_segments
+        )
+    elif spec.kind in ('thumbnails', 'storyboard'):
+        width, height = THUMBNAIL_SIZE
+        algorithm = scaler or DEFAULT_SCALER
+        filters = [f"fps=1/{spec.interval:g}", f"scale={width}:{height}:flags={algorithm}"]
+        overlay = _output_overlay(spec, filming_time, height, clock_segments)
+    else:
+        raise ValueError(
+            f"Invalid output kind '{spec.kind}'. Valid options: {', '.join(OUTPUT_KINDS)}"
+        )
+    if overlay:
+        filters.append(overlay)
+    if spec.kind != 'video':
+        filters.append("tile={}x{}".format(*THUMBNAIL_TILE))
+    return ",".join(filters) or "null"
+
+
+def build_split_graph(chains, deinterlace=False):
+    """Build a filter graph fanning the decoded video out to several chains.
+
+    Args:
+        chains: Filter chains from build_output_chain; chain i is labelled
+                [oi] in the graph.
+        deinterlace: If True, deinterlace once before the split.
+
+    Returns:
+        filter_complex graph string.
+    """
+    head = "yadif," if deinterlace else ""
+    if len(chains) == 1:
+        return f"[0:v]{head}{chains[0]}[o0]"
+    labels = "".join(f"[d{i}]" for i in range(len(chains)))
+    return ";".join(
+        [f"[0:v]{head}split={len(chains)}{labels}"] +
+        [f"[d{i}]{chain}[o{i}]" for i, chain in enumerate(chains)]
+    )
+
+
+def build_multi_output_command(ffmpeg, input_path, filming_time, outputs,
+                               audio_codec=DEFAULT_AUDIO_CODEC, scaler=None,
+                               deinterlace=False, filter_threads=None, threads=None,
+                               clock_segments=None, start_time=None, duration=None,
+                               chapters_path=None, timecode=None):
+    """Build one FFmpeg command writing several outputs from a single decode.
+
+    The input is demuxed and decoded once. The decoded (and, if requested,
+    deinterlaced) frames are fanned out with split, and each branch gets its
+    own scaling and timestamp overlay before its encoder. Stream-copied
+    outputs take the packets straight from the demuxer.
+
+    Args:
+        ffmpeg: Path to the ffmpeg executable.
+        input_path: Path to the input MTS file.
+        filming_time: datetime of the first frame of the recording.
+        outputs: List of OutputSpec objects.
+        audio_codec: Default audio handling for 'video' outputs.
+        scaler: Optional scaler algorithm from SCALERS.
+        deinterlace: If True, deinterlace once before the split.
+        filter_threads: Optional thread count for the filter graph.
+        threads: Encoder thread count per output (default: all cores).
+        clock_segments: Optional list of clock segments (see
+                        build_filter_graph).
+        start_time: Optional media offset to seek to on the input side.
+        duration: Optional length in seconds to convert.
+        chapters_path: Optional chapter file for the MP4 outputs (see
+                       write_chapter_metadata).
+        timecode: Optional start timecode for the MP4 outputs' tmcd tracks.
+
+    Returns:
+        FFmpeg command as a list of arguments.
+
+    Raises:
+        ValueError: If an output kind is not in OUTPUT_KINDS.
+    """
+    chains = [
+        build_output_chain(spec, filming_time, scaler, clock_segments)
+        for spec in outputs if spec.kind != 'copy'
+    ]
+    graph = build_split_graph(chains, deinterlace)
+
+    thread_args = []
+    if filter_threads:
+        thread_args = ["-filter_complex_threads", str(filter_threads)]
+
+    cmd = [ffmpeg, *thread_args, *get_seek_args(start_time, duration), "-i", str(input_path),
+           *get_chapters_input_args(chapters_path)]
+    navigation_args = get_navigation_args(1 if chapters_path else None, timecode)
+    if chains:
+        cmd += ["-filter_complex", graph]
+
+    branch = 0
+    for spec in outputs:
+        if spec.kind == 'copy':
+            cmd += ["-map", "0:v", "-map", "0:a?", *get_creation_time_args(filming_time),
+                    *navigation_args, "-c", "copy", "-movflags", "+faststart", "-y",
+                    str(spec.path)]
+            continue
+        label = f"[o{branch}]"
+        branch += 1
+        if spec.kind == 'video':
+            cmd += [
+                "-map", label, "-map", "0:a?",
+                "-c:v", "libx264",
+                "-preset", spec.preset or DEFAULT_PRESET,
+                "-crf", str(spec.crf if spec.crf is not None else DEFAULT_CRF),
+                "-threads", str(threads or 0),
+                *AUDIO_CODECS[spec.audio_codec or audio_codec],
+                *get_creation_time_args(filming_time),
+                *navigation_args,
+                "-movflags", "+faststart",
+                "-y", str(spec.path)
+            ]
+        else:
+            cmd += ["-map", label, "-c:v", "mjpeg", "-q:v", "3",
+                    "-f", "image2", "-y", get_sheet_pattern(spec)]
+    return cmd
+
+
+def get_range_length(input_file, start=None, end=None, duration=None, clock_index=False):
+    """Get how many seconds of a file a --start/--end range converts.
+
+    Args:
+        input_file: Path to the input MTS file.
+        start: Optional range start (see convert_video).
+        end: Optional range end.
+        duration: File duration in seconds (default: read with ffprobe).
+        clock_index: If True, resolve recording times through the clock
+                     index, as convert_video(clock_index=True) does.
+
+    Returns:
+        Length in seconds (the whole duration without a range), or None if
+        it cannot be determined.
+    """
+    if duration is None:
+        duration = get_video_duration(input_file)
+    if start is None and end is None:
+        return duration or None
+    try:
+        specs = [parse_time_spec(value) for value in (start, end) if value is not None]
+        filming_time = clock_segments = None
+        if any(spec.seconds is None for spec in specs):
+            filming_time = get_video_creation_time(input_file)
+            if clock_index:
+                from clock_index import get_clock_segments
+                clock_segments = get_clock_segments(input_file)
+        first, length = resolve_range(start, end, filming_time, duration or 0.0, clock_segments)
+    except (ValueError, MetadataExtractionError):
+        return None
+    if length is not None:
+        return length
+    return duration - first if duration else None
+
+
+def convert_video(input_file, output_file=None, font_size=32, position=None, resolution=None,
+                  timestamp_mode=None, audio_codec=None, overlay_engine=None, scaler=None,
+                  deinterlace=False, filter_threads=None, threads=None, stats_callback=None,
+                  preset=None, crf=None, low_priority=False, cancel_event=None,
+                  clock_index=False, extra_outputs=None, output_format=None,
+                  hls_ladder=None, hls_segment_type=None, checkpoint=False,
+                  checkpoint_segment_seconds=None, governor=None, start=None, end=None,
+                  preflight=None, chapters=False, source_file=None):
+    """
     Convert MTS to MP4 with dynamic timestamp overlay.
 
     The timestamp shows the original filming date/time and updates every minute
     as the video progresses.
 
     Args:
-        input_file: Path to the input MTS file.
-        output_file: Optional path for the output MP4 file.
+        input_file: Path to the input MTS file, or a readable binary stream
+                    ('-' for stdin). Streams are piped into FFmpeg without
+                    a temporary file.
+        output_file: Optional path for the output MP4 file, or a writable
+                     binary stream ('-' for stdout) receiving fragmented MP4.
         font_size: Font size for the timestamp text (default: 32).
         position: Timestamp position. One of 'top-left', 'top-right',
                   'bottom-left', 'bottom-right'. Default is DEFAULT_POSITION.
         resolution: Output resolution preset. One of 'original', '1080p',
                     '720p', '480p'. Default is 'original' (no scaling).
+        timestamp_mode: 'burn-in' (default) re-encodes the video with the
+                        clock drawn on it. 'subtitle' stream-copies the video
+                        and adds a mov_text track with one cue per second;
+                        position, font_size and resolution are ignored.
+        audio_codec: 'aac' (default) to transcode audio, 'copy' to keep it.
+        overlay_engine: 'drawtext' (default) or 'sprite' for burn-in mode.
+        scaler: Scaler algorithm for resolution presets (see SCALERS).
+        deinterlace: If True, deinterlace the video before scaling.
+        filter_threads: Optional thread count for FFmpeg filtering.
+        threads: Encoder thread count (default: all CPU cores).
+        stats_callback: Optional callable receiving FFmpeg progress
+                        statistics (see parse_ffmpeg_stats) instead of
+                        echoing progress to the console.
+        preset: x264 preset (default: 'medium').
+        crf: x264 constant rate factor (default: 23).
+        low_priority: If True, run FFmpeg below normal OS priority.
+        cancel_event: Optional threading.Event; setting it kills FFmpeg and
+                      the conversion returns False.
+        clock_index: If True, scan the whole file for camera clock records
+                     so the timestamp follows every restart of the clock
+                     (files holding several recordings). Ignored for
+                     streams.
+        extra_outputs: Optional list of further outputs written from the
+                       same decode: EXTRA_OUTPUT_PRESETS names (written next
+                       to output_file) or OutputSpec objects. Needs burn-in
+                       mode and file paths; always uses the drawtext engine.
+        output_format: 'mp4' (default) or 'hls' for segments listed in an
+                       .m3u8 playlist (written at output_file with its
+                       extension replaced). HLS needs burn-in mode and
+                       file paths and always uses the drawtext engine.
+        hls_ladder: Optional list of resolution presets for HLS; each gets
+                    its own rendition and output_file becomes the master
+                    playlist. Default is one rendition at resolution.
+        hls_segment_type: 'fmp4' (default) or 'mpegts' HLS segments.
+        checkpoint: If True, encode in segments kept in a work directory
+                    next to the output, so an interrupted conversion of
+                    the same clip and settings resumes where it stopped
+                    (see checkpoint_encode). Applies to burn-in MP4
+                    conversions of files.
+        checkpoint_segment_seconds: Segment length for checkpoint (default:
+                                    DEFAULT_SEGMENT_SECONDS).
+        governor: Optional GOVERNORS name ('background' or 'idle') to run
+                  FFmpeg at lower CPU and disk priority with fewer threads
+                  and a shorter x264 lookahead.
+        start: Optional start of the part to convert: a media offset
+               (seconds or [HH:]MM:SS) or '@' and a recording time (see
+               time_range). Default is the beginning of the file.
+        end: Optional end of the part to convert, in the same forms.
+             Default is the end of the file. Ranges need file paths.
+        preflight: Optional PREFLIGHT_MODES entry. The input's packet
+                   structure is checked first and corrupt files are
+                   rejected before any encoding; with 'repair', files that
+                   lost sync or were cut short are converted from a copy
+                   of their readable packets, kept in a 'repaired' folder
+                   next to the output (see ts_integrity).
+        chapters: If True, add a chapter at every minute of recording time
+                  and a tmcd timecode track starting at the recording time,
+                  in the same FFmpeg run as the conversion. Applies to MP4
+                  output of files.
+        source_file: Optional path of the original clip when input_file is
+                     a local copy of it (a prefetched input). The recording
+                     time is read from the original, where the AVCHD
+                     navigation files can be found, and checkpointed work
+                     is kept under its identity, so a later run from
+                     another copy resumes it.
 
     Returns:
         True if conversion succeeded, False otherwise.
     """
+    if timestamp_mode is None:
+        timestamp_mode = DEFAULT_TIMESTAMP_MODE
+    if audio_codec is None:
+        audio_codec = DEFAULT_AUDIO_CODEC
+    if overlay_engine is None:
+        overlay_engine = DEFAULT_OVERLAY_ENGINE
+    if output_format is None:
+        output_format = DEFAULT_OUTPUT_FORMAT
+
+    run_options = {
+        'stats_callback': stats_callback,
+        'cancel_event': cancel_event,
+        'low_priority': low_priority,
+        'governor': governor,
+    }
+    command_options = {
+        'font_size': font_size,
+        'position': position,
+        'resolution': resolution,
+        'audio_codec': audio_codec,
+        'overlay_engine': overlay_engine,
+        'scaler': scaler,
+        'deinterlace': deinterlace,
+        'filter_threads': filter_threads,
+        'threads': threads,
+        'preset': preset,
+        'crf': crf,
+    }
+
+    if _is_stream(input_file) or _is_stream(output_file):
+        if timestamp_mode == 'subtitle':
+            print("Error: subtitle mode needs seekable files; use burn-in for streams.",
+                  file=sys.stderr)
+            return False
+        if (extra_outputs or output_format != 'mp4' or start is not None or end is not None
+                or preflight):
+            print("Error: extra outputs, HLS, ranges and pre-flight checks need file paths, "
+                  "not streams.", file=sys.stderr)
+            return False
+        return _convert_stream(input_file, output_file, command_options, run_options)
+
     input_path = Path(input_file)
 
     if not input_path.exists():
@@ -471,14 +2297,27 @@ def convert_video(input_file, output_file=None, font_size=32, position=None, res
         print(f"Warning: Input file is not .MTS format, proceeding anyway...")
 
     # Set output filename - use unique path to avoid overwriting
+    extension = OUTPUT_EXTENSIONS[output_format]
     if output_file is None:
-        output_path = get_unique_output_path(input_path)
+        output_path = get_unique_output_path(input_path, extension=extension)
     else:
         output_path = Path(output_file)
+        if output_format != DEFAULT_OUTPUT_FORMAT:
+            output_path = output_path.with_suffix(extension)
+
+    # The clip's identity survives prefetched and repaired copies
+    source_path = Path(source_file) if source_file is not None else input_path
+
+    if preflight:
+        input_path = _preflight_input(input_path, output_path, preflight)
+        if input_path is None:
+            return False
+        input_file = str(input_path)
 
-    # Get the original filming time
+    # Get the original filming time, from the clip in its AVCHD tree rather
+    # than a prefetched or repaired copy
     try:
-        filming_time = get_video_creation_time(input_file)
+        filming_time = get_video_creation_time(str(source_path))
     except MetadataExtractionError as e:
         print(f"\nError: {e}")
         print("The recording timestamp could not be determined from the video metadata.")
@@ -487,74 +2326,463 @@ def convert_video(input_file, output_file=None, font_size=32, position=None, res
 
     print(f"Detected filming time: {filming_time.strftime('%Y-%m-%d %H:%M:%S')}")
 
-    # Get position coordinates using the utility function
-    pos = get_position_coordinates(position)
+    clock_segments = None
+    if clock_index:
+        from clock_index import get_clock_segments
+        clock_segments = get_clock_segments(input_path)
+        if len(clock_segments) > 1:
+            print(f"Camera clock restarts {len(clock_segments) - 1} time(s); "
+                  "the timestamp will follow it.")
+        else:
+            clock_segments = None
+
+    # Range: seek on the input side and move the clock to the range start
+    range_start, range_length = 0.0, None
+    if start is not None or end is not None:
+        try:
+            range_start, range_length = resolve_range(
+                start, end, filming_time, get_video_duration(input_path), clock_segments
+            )
+        except ValueError as e:
+            print(f"Error: {e}")
+            return False
+        print(f"Converting range {describe_range(range_start, range_length)} of the recording")
+    range_options = {'start_time': range_start or None, 'duration': range_length}
+    cut_time, cut_segments = offset_clock(filming_time, clock_segments, range_start)
 
-    # Build the drawtext filter with dynamic time calculation
-    # The timestamp updates every second as the video plays
-    # We use FFmpeg expression language to calculate current time
-    drawtext_filter = (
-        f"drawtext="
-        f"text='%{{pts\\:localtime\\:{int(filming_time.timestamp())}\\:%Y-%m-%d %H\\\\\\:%M\\\\\\:%S}}':"
-        f"fontsize={font_size}:"
-        f"fontcolor=white:"
-        f"borderw=2:"
-        f"bordercolor=black:"
-        f"{pos}"
-    )
+    ffmpeg = FFMPEG_PATH or get_ffmpeg_path()
 
-    # Combine drawtext with optional resolution scaling
-    video_filter = build_video_filter(drawtext_filter, resolution)
+    if output_format == 'hls':
+        if timestamp_mode == 'subtitle' or extra_outputs:
+            print("Error: HLS output needs burn-in mode and no extra outputs.")
+            return False
+        return _convert_hls(
+            ffmpeg, input_path, output_path, cut_time, command_options,
+            run_options, cut_segments, hls_ladder, hls_segment_type, **range_options
+        )
 
-    # FFmpeg command
-    ffmpeg = FFMPEG_PATH or get_ffmpeg_path()
-    cmd = [
-        ffmpeg,
-        "-i", str(input_path),
-        "-vf", video_filter,
-        "-c:v", "libx264",
-        "-preset", "medium",
-        "-crf", "23",
-        "-threads", "0",  # Use all available CPU cores
-        "-c:a", "aac",
-        "-b:a", "192k",
-        "-movflags", "+faststart",
-        "-y",  # Overwrite output file if exists
-        str(output_path)
-    ]
+    # Chapters and the timecode track are muxed by the conversion's own run
+    navigation = contextlib.nullcontext({})
+    if chapters:
+        navigation = prepare_navigation(
+            input_path, cut_time,
+            range_length or get_video_duration(input_path) - range_start, cut_segments
+        )
+    with navigation as navigation_options:
+        if extra_outputs:
+            if timestamp_mode == 'subtitle':
+                print("Error: extra outputs need burn-in mode.")
+                return False
+            return _convert_multi_output(
+                ffmpeg, input_path, output_path, cut_time, extra_outputs,
+                command_options, run_options, cut_segments, **range_options,
+                **navigation_options
+            )
+
+        if timestamp_mode == 'subtitle':
+            return _convert_with_subtitle_track(
+                ffmpeg, input_path, output_path, cut_time, audio_codec,
+                clock_segments=cut_segments, **range_options, **navigation_options,
+                **run_options
+            )
+
+        if checkpoint:
+            return _convert_checkpointed(
+                ffmpeg, input_path, output_path, filming_time, command_options,
+                run_options, clock_segments, checkpoint_segment_seconds, **range_options,
+                source_path=source_path, **navigation_options
+            )
+
+        cmd = build_burn_in_command(
+            ffmpeg, input_path, output_path, cut_time,
+            clock_segments=cut_segments, **range_options, **command_options,
+            **navigation_options
+        )
+
+        print(f"\nConverting: {input_path.name} -> {output_path.name}")
+        print("This may take a while depending on video length...\n")
+
+        return _run_ffmpeg(cmd, output_path, **run_options)
+
+
+def _convert_multi_output(ffmpeg, input_path, output_path, filming_time, extra_outputs,
+                          command_options, run_options, clock_segments=None,
+                          start_time=None, duration=None, **navigation):
+    """Write the main output and every extra output from one decode.
+
+    Args:
+        ffmpeg: Path to the ffmpeg executable.
+        input_path: Path to the input MTS file.
+        output_path: Path of the main MP4 output.
+        filming_time: datetime of the first frame of the recording.
+        extra_outputs: EXTRA_OUTPUT_PRESETS names or OutputSpec objects.
+        command_options: convert_video burn-in options.
+        run_options: _run_ffmpeg keyword arguments.
+        clock_segments: Optional list of clock segments.
+        start_time: Optional media offset to start at.
+        duration: Optional length in seconds to convert.
+        **navigation: Optional chapters_path and timecode (see
+                      prepare_navigation).
+
+    Returns:
+        True if every output was written, False otherwise.
+    """
+    try:
+        extras = build_extra_outputs(
+            output_path, extra_outputs,
+            font_size=command_options['font_size'], position=command_options['position']
+        )
+    except ValueError as e:
+        print(f"Error: {e}")
+        return False
+    main = OutputSpec(
+        str(output_path),
+        resolution=command_options['resolution'],
+        font_size=command_options['font_size'],
+        position=command_options['position'],
+        preset=command_options['preset'],
+        crf=command_options['crf'],
+    )
+    outputs = [main] + extras
+    cmd = build_multi_output_command(
+        ffmpeg, input_path, filming_time, outputs,
+        audio_codec=command_options['audio_codec'],
+        scaler=command_options['scaler'],
+        deinterlace=command_options['deinterlace'],
+        filter_threads=command_options['filter_threads'],
+        threads=command_options['threads'],
+        clock_segments=clock_segments,
+        start_time=start_time,
+        duration=duration,
+        **navigation
+    )
 
-    print(f"\nConverting: {input_path.name} -> {output_path.name}")
+    names = ", ".join(Path(spec.path).name for spec in extras)
+    print(f"\nConverting: {input_path.name} -> {output_path.name} (also {names})")
     print("This may take a while depending on video length...\n")
 
+    if not _run_ffmpeg(cmd, output_path, **run_options):
+        return False
+
+    # The storyboard covers what was converted: the range, or the whole file
+    length = duration
+    if length is None and any(spec.kind == 'storyboard' for spec in extras):
+        length = get_video_duration(input_path) - (start_time or 0.0)
+    for spec in extras:
+        if spec.kind == 'storyboard':
+            Path(spec.path).write_text(
+                build_storyboard_vtt(length, get_sheet_pattern(spec), spec.interval),
+                encoding='utf-8'
+            )
+    return True
+
+
+def _convert_hls(ffmpeg, input_path, playlist_path, filming_time, command_options,
+                 run_options, clock_segments=None, ladder=None, segment_type=None,
+                 start_time=None, duration=None):
+    """Write an HLS output (see hls_output.build_hls_command).
+
+    Args:
+        ffmpeg: Path to the ffmpeg executable.
+        input_path: Path to the input MTS file.
+        playlist_path: Path of the .m3u8 playlist to write.
+        filming_time: datetime of the first frame of the recording.
+        command_options: convert_video burn-in options.
+        run_options: _run_ffmpeg keyword arguments.
+        clock_segments: Optional list of clock segments.
+        ladder: Optional list of resolution presets, one per rendition.
+        segment_type: One of HLS_SEGMENT_TYPES.
+        start_time: Optional media offset to start at.
+        duration: Optional length in seconds to convert.
+
+    Returns:
+        True if FFmpeg succeeded, False otherwise.
+    """
+    from hls_output import build_hls_command, get_rendition_names
+    from mp4_verify import get_source_summary
+
+    options = {
+        key: command_options[key]
+        for key in ('font_size', 'position', 'resolution', 'audio_codec', 'scaler',
+                    'deinterlace', 'filter_threads', 'threads', 'preset', 'crf')
+    }
     try:
-        # Run FFmpeg with progress output
-        process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            universal_newlines=True,
-            creationflags=get_subprocess_flags()
+        cmd = build_hls_command(
+            ffmpeg, input_path, playlist_path, filming_time,
+            ladder=ladder, segment_type=segment_type, clock_segments=clock_segments,
+            has_audio=get_source_summary(input_path)[1], start_time=start_time,
+            duration=duration, **options
         )
+    except ValueError as e:
+        print(f"Error: {e}")
+        return False
 
-        # Show progress
-        for line in process.stdout:
-            if "frame=" in line or "time=" in line:
-                # Extract progress info
-                print(f"\r{line.strip()[:80]}", end="", flush=True)
+    renditions = ""
+    if ladder and len(set(ladder)) > 1:
+        renditions = f", {', '.join(get_rendition_names(dict.fromkeys(ladder)))}"
+    print(f"\nConverting: {input_path.name} -> {playlist_path.name} (HLS{renditions})")
+    print("This may take a while depending on video length...\n")
 
-        process.wait()
+    return _run_ffmpeg(cmd, playlist_path, **run_options)
 
-        if process.returncode == 0:
-            print(f"\n\nSuccess! Output saved to: {output_path}")
-            return True
-        else:
-            print(f"\n\nError: FFmpeg returned code {process.returncode}")
+
+def _convert_checkpointed(ffmpeg, input_path, output_path, filming_time, command_options,
+                          run_options, clock_segments=None, segment_seconds=None,
+                          start_time=None, duration=None, source_path=None, **navigation):
+    """Burn in the timestamp segment by segment, resuming earlier work.
+
+    Args:
+        ffmpeg: Path to the ffmpeg executable.
+        input_path: Path to the input MTS file.
+        output_path: Path for the output MP4 file.
+        filming_time: datetime of the first frame of the recording.
+        command_options: convert_video burn-in options.
+        run_options: _run_ffmpeg keyword arguments.
+        clock_segments: Optional list of clock segments.
+        segment_seconds: Segment length (default: DEFAULT_SEGMENT_SECONDS).
+        start_time: Optional media offset of the range to convert.
+        duration: Optional length of the range (default: to the end).
+        source_path: Path of the original clip the work directory is keyed
+                     on (default: input_path).
+        **navigation: Optional chapters_path and timecode, added when the
+                      segments are joined (see prepare_navigation).
+
+    Returns:
+        True if the output was written, False otherwise. Finished segments
+        are kept when the conversion fails or is cancelled.
+    """
+    from checkpoint_encode import (
+        DEFAULT_SEGMENT_SECONDS,
+        build_concat_command,
+        get_checkpoint_dir,
+        get_part_path,
+        get_partial_path,
+        plan_segments,
+        remove_checkpoint,
+        write_concat_list
+    )
+
+    segment_seconds = segment_seconds or DEFAULT_SEGMENT_SECONDS
+    start_time = start_time or 0
+    length = duration
+    if length is None:
+        length = get_video_duration(input_path) - start_time
+        if length <= 0:
+            print("Error: could not determine the video duration for checkpointed encoding.")
             return False
 
-    except Exception as e:
-        print(f"\n\nError during conversion: {e}")
+    settings = dict(command_options, filming_time=filming_time, segment_seconds=segment_seconds)
+    if start_time or duration:
+        settings.update(start_time=start_time, duration=duration)
+    work_dir = get_checkpoint_dir(source_path or input_path, output_path.parent, settings)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    segments = plan_segments(length, segment_seconds)
+
+    done = sum(get_part_path(work_dir, index).exists() for index in range(len(segments)))
+    print(f"\nConverting: {input_path.name} -> {output_path.name} "
+          f"in {len(segments)} checkpointed segment(s)")
+    if done:
+        print(f"Resuming: {done} segment(s) already encoded")
+
+    stats_callback = run_options['stats_callback']
+    for index, (offset, segment_length) in enumerate(segments):
+        part = get_part_path(work_dir, index)
+        if part.exists():
+            continue
+        if segment_length is None and duration:
+            # The last segment of a range ends with the range
+            segment_length = duration - offset
+        segment_time, segment_clock = offset_clock(
+            filming_time, clock_segments, start_time + offset
+        )
+        partial = get_partial_path(work_dir, index)
+        cmd = build_burn_in_command(
+            ffmpeg, input_path, partial, segment_time,
+            clock_segments=segment_clock, start_time=start_time + offset,
+            duration=segment_length, audio=False, **command_options
+        )
+        segment_options = dict(run_options)
+        if stats_callback is not None:
+            # Report progress on the timeline of the whole conversion
+            segment_options['stats_callback'] = lambda stats, offset=offset: stats_callback(
+                dict(stats, time=stats['time'] + offset) if 'time' in stats else stats
+            )
+        if not _run_ffmpeg(cmd, part.name, **segment_options):
+            return False
+        os.replace(partial, part)
+
+    cmd = build_concat_command(
+        ffmpeg, write_concat_list(work_dir, len(segments)), input_path, output_path,
+        command_options['audio_codec'], start_time=start_time, duration=duration,
+        filming_time=offset_clock(filming_time, clock_segments, start_time)[0],
+        **navigation
+    )
+    if not _run_ffmpeg(cmd, output_path, **run_options):
+        return False
+    remove_checkpoint(work_dir)
+    return True
+
+
+def _convert_stream(input_file, output_file, command_options, run_options):
+    """Burn in the timestamp where the input or output is a stream.
+
+    Stream input is identified from the DPM marker in its first bytes and
+    then piped into FFmpeg; stream output is fragmented MP4 on FFmpeg's
+    stdout. When writing to stdout, status messages go to stderr.
+
+    Args:
+        input_file: Input path, binary stream, or '-' for stdin.
+        output_file: Output path, binary stream, or '-' for stdout. None
+                     writes next to a path input, or to stdout otherwise.
+        command_options: Keyword arguments for build_burn_in_command.
+        run_options: Keyword arguments for _run_ffmpeg.
+
+    Returns:
+        True if conversion succeeded, False otherwise.
+    """
+    if output_file is None and _is_stream(input_file):
+        output_file = STDIO_PATH
+
+    to_stdout = output_file == STDIO_PATH
+    # Grab the real stdout before status output is redirected away from it
+    stdout = sys.stdout.buffer if to_stdout else None
+    messages = contextlib.redirect_stdout(sys.stderr) if to_stdout else contextlib.nullcontext()
+
+    with messages:
+        input_stream = None
+        if _is_stream(input_file):
+            stream = sys.stdin.buffer if input_file == STDIO_PATH else input_file
+            input_stream = PeekedStream(stream)
+            filming_time = parse_dpm_timestamp(input_stream.head)
+            if filming_time is None:
+                print("\nError: No AVCHD recording timestamp (DPM marker) found at the "
+                      "start of the input stream.")
+                return False
+            input_arg, input_format, input_name = 'pipe:0', 'mpegts', '<stdin>'
+        else:
+            input_path = Path(input_file)
+            if not input_path.exists():
+                print(f"Error: Input file '{input_file}' not found.")
+                return False
+            try:
+                filming_time = get_video_creation_time(input_file)
+            except MetadataExtractionError as e:
+                print(f"\nError: {e}")
+                return False
+            input_arg, input_format, input_name = str(input_path), None, input_path.name
+
+        output_stream = None
+        if _is_stream(output_file):
+            output_stream = stdout if to_stdout else output_file
+            output_arg, output_name = 'pipe:1', '<stdout>'
+        else:
+            output_path = Path(output_file) if output_file else get_unique_output_path(Path(input_file))
+            output_arg, output_name = str(output_path), output_path.name
+
+        print(f"Detected filming time: {filming_time.strftime('%Y-%m-%d %H:%M:%S')}")
+
+        cmd = build_burn_in_command(
+            FFMPEG_PATH or get_ffmpeg_path(), input_arg, output_arg, filming_time,
+            input_format=input_format,
+            fragmented=output_stream is not None,
+            **command_options
+        )
+
+        print(f"\nConverting: {input_name} -> {output_name}")
+        return _run_ffmpeg(
+            cmd, output_name,
+            input_stream=input_stream,
+            output_stream=output_stream,
+            **run_options
+        )
+
+
+def _preflight_input(input_path, output_path, mode):
+    """Check an input's packet structure before spending encoder time on it.
+
+    Args:
+        input_path: Path to the input MTS file.
+        output_path: Path of the conversion's output.
+        mode: PREFLIGHT_MODES entry.
+
+    Returns:
+        Path to convert from (the input or its repaired copy), or None if
+        the input is rejected.
+    """
+    from ts_integrity import (
+        STATUS_CORRUPT,
+        STATUS_REPAIRABLE,
+        get_repair_path,
+        get_report,
+        repair_file
+    )
+
+    report = get_report(input_path)
+    for warning in report.warnings:
+        print(f"Warning: {input_path.name}: {warning}")
+    if report.status == STATUS_CORRUPT:
+        print(f"Error: '{input_path.name}' failed the pre-flight check: "
+              + "; ".join(report.problems))
+        return None
+    if report.status != STATUS_REPAIRABLE:
+        return input_path
+
+    repair_path = get_repair_path(input_path, output_path.parent)
+    if mode != 'repair' or repair_path.resolve() == input_path.resolve():
+        print(f"Warning: {input_path.name}: " + "; ".join(report.problems))
+        return input_path
+    repaired = repair_file(input_path, repair_path, report)
+    print(f"Repaired {input_path.name} ({'; '.join(report.problems)}); "
+          f"converting from {repaired}")
+    return repaired
+
+
+def _convert_with_subtitle_track(ffmpeg, input_path, output_path, filming_time, audio_codec,
+                                 clock_segments=None, start_time=None, duration=None,
+                                 chapters_path=None, timecode=None, **run_options):
+    """Stream-copy the video and attach a soft timestamp subtitle track.
+
+    Args:
+        ffmpeg: Path to the ffmpeg executable.
+        input_path: Path to the input MTS file.
+        output_path: Path for the output MP4 file.
+        filming_time: datetime of the first frame of the recording.
+        audio_codec: Key into AUDIO_CODECS ('aac' or 'copy').
+        clock_segments: Optional list of clock segments for the cues.
+        start_time: Optional media offset to start at; the copy starts at
+                    the keyframe before it.
+        duration: Optional length in seconds to copy.
+        chapters_path: Optional chapter file (see write_chapter_metadata).
+        timecode: Optional start timecode for a tmcd track.
+        **run_options: Keyword arguments for _run_ffmpeg (stats_callback,
+                       cancel_event, low_priority).
+
+    Returns:
+        True if conversion succeeded, False otherwise.
+    """
+    cue_duration = duration or get_video_duration(input_path) - (start_time or 0.0)
+    if cue_duration <= 0:
+        print(f"\nError: Could not determine the duration of '{input_path}'.")
+        print("Subtitle mode needs the duration to build timestamp cues.")
         return False
 
+    subtitle_path = write_timestamp_subtitles(
+        filming_time, cue_duration, clock_segments=clock_segments
+    )
+    try:
+        cmd = build_subtitle_command(
+            ffmpeg, input_path, subtitle_path, output_path, audio_codec,
+            start_time=start_time, duration=duration, filming_time=filming_time,
+            chapters_path=chapters_path, timecode=timecode
+        )
+        print(f"\nCopying: {input_path.name} -> {output_path.name} (timestamp subtitle track)")
+        return _run_ffmpeg(cmd, output_path, **run_options)
+    finally:
+        try:
+            subtitle_path.unlink()
+        except OSError:
+            pass
+
 
 def run_cli(args):
     """Run the CLI with the given arguments.
@@ -613,19 +2841,73 @@ def run_cli(args):
 
         return (len(files), 0)
 
+    # Plan mode: estimate conversion times without converting
+    if parsed.plan:
+        files = discover_files(parsed.input_paths)
+        if not files:
+            print("No MTS files found.")
+            return (0, 0)
+        _print_plan(parsed, files)
+        return (0, 0)
+
     # Check for FFmpeg
     if not check_ffmpeg():
         print("\nError: FFmpeg is not installed or not in PATH.")
         return (0, 0)
 
+    throttle = create_throttle(parsed.max_load, parsed.min_free_memory)
+
     # Legacy mode: single file with explicit output
     if parsed.legacy_mode:
+        if throttle is not None:
+            throttle.wait()
         success = convert_video(
             parsed.input_paths[0],
             parsed.output_file,
             position=parsed.position,
-            resolution=parsed.resolution
+            resolution=parsed.resolution,
+            timestamp_mode=parsed.timestamp_mode,
+            audio_codec=parsed.audio_codec,
+            overlay_engine=parsed.overlay_engine,
+            scaler=parsed.scaler,
+            deinterlace=parsed.deinterlace,
+            filter_threads=parsed.filter_threads,
+            clock_index=parsed.clock_index,
+            extra_outputs=parsed.also,
+            output_format=parsed.output_format,
+            hls_ladder=parsed.hls_ladder,
+            hls_segment_type=parsed.hls_segment_type,
+            checkpoint=parsed.checkpoint,
+            checkpoint_segment_seconds=parsed.checkpoint_segment,
+            governor=parsed.governor,
+            start=parsed.start,
+            end=parsed.end,
+            preflight=parsed.preflight,
+            chapters=parsed.chapters
         )
+        if (success and parsed.verify and not _is_stream(parsed.output_file)
+                and parsed.output_format == 'mp4'):
+            from mp4_verify import verify_output
+            expected_duration = None
+            if parsed.start is not None or parsed.end is not None:
+                expected_duration = get_range_length(
+                    parsed.input_paths[0], parsed.start, parsed.end,
+                    clock_index=parsed.clock_index
+                )
+            verification = verify_output(
+                parsed.output_file, parsed.input_paths[0],
+                expect_subtitle=parsed.timestamp_mode == 'subtitle',
+                expected_duration=expected_duration
+            )
+            for problem in verification.problems:
+                print(f"Verification failed: {problem}")
+            success = verification.ok
+        if success and parsed.catalog and not _is_stream(parsed.input_paths[0]):
+            from footage_catalog import FootageCatalog
+            try:
+                FootageCatalog().record(parsed.input_paths[0], parsed.output_file)
+            except (OSError, sqlite3.Error) as e:
+                print(f"Warning: could not record the clip in the catalog: {e}")
         return (1, 0) if success else (0, 1)
 
     # Batch mode: discover files and use BatchConverter
@@ -635,22 +2917,211 @@ def run_cli(args):
         print("No MTS files found.")
         return (0, 0)
 
+    from batch_plan import EtaTracker, format_duration, plan_batch, ThroughputModel
+
+    throughput_model = ThroughputModel()
+    # Two-tier batches run two jobs per file, which the plan does not cover
+    eta = None if parsed.two_tier else EtaTracker(
+        plan_batch(files, _plan_options(parsed), throughput_model)
+    )
+
     # Progress callback for displaying per-file progress
     def progress_callback(current, total, current_file):
-        print(f"Converting {current}/{total}: {current_file.name}")
+        if eta is None:
+            print(f"Converting {current}/{total}: {current_file.name}")
+            return
+        eta.file_done(current_file)
+        print(f"Converting {current}/{total}: {current_file.name} "
+              f"(about {format_duration(eta.remaining())} left)")
 
     # Create batch converter with output directory, position and resolution if specified
     output_dir = Path(parsed.output_dir) if parsed.output_dir else None
-    converter = BatchConverter(
+    converter_class = BatchConverter
+    converter_extra = {'throughput_model': throughput_model}
+    if parsed.queue:
+        results = _run_queued(parsed, files, output_dir, progress_callback, throttle)
+        if parsed.catalog:
+            from footage_catalog import FootageCatalog, record_results
+            record_results(FootageCatalog(), results)
+        return _print_batch_summary(results)
+    if parsed.autotune:
+        from autotune import AdaptiveBatchConverter
+        converter_class = AdaptiveBatchConverter
+        converter_extra['max_workers'] = parsed.max_workers
+    elif parsed.two_tier:
+        from batch_converter import TwoTierBatchConverter
+        converter_class = TwoTierBatchConverter
+    if parsed.cache:
+        from conversion_cache import ConversionCache
+        converter_extra['cache'] = ConversionCache()
+    if parsed.scratch_dir:
+        converter_extra['scratch_dir'] = Path(parsed.scratch_dir)
+        converter_extra['scratch_limit_gb'] = parsed.scratch_limit
+    if parsed.check_space:
+        from space_planner import SpacePlanner
+        converter_extra['space_planner'] = SpacePlanner()
+    if parsed.prefetch:
+        converter_extra['prefetch'] = True
+        converter_extra['prefetch_budget_gb'] = parsed.prefetch_budget
+    if parsed.also:
+        converter_extra['extra_outputs'] = parsed.also
+    if parsed.output_format != DEFAULT_OUTPUT_FORMAT:
+        converter_extra['output_format'] = parsed.output_format
+        converter_extra['hls_ladder'] = parsed.hls_ladder
+        converter_extra['hls_segment_type'] = parsed.hls_segment_type
+    if parsed.checkpoint:
+        converter_extra['checkpoint'] = True
+        converter_extra['checkpoint_segment_seconds'] = parsed.checkpoint_segment
+    if parsed.governor:
+        converter_extra['governor'] = parsed.governor
+    if throttle is not None:
+        converter_extra['throttle'] = throttle
+    if parsed.start is not None or parsed.end is not None:
+        converter_extra['start'] = parsed.start
+        converter_extra['end'] = parsed.end
+    if parsed.preflight:
+        converter_extra['preflight'] = parsed.preflight
+    if parsed.catalog:
+        from footage_catalog import FootageCatalog
+        converter_extra['catalog'] = FootageCatalog()
+    if parsed.chapters:
+        converter_extra['chapters'] = True
+
+    converter = converter_class(
         progress_callback=progress_callback,
         output_dir=output_dir,
         position=parsed.position,
-        resolution=parsed.resolution
+        resolution=parsed.resolution,
+        timestamp_mode=parsed.timestamp_mode,
+        audio_codec=parsed.audio_codec,
+        overlay_engine=parsed.overlay_engine,
+        scaler=parsed.scaler,
+        deinterlace=parsed.deinterlace,
+        filter_threads=parsed.filter_threads,
+        clock_index=parsed.clock_index,
+        verify=parsed.verify,
+        **converter_extra
     )
 
     # Run batch conversion
     results = converter.convert_batch(files)
 
+    return _print_batch_summary(results)
+
+
+def _run_queued(parsed, files, output_dir, progress_callback, throttle=None):
+    """Submit files to the shared job queue and work until they are done.
+
+    Args:
+        parsed: Parsed CLI arguments.
+        files: MTS files to convert.
+        output_dir: Optional output directory.
+        progress_callback: Called as progress_callback(current, total, file)
+                           when one of these files finishes.
+        throttle: Optional DispatchThrottle checked before each lease.
+
+    Returns:
+        List of BatchResult objects, one per input file, in input order.
+    """
+    from batch_converter import BatchConverter
+    from job_queue import JobQueue, run_workers
+
+    # BatchConverter owns the mapping from settings to convert_video options
+    options = BatchConverter(
+        position=parsed.position,
+        resolution=parsed.resolution,
+        timestamp_mode=parsed.timestamp_mode,
+        audio_codec=parsed.audio_codec,
+        overlay_engine=parsed.overlay_engine,
+        scaler=parsed.scaler,
+        deinterlace=parsed.deinterlace,
+        filter_threads=parsed.filter_threads,
+        clock_index=parsed.clock_index,
+        extra_outputs=parsed.also,
+        output_format=parsed.output_format,
+        hls_ladder=parsed.hls_ladder,
+        hls_segment_type=parsed.hls_segment_type,
+        checkpoint=parsed.checkpoint,
+        checkpoint_segment_seconds=parsed.checkpoint_segment,
+        governor=parsed.governor,
+        start=parsed.start,
+        end=parsed.end,
+        preflight=parsed.preflight,
+        chapters=parsed.chapters
+    )._conversion_options()
+
+    queue = JobQueue()
+    job_ids = [
+        queue.enqueue(f, output_dir=output_dir, options=options, priority=parsed.priority)
+        for f in files
+    ]
+    print(f"Queued {len(job_ids)} job(s); machine-wide concurrency is {queue.get_concurrency()}.")
+
+    finished = []
+
+    def on_job_done(job, result):
+        if job.id in job_ids:
+            finished.append(job.id)
+            progress_callback(len(finished), len(job_ids), job.input_file)
+
+    run_workers(
+        queue, queue.get_concurrency(), job_ids=job_ids, on_job_done=on_job_done,
+        throttle=throttle
+    )
+    return [job.to_result() for job in queue.get_jobs(job_ids)]
+
+
+def _plan_options(parsed):
+    """Get the settings that drive conversion time from parsed CLI arguments.
+
+    Args:
+        parsed: Parsed CLI arguments.
+
+    Returns:
+        Dictionary of convert_video keyword arguments for batch_plan.
+    """
+    return {
+        'timestamp_mode': parsed.timestamp_mode,
+        'resolution': parsed.resolution,
+        'overlay_engine': parsed.overlay_engine,
+        'deinterlace': parsed.deinterlace,
+        'start': parsed.start,
+        'end': parsed.end,
+        'clock_index': parsed.clock_index,
+    }
+
+
+def _print_plan(parsed, files):
+    """Print per-file and total conversion time estimates.
+
+    Args:
+        parsed: Parsed CLI arguments.
+        files: MTS files of the batch.
+    """
+    from batch_plan import format_duration, plan_batch, ThroughputModel
+
+    plans = plan_batch(files, _plan_options(parsed), ThroughputModel())
+    source = "learned on this machine" if plans[0].learned else "default, nothing learned yet"
+    print(f"Plan for {len(plans)} file(s) at {plans[0].speed:.2f}x realtime ({source}):")
+    width = max(len(plan.input_file.name) for plan in plans)
+    for plan in plans:
+        print(f"  {plan.input_file.name:<{width}}  {format_duration(plan.duration)} of video  "
+              f"~{format_duration(plan.seconds)}")
+    total_duration = sum(plan.duration for plan in plans)
+    total_seconds = sum(plan.seconds for plan in plans)
+    print(f"Total: {format_duration(total_duration)} of video, "
+          f"about {format_duration(total_seconds)} to convert")
+
+
+def _print_batch_summary(results):
+    """Print the batch summary.
+
+    Args:
+        results: List of BatchResult objects.
+
+    Returns:
+        Tuple of (success_count, failure_count).
+    """
     # Calculate success/failure counts
     success_count = sum(1 for r in results if r.success)
     failure_count = len(results) - success_count
@@ -662,6 +3133,11 @@ def run_cli(args):
     print(f"  Successful: {success_count}")
     print(f"  Failed: {failure_count}")
 
+    verified = [r for r in results if r.verification is not None]
+    if verified:
+        passed = sum(1 for r in verified if r.verification.ok)
+        print(f"  Verified: {passed}/{len(verified)} outputs passed")
+
     if failure_count > 0:
         print("\nFailed files:")
         for r in results:
@@ -673,12 +3149,15 @@ def run_cli(args):
 
 def main():
     """Main entry point."""
-    print("=" * 60)
-    print("  MTS to MP4 Converter with Timestamp Overlay")
-    print("=" * 60)
-
     args = sys.argv[1:]
 
+    # When the video is streamed to stdout, messages go to stderr
+    console = sys.stderr if args[1:] == [STDIO_PATH] else sys.stdout
+
+    print("=" * 60, file=console)
+    print("  MTS to MP4 Converter with Timestamp Overlay", file=console)
+    print("=" * 60, file=console)
+
     # Interactive mode if no arguments
     if not args:
         print("\nUsage: python mts_converter.py <input.mts> [output.mp4]")
@@ -703,7 +3182,7 @@ def main():
 
     # Print completion message for successful conversions
     if success_count > 0:
-        print("\nDone!")
+        print("\nDone!", file=console)
 
     # Exit with appropriate code
     if failure_count > 0:
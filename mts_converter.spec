@@ -24,6 +24,15 @@ for exe in ['ffmpeg.exe', 'ffprobe.exe']:
 if not ffmpeg_files:
     print("WARNING: ffmpeg.exe/ffprobe.exe not found - they won't be bundled!")
 
+# Bundle the timestamp font so drawtext never needs a fontconfig lookup
+font_datas = []
+if os.path.isdir('fonts'):
+    for name in os.listdir('fonts'):
+        if name.lower().endswith(('.ttf', '.otf', '.ttc')):
+            font_datas.append((os.path.join('fonts', name), 'fonts'))
+if not font_datas:
+    print("NOTE: no fonts/*.ttf found - the system font will be used")
+
 # Collect tkinterdnd2 data files for drag and drop support
 tkdnd_datas = []
 tkdnd_binaries = []
@@ -54,7 +63,7 @@ gui_a = Analysis(
     ['mts_converter_gui.py'],
     pathex=[],
     binaries=ffmpeg_files,
-    datas=tkdnd_datas,
+    datas=tkdnd_datas + font_datas,
     hiddenimports=['tkinterdnd2'],
     hookspath=[],
     hooksconfig={},
@@ -96,7 +105,7 @@ cli_a = Analysis(
     ['mts_converter.py'],
     pathex=[],
     binaries=ffmpeg_files,
-    datas=[],
+    datas=font_datas,
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
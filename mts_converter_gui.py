@@ -6,6 +6,7 @@ A simple Windows GUI for converting .MTS videos to .MP4 with timestamp overlay.
 Supports batch processing of multiple files with progress tracking.
 """
 
+import contextlib
 import re
 import subprocess
 import sys
@@ -22,7 +23,31 @@ from ffmpeg_utils import (
     check_ffmpeg_available,
     get_subprocess_flags
 )
-from mts_converter import MetadataExtractionError, extract_avchd_timestamp, build_video_filter
+from mts_converter import (
+    DEFAULT_POSITION,
+    POSITIONS,
+    MetadataExtractionError,
+    build_drawtext_filter,
+    build_video_filter,
+    convert_video,
+    extract_avchd_timestamp,
+    get_chapters_input_args,
+    get_creation_time_args,
+    get_navigation_args,
+    get_seek_args,
+    prepare_navigation
+)
+from time_range import offset_clock, parse_time_spec, resolve_range
+from ts_integrity import STATUS_CORRUPT, STATUS_REPAIRABLE, check_files, get_repair_path, repair_file
+from resource_governor import (
+    DEFAULT_MAX_LOAD,
+    DEFAULT_MIN_FREE_MEMORY_MB,
+    DispatchThrottle,
+    get_governed_flags,
+    get_governed_preexec_fn,
+    get_governor,
+    govern_command
+)
 
 try:
     import tkinter as tk
@@ -62,17 +87,44 @@ class MTSConverterGUI:
         self.is_converting = False
         self.cancel_requested = False
         self.batch_start_time: Optional[float] = None
+        self.eta_tracker = None
         self.current_process: Optional[subprocess.Popen] = None
         self.current_output_path: Optional[str] = None
+        self.two_tier_converter = None
+        self.queue_stop_event: Optional[threading.Event] = None
+        self.cancel_event = threading.Event()
 
         # Output directory (None = same as source)
         self.output_dir: Optional[Path] = None
 
+        # Proxy-first mode: review proxies for all files, then archive encodes
+        self.two_tier = tk.BooleanVar(value=False)
+
+        # Shared job queue: coordinate with other converters on this machine
+        # (on by default, so two GUI windows never oversubscribe the CPU)
+        self.use_job_queue = tk.BooleanVar(value=True)
+
+        # Resumable mode: encode in checkpointed segments
+        self.checkpoint = tk.BooleanVar(value=False)
+
+        # Background mode: governed FFmpeg and throttled dispatch
+        self.background_mode = tk.BooleanVar(value=False)
+
+        # Pre-flight check: skip corrupt clips, repair damaged ones
+        self.preflight = tk.BooleanVar(value=False)
+
+        # Navigation: per-minute chapters and a timecode track
+        self.chapters = tk.BooleanVar(value=False)
+
         # Timestamp options
         self.position = tk.StringVar(value="bottom-right")
         self.font_size = tk.IntVar(value=32)
         self.resolution = tk.StringVar(value="Original")
 
+        # Optional range: media offsets or '@' and a recording time
+        self.range_start = tk.StringVar(value="")
+        self.range_end = tk.StringVar(value="")
+
         # Progress tracking
         self.batch_progress_var = tk.DoubleVar(value=0)
         self.file_progress_var = tk.DoubleVar(value=0)
@@ -190,6 +242,42 @@ class MTSConverterGUI:
             command=self.reset_output_dir
         ).grid(row=0, column=3, padx=5)
 
+        ttk.Checkbutton(
+            output_frame,
+            text="Proxy first: quick 480p review copies, then full-quality archive",
+            variable=self.two_tier
+        ).grid(row=1, column=0, columnspan=4, sticky="w", padx=5, pady=(5, 0))
+
+        ttk.Checkbutton(
+            output_frame,
+            text="Use shared job queue (share the machine with other converters)",
+            variable=self.use_job_queue
+        ).grid(row=2, column=0, columnspan=4, sticky="w", padx=5)
+
+        ttk.Checkbutton(
+            output_frame,
+            text="Resumable: encode in 5-minute segments that survive a cancel or crash",
+            variable=self.checkpoint
+        ).grid(row=3, column=0, columnspan=4, sticky="w", padx=5)
+
+        ttk.Checkbutton(
+            output_frame,
+            text="Background mode: low priority, half the CPU cores, wait while the computer is busy",
+            variable=self.background_mode
+        ).grid(row=4, column=0, columnspan=4, sticky="w", padx=5)
+
+        ttk.Checkbutton(
+            output_frame,
+            text="Check clips first: skip corrupt ones, convert damaged ones from a repaired copy",
+            variable=self.preflight
+        ).grid(row=5, column=0, columnspan=4, sticky="w", padx=5)
+
+        ttk.Checkbutton(
+            output_frame,
+            text="Chapters: a chapter per minute of recording time, plus a timecode track",
+            variable=self.chapters
+        ).grid(row=6, column=0, columnspan=4, sticky="w", padx=5)
+
         # Timestamp options frame
         options_frame = ttk.LabelFrame(main_frame, text="Timestamp Options", padding="5")
         options_frame.grid(row=4, column=0, columnspan=4, sticky="ew", pady=5)
@@ -228,6 +316,21 @@ class MTSConverterGUI:
         )
         resolution_combo.grid(row=2, column=1, sticky="w", padx=5, pady=5)
 
+        # Range (blank: whole file)
+        ttk.Label(options_frame, text="Start:").grid(row=3, column=0, sticky="w", pady=5)
+        ttk.Entry(options_frame, textvariable=self.range_start, width=22).grid(
+            row=3, column=1, sticky="w", padx=5, pady=5
+        )
+        ttk.Label(options_frame, text="End:").grid(row=4, column=0, sticky="w", pady=5)
+        ttk.Entry(options_frame, textvariable=self.range_end, width=22).grid(
+            row=4, column=1, sticky="w", padx=5, pady=5
+        )
+        ttk.Label(
+            options_frame,
+            text="Blank for the whole file; 1:30 into the file, or @14:35:20 recording time",
+            font=("Segoe UI", 8)
+        ).grid(row=5, column=0, columnspan=2, sticky="w")
+
         # Progress frame
         progress_frame = ttk.LabelFrame(main_frame, text="Progress", padding="5")
         progress_frame.grid(row=5, column=0, columnspan=4, sticky="ew", pady=5)
@@ -359,7 +462,7 @@ class MTSConverterGUI:
         Args:
             event: The drop event containing file paths.
         """
-        if self.is_converting:
+        if self.is_converting and self.two_tier_converter is None:
             messagebox.showwarning(
                 "Conversion in Progress",
                 "Cannot add files while conversion is in progress."
@@ -481,16 +584,21 @@ class MTSConverterGUI:
         Args:
             files: List of Path objects to add to the queue.
         """
-        added_count = 0
+        added = []
         for file_path in files:
             # Prevent duplicates
             if file_path not in self.file_queue:
                 self.file_queue.append(file_path)
                 self.file_listbox.insert(tk.END, file_path.name)
-                added_count += 1
-
-        if added_count > 0:
-            self.log(f"Added {added_count} file(s) to queue")
+                added.append(file_path)
+
+        if added:
+            self.log(f"Added {len(added)} file(s) to queue")
+            # During a proxy-first batch, new files jump ahead of archive encodes
+            converter = self.two_tier_converter
+            if converter is not None and not converter.add_files(added):
+                self.log("The running batch is finishing; "
+                         "the new file(s) will be converted in the next batch")
         self._update_queue_display()
 
     def remove_files_from_queue(self, indices: List[int]):
@@ -560,6 +668,43 @@ class MTSConverterGUI:
             return "480p"
         return "original"
 
+    def _get_governor(self) -> Optional[str]:
+        """Get the resource governor for conversions from the GUI option.
+
+        Returns:
+            'background' in background mode, otherwise None.
+        """
+        return 'background' if self.background_mode.get() else None
+
+    def _get_preflight(self) -> Optional[str]:
+        """Get the pre-flight mode for conversions from the GUI option.
+
+        Returns:
+            'repair' when clips are checked first, otherwise None.
+        """
+        return 'repair' if self.preflight.get() else None
+
+    def _get_range(self):
+        """Get the conversion range from the GUI options.
+
+        Returns:
+            Tuple of (start, end) strings, None where left blank.
+        """
+        start = self.range_start.get().strip() or None
+        end = self.range_end.get().strip() or None
+        return start, end
+
+    def _get_throttle(self) -> Optional[DispatchThrottle]:
+        """Get the dispatch throttle for batches from the GUI option.
+
+        Returns:
+            DispatchThrottle with the default limits in background mode,
+            otherwise None.
+        """
+        if not self.background_mode.get():
+            return None
+        return DispatchThrottle(DEFAULT_MAX_LOAD, DEFAULT_MIN_FREE_MEMORY_MB)
+
     def _get_video_duration(self, input_path: str) -> float:
         """Get video duration in seconds using ffprobe.
 
@@ -694,9 +839,16 @@ class MTSConverterGUI:
     def request_cancel(self):
         """Request cancellation of the current batch operation."""
         self.cancel_requested = True
+        self.cancel_event.set()
         self.log("Cancelling...")
         self.cancel_btn.configure(state="disabled")
 
+        if self.two_tier_converter is not None:
+            self.two_tier_converter.cancel()
+
+        if self.queue_stop_event is not None:
+            self.queue_stop_event.set()
+
         # Kill the current FFmpeg process if running
         if self.current_process is not None:
             try:
@@ -723,23 +875,46 @@ class MTSConverterGUI:
             )
             return
 
+        # Validate the range before anything starts
+        try:
+            for value in self._get_range():
+                if value is not None:
+                    parse_time_spec(value)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+
         # Reset state
         self.is_converting = True
         self.cancel_requested = False
+        self.cancel_event.clear()
         self.batch_results = []
         self.batch_start_time = time.time()
+        self.eta_tracker = None
 
         # Update UI
         self.convert_btn.configure(state="disabled")
         self.cancel_btn.configure(state="normal")
-        self.add_files_btn.configure(state="disabled")
-        self.add_folder_btn.configure(state="disabled")
         self.remove_btn.configure(state="disabled")
         self.clear_all_btn.configure(state="disabled")
 
+        if self.two_tier.get():
+            # Files can still be added: their proxies jump the queue
+            target = self._run_two_tier_conversion
+            self.two_tier_converter = self._create_two_tier_converter()
+        elif self.use_job_queue.get():
+            target = self._run_queued_conversion
+            self.queue_stop_event = threading.Event()
+            self.add_files_btn.configure(state="disabled")
+            self.add_folder_btn.configure(state="disabled")
+        else:
+            target = self._run_batch_conversion
+            self.add_files_btn.configure(state="disabled")
+            self.add_folder_btn.configure(state="disabled")
+
         # Start conversion in a separate thread
         thread = threading.Thread(
-            target=self._run_batch_conversion,
+            target=target,
             daemon=True
         )
         thread.start()
@@ -750,6 +925,14 @@ class MTSConverterGUI:
     def _run_batch_conversion(self):
         """Run the batch conversion (called in a separate thread)."""
         from batch_converter import BatchConverter, BatchResult
+        from batch_plan import EtaTracker, plan_batch, ThroughputModel
+
+        throughput_model = ThroughputModel()
+        start, end = self._get_range()
+        plan_options = {'resolution': self._get_resolution_value(), 'start': start, 'end': end}
+        self.eta_tracker = EtaTracker(
+            plan_batch(list(self.file_queue), plan_options, throughput_model)
+        )
 
         def progress_callback(current: int, total: int, current_file: Path):
             self.root.after(0, lambda: self.on_batch_progress(current, total, current_file))
@@ -758,9 +941,26 @@ class MTSConverterGUI:
             progress_callback=progress_callback,
             output_dir=self.output_dir
         )
+        throttle = self._get_throttle()
+
+        # Check every clip up front so corrupt ones cost no encoder time
+        reports = {}
+        if self._get_preflight():
+            reports = dict(zip(self.file_queue, check_files(self.file_queue)))
+            for report in reports.values():
+                if not report.ok or report.warnings:
+                    self.root.after(0, lambda r=report: self.log(f"Check: {r.describe()}"))
 
         total = len(self.file_queue)
         for index, input_file in enumerate(self.file_queue, start=1):
+            if throttle is not None:
+                reason = throttle.pressure()
+                if reason:
+                    self.root.after(0, lambda r=reason: self.log(
+                        f"Computer busy ({r}); waiting before the next file"
+                    ))
+                    throttle.wait(self.cancel_event)
+
             if self.cancel_requested:
                 self.root.after(0, lambda: self.log("Batch cancelled by user"))
                 break
@@ -772,9 +972,21 @@ class MTSConverterGUI:
 
             # Perform conversion
             output_file = converter._get_output_path(input_file)
+            report = reports.get(input_file)
             try:
-                success = self._convert_single_file(str(input_file), str(output_file))
+                if report is not None and report.status == STATUS_CORRUPT:
+                    raise ValueError("Pre-flight check failed: " + "; ".join(report.problems))
+                source = input_file
+                if report is not None and report.status == STATUS_REPAIRABLE:
+                    source = repair_file(
+                        input_file, get_repair_path(input_file, output_file.parent), report
+                    )
+                started = time.monotonic()
+                success = self._convert_single_file(
+                    str(source), str(output_file), source_file=str(input_file)
+                )
                 if success:
+                    throughput_model.observe(input_file, plan_options, time.monotonic() - started)
                     result = BatchResult(
                         input_file=input_file,
                         output_file=output_file,
@@ -802,12 +1014,191 @@ class MTSConverterGUI:
         # Conversion complete
         self.root.after(0, self._batch_complete)
 
-    def _convert_single_file(self, input_path: str, output_path: str) -> bool:
+    def _create_two_tier_converter(self):
+        """Create the converter for a proxy-first batch (main thread only).
+
+        Returns:
+            TwoTierBatchConverter configured from the GUI options.
+        """
+        from batch_converter import TwoTierBatchConverter
+
+        def progress_callback(current: int, total: int, current_file: Path):
+            result = converter.results[-1]
+            self.root.after(0, lambda: self.on_two_tier_progress(current, total, result))
+
+        converter = TwoTierBatchConverter(
+            progress_callback=progress_callback,
+            output_dir=self.output_dir,
+            position=self.position.get(),
+            resolution=self._get_resolution_value(),
+            font_size=self.font_size.get(),
+            governor=self._get_governor(),
+            throttle=self._get_throttle(),
+            start=self._get_range()[0],
+            end=self._get_range()[1],
+            preflight=self._get_preflight(),
+            chapters=self.chapters.get(),
+            checkpoint=self.checkpoint.get()
+        )
+        return converter
+
+    def _run_two_tier_conversion(self):
+        """Run a proxy-first batch (called in a separate thread)."""
+        converter = self.two_tier_converter
+        try:
+            self.batch_results = converter.convert_batch(list(self.file_queue))
+        except Exception as e:
+            self.root.after(0, lambda: self.log(f"Error: {e}"))
+        finally:
+            self.two_tier_converter = None
+            self.root.after(0, self._batch_complete)
+
+    def on_two_tier_progress(self, current: int, total: int, result):
+        """Handle progress updates from a proxy-first batch.
+
+        Args:
+            current: Number of jobs finished so far.
+            total: Total number of proxy and archive jobs.
+            result: BatchResult of the job that just finished.
+        """
+        self.batch_progress_var.set((current / total) * 100 if total else 0)
+        self.file_counter_label.configure(text=f"{current} of {total} jobs")
+
+        tier = "Proxy" if result.tier == 'proxy' else "Archive"
+        if result.success:
+            self.log(f"{tier} ready: {result.output_file.name}")
+        else:
+            self.log(f"{tier} failed: {result.input_file.name}: {result.error}")
+
+        # Mark files: half-done after the proxy, done after the archive
+        if result.input_file in self.file_queue:
+            index = self.file_queue.index(result.input_file)
+            if not result.success:
+                status = "✗"
+            else:
+                status = "◐" if result.tier == 'proxy' else "✓"
+            self.file_listbox.delete(index)
+            self.file_listbox.insert(index, f"{status} {result.input_file.name}")
+
+    def _run_queued_conversion(self):
+        """Run the batch through the shared job queue (called in a separate thread)."""
+        from batch_converter import BatchConverter
+        from batch_plan import EtaTracker, plan_batch, ThroughputModel
+        from job_queue import JobQueue, run_workers
+
+        start, end = self._get_range()
+        options = BatchConverter(
+            position=self.position.get(),
+            resolution=self._get_resolution_value(),
+            font_size=self.font_size.get(),
+            governor=self._get_governor(),
+            start=start,
+            end=end,
+            preflight=self._get_preflight(),
+            chapters=self.chapters.get(),
+            checkpoint=self.checkpoint.get()
+        )._conversion_options()
+        plan_options = {'resolution': self._get_resolution_value(), 'start': start, 'end': end}
+        plans = plan_batch(list(self.file_queue), plan_options, ThroughputModel())
+        self.eta_tracker = EtaTracker(plans)
+        # Jobs carry resolved paths; map them back to the batch's files
+        queued_files = {plan.input_file.resolve(): plan for plan in plans}
+
+        try:
+            queue = JobQueue()
+            job_ids = [
+                queue.enqueue(f, output_dir=self.output_dir, options=options)
+                for f in self.file_queue
+            ]
+            self.root.after(0, lambda: self.log(
+                f"Queued {len(job_ids)} job(s); concurrency {queue.get_concurrency()}"
+            ))
+
+            finished = []
+            # Progress (0-100) of this batch's running jobs, by job id
+            running = {}
+            running_lock = threading.Lock()
+
+            def on_job_stats(job, stats):
+                plan = queued_files.get(job.input_file)
+                if job.id not in job_ids or plan is None or 'time' not in stats:
+                    return
+                if plan.duration <= 0:
+                    return
+                with running_lock:
+                    if job.id not in running:
+                        self.root.after(0, lambda: self.current_file_label.configure(
+                            text=f"Converting: {job.input_file.name}"
+                        ))
+                    running[job.id] = min(100.0, stats['time'] / plan.duration * 100)
+                    percentage = sum(running.values()) / len(running)
+                self._update_file_progress(percentage)
+
+            def on_job_done(job, result):
+                if job.id in job_ids:
+                    with running_lock:
+                        running.pop(job.id, None)
+                    plan = queued_files.get(job.input_file)
+                    if plan is not None:
+                        self.eta_tracker.file_done(plan.input_file)
+                    finished.append(job.id)
+                    count = len(finished)
+                    self.root.after(0, lambda: self.on_queue_progress(count, len(job_ids), result))
+
+            run_workers(
+                queue,
+                queue.get_concurrency(),
+                job_ids=job_ids,
+                stop_event=self.queue_stop_event,
+                on_job_done=on_job_done,
+                on_job_stats=on_job_stats,
+                throttle=self._get_throttle()
+            )
+
+            if self.cancel_requested:
+                # Interrupted jobs were released back to the queue; withdraw ours
+                queue.cancel(job_ids)
+                self.root.after(0, lambda: self.log("Batch cancelled by user"))
+            self.batch_results = [job.to_result() for job in queue.get_jobs(job_ids)]
+        except Exception as e:
+            self.root.after(0, lambda: self.log(f"Error: {e}"))
+        finally:
+            self.queue_stop_event = None
+            self.root.after(0, self._batch_complete)
+
+    def on_queue_progress(self, current: int, total: int, result):
+        """Handle progress updates from a queued batch.
+
+        Args:
+            current: Number of this batch's jobs finished so far.
+            total: Number of jobs in this batch.
+            result: BatchResult of the job that just finished.
+        """
+        self.batch_progress_var.set((current / total) * 100 if total else 0)
+        self.file_counter_label.configure(text=f"{current} of {total} files")
+
+        if result.success:
+            self.log(f"Completed: {result.output_file.name}")
+        else:
+            self.log(f"Failed: {result.input_file.name}: {result.error}")
+
+        # Jobs finish in queue order, not list order: find the file's row
+        resolved = [f.resolve() for f in self.file_queue]
+        if result.input_file in resolved:
+            index = resolved.index(result.input_file)
+            status = "✓" if result.success else "✗"
+            self.file_listbox.delete(index)
+            self.file_listbox.insert(index, f"{status} {self.file_queue[index].name}")
+
+    def _convert_single_file(self, input_path: str, output_path: str,
+                             source_file: Optional[str] = None) -> bool:
         """Convert a single file.
 
         Args:
             input_path: Path to input MTS file.
             output_path: Path for output MP4 file.
+            source_file: Path of the original clip when input_path is a
+                         repaired copy of it.
 
         Returns:
             True if conversion succeeded, False otherwise.
@@ -819,107 +1210,130 @@ class MTSConverterGUI:
             # Get video duration for progress tracking
             total_duration = self._get_video_duration(input_path)
 
-            # Get filming time
-            filming_time = self.get_video_creation_time(input_path)
+            # Get filming time from the original clip, not a repaired copy
+            filming_time = self.get_video_creation_time(source_file or input_path)
             self.root.after(0, lambda: self.log(
                 f"Processing: {Path(input_path).name} "
                 f"(filmed: {filming_time.strftime('%Y-%m-%d %H:%M')})"
             ))
 
-            # Position mapping
-            positions = {
-                "top-left": "x=20:y=20",
-                "top-right": "x=w-tw-20:y=20",
-                "bottom-left": "x=20:y=h-th-20",
-                "bottom-right": "x=w-tw-20:y=h-th-20",
-            }
-            pos = positions.get(self.position.get(), positions["bottom-right"])
+            # Range: seek on the input side, start the clock at the range start
+            range_start, range_end = self._get_range()
+            start_time, length = 0.0, None
+            if range_start is not None or range_end is not None:
+                try:
+                    start_time, length = resolve_range(
+                        range_start, range_end, filming_time, total_duration
+                    )
+                except ValueError as e:
+                    self.root.after(0, lambda: self.log(f"Error: {e}"))
+                    return False
+                filming_time = offset_clock(filming_time, None, start_time)[0]
+                total_duration = length or total_duration - start_time
+
+            if self.checkpoint.get():
+                return self._convert_checkpointed_file(
+                    input_path, output_path, total_duration, source_file
+                )
+
+            # Unknown positions fall back to the CLI default (bottom-right)
+            position = self.position.get()
+            if position not in POSITIONS:
+                position = DEFAULT_POSITION
             font_size = self.font_size.get()
 
-            # Build drawtext filter
-            drawtext_filter = (
-                f"drawtext="
-                f"text='%{{pts\\:localtime\\:{int(filming_time.timestamp())}\\:%Y-%m-%d %H\\\\\\:%M\\\\\\:%S}}':"
-                f"fontsize={font_size}:"
-                f"fontcolor=white:"
-                f"borderw=2:"
-                f"bordercolor=black:"
-                f"{pos}"
-            )
+            # Same drawtext filter as the CLI, so both render the same clock
+            drawtext_filter = build_drawtext_filter(filming_time, font_size, position=position)
 
             # Combine drawtext with optional resolution scaling
             resolution = self._get_resolution_value()
             video_filter = build_video_filter(drawtext_filter, resolution)
 
-            ffmpeg = self.ffmpeg_path or get_ffmpeg_path()
-            cmd = [
-                ffmpeg,
-                "-i", input_path,
-                "-vf", video_filter,
-                "-c:v", "libx264",
-                "-preset", "medium",
-                "-crf", "23",
-                "-threads", "0",  # Use all available CPU cores
-                "-c:a", "aac",
-                "-b:a", "192k",
-                "-movflags", "+faststart",
-                "-y",
-                output_path
-            ]
-
-            # Store output path for cleanup on cancel
-            self.current_output_path = output_path
+            # Chapters and timecode track, muxed by this same FFmpeg run
+            navigation = contextlib.nullcontext({})
+            if self.chapters.get():
+                navigation = prepare_navigation(Path(input_path), filming_time, total_duration)
+            with navigation as navigation_options:
+                chapters_path = navigation_options.get('chapters_path')
+                timecode = navigation_options.get('timecode')
+
+                ffmpeg = self.ffmpeg_path or get_ffmpeg_path()
+                cmd = [
+                    ffmpeg,
+                    *get_seek_args(start_time, length),
+                    "-i", input_path,
+                    *get_chapters_input_args(chapters_path),
+                    "-vf", video_filter,
+                    "-c:v", "libx264",
+                    "-preset", "medium",
+                    "-crf", "23",
+                    "-threads", "0",  # Use all available CPU cores
+                    "-c:a", "aac",
+                    "-b:a", "192k",
+                    *get_creation_time_args(filming_time),
+                    *get_navigation_args(1 if chapters_path else None, timecode),
+                    "-movflags", "+faststart",
+                    "-y",
+                    output_path
+                ]
+                governor = get_governor(self._get_governor())
+                if governor is not None:
+                    cmd = govern_command(cmd, governor)
+
+                # Store output path for cleanup on cancel
+                self.current_output_path = output_path
+
+                process = subprocess.Popen(
+                    cmd,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    universal_newlines=True,
+                    creationflags=get_governed_flags(governor),
+                    preexec_fn=get_governed_preexec_fn(governor)
+                )
 
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                universal_newlines=True,
-                creationflags=get_subprocess_flags()
-            )
+                # Store process reference for cancellation
+                self.current_process = process
 
-            # Store process reference for cancellation
-            self.current_process = process
+                for line in process.stdout:
+                    # Check for cancellation
+                    if self.cancel_requested:
+                        break
 
-            for line in process.stdout:
-                # Check for cancellation
-                if self.cancel_requested:
-                    break
+                    if "frame=" in line:
+                        # Update status label with FFmpeg output
+                        self.root.after(0, lambda l=line: self.status_label.configure(
+                            text=l.strip()[:60]
+                        ))
+                        # Parse and update per-file progress
+                        progress = self._parse_ffmpeg_progress(line, total_duration)
+                        if progress >= 0:
+                            self._update_file_progress(progress)
 
-                if "frame=" in line:
-                    # Update status label with FFmpeg output
-                    self.root.after(0, lambda l=line: self.status_label.configure(
-                        text=l.strip()[:60]
-                    ))
-                    # Parse and update per-file progress
-                    progress = self._parse_ffmpeg_progress(line, total_duration)
-                    if progress >= 0:
-                        self._update_file_progress(progress)
+                process.wait()
 
-            process.wait()
+                # Clear process reference
+                self.current_process = None
 
-            # Clear process reference
-            self.current_process = None
+                # Handle cancellation - delete partial file
+                if self.cancel_requested:
+                    try:
+                        output_file = Path(output_path)
+                        if output_file.exists():
+                            output_file.unlink()
+                            self.root.after(0, lambda: self.log(f"Deleted partial file: {output_file.name}"))
+                    except Exception:
+                        pass
+                    self.current_output_path = None
+                    return False
 
-            # Handle cancellation - delete partial file
-            if self.cancel_requested:
-                try:
-                    output_file = Path(output_path)
-                    if output_file.exists():
-                        output_file.unlink()
-                        self.root.after(0, lambda: self.log(f"Deleted partial file: {output_file.name}"))
-                except Exception:
-                    pass
                 self.current_output_path = None
-                return False
 
-            self.current_output_path = None
+                # Set progress to 100% on completion
+                if process.returncode == 0:
+                    self._update_file_progress(100)
 
-            # Set progress to 100% on completion
-            if process.returncode == 0:
-                self._update_file_progress(100)
-
-            return process.returncode == 0
+                return process.returncode == 0
 
         except MetadataExtractionError as e:
             self.root.after(0, lambda: self.log(f"Metadata Error: {e}"))
@@ -928,6 +1342,55 @@ class MTSConverterGUI:
             self.root.after(0, lambda: self.log(f"Error: {e}"))
             return False
 
+    def _convert_checkpointed_file(self, input_path: str, output_path: str,
+                                   total_duration: float,
+                                   source_file: Optional[str] = None) -> bool:
+        """Convert a file in resumable segments (see checkpoint_encode).
+
+        Cancelling keeps the finished segments; converting the file again
+        with the same settings continues from them.
+
+        Args:
+            input_path: Path to input MTS file.
+            output_path: Path for output MP4 file.
+            total_duration: Duration of the part to convert in seconds, for
+                            progress tracking.
+            source_file: Path of the original clip when input_path is a
+                         repaired copy of it.
+
+        Returns:
+            True if conversion succeeded, False otherwise.
+        """
+        range_start, range_end = self._get_range()
+
+        def on_stats(stats):
+            if 'time' in stats and total_duration > 0:
+                self._update_file_progress(min(100.0, stats['time'] / total_duration * 100))
+
+        success = convert_video(
+            input_path,
+            output_path,
+            font_size=self.font_size.get(),
+            position=self.position.get(),
+            resolution=self._get_resolution_value(),
+            stats_callback=on_stats,
+            cancel_event=self.cancel_event,
+            checkpoint=True,
+            governor=self._get_governor(),
+            start=range_start,
+            end=range_end,
+            chapters=self.chapters.get(),
+            source_file=source_file
+        )
+        if self.cancel_requested:
+            self.root.after(0, lambda: self.log(
+                f"Stopped {Path(input_path).name}; finished segments are kept for resuming"
+            ))
+            return False
+        if success:
+            self._update_file_progress(100)
+        return success
+
     def on_batch_progress(self, current: int, total: int, current_file: Path):
         """Handle batch progress updates.
 
@@ -943,6 +1406,10 @@ class MTSConverterGUI:
         # Update counter
         self.file_counter_label.configure(text=f"{current} of {total} files")
 
+        # Correct the ETA against the pace so far
+        if self.eta_tracker is not None:
+            self.eta_tracker.file_done(current_file)
+
         # Update listbox to show completion status
         if current <= self.file_listbox.size():
             result = self.batch_results[current - 1] if current <= len(self.batch_results) else None
@@ -958,7 +1425,11 @@ class MTSConverterGUI:
             elapsed = int(time.time() - self.batch_start_time)
             minutes = elapsed // 60
             seconds = elapsed % 60
-            self.elapsed_time_label.configure(text=f"Elapsed: {minutes:02d}:{seconds:02d}")
+            text = f"Elapsed: {minutes:02d}:{seconds:02d}"
+            if self.eta_tracker is not None:
+                from batch_plan import format_duration
+                text += f"  ETA: {format_duration(self.eta_tracker.remaining())}"
+            self.elapsed_time_label.configure(text=text)
             self.root.after(1000, self._update_elapsed_time)
 
     def _batch_complete(self):
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Resource governor for encodes on shared machines.
+
+By default FFmpeg runs at normal priority with one encoder thread per core
+and x264's full lookahead, so a batch on a machine that also serves files
+leaves everything else waiting for CPU and disk. A governor profile makes
+FFmpeg a background citizen:
+
+- its children run at a lower CPU priority, and on Linux and macOS at a
+  lower disk I/O priority
+- decoder, filter and encoder threads are capped to a share of the cores
+- x264's lookahead, the largest part of an encode's memory, is shortened
+
+A DispatchThrottle can also hold new encodes back while the machine's load
+average is high or its free memory is low. The throttle only delays the
+start of a job; running encodes are never paused.
+"""
+
+import ctypes
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from ffmpeg_utils import get_preexec_fn, get_subprocess_flags
+
+
+# Linux I/O scheduling classes (see ioprio_set(2))
+IOPRIO_CLASS_BE = 2
+IOPRIO_CLASS_IDLE = 3
+
+# Windows priority classes (the subprocess constants exist only on Windows)
+BELOW_NORMAL_PRIORITY_CLASS = getattr(subprocess, 'BELOW_NORMAL_PRIORITY_CLASS', 0x4000)
+IDLE_PRIORITY_CLASS = getattr(subprocess, 'IDLE_PRIORITY_CLASS', 0x40)
+
+
+@dataclass(frozen=True)
+class GovernorProfile:
+    """Limits applied to FFmpeg children.
+
+    Attributes:
+        name: Profile name (a GOVERNORS key).
+        niceness: POSIX niceness added to the child.
+        io_class: Linux I/O scheduling class (IOPRIO_CLASS_*). On macOS
+                  any class throttles the child's disk I/O.
+        io_level: Level within the I/O class (0 highest, 7 lowest).
+        windows_priority: Windows priority class of the child.
+        thread_share: Fraction of the CPU cores FFmpeg may use.
+        rc_lookahead: x264 lookahead frames (x264's default is 40).
+    """
+    name: str
+    niceness: int
+    io_class: int
+    io_level: int
+    windows_priority: int
+    thread_share: float
+    rc_lookahead: int
+
+
+# Governor profiles: 'background' keeps a file server responsive while
+# still finishing batches at a useful pace; 'idle' uses only what nothing
+# else wants
+GOVERNORS = {
+    'background': GovernorProfile(
+        name='background', niceness=10, io_class=IOPRIO_CLASS_BE, io_level=7,
+        windows_priority=BELOW_NORMAL_PRIORITY_CLASS, thread_share=0.5, rc_lookahead=20
+    ),
+    'idle': GovernorProfile(
+        name='idle', niceness=19, io_class=IOPRIO_CLASS_IDLE, io_level=0,
+        windows_priority=IDLE_PRIORITY_CLASS, thread_share=0.25, rc_lookahead=10
+    ),
+}
+
+# Dispatch throttle defaults: 1-minute load average per core above which
+# new encodes wait, free memory (MB) below which they wait, how often the
+# machine is checked and the longest a job is held before it starts anyway
+DEFAULT_MAX_LOAD = 0.9
+DEFAULT_MIN_FREE_MEMORY_MB = 1024
+DEFAULT_THROTTLE_POLL_SECONDS = 5.0
+DEFAULT_THROTTLE_MAX_WAIT_SECONDS = 600.0
+
+# FFmpeg options whose value is a thread count
+THREAD_OPTIONS = ('-threads', '-filter_threads', '-filter_complex_threads')
+
+# ioprio_set system call numbers by machine (glibc has no wrapper)
+_IOPRIO_SET_SYSCALLS = {
+    'x86_64': 251, 'amd64': 251, 'i386': 289, 'i686': 289,
+    'aarch64': 30, 'arm64': 30, 'armv7l': 314, 'ppc64le': 273,
+}
+_IOPRIO_WHO_PROCESS = 1
+_IOPRIO_CLASS_SHIFT = 13
+
+# macOS setiopolicy_np arguments: disk I/O of the whole process, throttled
+_IOPOL_TYPE_DISK = 0
+_IOPOL_SCOPE_PROCESS = 0
+_IOPOL_THROTTLE = 3
+
+
+def get_governor(name: Optional[str]) -> Optional[GovernorProfile]:
+    """Look up a governor profile.
+
+    Args:
+        name: GOVERNORS key, or None for no governor.
+
+    Returns:
+        GovernorProfile, or None if name is None.
+
+    Raises:
+        ValueError: If name is not a known profile.
+    """
+    if name is None:
+        return None
+    if name not in GOVERNORS:
+        raise ValueError(
+            f"Invalid governor '{name}'. Must be one of: {', '.join(GOVERNORS)}"
+        )
+    return GOVERNORS[name]
+
+
+def cap_threads(threads: Optional[int], profile: GovernorProfile,
+                cpu_count: Optional[int] = None) -> int:
+    """Cap a thread count to a profile's share of the CPU cores.
+
+    Args:
+        threads: Requested thread count; None or 0 means all cores.
+        profile: Governor profile.
+        cpu_count: CPU count (default: os.cpu_count()).
+
+    Returns:
+        Thread count of at least 1.
+    """
+    limit = max(1, int((cpu_count or os.cpu_count() or 1) * profile.thread_share))
+    return min(threads, limit) if threads else limit
+
+
+def govern_command(cmd: List[str], profile: GovernorProfile,
+                   cpu_count: Optional[int] = None) -> List[str]:
+    """Apply a profile's thread and memory caps to an FFmpeg command.
+
+    Thread options are capped (a 0 meaning all cores included), decoder
+    and filter thread counts are added where the command leaves them to
+    FFmpeg, and every libx264 output gets a shorter lookahead.
+
+    Args:
+        cmd: FFmpeg command as a list of arguments.
+        profile: Governor profile.
+        cpu_count: CPU count (default: os.cpu_count()).
+
+    Returns:
+        New command list.
+    """
+    limit = cap_threads(None, profile, cpu_count)
+    governed = [cmd[0]]
+    if '-filter_threads' not in cmd:
+        governed += ['-filter_threads', str(limit)]
+    if '-filter_complex_threads' not in cmd:
+        governed += ['-filter_complex_threads', str(limit)]
+
+    decoder_threads = False
+    for index in range(1, len(cmd)):
+        arg, previous = cmd[index], cmd[index - 1]
+        if previous in THREAD_OPTIONS:
+            arg = str(cap_threads(int(arg), profile, cpu_count))
+            decoder_threads = decoder_threads or previous == '-threads'
+        elif arg == '-i' and not decoder_threads:
+            # Input options must precede the first input
+            governed += ['-threads', str(limit)]
+            decoder_threads = True
+        governed.append(arg)
+        following = cmd[index + 1] if index + 1 < len(cmd) else None
+        if previous.startswith('-c:v') and arg == 'libx264' and following != '-rc-lookahead':
+            governed += ['-rc-lookahead', str(profile.rc_lookahead)]
+    return governed
+
+
+def get_governed_flags(profile: Optional[GovernorProfile], low_priority: bool = False) -> int:
+    """Get subprocess creation flags for a governed FFmpeg child.
+
+    Args:
+        profile: Governor profile, or None for the plain flags.
+        low_priority: If True, start below normal priority even without
+                      a profile.
+
+    Returns:
+        Flags for subprocess.Popen's creationflags.
+    """
+    if profile is None or sys.platform != 'win32':
+        return get_subprocess_flags(low_priority)
+    # Priority classes are exclusive: the profile's class replaces below-normal
+    return get_subprocess_flags() | profile.windows_priority
+
+
+def get_governed_preexec_fn(profile: Optional[GovernorProfile],
+                            low_priority: bool = False) -> Optional[Callable[[], None]]:
+    """Get the POSIX pre-exec hook for a governed FFmpeg child.
+
+    The hook lowers the child's CPU priority to the profile's niceness
+    (or the low-priority niceness, whichever is lower priority) and its
+    disk I/O priority where the platform allows it.
+
+    Args:
+        profile: Governor profile, or None for the plain hook.
+        low_priority: If True, renice the child even without a profile.
+
+    Returns:
+        Callable for subprocess.Popen's preexec_fn, or None.
+    """
+    if profile is None or sys.platform == 'win32':
+        return get_preexec_fn(low_priority)
+
+    low_priority_hook = get_preexec_fn(low_priority)
+    # Resolve libc in the parent: loading libraries between fork and exec
+    # is not safe in a threaded program
+    set_io_priority = _get_io_priority_setter(profile)
+
+    def lower_priority():
+        if low_priority_hook is not None:
+            low_priority_hook()
+        current = os.nice(0)
+        if current < profile.niceness:
+            os.nice(profile.niceness - current)
+        if set_io_priority is not None:
+            set_io_priority()
+
+    return lower_priority
+
+
+def _get_io_priority_setter(profile: GovernorProfile) -> Optional[Callable[[], None]]:
+    """Get a function lowering the calling process's disk I/O priority.
+
+    Args:
+        profile: Governor profile.
+
+    Returns:
+        Callable, or None if the platform has no supported I/O priority.
+    """
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        if sys.platform.startswith('linux'):
+            number = _IOPRIO_SET_SYSCALLS.get(platform.machine().lower())
+            if number is None:
+                return None
+            syscall = libc.syscall
+            value = (profile.io_class << _IOPRIO_CLASS_SHIFT) | profile.io_level
+            return lambda: syscall(number, _IOPRIO_WHO_PROCESS, 0, value)
+        if sys.platform == 'darwin':
+            setiopolicy = libc.setiopolicy_np
+            return lambda: setiopolicy(_IOPOL_TYPE_DISK, _IOPOL_SCOPE_PROCESS, _IOPOL_THROTTLE)
+    except (OSError, AttributeError):
+        pass
+    return None
+
+
+def get_load_per_core() -> Optional[float]:
+    """Get the 1-minute load average divided by the CPU count.
+
+    Returns:
+        Load per core, or None where there is no load average (Windows).
+    """
+    try:
+        load = os.getloadavg()[0]
+    except (AttributeError, OSError):
+        return None
+    return load / (os.cpu_count() or 1)
+
+
+def get_free_memory_mb() -> Optional[float]:
+    """Get the memory available to new processes without swapping.
+
+    Returns:
+        Available memory in megabytes, or None if it cannot be read.
+    """
+    if sys.platform == 'win32':
+        class MemoryStatus(ctypes.Structure):
+            _fields_ = [
+                ('dwLength', ctypes.c_ulong), ('dwMemoryLoad', ctypes.c_ulong),
+                ('ullTotalPhys', ctypes.c_ulonglong), ('ullAvailPhys', ctypes.c_ulonglong),
+                ('ullTotalPageFile', ctypes.c_ulonglong), ('ullAvailPageFile', ctypes.c_ulonglong),
+                ('ullTotalVirtual', ctypes.c_ulonglong), ('ullAvailVirtual', ctypes.c_ulonglong),
+                ('ullAvailExtendedVirtual', ctypes.c_ulonglong),
+            ]
+        status = MemoryStatus()
+        status.dwLength = ctypes.sizeof(MemoryStatus)
+        if not ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return None
+        return status.ullAvailPhys / (1024 * 1024)
+
+    try:
+        # MemAvailable counts reclaimable cache, unlike the free page count
+        with open('/proc/meminfo', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+class DispatchThrottle:
+    """Holds new encodes back while the machine is busy.
+
+    The load average includes encodes this converter is already running,
+    so max_load should leave room for them (a 'background' encode uses
+    about half the cores).
+
+    Attributes:
+        max_load: Load per core above which dispatch waits, or None.
+        min_free_memory_mb: Free memory below which dispatch waits, or None.
+        poll_seconds: Seconds between checks while waiting.
+        max_wait_seconds: Longest a job is held before it starts anyway,
+                          so a batch never stalls for good.
+    """
+
+    def __init__(
+        self,
+        max_load: Optional[float] = None,
+        min_free_memory_mb: Optional[float] = None,
+        poll_seconds: float = DEFAULT_THROTTLE_POLL_SECONDS,
+        max_wait_seconds: float = DEFAULT_THROTTLE_MAX_WAIT_SECONDS
+    ):
+        """Initialize DispatchThrottle.
+
+        Args:
+            max_load: Load per core above which dispatch waits (None: no
+                      load check).
+            min_free_memory_mb: Free memory in MB below which dispatch
+                                waits (None: no memory check).
+            poll_seconds: Seconds between checks while waiting.
+            max_wait_seconds: Longest wait per job.
+        """
+        self.max_load = max_load
+        self.min_free_memory_mb = min_free_memory_mb
+        self.poll_seconds = poll_seconds
+        self.max_wait_seconds = max_wait_seconds
+
+    def pressure(self) -> Optional[str]:
+        """Check whether the machine is too busy for another encode.
+
+        Returns:
+            Description of the pressure, or None if there is headroom.
+        """
+        if self.max_load is not None:
+            load = get_load_per_core()
+            if load is not None and load > self.max_load:
+                return f"load {load:.2f} per core"
+        if self.min_free_memory_mb is not None:
+            free = get_free_memory_mb()
+            if free is not None and free < self.min_free_memory_mb:
+                return f"{free:.0f} MB free memory"
+        return None
+
+    def wait(self, cancel_event: Optional[threading.Event] = None) -> float:
+        """Block until the machine has headroom, the wait limit or a cancel.
+
+        Args:
+            cancel_event: Optional event that ends the wait early.
+
+        Returns:
+            Seconds waited.
+        """
+        started = time.monotonic()
+        announced = False
+        while True:
+            waited = time.monotonic() - started
+            reason = self.pressure()
+            if reason is None or waited >= self.max_wait_seconds:
+                return waited
+            if cancel_event is not None and cancel_event.is_set():
+                return waited
+            if not announced:
+                print(f"Machine busy ({reason}); holding the next encode...")
+                announced = True
+            if cancel_event is not None:
+                cancel_event.wait(self.poll_seconds)
+            else:
+                time.sleep(self.poll_seconds)
+
+
+def create_throttle(max_load: Optional[float] = None,
+                    min_free_memory_mb: Optional[float] = None) -> Optional[DispatchThrottle]:
+    """Create a DispatchThrottle if any limit is set.
+
+    Args:
+        max_load: Load per core above which dispatch waits.
+        min_free_memory_mb: Free memory in MB below which dispatch waits.
+
+    Returns:
+        DispatchThrottle, or None if both limits are None.
+    """
+    if max_load is None and min_free_memory_mb is None:
+        return None
+    return DispatchThrottle(max_load, min_free_memory_mb)
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Local scratch staging for outputs on slow storage.
+
+Encoding straight to a network share makes FFmpeg wait on every write, and
+the +faststart pass reads and rewrites the whole file over the network a
+second time. ScratchStager lets conversions write to a fast local scratch
+directory instead; finished files are moved to their destination by a
+background thread while the next file encodes.
+
+Each destination path is reserved with an empty placeholder while its
+file is staged, so parallel or later jobs never pick the same name. The
+transfer copies to a hidden temporary file next to the destination and
+renames it over the placeholder, so a destination is either the empty
+reservation or the complete file, never a partial copy.
+"""
+
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+
+# Default bound on staged bytes waiting for transfer (GB)
+DEFAULT_SCRATCH_LIMIT_GB = 20
+
+# Prefix of temporary files written next to the destination
+TRANSFER_PREFIX = '.transfer_'
+
+
+class ScratchStager:
+    """Stages outputs in a scratch directory and moves them in the background.
+
+    Attributes:
+        scratch_dir: Directory staged outputs are written to.
+        limit_bytes: Staged bytes allowed to wait for transfer before new
+                     encodes are held back.
+        pending_bytes: Bytes currently waiting for or in transfer.
+        errors: Mapping of destination path to error message for failed
+                transfers.
+    """
+
+    def __init__(self, scratch_dir: Path, limit_gb: float = DEFAULT_SCRATCH_LIMIT_GB):
+        """Initialize ScratchStager and start its transfer thread.
+
+        Args:
+            scratch_dir: Local directory for staged outputs (created if
+                         missing).
+            limit_gb: Staged gigabytes allowed to wait for transfer
+                      (default: DEFAULT_SCRATCH_LIMIT_GB).
+        """
+        self.scratch_dir = Path(scratch_dir)
+        self.scratch_dir.mkdir(parents=True, exist_ok=True)
+        self.limit_bytes = int(limit_gb * 1024 ** 3)
+        self.pending_bytes = 0
+        self.errors: Dict[Path, str] = {}
+        self._pending: Dict[Path, threading.Event] = {}
+        self._condition = threading.Condition()
+        self._transfers: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._transfer_loop, daemon=True)
+        self._thread.start()
+
+    def stage(self, output_file: Path) -> Path:
+        """Reserve a destination and get the scratch path to encode to.
+
+        Blocks while staged files waiting for transfer exceed the limit, so
+        scratch usage stays bounded when encoding outpaces the transfers.
+
+        Args:
+            output_file: Final destination of the output.
+
+        Returns:
+            Path in the scratch directory to write the output to.
+        """
+        with self._condition:
+            while self.pending_bytes >= self.limit_bytes and self._pending:
+                self._condition.wait()
+
+        output_file = Path(output_file)
+        if not output_file.exists():
+            output_file.touch()
+        fd, path = tempfile.mkstemp(suffix=output_file.suffix, prefix='stage_',
+                                    dir=self.scratch_dir)
+        os.close(fd)
+        return Path(path)
+
+    def discard(self, scratch_file: Path, output_file: Path):
+        """Remove a staged file whose conversion failed, and its reservation.
+
+        Args:
+            scratch_file: Path returned by stage().
+            output_file: Final destination of the output.
+        """
+        _remove(scratch_file)
+        try:
+            if output_file.exists() and output_file.stat().st_size == 0:
+                output_file.unlink()
+        except OSError:
+            pass
+
+    def submit(self, scratch_file: Path, output_file: Path):
+        """Queue a finished staged file for transfer to its destination.
+
+        Args:
+            scratch_file: Path returned by stage().
+            output_file: Final destination of the output.
+        """
+        output_file = Path(output_file)
+        size = scratch_file.stat().st_size
+        with self._condition:
+            self.pending_bytes += size
+            self._pending[output_file] = threading.Event()
+        self._transfers.put((scratch_file, output_file, size))
+
+    def wait(self, output_file: Path) -> Optional[str]:
+        """Wait until a submitted file has reached its destination.
+
+        Args:
+            output_file: Destination passed to submit().
+
+        Returns:
+            Error message if the transfer failed, None otherwise (also when
+            the file was never submitted).
+        """
+        output_file = Path(output_file)
+        with self._condition:
+            done = self._pending.get(output_file)
+        if done is not None:
+            done.wait()
+        return self.errors.get(output_file)
+
+    def finish(self) -> Dict[Path, str]:
+        """Wait for every queued transfer to complete.
+
+        Returns:
+            Mapping of destination path to error message for transfers that
+            failed.
+        """
+        self._transfers.join()
+        return dict(self.errors)
+
+    def close(self):
+        """Finish outstanding transfers and stop the transfer thread."""
+        self.finish()
+        self._transfers.put(None)
+        self._thread.join()
+
+    def _transfer_loop(self):
+        """Move queued files to their destinations, one at a time."""
+        while True:
+            job = self._transfers.get()
+            if job is None:
+                self._transfers.task_done()
+                return
+            scratch_file, output_file, size = job
+            try:
+                move_into_place(scratch_file, output_file)
+            except OSError as e:
+                self.errors[output_file] = f"Transfer to {output_file.parent} failed: {e}"
+                self.discard(scratch_file, output_file)
+            with self._condition:
+                self.pending_bytes -= size
+                self._pending.pop(output_file).set()
+                self._condition.notify_all()
+            self._transfers.task_done()
+
+
+def move_into_place(source: Path, destination: Path):
+    """Move a file to its destination with an atomic final rename.
+
+    Within one filesystem this is a single rename. Otherwise the file is
+    copied to a hidden temporary name in the destination directory, flushed
+    to disk, and renamed over the destination; the source is deleted
+    afterwards.
+
+    Args:
+        source: File to move.
+        destination: Final path; replaced if it exists.
+
+    Raises:
+        OSError: If the copy or rename fails. The destination is left
+                 untouched and no temporary file remains.
+    """
+    try:
+        os.replace(source, destination)
+        return
+    except OSError:
+        # Different filesystem (EXDEV) or rename not permitted: copy instead
+        pass
+
+    temp_path = destination.parent / f"{TRANSFER_PREFIX}{destination.name}"
+    try:
+        shutil.copyfile(source, temp_path)
+        with open(temp_path, 'rb+') as f:
+            os.fsync(f.fileno())
+        os.replace(temp_path, destination)
+    except OSError:
+        _remove(temp_path)
+        raise
+    _remove(source)
+
+
+def _remove(path: Path):
+    """Delete a file, ignoring errors.
+
+    Args:
+        path: File to delete.
+    """
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
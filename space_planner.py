@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Output size prediction and free-space checks for batch dispatch.
+
+A conversion that runs out of disk space fails only when FFmpeg's write
+fails, often near the end of a long file. SpacePlanner estimates each
+output's size before it is dispatched, from the clip duration and the
+bitrate this profile produced before (or a per-resolution default), and
+checks it against free space on every volume the job writes to, less
+space already promised to running jobs and pending transfers.
+
+Observed output sizes are remembered per profile in the data directory,
+so estimates improve with every batch.
+"""
+
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from avchd_index import lookup_clip
+from ffmpeg_utils import get_data_dir
+from mp4_verify import get_source_summary
+from mts_converter import (
+    DEFAULT_AUDIO_CODEC,
+    DEFAULT_CRF,
+    DEFAULT_PRESET,
+    DEFAULT_RESOLUTION,
+    DEFAULT_TIMESTAMP_MODE,
+    get_range_length
+)
+
+
+# File (inside the data directory) holding observed output bitrates
+SIZE_HISTORY_FILE = 'output_sizes.json'
+
+# Output bitrate (bits/s, video and audio) assumed for a profile with no
+# history, by resolution preset, at the default CRF
+DEFAULT_BITRATES = {
+    'original': 10_000_000,
+    '1080p': 10_000_000,
+    '720p': 5_000_000,
+    '480p': 2_500_000,
+}
+
+# Source bitrate (bits/s) used to guess a duration from the file size when
+# the duration cannot be read. AVCHD tops out at 24 Mbit/s.
+SOURCE_BITRATE = 24_000_000
+
+# Estimates are multiplied by this to allow for variation between clips
+SIZE_MARGIN = 1.2
+
+# Space always left free on a volume
+FREE_SPACE_RESERVE = 256 * 1024 * 1024
+
+# Weight of a new observation in the bitrate history (moving average)
+HISTORY_WEIGHT = 0.3
+
+
+def profile_key(options: Dict) -> str:
+    """Get the history key for a set of convert_video options.
+
+    Args:
+        options: convert_video keyword arguments.
+
+    Returns:
+        String combining the settings that drive output size.
+    """
+    return "|".join(str(part) for part in (
+        options.get('timestamp_mode') or DEFAULT_TIMESTAMP_MODE,
+        options.get('resolution') or DEFAULT_RESOLUTION,
+        options.get('audio_codec') or DEFAULT_AUDIO_CODEC,
+        options.get('preset') or DEFAULT_PRESET,
+        options.get('crf') if options.get('crf') is not None else DEFAULT_CRF,
+    ))
+
+
+def format_size(size: int) -> str:
+    """Format a byte count for messages.
+
+    Args:
+        size: Number of bytes.
+
+    Returns:
+        Size in GB with one decimal, e.g. '4.2 GB'.
+    """
+    return f"{size / 1024 ** 3:.1f} GB"
+
+
+def volume_path(directory: Path) -> Path:
+    """Get the nearest existing ancestor of a (possibly missing) directory.
+
+    Args:
+        directory: Directory a job will write to.
+
+    Returns:
+        Existing path on the same volume.
+    """
+    path = Path(directory).absolute()
+    while not path.exists() and path.parent != path:
+        path = path.parent
+    return path
+
+
+def estimate_source_duration(input_file: Path) -> float:
+    """Get a clip's duration, guessing from its size if it cannot be read.
+
+    Args:
+        input_file: Path to the MTS file.
+
+    Returns:
+        Duration in seconds.
+
+    Raises:
+        OSError: If the file cannot be read.
+    """
+    clip = lookup_clip(input_file)
+    if clip is not None:
+        return clip.duration
+    duration = get_source_summary(input_file)[0]
+    if duration is None:
+        duration = Path(input_file).stat().st_size * 8 / SOURCE_BITRATE
+    return duration
+
+
+class SizeHistory:
+    """Remembers the output bitrate observed per conversion profile.
+
+    Attributes:
+        path: Path to the JSON file backing the history.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        """Initialize SizeHistory.
+
+        Args:
+            path: Optional JSON file path. Defaults to SIZE_HISTORY_FILE in
+                  the per-user data directory.
+        """
+        self.path = Path(path) if path else Path(get_data_dir()) / SIZE_HISTORY_FILE
+
+    def _load(self) -> Dict:
+        """Load the whole history, tolerating a missing or corrupt file."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, profile: str) -> Optional[float]:
+        """Get the observed output rate for a profile.
+
+        Args:
+            profile: Key from profile_key().
+
+        Returns:
+            Output bytes per second of media, or None if nothing has been
+            observed yet.
+        """
+        entry = self._load().get(profile)
+        return entry['bytes_per_second'] if entry else None
+
+    def record(self, profile: str, bytes_per_second: float):
+        """Fold an observed output rate into the profile's average.
+
+        Args:
+            profile: Key from profile_key().
+            bytes_per_second: Output bytes per second of media.
+        """
+        data = self._load()
+        entry = data.get(profile)
+        if entry:
+            # Early samples count fully until the average has settled
+            weight = max(HISTORY_WEIGHT, 1.0 / (entry['samples'] + 1))
+            rate = entry['bytes_per_second'] * (1 - weight) + bytes_per_second * weight
+            samples = entry['samples'] + 1
+        else:
+            rate, samples = bytes_per_second, 1
+        data[profile] = {'bytes_per_second': round(rate, 1), 'samples': samples}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+
+class SpacePlanner:
+    """Predicts output sizes and checks them against free disk space.
+
+    Space is reserved for dispatched jobs until they finish, so parallel
+    jobs are not all admitted against the same free space.
+
+    Attributes:
+        history: SizeHistory used for and updated by predictions.
+        margin: Factor applied to estimates.
+        reserve_bytes: Space always left free on a volume.
+    """
+
+    def __init__(
+        self,
+        history: Optional[SizeHistory] = None,
+        margin: float = SIZE_MARGIN,
+        reserve_bytes: int = FREE_SPACE_RESERVE
+    ):
+        """Initialize SpacePlanner.
+
+        Args:
+            history: Optional SizeHistory (default: history in the data
+                     directory).
+            margin: Factor applied to estimates (default: SIZE_MARGIN).
+            reserve_bytes: Space always left free on a volume
+                           (default: FREE_SPACE_RESERVE).
+        """
+        self.history = history if history is not None else SizeHistory()
+        self.margin = margin
+        self.reserve_bytes = reserve_bytes
+        self._durations: Dict[Path, float] = {}
+        self._reserved: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def source_duration(self, input_file: Path) -> float:
+        """Get a clip's duration (see estimate_source_duration), cached.
+
+        Args:
+            input_file: Path to the MTS file.
+
+        Returns:
+            Duration in seconds.
+        """
+        input_file = Path(input_file)
+        if input_file not in self._durations:
+            self._durations[input_file] = estimate_source_duration(input_file)
+        return self._durations[input_file]
+
+    def converted_duration(self, input_file: Path, options: Dict) -> Optional[float]:
+        """Get how many seconds of a clip a conversion encodes.
+
+        Args:
+            input_file: Path to the MTS file.
+            options: convert_video keyword arguments; a start or end
+                     limits the conversion to that range.
+
+        Returns:
+            Seconds of video, or None if the range cannot be resolved.
+        """
+        duration = self.source_duration(input_file)
+        if options.get('start') is None and options.get('end') is None:
+            return duration
+        return get_range_length(
+            input_file, options.get('start'), options.get('end'), duration,
+            clock_index=options.get('clock_index', False)
+        )
+
+    def estimate(self, input_file: Path, options: Dict) -> int:
+        """Predict the output size of a conversion.
+
+        Only the converted range counts; an unresolvable range is
+        estimated as the whole clip. Uses the profile's observed bitrate
+        if known. Otherwise subtitle
+        mode (video copied) is assumed to match the source bitrate and
+        burn-in mode the resolution's default bitrate, scaled for CRF
+        (x264 roughly halves the bitrate every 6 CRF steps).
+
+        Args:
+            input_file: Path to the MTS file.
+            options: convert_video keyword arguments.
+
+        Returns:
+            Estimated output size in bytes, including the margin.
+        """
+        source_duration = self.source_duration(input_file)
+        duration = self.converted_duration(input_file, options) or source_duration
+        rate = self.history.get(profile_key(options))
+        if rate is None:
+            if (options.get('timestamp_mode') or DEFAULT_TIMESTAMP_MODE) == 'subtitle':
+                size = Path(input_file).stat().st_size
+                rate = size / source_duration if source_duration else 0.0
+            else:
+                resolution = options.get('resolution') or DEFAULT_RESOLUTION
+                crf = options.get('crf') if options.get('crf') is not None else DEFAULT_CRF
+                bitrate = DEFAULT_BITRATES.get(resolution, DEFAULT_BITRATES['original'])
+                rate = bitrate / 8 * 2 ** ((DEFAULT_CRF - crf) / 6)
+        return int(duration * rate * self.margin)
+
+    def observe(self, input_file: Path, options: Dict, output_file: Path):
+        """Learn from a finished conversion's output size.
+
+        Args:
+            input_file: Path to the MTS file.
+            options: convert_video keyword arguments used.
+            output_file: Path to the finished output.
+        """
+        try:
+            duration = self.converted_duration(input_file, options)
+            size = Path(output_file).stat().st_size
+        except OSError:
+            return
+        if duration and size > 0:
+            with self._lock:
+                self.history.record(profile_key(options), size / duration)
+
+    def check(
+        self,
+        directories: List[Path],
+        size: int,
+        committed: Optional[Dict[Path, int]] = None
+    ) -> Optional[str]:
+        """Check that an output of the given size fits on every volume.
+
+        Args:
+            directories: Directories the job writes to. Directories on the
+                         same volume are counted once.
+            size: Estimated output size in bytes.
+            committed: Optional bytes already promised to a directory's
+                       volume outside this planner (e.g. pending transfers).
+
+        Returns:
+            None if the job fits, otherwise a message naming the volume
+            that is short of space.
+        """
+        committed_by_device: Dict[int, int] = {}
+        for directory, count in (committed or {}).items():
+            device = os.stat(volume_path(directory)).st_dev
+            committed_by_device[device] = committed_by_device.get(device, 0) + count
+
+        seen = set()
+        for directory in directories:
+            volume = volume_path(directory)
+            device = os.stat(volume).st_dev
+            if device in seen:
+                continue
+            seen.add(device)
+            with self._lock:
+                reserved = self._reserved.get(device, 0)
+            available = (shutil.disk_usage(volume).free - reserved
+                         - committed_by_device.get(device, 0) - self.reserve_bytes)
+            if size > available:
+                return (f"Not enough disk space in {directory}: output needs about "
+                        f"{format_size(size)}, {format_size(max(0, available))} available")
+        return None
+
+    def reserve(self, directories: List[Path], size: int) -> List[Tuple[int, int]]:
+        """Hold space for a dispatched job until release().
+
+        Args:
+            directories: Directories the job writes to.
+            size: Estimated output size in bytes.
+
+        Returns:
+            Reservation token for release().
+        """
+        devices = {os.stat(volume_path(d)).st_dev for d in directories}
+        with self._lock:
+            for device in devices:
+                self._reserved[device] = self._reserved.get(device, 0) + size
+        return [(device, size) for device in devices]
+
+    def release(self, token: List[Tuple[int, int]]):
+        """Release the space held for a finished job.
+
+        Args:
+            token: Value returned by reserve().
+        """
+        with self._lock:
+            for device, size in token:
+                self._reserved[device] -= size
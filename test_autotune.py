@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""Tests for autotune module.
+
+Tests the ThroughputTuner hill-climbing, the TuningStore persistence and
+the AdaptiveBatchConverter parallel scheduler.
+"""
+
+import pytest
+import threading
+import time
+from pathlib import Path
+
+
+class TestParseFFmpegStats:
+    """Tests for parse_ffmpeg_stats."""
+
+    def test_parses_fps_speed_and_time(self):
+        """Should extract fps, speed and media time from a progress line."""
+        from mts_converter import parse_ffmpeg_stats
+
+        line = "frame=  250 fps= 48.5 q=28.0 size=  1024kB time=00:01:02.50 bitrate=1000kbits/s speed=1.94x"
+        stats = parse_ffmpeg_stats(line)
+
+        assert stats['fps'] == 48.5
+        assert stats['speed'] == 1.94
+        assert stats['time'] == 62.5
+
+    def test_non_progress_line_is_empty(self):
+        """Lines without statistics should return an empty dict."""
+        from mts_converter import parse_ffmpeg_stats
+
+        assert parse_ffmpeg_stats("Input #0, mpegts, from 'a.mts':") == {}
+
+
+class TestThroughputTuner:
+    """Tests for ThroughputTuner."""
+
+    def test_threads_cover_cpus(self):
+        """Threads per worker should divide the CPUs between workers."""
+        from autotune import ThroughputTuner
+
+        tuner = ThroughputTuner(8, start_workers=2)
+
+        assert tuner.threads == 4
+
+    def test_adds_workers_while_throughput_improves(self):
+        """Improving throughput should add another worker."""
+        from autotune import ThroughputTuner
+
+        tuner = ThroughputTuner(8)
+        assert tuner.record(1.0) is True
+        assert tuner.workers == 2
+        assert tuner.record(1.8) is True
+        assert tuner.workers == 3
+
+    def test_settles_on_plateau(self):
+        """When throughput stops improving the best worker count is kept."""
+        from autotune import ThroughputTuner
+
+        tuner = ThroughputTuner(8)
+        tuner.record(1.0)   # 1 worker
+        tuner.record(1.8)   # 2 workers
+        tuner.record(1.85)  # 3 workers: within tolerance
+
+        assert tuner.settled is True
+        assert tuner.workers == 2
+        assert tuner.best_throughput == 1.8
+
+    def test_tries_fewer_workers_from_remembered_start(self):
+        """Starting from remembered settings, fewer workers are tried too."""
+        from autotune import ThroughputTuner
+
+        tuner = ThroughputTuner(8, start_workers=3)
+        tuner.record(2.0)   # 3 workers
+        tuner.record(1.9)   # 4 workers: worse
+        assert tuner.workers == 2
+        tuner.record(2.5)   # 2 workers: better
+        assert tuner.workers == 1
+        tuner.record(1.5)   # 1 worker: worse
+
+        assert tuner.settled is True
+        assert tuner.workers == 2
+
+    def test_respects_max_workers(self):
+        """The worker count should never exceed max_workers."""
+        from autotune import ThroughputTuner
+
+        tuner = ThroughputTuner(8, max_workers=2)
+        tuner.record(1.0)
+        tuner.record(2.0)
+
+        assert tuner.workers == 2
+        assert tuner.settled is True
+
+    def test_settled_tuner_ignores_measurements(self):
+        """A settled tuner should not change anymore."""
+        from autotune import ThroughputTuner
+
+        tuner = ThroughputTuner(1)
+        tuner.record(1.0)
+
+        assert tuner.settled is True
+        assert tuner.record(5.0) is False
+
+
+class TestTuningStore:
+    """Tests for TuningStore."""
+
+    def test_missing_profile_returns_none(self, tmp_path):
+        """Unknown profiles should return None."""
+        from autotune import TuningStore
+
+        store = TuningStore(tmp_path / "tuning.json")
+
+        assert store.get("burn-in|original") is None
+
+    def test_save_and_get_roundtrip(self, tmp_path):
+        """Saved settings should be returned for the same host and profile."""
+        from autotune import TuningStore
+
+        store = TuningStore(tmp_path / "tuning.json")
+        store.save("burn-in|720p", workers=3, threads=2, throughput=4.2)
+
+        reloaded = TuningStore(tmp_path / "tuning.json")
+        assert reloaded.get("burn-in|720p") == {'workers': 3, 'threads': 2, 'throughput': 4.2}
+
+    def test_corrupt_file_is_ignored(self, tmp_path):
+        """A corrupt store should behave like an empty one."""
+        from autotune import TuningStore
+
+        path = tmp_path / "tuning.json"
+        path.write_text("{not json")
+
+        assert TuningStore(path).get("anything") is None
+
+
+class TestAdaptiveBatchConverter:
+    """Tests for AdaptiveBatchConverter."""
+
+    def test_converts_all_files_in_order(self, tmp_path, mocker):
+        """Results should cover every file in input order."""
+        from autotune import AdaptiveBatchConverter, TuningStore
+
+        files = []
+        for i in range(4):
+            f = tmp_path / f"video{i}.mts"
+            f.touch()
+            files.append(f)
+        mocker.patch('batch_converter.convert_video', return_value=True)
+
+        converter = AdaptiveBatchConverter(
+            poll_interval=0.01, window=0.05, store=TuningStore(tmp_path / "t.json")
+        )
+        results = converter.convert_batch(files)
+
+        assert [r.input_file for r in results] == files
+        assert all(r.success for r in results)
+
+    def test_passes_threads_and_stats_callback(self, tmp_path, mocker):
+        """Each conversion should get a thread count and stats callback."""
+        from autotune import AdaptiveBatchConverter, TuningStore
+
+        mts = tmp_path / "video.mts"
+        mts.touch()
+        mock_convert = mocker.patch('batch_converter.convert_video', return_value=True)
+
+        AdaptiveBatchConverter(
+            poll_interval=0.01, store=TuningStore(tmp_path / "t.json")
+        ).convert_batch([mts])
+
+        kwargs = mock_convert.call_args[1]
+        assert kwargs['threads'] >= 1
+        assert callable(kwargs['stats_callback'])
+
+    def test_runs_files_in_parallel_and_remembers_best(self, tmp_path, mocker):
+        """Reported speed should drive parallelism and be remembered."""
+        from autotune import AdaptiveBatchConverter, TuningStore
+
+        files = []
+        for i in range(6):
+            f = tmp_path / f"video{i}.mts"
+            f.touch()
+            files.append(f)
+
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def fake_convert(input_file, output_file, **kwargs):
+            with lock:
+                active.append(input_file)
+                peak.append(len(active))
+            for _ in range(10):
+                kwargs['stats_callback']({'speed': 1.0})
+                time.sleep(0.01)
+            with lock:
+                active.remove(input_file)
+            return True
+
+        mocker.patch('batch_converter.convert_video', side_effect=fake_convert)
+        mocker.patch('autotune.os.cpu_count', return_value=4)
+        store = TuningStore(tmp_path / "t.json")
+
+        converter = AdaptiveBatchConverter(poll_interval=0.005, window=0.03, store=store)
+        results = converter.convert_batch(files)
+
+        assert all(r.success for r in results)
+        assert max(peak) >= 2
+        assert store.get(converter.profile_key()) is not None
+
+    def test_profile_key_includes_encoder_settings(self, tmp_path, mocker):
+        """Tuning results should not be shared across presets or CRFs."""
+        from autotune import AdaptiveBatchConverter, TuningStore
+        from mts_converter import DEFAULT_CRF, DEFAULT_PRESET
+
+        converter = AdaptiveBatchConverter(store=TuningStore(tmp_path / "t.json"))
+        default_key = converter.profile_key()
+        options = converter._conversion_options()
+        mocker.patch.object(converter, '_conversion_options',
+                            return_value=dict(options, preset='veryslow', crf=18))
+
+        assert default_key.endswith(f"|{DEFAULT_PRESET}|{DEFAULT_CRF}")
+        assert converter.profile_key().endswith("|veryslow|18")
+
+    def test_failed_conversion_removes_placeholder(self, tmp_path, mocker):
+        """Reserved output files should be removed when conversion fails."""
+        from autotune import AdaptiveBatchConverter, TuningStore
+
+        mts = tmp_path / "video.mts"
+        mts.touch()
+        mocker.patch('batch_converter.convert_video', return_value=False)
+
+        results = AdaptiveBatchConverter(
+            poll_interval=0.01, store=TuningStore(tmp_path / "t.json")
+        ).convert_batch([mts])
+
+        assert results[0].success is False
+        assert not (tmp_path / "video.mp4").exists()
+
+    def test_run_cli_uses_adaptive_converter(self, tmp_path, mocker):
+        """--autotune should select AdaptiveBatchConverter."""
+        from mts_converter import run_cli
+
+        mts = tmp_path / "video.mts"
+        mts.touch()
+        mocker.patch('batch_converter.discover_files', return_value=[mts])
+        mocker.patch('mts_converter.check_ffmpeg', return_value=True)
+        mock_adaptive = mocker.patch('autotune.AdaptiveBatchConverter')
+        mock_adaptive.return_value.convert_batch.return_value = []
+
+        run_cli([str(mts), '--autotune', '--max-workers', '3'])
+
+        assert mock_adaptive.call_args[1]['max_workers'] == 3
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""Tests for avchd_index module.
+
+Tests the clip information and playlist parsers, spanned recordings, the
+DPM cross-check and the use of the index by discovery and timestamping.
+"""
+
+import pytest
+import struct
+from datetime import datetime
+from pathlib import Path
+
+from test_clock_index import dpm_record
+
+
+def bcd(value):
+    """Encode a two-digit number as one BCD byte."""
+    return (value // 10) << 4 | value % 10
+
+
+def bcd_date(when):
+    """Encode a datetime as a time zone byte and a 7-byte BCD record."""
+    return bytes([0x1E, bcd(when.year // 100), bcd(when.year % 100), bcd(when.month),
+                  bcd(when.day), bcd(when.hour), bcd(when.minute), bcd(when.second)])
+
+
+def make_cpi(seconds):
+    """Build a clip information file with one STC sequence."""
+    sequence = struct.pack('>IBB', 0, 0, 1) + struct.pack('>IBB', 0, 1, 0)
+    sequence += struct.pack('>HIII', 0x1001, 0, 45000, 45000 + int(seconds * 45000))
+    return b'HDMV0200' + struct.pack('>IIIII', 40, 0, 0, 0, 0) + bytes(12) + sequence
+
+
+def make_mpl(items, marks, dates):
+    """Build a playlist file.
+
+    items: (clip name, seconds, connection condition) tuples.
+    marks: (mark type, play item) tuples, each at the item's start.
+    dates: datetimes written to the extension data.
+    """
+    playlist = b''
+    for name, seconds, condition in items:
+        body = name.encode() + b'M2TS' + struct.pack('>HBII', condition, 0, 0, int(seconds * 45000))
+        body += bytes(12)
+        playlist += struct.pack('>H', len(body)) + body
+    playlist = struct.pack('>IHHH', 0, 0, len(items), 0) + playlist
+    mark_data = struct.pack('>IH', 0, len(marks))
+    for mark_type, item in marks:
+        mark_data += struct.pack('>BBHIHI', 0, mark_type, item, 0, 0, 0)
+    extension = b'PLEX' + bytes(8) + b''.join(bcd_date(d) for d in dates)
+
+    playlist_start = 40
+    mark_start = playlist_start + len(playlist)
+    extension_start = mark_start + len(mark_data)
+    header = b'MPLS0200' + struct.pack('>III', playlist_start, mark_start, extension_start)
+    header += bytes(40 - len(header))
+    return header + playlist + mark_data + extension
+
+
+def make_card(tmp_path, clips, marks, dates, dpm=None):
+    """Create an AVCHD card tree.
+
+    clips: (clip name, seconds, connection condition) tuples.
+    dpm: Optional {clip name: datetime} written as DPM records into the clips.
+    """
+    bdmv = tmp_path / "card" / "PRIVATE" / "AVCHD" / "BDMV"
+    for sub in ("STREAM", "CLIPINF", "PLAYLIST"):
+        (bdmv / sub).mkdir(parents=True)
+    for name, seconds, _ in clips:
+        record = dpm_record(dpm[name]) if dpm and name in dpm else b''
+        (bdmv / "STREAM" / f"{name}.MTS").write_bytes(bytes(100) + record + bytes(100))
+        (bdmv / "CLIPINF" / f"{name}.CPI").write_bytes(make_cpi(seconds))
+    (bdmv / "PLAYLIST" / "00000.MPL").write_bytes(make_mpl(clips, marks, dates))
+    return bdmv
+
+
+class TestParsers:
+    """Tests for parse_clip_info, parse_playlist and find_bcd_dates."""
+
+    def test_clip_duration(self):
+        """The duration is the clip's presentation range."""
+        from avchd_index import parse_clip_info
+
+        assert parse_clip_info(make_cpi(12.5)) == 12.5
+
+    def test_playlist_items_marks_and_dates(self):
+        """Play items, entry marks and extension dates are read."""
+        from avchd_index import parse_playlist
+
+        when = datetime(2024, 7, 4, 15, 32, 10)
+        items, marks, dates = parse_playlist(
+            make_mpl([('00001', 10, 1), ('00002', 5, 5)], [(1, 0)], [when])
+        )
+
+        assert [(i.clip_name, i.connection_condition) for i in items] == [('00001', 1), ('00002', 5)]
+        assert items[1].out_time == 5 * 45000
+        assert [(m.mark_type, m.play_item) for m in marks] == [(1, 0)]
+        assert dates == [when]
+
+    def test_wrong_file_type(self):
+        """Other files are rejected."""
+        import pytest
+        from avchd_index import parse_clip_info, parse_playlist
+
+        with pytest.raises(ValueError):
+            parse_clip_info(make_mpl([], [], []))
+        with pytest.raises(ValueError):
+            parse_playlist(b'MPLS')
+
+    def test_invalid_bcd_is_skipped(self):
+        """Byte runs that are not valid dates are ignored."""
+        from avchd_index import find_bcd_dates
+
+        assert find_bcd_dates(bytes([0x20, 0x24, 0x13, 0x01, 0x00, 0x00, 0x00])) == []
+        assert find_bcd_dates(b'\x20\x2A\x01\x01\x00\x00\x00') == []
+
+
+class TestReadIndex:
+    """Tests for read_avchd_index."""
+
+    def test_spanned_recording(self, tmp_path):
+        """Seamless continuations get the previous clip's end as their time."""
+        from avchd_index import read_avchd_index
+
+        first = datetime(2024, 7, 4, 15, 0, 0)
+        second = datetime(2024, 7, 4, 16, 0, 0)
+        bdmv = make_card(
+            tmp_path,
+            [('00001', 600, 1), ('00002', 30, 5), ('00003', 20, 1)],
+            [(1, 0), (1, 2)],
+            [datetime(2024, 7, 5), first, second]
+        )
+
+        clips = read_avchd_index(bdmv)
+
+        assert [c.name for c in clips] == ['00001', '00002', '00003']
+        assert [c.recording for c in clips] == [0, 0, 1]
+        assert [c.duration for c in clips] == [600, 30, 20]
+        assert [c.recorded for c in clips] == [first, datetime(2024, 7, 4, 15, 10, 0), second]
+
+    def test_dpm_disagreement_drops_dates(self, tmp_path):
+        """If the clips' DPM times disagree, playlist times are not used."""
+        from avchd_index import read_avchd_index
+
+        bdmv = make_card(
+            tmp_path, [('00001', 10, 1)], [(1, 0)], [datetime(2024, 7, 4, 15, 0, 0)],
+            dpm={'00001': datetime(2023, 1, 1, 9, 0, 0)}
+        )
+
+        clips = read_avchd_index(bdmv)
+
+        assert clips[0].recorded is None
+        assert clips[0].duration == 10
+
+    def test_find_bdmv_dir(self, tmp_path):
+        """The tree is found from the card root or the STREAM folder."""
+        from avchd_index import find_bdmv_dir
+
+        bdmv = make_card(tmp_path, [('00001', 10, 1)], [], [])
+
+        assert find_bdmv_dir(tmp_path / "card") == bdmv
+        assert find_bdmv_dir(bdmv / "STREAM") == bdmv
+        assert find_bdmv_dir(tmp_path) is None
+
+
+class TestIndexUse:
+    """Tests for the index in discovery, timestamps and duration estimates."""
+
+    def test_discovery_of_card_in_playback_order(self, tmp_path):
+        """A card root yields its clips in playlist order."""
+        from batch_converter import discover_files
+
+        bdmv = make_card(tmp_path, [('00002', 10, 1), ('00001', 10, 1)], [], [])
+        (bdmv / "STREAM" / "00009.MTS").write_bytes(b'')
+
+        files = discover_files([str(tmp_path / "card")])
+
+        assert [f.name for f in files] == ['00002.MTS', '00001.MTS', '00009.MTS']
+
+    def test_timestamp_without_reading_clip(self, tmp_path, mocker):
+        """Clips on a card get their time from the playlist."""
+        from mts_converter import get_video_creation_time
+
+        when = datetime(2024, 7, 4, 15, 0, 0)
+        bdmv = make_card(tmp_path, [('00001', 10, 1)], [(1, 0)], [when])
+        dpm = mocker.patch('mts_converter.extract_avchd_timestamp')
+
+        assert get_video_creation_time(str(bdmv / "STREAM" / "00001.MTS")) == when
+        dpm.assert_not_called()
+
+    @pytest.mark.parametrize('copy_kind', ['prefetched', 'repaired'])
+    def test_copy_gets_the_original_clip_time(self, tmp_path, mocker, copy_kind):
+        """Converting from a copy outside the card still uses the playlist time."""
+        import shutil
+        from unittest.mock import MagicMock
+        from mts_converter import convert_video
+
+        when = datetime(2024, 7, 4, 15, 0, 0)
+        bdmv = make_card(tmp_path, [('00001', 10, 1)], [(1, 0)], [when])
+        clip = bdmv / "STREAM" / "00001.MTS"
+        copy = Path(shutil.copy(clip, tmp_path / "00001.MTS"))
+        process = MagicMock()
+        process.stdout = iter([])
+        process.returncode = 0
+        popen = mocker.patch('mts_converter.subprocess.Popen', return_value=process)
+        mocker.patch('mts_converter.extract_avchd_timestamp', return_value=None)
+        mocker.patch('mts_converter.subprocess.run', side_effect=OSError)
+
+        if copy_kind == 'prefetched':
+            assert convert_video(str(copy), str(tmp_path / "out.mp4"), source_file=str(clip))
+        else:
+            mocker.patch('mts_converter._preflight_input', return_value=copy)
+            assert convert_video(str(clip), str(tmp_path / "out.mp4"), preflight='repair')
+
+        cmd = popen.call_args[0][0]
+        assert cmd[cmd.index('-i') + 1] == str(copy)
+        assert f"localtime\\:{int(when.timestamp())}" in ' '.join(cmd)
+
+    def test_duration_estimate_from_clip_info(self, tmp_path):
+        """Duration estimates come from the clip information file."""
+        from space_planner import estimate_source_duration
+
+        bdmv = make_card(tmp_path, [('00001', 42, 1)], [], [])
+
+        assert estimate_source_duration(bdmv / "STREAM" / "00001.MTS") == 42
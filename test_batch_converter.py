@@ -560,3 +560,109 @@ class TestOutputDirectory:
         output_path = Path(call_args[1])
         assert output_path.parent == tmp_path
         assert output_path.name == "video.mp4"
+
+
+class TestTwoTierBatchConverter:
+    """Tests for TwoTierBatchConverter proxy-first scheduling."""
+
+    def test_proxies_run_before_archives(self, tmp_path, mocker):
+        """All proxies should be produced before any archive encode."""
+        from batch_converter import TwoTierBatchConverter
+
+        files = [tmp_path / "a.mts", tmp_path / "b.mts"]
+        for f in files:
+            f.touch()
+        mock_convert = mocker.patch('batch_converter.convert_video', return_value=True)
+
+        results = TwoTierBatchConverter().convert_batch(files)
+
+        assert [r.tier for r in results] == ['proxy', 'proxy', 'archive', 'archive']
+        outputs = [Path(c[0][1]).name for c in mock_convert.call_args_list]
+        assert outputs == ['a_proxy.mp4', 'b_proxy.mp4', 'a.mp4', 'b.mp4']
+
+    def test_proxy_and_archive_settings(self, tmp_path, mocker):
+        """Proxies should be fast and small; archives low priority."""
+        from batch_converter import TwoTierBatchConverter
+
+        mts = tmp_path / "a.mts"
+        mts.touch()
+        mock_convert = mocker.patch('batch_converter.convert_video', return_value=True)
+
+        TwoTierBatchConverter(resolution='original').convert_batch([mts])
+
+        proxy_kwargs = mock_convert.call_args_list[0][1]
+        archive_kwargs = mock_convert.call_args_list[1][1]
+        assert proxy_kwargs['resolution'] == '480p'
+        assert proxy_kwargs['preset'] == 'ultrafast'
+        assert archive_kwargs['resolution'] == 'original'
+        assert archive_kwargs['low_priority'] is True
+        assert 'preset' not in archive_kwargs
+
+    def test_new_files_preempt_archive_encode(self, tmp_path, mocker):
+        """Files added during an archive encode should get their proxy first."""
+        from batch_converter import TwoTierBatchConverter
+
+        first = tmp_path / "a.mts"
+        late = tmp_path / "b.mts"
+        first.touch()
+        late.touch()
+        calls = []
+
+        def fake_convert(input_file, output_file, **kwargs):
+            calls.append(Path(output_file).name)
+            if Path(output_file).name == 'a.mp4' and late not in added:
+                Path(output_file).write_bytes(b'partial')
+                added.append(late)
+                converter.add_files([late])
+                assert kwargs['cancel_event'].wait(1)
+                return False
+            return True
+
+        added = []
+        mocker.patch('batch_converter.convert_video', side_effect=fake_convert)
+        converter = TwoTierBatchConverter()
+        results = converter.convert_batch([first])
+
+        assert calls == ['a_proxy.mp4', 'a.mp4', 'b_proxy.mp4', 'a.mp4', 'b.mp4']
+        assert [(r.input_file.name, r.tier) for r in results] == [
+            ('a.mts', 'proxy'), ('b.mts', 'proxy'), ('a.mts', 'archive'), ('b.mts', 'archive')
+        ]
+        assert all(r.success for r in results)
+
+    def test_no_intake_after_last_job(self, tmp_path, mocker):
+        """Files added while the batch finishes up are refused, not lost."""
+        from batch_converter import TwoTierBatchConverter
+
+        mts = tmp_path / "a.mts"
+        mts.touch()
+        late = tmp_path / "b.mts"
+        mocker.patch('batch_converter.convert_video', return_value=True)
+        converter = TwoTierBatchConverter()
+        accepted = []
+        finish = converter._finish_batch
+        mocker.patch.object(converter, '_finish_batch', side_effect=lambda results: (
+            accepted.append(converter.add_files([late])), finish(results)
+        ))
+
+        results = converter.convert_batch([mts])
+
+        assert accepted == [False]
+        assert [r.input_file for r in results] == [mts, mts]
+        assert converter.add_files([late]) is False
+
+    def test_cancel_stops_batch(self, tmp_path, mocker):
+        """cancel() should drop queued jobs and stop the batch."""
+        from batch_converter import TwoTierBatchConverter
+
+        files = [tmp_path / "a.mts", tmp_path / "b.mts"]
+        for f in files:
+            f.touch()
+
+        def fake_convert(input_file, output_file, **kwargs):
+            converter.cancel()
+            return False
+
+        mocker.patch('batch_converter.convert_video', side_effect=fake_convert)
+        converter = TwoTierBatchConverter()
+
+        assert converter.convert_batch(files) == []
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Tests for batch_plan module.
+
+Tests the learned throughput model, batch time estimates, the live ETA
+and the --plan dry run.
+"""
+
+import pytest
+
+from test_mp4_verify import make_source
+
+
+class TestThroughputModel:
+    """Tests for ThroughputModel."""
+
+    def test_default_speeds(self, tmp_path):
+        """Without history, defaults depend on mode and resolution."""
+        from batch_plan import ThroughputModel, DEFAULT_SPEEDS, SUBTITLE_SPEED
+
+        model = ThroughputModel(tmp_path / "speeds.json")
+
+        assert model.speed({'resolution': '720p'}) == DEFAULT_SPEEDS['720p']
+        assert model.speed({'timestamp_mode': 'subtitle'}) == SUBTITLE_SPEED
+
+    def test_learns_per_profile(self, tmp_path):
+        """Observed speeds are averaged per profile."""
+        from batch_plan import ThroughputModel
+
+        model = ThroughputModel(tmp_path / "speeds.json")
+        source = make_source(tmp_path / "a.mts", 10.0)
+
+        model.observe(source, {'resolution': '720p'}, 5.0)
+        model.observe(source, {'resolution': '720p'}, 2.5)
+
+        assert model.speed({'resolution': '720p'}) == pytest.approx(3.0)
+        assert model.speed({'resolution': '1080p'}) == 1.0
+
+    def test_short_conversions_are_ignored(self, tmp_path):
+        """Conversions too short to time are not learned from."""
+        from batch_plan import ThroughputModel
+
+        model = ThroughputModel(tmp_path / "speeds.json")
+        source = make_source(tmp_path / "a.mts", 10.0)
+
+        model.observe(source, {}, 0.01)
+
+        assert not (tmp_path / "speeds.json").exists()
+
+
+    def test_range_conversions_learn_range_speed(self, tmp_path):
+        """A ranged conversion is timed against the range, not the whole clip."""
+        from batch_plan import ThroughputModel
+
+        model = ThroughputModel(tmp_path / "speeds.json")
+        source = make_source(tmp_path / "a.mts", 10.0)
+
+        model.observe(source, {'resolution': '720p', 'start': '2', 'end': '6'}, 2.0)
+        model.observe(source, {'resolution': '480p', 'start': '4'}, 2.0)
+
+        assert model.speed({'resolution': '720p'}) == pytest.approx(2.0)
+        assert model.speed({'resolution': '480p'}) == pytest.approx(3.0)
+
+
+class TestPlan:
+    """Tests for plan_batch and EtaTracker."""
+
+    def test_plan_uses_duration_and_speed(self, tmp_path):
+        """Each file's estimate is its duration divided by the speed."""
+        from batch_plan import ThroughputModel, plan_batch
+
+        clips = [make_source(tmp_path / "a.mts", 10.0), make_source(tmp_path / "b.mts", 4.0)]
+
+        plans = plan_batch(clips, {'resolution': '480p'}, ThroughputModel(tmp_path / "s.json"))
+
+        assert [round(p.seconds, 1) for p in plans] == [2.5, 1.0]
+        assert plans[0].learned is False
+
+    def test_plan_covers_range(self, tmp_path):
+        """With a range only the range is planned."""
+        from batch_plan import ThroughputModel, plan_batch
+
+        clip = make_source(tmp_path / "a.mts", 10.0)
+
+        plans = plan_batch([clip], {'resolution': '480p', 'start': '0:02', 'end': '0:06'},
+                           ThroughputModel(tmp_path / "s.json"))
+
+        assert plans[0].duration == pytest.approx(4.0)
+        assert plans[0].seconds == pytest.approx(1.0)
+
+    def test_eta_is_corrected_by_actual_pace(self, tmp_path, mocker):
+        """Files taking twice as long as planned double the remaining estimate."""
+        from batch_plan import EtaTracker, FilePlan
+
+        clock = mocker.patch('batch_plan.time.monotonic', return_value=0.0)
+        plans = [FilePlan(tmp_path / f"{n}.mts", 10.0, 1.0, False, 10.0) for n in "abc"]
+        tracker = EtaTracker(plans)
+        assert tracker.remaining() == 30.0
+
+        clock.return_value = 20.0
+        tracker.file_done(tmp_path / "a.mts")
+        assert tracker.remaining() == 40.0
+
+        clock.return_value = 25.0
+        assert tracker.remaining() == 35.0
+
+    def test_format_duration(self):
+        """Durations are shown as H:MM:SS."""
+        from batch_plan import format_duration
+
+        assert format_duration(3723.4) == "1:02:03"
+        assert format_duration(-5) == "0:00:00"
+
+
+class TestBatchThroughput:
+    """Tests for speed learning in BatchConverter."""
+
+    def test_conversion_speed_is_recorded(self, tmp_path, mocker):
+        """Successful conversions are timed and remembered."""
+        from batch_converter import BatchConverter
+        from batch_plan import ThroughputModel
+
+        source = make_source(tmp_path / "a.mts", 10.0)
+        mocker.patch('batch_converter.convert_video', return_value=True)
+        mocker.patch('batch_converter.time.monotonic', side_effect=[0.0, 5.0])
+        model = ThroughputModel(tmp_path / "speeds.json")
+
+        BatchConverter(resolution='720p', throughput_model=model).convert_batch([source])
+
+        assert model.speed({'resolution': '720p'}) == pytest.approx(2.0)
+
+
+class TestPlanCli:
+    """Tests for the --plan dry run."""
+
+    def test_plan_prints_estimates_without_converting(self, tmp_path, mocker, capsys):
+        """--plan lists per-file and total estimates and converts nothing."""
+        from mts_converter import run_cli
+
+        mocker.patch('batch_plan.get_data_dir', return_value=str(tmp_path))
+        mock_convert = mocker.patch('batch_converter.convert_video')
+        clip = make_source(tmp_path / "a.mts", 10.0)
+
+        assert run_cli([str(clip), '--plan', '-r', '480p']) == (0, 0)
+
+        output = capsys.readouterr().out
+        assert "a.mts" in output
+        assert "0:00:10 of video" in output
+        assert "about 0:00:02 to convert" in output
+        mock_convert.assert_not_called()
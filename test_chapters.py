@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""Tests for wall-clock chapters and the timecode track.
+
+Tests the per-minute chapter list, start timecodes, the options added to
+the conversion commands and convert_video(chapters=True).
+"""
+
+from unittest.mock import MagicMock
+from datetime import datetime
+from fractions import Fraction
+
+
+FILMING_TIME = datetime(2024, 12, 15, 14, 34, 40)
+
+
+def parse_chapters(document):
+    """Get (start ms, end ms, title) of each chapter in an FFMETADATA document."""
+    chapters = []
+    for block in document.split('[CHAPTER]')[1:]:
+        fields = dict(line.split('=', 1) for line in block.strip().splitlines())
+        chapters.append((int(fields['START']), int(fields['END']), fields['title']))
+    return chapters
+
+
+class TestChapterMetadata:
+    """Tests for build_chapter_metadata."""
+
+    def test_chapters_on_minute_marks(self):
+        """The first chapter starts with the media, the rest on the clock's minutes."""
+        from mts_converter import build_chapter_metadata
+
+        document = build_chapter_metadata(FILMING_TIME, 200.0)
+
+        assert document.startswith(';FFMETADATA1\n')
+        assert parse_chapters(document) == [
+            (0, 20000, '2024-12-15 14:34'),
+            (20000, 80000, '2024-12-15 14:35'),
+            (80000, 140000, '2024-12-15 14:36'),
+            (140000, 200000, '2024-12-15 14:37'),
+        ]
+
+    def test_no_slivers(self):
+        """A minute mark just after the start or before the end moves a boundary."""
+        from mts_converter import build_chapter_metadata
+
+        document = build_chapter_metadata(datetime(2024, 12, 15, 14, 34, 59, 500000), 60.8)
+
+        assert parse_chapters(document) == [(0, 60800, '2024-12-15 14:35')]
+
+    def test_clock_restart_starts_a_chapter(self):
+        """Chapters follow the camera clock across a restart."""
+        from mts_converter import build_chapter_metadata
+        from clock_index import ClockSegment
+
+        restart = datetime(2024, 12, 15, 16, 0, 30)
+        segments = [ClockSegment(0.0, FILMING_TIME), ClockSegment(50.0, restart)]
+
+        chapters = parse_chapters(build_chapter_metadata(FILMING_TIME, 120.0, segments))
+
+        assert [start for start, _, _ in chapters] == [0, 20000, 50000, 80000]
+        assert chapters[2][2] == '2024-12-15 16:00'
+        assert chapters[3][2] == '2024-12-15 16:01'
+
+
+class TestTimecode:
+    """Tests for format_timecode."""
+
+    def test_integer_rate(self):
+        """PAL rates count frames directly."""
+        from mts_converter import format_timecode
+
+        assert format_timecode(datetime(2024, 12, 15, 14, 35, 20, 480000), Fraction(25)) == '14:35:20:12'
+
+    def test_ntsc_drop_frame(self):
+        """29.97 fps uses drop-frame timecode and skips the dropped frame numbers."""
+        from mts_converter import format_timecode
+
+        ntsc = Fraction(30000, 1001)
+        assert format_timecode(datetime(2024, 12, 15, 14, 35, 20, 500000), ntsc) == '14:35:20;15'
+        assert format_timecode(datetime(2024, 12, 15, 14, 31, 0), ntsc) == '14:31:00;02'
+        assert format_timecode(datetime(2024, 12, 15, 14, 30, 0), ntsc) == '14:30:00;00'
+
+
+class TestCommands:
+    """Tests for the chapter input and navigation options in commands."""
+
+    def test_burn_in_command(self):
+        """The chapter file is a second input mapped to the output's chapters."""
+        from mts_converter import build_burn_in_command
+
+        cmd = build_burn_in_command(
+            'ffmpeg', 'in.mts', 'out.mp4', FILMING_TIME,
+            chapters_path='chapters.txt', timecode='14:34:40;00'
+        )
+
+        assert cmd[cmd.index('chapters.txt') - 3:cmd.index('chapters.txt')] == ['-f', 'ffmetadata', '-i']
+        assert cmd.index('in.mts') < cmd.index('chapters.txt')
+        assert cmd[cmd.index('-map_chapters') + 1] == '1'
+        assert cmd[cmd.index('-timecode') + 1] == '14:34:40;00'
+
+    def test_subtitle_command(self):
+        """With the subtitle file as input 1, the chapters are input 2."""
+        from mts_converter import build_subtitle_command
+
+        cmd = build_subtitle_command('ffmpeg', 'in.mts', 'ts.srt', 'out.mp4', chapters_path='chapters.txt')
+
+        assert cmd[cmd.index('-map_chapters') + 1] == '2'
+        assert '-timecode' not in cmd
+
+    def test_no_navigation_by_default(self):
+        """Without chapters the command is unchanged."""
+        from mts_converter import build_burn_in_command
+
+        cmd = build_burn_in_command('ffmpeg', 'in.mts', 'out.mp4', FILMING_TIME)
+
+        assert '-map_chapters' not in cmd and '-timecode' not in cmd
+        assert cmd.count('-i') == 1
+
+
+class TestConvertVideo:
+    """Tests for convert_video(chapters=True) and the CLI option."""
+
+    def test_chapters_in_the_same_run(self, tmp_path, mocker):
+        """One FFmpeg run gets the chapters and timecode; the chapter file is removed."""
+        from mts_converter import convert_video
+
+        (tmp_path / "clip.mts").write_bytes(b'x')
+        process = MagicMock()
+        process.stdout = iter([])
+        process.returncode = 0
+        popen = mocker.patch('mts_converter.subprocess.Popen', return_value=process)
+        mocker.patch('mts_converter.get_video_creation_time', return_value=FILMING_TIME)
+        mocker.patch('mts_converter.get_video_duration', return_value=200.0)
+        mocker.patch('mts_converter.get_video_frame_rate', return_value=Fraction(30000, 1001))
+
+        assert convert_video(str(tmp_path / "clip.mts"), str(tmp_path / "clip.mp4"),
+                             chapters=True) is True
+
+        popen.assert_called_once()
+        cmd = popen.call_args[0][0]
+        chapters_path = cmd[cmd.index('ffmetadata') + 2]
+        assert cmd[cmd.index('-timecode') + 1] == '14:34:40;00'
+        assert not (tmp_path / chapters_path).exists()
+
+    def test_parse_args_and_batch_option(self):
+        """--chapters is off by default and reaches convert_video through batches."""
+        from mts_converter import parse_args
+        from batch_converter import BatchConverter
+
+        assert parse_args(['clip.mts', '--chapters']).chapters is True
+        assert parse_args(['clip.mts']).chapters is False
+        assert BatchConverter(chapters=True)._conversion_options()['chapters'] is True
+        assert 'chapters' not in BatchConverter()._conversion_options()
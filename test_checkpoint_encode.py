@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Tests for checkpoint_encode module.
+
+Tests segment planning, the clock offset of each segment, resuming from
+finished segments and the concat step.
+"""
+
+from unittest.mock import MagicMock
+from datetime import datetime, timedelta
+from pathlib import Path
+
+
+FILMING_TIME = datetime(2024, 1, 15, 10, 30, 0)
+
+
+class TestPlanning:
+    """Tests for plan_segments and the clock of each segment."""
+
+    def test_last_segment_runs_to_end(self):
+        """Segments have a fixed length; the last one is open-ended."""
+        from checkpoint_encode import plan_segments
+
+        assert plan_segments(650.0, 300) == [(0, 300), (300, 300), (600, None)]
+        assert plan_segments(600.0, 300) == [(0, 300), (300, None)]
+        assert plan_segments(5.0, 300) == [(0, None)]
+
+    def test_work_dir_depends_on_settings(self, tmp_path):
+        """Different settings never share finished segments."""
+        from checkpoint_encode import get_checkpoint_dir
+
+        clip = tmp_path / "clip.mts"
+        clip.write_bytes(b'x')
+
+        first = get_checkpoint_dir(clip, tmp_path, {'crf': 23})
+
+        assert first == get_checkpoint_dir(clip, tmp_path, {'crf': 23})
+        assert first != get_checkpoint_dir(clip, tmp_path, {'crf': 28})
+        assert first.parent == tmp_path / ".checkpoints"
+
+    def test_work_dir_ignores_thread_counts(self, tmp_path):
+        """Retuned thread counts still resume the same work directory."""
+        from checkpoint_encode import get_checkpoint_dir
+
+        clip = tmp_path / "clip.mts"
+        clip.write_bytes(b'x')
+
+        assert (get_checkpoint_dir(clip, tmp_path, {'crf': 23, 'threads': 2, 'filter_threads': 1})
+                == get_checkpoint_dir(clip, tmp_path, {'crf': 23, 'threads': 8}))
+
+
+class TestCheckpointedConversion:
+    """Tests for convert_video(checkpoint=True)."""
+
+    def _mock_ffmpeg(self, mocker, fail_on=None):
+        """Mock FFmpeg; each run writes its output file unless it fails."""
+        calls = []
+
+        def popen(cmd, **kwargs):
+            calls.append(cmd)
+            process = MagicMock()
+            process.stdout = iter([])
+            failed = fail_on is not None and len(calls) == fail_on
+            process.returncode = 1 if failed else 0
+            if not failed:
+                Path(cmd[-1]).write_bytes(b'mp4')
+            return process
+
+        mocker.patch('mts_converter.subprocess.Popen', side_effect=popen)
+        mocker.patch('mts_converter.get_video_creation_time', return_value=FILMING_TIME)
+        mocker.patch('mts_converter.get_video_duration', return_value=650.0)
+        return calls
+
+    def test_segments_then_concat(self, tmp_path, mocker):
+        """Each segment is seeked, offset and silent; the concat copies video."""
+        from mts_converter import convert_video
+
+        clip = tmp_path / "clip.mts"
+        clip.write_bytes(b'x')
+        calls = self._mock_ffmpeg(mocker)
+
+        assert convert_video(str(clip), str(tmp_path / "clip.mp4"), checkpoint=True,
+                             checkpoint_segment_seconds=300) is True
+
+        assert len(calls) == 4
+        second = calls[1]
+        assert second[second.index('-ss') + 1] == '300'
+        assert second[second.index('-t') + 1] == '300'
+        assert '-an' in second
+        assert 'drawtext=' in ' '.join(second)
+        assert str(int((FILMING_TIME + timedelta(seconds=300)).timestamp())) in ' '.join(second)
+        assert '-t' not in calls[2]
+        concat = calls[3]
+        assert concat[concat.index('-c:v') + 1] == 'copy'
+        assert not (tmp_path / ".checkpoints").exists()
+
+    def test_resume_skips_finished_segments(self, tmp_path, mocker):
+        """After a failure, a new run encodes only the missing segments."""
+        from mts_converter import convert_video
+
+        clip = tmp_path / "clip.mts"
+        clip.write_bytes(b'x')
+        calls = self._mock_ffmpeg(mocker, fail_on=2)
+
+        assert convert_video(str(clip), str(tmp_path / "clip.mp4"), checkpoint=True,
+                             checkpoint_segment_seconds=300) is False
+        first_run = len(calls)
+        assert convert_video(str(clip), str(tmp_path / "clip.mp4"), checkpoint=True,
+                             checkpoint_segment_seconds=300) is True
+
+        resumed = calls[first_run:]
+        assert len(resumed) == 3
+        assert resumed[0][resumed[0].index('-ss') + 1] == '300'
+
+    def test_resume_from_prefetched_copy(self, tmp_path, mocker):
+        """Runs from different local copies of a clip share its finished segments."""
+        import shutil
+        from mts_converter import convert_video
+
+        clip = tmp_path / "clip.mts"
+        clip.write_bytes(b'x')
+        calls = self._mock_ffmpeg(mocker, fail_on=2)
+        copies = []
+        for name in ("prefetch1", "prefetch2"):
+            (tmp_path / name).mkdir()
+            copies.append(Path(shutil.copy(clip, tmp_path / name / "clip.mts")))
+
+        assert convert_video(str(copies[0]), str(tmp_path / "clip.mp4"), checkpoint=True,
+                             checkpoint_segment_seconds=300, threads=2,
+                             source_file=str(clip)) is False
+        first_run = len(calls)
+        assert convert_video(str(copies[1]), str(tmp_path / "clip.mp4"), checkpoint=True,
+                             checkpoint_segment_seconds=300, threads=4,
+                             source_file=str(clip)) is True
+
+        resumed = calls[first_run:]
+        assert len(resumed) == 3
+        assert resumed[0][resumed[0].index('-ss') + 1] == '300'
+
+    def test_batch_passes_original_of_prefetched_input(self, tmp_path, mocker):
+        """A batch converting from a prefetched copy names the original clip."""
+        from batch_converter import BatchConverter
+
+        clip = tmp_path / "clip.mts"
+        clip.write_bytes(b'x')
+        local = tmp_path / "local" / "clip.mts"
+        prefetcher = MagicMock()
+        prefetcher.acquire.return_value = local
+        convert = mocker.patch('batch_converter.convert_video', return_value=True)
+        converter = BatchConverter(checkpoint=True)
+        converter._prefetcher = prefetcher
+
+        converter._convert_file(clip, tmp_path / "clip.mp4")
+
+        assert convert.call_args[0][0] == str(local)
+        assert convert.call_args[1]['source_file'] == str(clip)
+
+    def test_parse_args_checkpoint(self):
+        """--checkpoint and --checkpoint-segment should be parsed."""
+        from mts_converter import parse_args
+
+        args = parse_args(['a.mts', '--checkpoint', '--checkpoint-segment', '120'])
+
+        assert args.checkpoint is True
+        assert args.checkpoint_segment == 120.0
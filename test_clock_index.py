@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""Tests for clock_index module.
+
+Tests the chunked marker search, PTS lookup in synthetic AVCHD transport
+streams, clock segment building and the overlay driven by the segments.
+"""
+
+import pytest
+from unittest.mock import MagicMock
+from datetime import datetime, timedelta
+
+
+VIDEO_PID = 0x1011
+
+
+def bcd(value):
+    """Encode a two-digit number as BCD."""
+    return ((value // 10) << 4) | (value % 10)
+
+
+def dpm_record(when):
+    """Build a DPM timestamp record for a datetime."""
+    return b'DPM' + bytes([
+        0x00, 0x00, 0x00,
+        bcd(when.year // 100), bcd(when.year % 100), bcd(when.month), 0x00,
+        bcd(when.day), bcd(when.hour), bcd(when.minute), bcd(when.second)
+    ])
+
+
+def pes_header(pts_seconds):
+    """Build a video PES header carrying a PTS."""
+    pts = int(pts_seconds * 90000)
+    return b'\x00\x00\x01\xe0\x00\x00\x80\x80\x05' + bytes([
+        0x21 | ((pts >> 29) & 0x0E),
+        (pts >> 22) & 0xFF,
+        ((pts >> 14) & 0xFE) | 0x01,
+        (pts >> 7) & 0xFF,
+        ((pts << 1) & 0xFE) | 0x01,
+    ])
+
+
+def ts_packet(payload, start=False, pid=VIDEO_PID):
+    """Build a 192-byte AVCHD packet (timecode prefix + TS packet)."""
+    header = bytes([0x47, (0x40 if start else 0x00) | (pid >> 8), pid & 0xFF, 0x10])
+    return b'\x00\x00\x00\x00' + header + payload.ljust(184, b'\xff')
+
+
+def make_stream(gops):
+    """Build a synthetic stream from (pts_seconds, wall_clock) GOPs.
+
+    The DPM record of every other GOP is placed in the second packet of the
+    PES packet, to exercise walking back to the PES header.
+    """
+    data = b''
+    for index, (pts, when) in enumerate(gops):
+        if index % 2:
+            data += ts_packet(pes_header(pts), start=True)
+            data += ts_packet(b'\x00' * 20 + dpm_record(when))
+        else:
+            data += ts_packet(pes_header(pts) + dpm_record(when), start=True)
+        data += ts_packet(b'\x00' * 184, pid=0x1100)
+    return data
+
+
+START = datetime(2024, 1, 15, 10, 30, 0)
+
+
+def continuous(count, pts_start=1.0, clock=START, step=1.0):
+    """GOPs with a continuously running clock."""
+    return [(pts_start + i * step, clock + timedelta(seconds=i * step)) for i in range(count)]
+
+
+class TestFindMarkers:
+    """Tests for find_markers."""
+
+    def test_marker_across_chunk_boundary_found_once(self):
+        """Markers spanning a chunk boundary are found exactly once."""
+        from clock_index import find_markers
+
+        data = b'xxDPMxxxDPM'
+
+        assert list(find_markers(data, chunk_size=3)) == [2, 8]
+
+    def test_matches_plain_search(self):
+        """Chunked search should match a single find() loop."""
+        from clock_index import find_markers
+
+        data = (b'abcDPM' * 50) + b'DP'
+
+        assert list(find_markers(data, chunk_size=7)) == [i * 6 + 3 for i in range(50)]
+
+
+class TestScan:
+    """Tests for scan_buffer and scan_file."""
+
+    def test_detects_avchd_layout(self):
+        """192-byte packets with a timecode prefix should be detected."""
+        from clock_index import detect_packet_layout
+
+        assert detect_packet_layout(make_stream(continuous(3))) == (192, 4)
+
+    def test_entries_have_pts_and_clock(self, tmp_path):
+        """Each DPM record should be paired with its PES timestamp."""
+        from clock_index import scan_file
+
+        clip = tmp_path / "clip.mts"
+        clip.write_bytes(make_stream(continuous(4)))
+
+        entries = scan_file(clip)
+
+        assert [e.pts for e in entries] == [1.0, 2.0, 3.0, 4.0]
+        assert entries[3].wall_clock == START + timedelta(seconds=3)
+
+    def test_empty_file(self, tmp_path):
+        """Empty files should give an empty index."""
+        from clock_index import scan_file
+
+        clip = tmp_path / "empty.mts"
+        clip.touch()
+
+        assert scan_file(clip) == []
+
+
+class TestClockSegments:
+    """Tests for build_clock_segments."""
+
+    def test_continuous_clock_is_one_segment(self, tmp_path):
+        """A single recording should give a single segment."""
+        from clock_index import get_clock_segments
+
+        clip = tmp_path / "clip.mts"
+        clip.write_bytes(make_stream(continuous(6)))
+
+        segments = get_clock_segments(clip)
+
+        assert len(segments) == 1
+        assert segments[0].start == 0.0
+        assert segments[0].wall_clock == START
+
+    def test_joined_recordings_start_new_segment(self, tmp_path):
+        """A clock restart with a PTS reset should start a new segment."""
+        from clock_index import get_clock_segments
+
+        later = datetime(2024, 1, 15, 14, 0, 0)
+        clip = tmp_path / "joined.mts"
+        clip.write_bytes(make_stream(
+            continuous(4) + continuous(3, pts_start=0.5, clock=later)
+        ))
+
+        segments = get_clock_segments(clip)
+
+        assert len(segments) == 2
+        # Four GOPs of one second each, the splice counted as one GOP
+        assert segments[1].start == 4.0
+        assert segments[1].wall_clock == later
+
+    def test_clock_jump_with_continuous_pts(self):
+        """A clock jump without a PTS discontinuity is also detected."""
+        from clock_index import ClockEntry, build_clock_segments
+
+        entries = [
+            ClockEntry(0, 10.0, START),
+            ClockEntry(1, 11.0, START + timedelta(seconds=1)),
+            ClockEntry(2, 12.0, START + timedelta(hours=1)),
+        ]
+
+        segments = build_clock_segments(entries)
+
+        assert [s.start for s in segments] == [0.0, 2.0]
+
+    def test_pts_wrap_is_not_a_discontinuity(self):
+        """33-bit PTS wrap-around should be unwrapped."""
+        from clock_index import ClockEntry, build_clock_segments, PTS_WRAP, PTS_CLOCK
+
+        top = PTS_WRAP / PTS_CLOCK
+        entries = [
+            ClockEntry(0, top - 1.0, START),
+            ClockEntry(1, 0.0, START + timedelta(seconds=1)),
+            ClockEntry(2, 1.0, START + timedelta(seconds=2)),
+        ]
+
+        assert len(build_clock_segments(entries)) == 1
+
+
+class TestSegmentOverlay:
+    """Tests for overlays driven by clock segments."""
+
+    def segments(self):
+        """Two clock segments with a restart at 12.5 seconds."""
+        from clock_index import ClockSegment
+
+        return [ClockSegment(0.0, START), ClockSegment(12.5, datetime(2024, 1, 15, 14, 0, 0))]
+
+    def test_drawtext_per_segment(self):
+        """Each segment should get a drawtext enabled for its time range."""
+        from mts_converter import build_filter_graph
+
+        vf = build_filter_graph(START, clock_segments=self.segments())[1]
+
+        assert vf.count('drawtext=') == 2
+        assert "enable='lt(t,12.5)'" in vf
+        assert "enable='gte(t,12.5)'" in vf
+
+    def test_single_segment_keeps_plain_filter(self):
+        """One segment should produce the usual single drawtext."""
+        from mts_converter import build_filter_graph
+
+        assert build_filter_graph(START, clock_segments=self.segments()[:1]) == build_filter_graph(START)
+
+    def test_subtitles_follow_segments(self):
+        """Subtitle cues should switch to the new clock at a restart."""
+        from mts_converter import build_timestamp_subtitles
+
+        srt = build_timestamp_subtitles(START, 15, self.segments())
+
+        assert "2024-01-15 10:30:12" in srt
+        assert "2024-01-15 14:00:00" in srt
+        assert "10:30:13" not in srt
+
+    def test_convert_video_uses_clock_index(self, tmp_path, mocker):
+        """convert_video(clock_index=True) should follow the camera clock."""
+        from mts_converter import convert_video
+
+        later = datetime(2024, 1, 15, 14, 0, 0)
+        clip = tmp_path / "joined.mts"
+        clip.write_bytes(make_stream(continuous(3) + continuous(3, pts_start=0.2, clock=later)))
+
+        mock_popen = mocker.patch('mts_converter.subprocess.Popen')
+        mock_process = MagicMock()
+        mock_process.stdout = iter([])
+        mock_process.returncode = 0
+        mock_popen.return_value = mock_process
+
+        convert_video(str(clip), clock_index=True)
+
+        cmd = mock_popen.call_args[0][0]
+        vf = cmd[cmd.index('-vf') + 1]
+        assert vf.count('drawtext=') == 2
+
+    def test_batch_converter_passes_clock_index(self, tmp_path, mocker):
+        """BatchConverter should forward clock_index to convert_video."""
+        from batch_converter import BatchConverter
+
+        clip = tmp_path / "clip.mts"
+        clip.touch()
+        mock_convert = mocker.patch('batch_converter.convert_video', return_value=True)
+
+        BatchConverter(clock_index=True).convert_batch([clip])
+
+        assert mock_convert.call_args[1]['clock_index'] is True
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""Tests for conversion_cache module.
+
+Tests clip fingerprints, settings hashes, the persistent cache and the
+duplicate handling in BatchConverter.
+"""
+
+import pytest
+from pathlib import Path
+
+
+def write_clip(path, data):
+    """Write clip bytes and return the path."""
+    path.write_bytes(data)
+    return path
+
+
+def fake_convert(input_file, output_file, **kwargs):
+    """Stand-in for convert_video that writes a small output."""
+    Path(output_file).write_bytes(b'mp4 data')
+    return True
+
+
+class TestFingerprint:
+    """Tests for fingerprint_file and cache_key."""
+
+    def test_identical_copies_match(self, tmp_path):
+        """Byte-identical copies in different places share a fingerprint."""
+        from conversion_cache import fingerprint_file
+
+        (tmp_path / "a").mkdir()
+        (tmp_path / "b").mkdir()
+        one = write_clip(tmp_path / "a" / "clip.mts", b'x' * 5000)
+        two = write_clip(tmp_path / "b" / "other.mts", b'x' * 5000)
+
+        assert fingerprint_file(one) == fingerprint_file(two)
+
+    def test_tail_change_is_detected(self, tmp_path):
+        """A difference in the last chunk changes the fingerprint."""
+        from conversion_cache import fingerprint_file
+
+        one = write_clip(tmp_path / "a.mts", b'x' * 5000)
+        two = write_clip(tmp_path / "b.mts", b'x' * 4999 + b'y')
+
+        assert fingerprint_file(one, chunk_size=1000) != fingerprint_file(two, chunk_size=1000)
+
+    def test_settings_change_key(self, tmp_path):
+        """Different conversion settings give different keys."""
+        from conversion_cache import cache_key
+
+        clip = write_clip(tmp_path / "a.mts", b'x' * 100)
+
+        assert cache_key(clip, {'position': 'top-left'}) != cache_key(clip, {'position': 'top-right'})
+
+    def test_settings_hash_ignores_key_order(self):
+        """Settings hashes should not depend on dict order."""
+        from conversion_cache import settings_hash
+
+        assert settings_hash({'a': 1, 'b': 2}) == settings_hash({'b': 2, 'a': 1})
+
+
+class TestConversionCache:
+    """Tests for ConversionCache."""
+
+    def test_store_and_lookup(self, tmp_path):
+        """A stored output should be found again."""
+        from conversion_cache import ConversionCache
+
+        output = write_clip(tmp_path / "out.mp4", b'data')
+        cache = ConversionCache(tmp_path / "cache.json")
+        cache.store("key", output)
+
+        assert ConversionCache(tmp_path / "cache.json").lookup("key") == output.resolve()
+
+    def test_missing_output_is_a_miss(self, tmp_path):
+        """Entries whose output was deleted should not be used."""
+        from conversion_cache import ConversionCache
+
+        output = write_clip(tmp_path / "out.mp4", b'data')
+        cache = ConversionCache(tmp_path / "cache.json")
+        cache.store("key", output)
+        output.unlink()
+
+        assert cache.lookup("key") is None
+
+
+class TestBatchConverterCache:
+    """Tests for cache use in BatchConverter."""
+
+    def test_duplicates_in_batch_encode_once(self, tmp_path, mocker):
+        """A clip present twice in one output directory is encoded once."""
+        from batch_converter import BatchConverter
+        from conversion_cache import ConversionCache
+
+        (tmp_path / "card1").mkdir()
+        (tmp_path / "card2").mkdir()
+        out = tmp_path / "out"
+        out.mkdir()
+        one = write_clip(tmp_path / "card1" / "clip.mts", b'x' * 3000)
+        two = write_clip(tmp_path / "card2" / "clip.mts", b'x' * 3000)
+        mock_convert = mocker.patch('batch_converter.convert_video', side_effect=fake_convert)
+
+        converter = BatchConverter(output_dir=out, cache=ConversionCache(tmp_path / "c.json"))
+        results = converter.convert_batch([one, two])
+
+        assert mock_convert.call_count == 1
+        assert results[1].success is True
+        assert results[1].cached is True
+        assert results[1].output_file == results[0].output_file
+        assert not (out / "clip (1).mp4").exists()
+
+    def test_differently_named_duplicate_gets_own_output(self, tmp_path, mocker):
+        """A duplicate under another name gets a link named after itself."""
+        from batch_converter import BatchConverter
+        from conversion_cache import ConversionCache
+
+        one = write_clip(tmp_path / "a.mts", b'x' * 3000)
+        two = write_clip(tmp_path / "b.mts", b'x' * 3000)
+        mock_convert = mocker.patch('batch_converter.convert_video', side_effect=fake_convert)
+
+        converter = BatchConverter(cache=ConversionCache(tmp_path / "c.json"))
+        results = converter.convert_batch([one, two])
+
+        assert mock_convert.call_count == 1
+        assert results[1].cached is True
+        assert results[1].output_file == tmp_path / "b.mp4"
+        assert (tmp_path / "b.mp4").read_bytes() == (tmp_path / "a.mp4").read_bytes()
+
+    def test_extra_outputs_bypass_cache(self, tmp_path, mocker):
+        """With --also, duplicates encode again so each gets its extras."""
+        from batch_converter import BatchConverter
+        from conversion_cache import ConversionCache
+
+        one = write_clip(tmp_path / "a.mts", b'x' * 3000)
+        two = write_clip(tmp_path / "b.mts", b'x' * 3000)
+        mock_convert = mocker.patch('batch_converter.convert_video', side_effect=fake_convert)
+        cache = ConversionCache(tmp_path / "c.json")
+
+        converter = BatchConverter(cache=cache, extra_outputs=['proxy'])
+        results = converter.convert_batch([one, two])
+
+        assert mock_convert.call_count == 2
+        assert [r.cached for r in results] == [False, False]
+        extras = [Path(call[1]['extra_outputs'][0].path) for call in mock_convert.call_args_list]
+        assert extras == [tmp_path / "a_proxy.mp4", tmp_path / "b_proxy.mp4"]
+        assert not (tmp_path / "c.json").exists()
+
+    def test_previous_output_is_linked(self, tmp_path, mocker):
+        """A clip converted in an earlier batch is linked, not encoded."""
+        from batch_converter import BatchConverter
+        from conversion_cache import ConversionCache
+
+        (tmp_path / "first").mkdir()
+        (tmp_path / "second").mkdir()
+        original = write_clip(tmp_path / "first" / "clip.mts", b'x' * 3000)
+        redelivered = write_clip(tmp_path / "second" / "clip.mts", b'x' * 3000)
+        cache = ConversionCache(tmp_path / "c.json")
+        mock_convert = mocker.patch('batch_converter.convert_video', side_effect=fake_convert)
+
+        BatchConverter(cache=cache).convert_batch([original])
+        results = BatchConverter(cache=cache).convert_batch([redelivered])
+
+        assert mock_convert.call_count == 1
+        assert results[0].cached is True
+        assert results[0].output_file == tmp_path / "second" / "clip.mp4"
+        assert results[0].output_file.read_bytes() == b'mp4 data'
+
+    def test_changed_settings_are_encoded(self, tmp_path, mocker):
+        """The same clip with different settings is encoded again."""
+        from batch_converter import BatchConverter
+        from conversion_cache import ConversionCache
+
+        clip = write_clip(tmp_path / "clip.mts", b'x' * 3000)
+        cache = ConversionCache(tmp_path / "c.json")
+        mock_convert = mocker.patch('batch_converter.convert_video', side_effect=fake_convert)
+
+        BatchConverter(cache=cache, position='top-left').convert_batch([clip])
+        BatchConverter(cache=cache, position='top-right').convert_batch([clip])
+
+        assert mock_convert.call_count == 2
+
+    def test_no_cache_by_default(self, tmp_path, mocker):
+        """Without a cache every file is encoded."""
+        from batch_converter import BatchConverter
+
+        one = write_clip(tmp_path / "a.mts", b'x' * 3000)
+        two = write_clip(tmp_path / "b.mts", b'x' * 3000)
+        mock_convert = mocker.patch('batch_converter.convert_video', side_effect=fake_convert)
+
+        BatchConverter().convert_batch([one, two])
+
+        assert mock_convert.call_count == 2
+
+    def test_run_cli_cache_flag(self, tmp_path, mocker):
+        """--cache should give the batch converter a ConversionCache."""
+        from conversion_cache import ConversionCache
+        from mts_converter import run_cli
+
+        clip = write_clip(tmp_path / "clip.mts", b'x')
+        mocker.patch('mts_converter.check_ffmpeg', return_value=True)
+        mock_converter = mocker.patch('batch_converter.BatchConverter')
+        mock_converter.return_value.convert_batch.return_value = []
+        mocker.patch('conversion_cache.get_data_dir', return_value=str(tmp_path))
+
+        run_cli([str(clip), '--cache'])
+
+        assert isinstance(mock_converter.call_args[1]['cache'], ConversionCache)
+
+    @pytest.mark.parametrize('scheduler', ['--autotune', '--two-tier'])
+    def test_cache_needs_default_scheduler(self, scheduler):
+        """--cache is rejected with schedulers that do not use it."""
+        from mts_converter import parse_args
+
+        with pytest.raises(SystemExit):
+            parse_args(['clip.mts', '--cache', scheduler])
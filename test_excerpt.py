@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""Tests for excerpt module.
+
+Tests the recording time stored in converted MP4s, keyframe probing,
+the split into copied and re-encoded pieces, and the FFmpeg commands of
+stream-copied and frame-accurate excerpts.
+"""
+
+import json
+import pytest
+from unittest.mock import MagicMock
+from datetime import datetime, timedelta
+from pathlib import Path
+
+
+RECORDED = datetime(2024, 12, 15, 14, 30, 0)
+# A 10-minute MP4 with a keyframe every 0.5 s
+KEYFRAMES = [index * 0.5 for index in range(1200)]
+
+
+class TestCreationTime:
+    """Tests for the recording time written into converted MP4s."""
+
+    def test_burn_in_output_carries_first_frame_time(self):
+        """The burn-in command tags the output with its first frame's time."""
+        from mts_converter import build_burn_in_command
+
+        cmd = build_burn_in_command('ffmpeg', 'in.mts', 'out.mp4', RECORDED)
+
+        assert cmd[cmd.index('-metadata') + 1] == 'creation_time=2024-12-15T14:30:00.000000Z'
+
+    def test_tag_reads_back_unchanged(self, mocker):
+        """get_video_creation_time returns the wall-clock time that was written."""
+        from mts_converter import get_creation_time_args, get_video_creation_time
+
+        tag = get_creation_time_args(RECORDED)[1].split('=', 1)[1]
+        mocker.patch('mts_converter.extract_avchd_timestamp', return_value=None)
+        mocker.patch('mts_converter.subprocess.run', return_value=MagicMock(stdout=tag + '\n'))
+
+        assert get_video_creation_time('clip.mp4') == RECORDED
+
+
+class TestPlanning:
+    """Tests for probe_source, find_copy_start and plan_accurate_parts."""
+
+    def test_probe_reads_keyframes(self, mocker):
+        """Keyframe times are offsets from the start of the MP4."""
+        from excerpt import probe_source
+
+        info = {
+            'packets': [
+                {'pts_time': '0.100000', 'flags': 'K__'},
+                {'pts_time': '0.133367', 'flags': '___'},
+                {'pts_time': '0.600000', 'flags': 'K__'},
+            ],
+            'streams': [{'codec_name': 'h264', 'profile': 'High', 'pix_fmt': 'yuv420p'}],
+            'format': {'start_time': '0.100000', 'duration': '600.0'},
+        }
+        run = mocker.patch('excerpt.subprocess.run', return_value=MagicMock(stdout=json.dumps(info)))
+
+        source = probe_source(Path('clip.mp4'), 120.0, 130.0)
+
+        assert source.keyframes == [0.0, 0.5]
+        assert (source.duration, source.profile) == (600.0, 'High')
+        cmd = run.call_args[0][0]
+        assert cmd[cmd.index('-read_intervals') + 1] == '90.0%160.0'
+
+    def test_copy_starts_at_keyframe_before(self):
+        """A stream copy starts at the last keyframe at or before the start."""
+        from excerpt import find_copy_start
+
+        assert find_copy_start(KEYFRAMES, 130.3) == 130.0
+        assert find_copy_start(KEYFRAMES, 130.5) == 130.5
+
+    def test_accurate_parts(self):
+        """Partial GOPs at the ends are re-encoded and whole GOPs copied."""
+        from excerpt import ExcerptPart, plan_accurate_parts
+
+        assert plan_accurate_parts(KEYFRAMES, 130.3, 140.2) == [
+            ExcerptPart(130.3, 130.5, encode=True),
+            ExcerptPart(130.5, 140.0, encode=False),
+            ExcerptPart(140.0, 140.2, encode=True),
+        ]
+        # Ends on keyframes: nothing to re-encode
+        assert plan_accurate_parts(KEYFRAMES, 130.0, 140.0) == [
+            ExcerptPart(130.0, 140.0, encode=False)
+        ]
+        # Within one GOP: re-encoded whole
+        assert plan_accurate_parts(KEYFRAMES, 130.1, 130.7) == [
+            ExcerptPart(130.1, 130.7, encode=True)
+        ]
+
+
+class TestCutExcerpt:
+    """Tests for cut_excerpt."""
+
+    def _mock(self, tmp_path, mocker):
+        """Mock the MP4's recording time, its probe and FFmpeg."""
+        from excerpt import SourceInfo
+
+        clip = tmp_path / "clip.mp4"
+        clip.write_bytes(b'mp4')
+        mocker.patch('excerpt.get_video_creation_time', return_value=RECORDED)
+        mocker.patch('excerpt.get_ffmpeg_path', return_value='ffmpeg')
+        mocker.patch('excerpt.probe_source', return_value=SourceInfo(
+            600.0, KEYFRAMES, 'h264', 'High', 'yuv420p'
+        ))
+        return clip, mocker.patch('excerpt._run')
+
+    def test_stream_copy_from_keyframe(self, tmp_path, mocker):
+        """Recording times map to offsets; the copy starts at the keyframe before."""
+        from excerpt import cut_excerpt
+
+        clip, run = self._mock(tmp_path, mocker)
+
+        output, first, duration = cut_excerpt(clip, '14:32:10', '14:35:00')
+
+        assert output == tmp_path / "clip_143210-143500.mp4"
+        assert first == RECORDED + timedelta(seconds=130)
+        assert duration == 170.0
+        cmd = run.call_args[0][0]
+        assert cmd.index('-ss') < cmd.index('-i')
+        assert cmd[cmd.index('-c') + 1] == 'copy'
+        assert cmd[cmd.index('-t') + 1] == '170.0'
+        assert 'creation_time=2024-12-15T14:32:10.000000Z' in cmd
+        assert 'libx264' not in cmd
+
+    def test_accurate_reencodes_only_the_ends(self, tmp_path, mocker):
+        """An accurate excerpt writes three pieces and joins them with the audio."""
+        from excerpt import cut_excerpt
+
+        clip, run = self._mock(tmp_path, mocker)
+
+        _, _, duration = cut_excerpt(
+            clip, '@2024-12-15 14:32:10', '14:35:00', tmp_path / "out.mp4", accurate=True,
+            recorded=RECORDED - timedelta(seconds=0.25)
+        )
+
+        commands = [call[0][0] for call in run.call_args_list]
+        assert len(commands) == 4
+        head, middle, tail, join = commands
+        assert 'libx264' in head and 'libx264' in tail
+        assert middle[middle.index('-c:v') + 1] == 'copy'
+        assert head[head.index('-profile:v') + 1] == 'high'
+        assert join[:3] == ['ffmpeg', '-f', 'concat']
+        assert join[-1] == str(tmp_path / "out.mp4")
+        assert duration == pytest.approx(170.0)
+        assert not list(tmp_path.glob('.excerpt-*'))
+
+    def test_range_outside_recording(self, tmp_path, mocker):
+        """A range before the recording raises ExcerptError without running FFmpeg."""
+        from excerpt import cut_excerpt, ExcerptError
+
+        clip, run = self._mock(tmp_path, mocker)
+
+        with pytest.raises(ExcerptError):
+            cut_excerpt(clip, '14:00', '14:10')
+        run.assert_not_called()
+
+    def test_recording_time_argument(self):
+        """Arguments are recording times with or without '@'."""
+        import argparse
+        from excerpt import recording_time_arg
+
+        assert recording_time_arg('14:32:10') == '@14:32:10'
+        assert recording_time_arg('@2024-12-15 14:32') == '@2024-12-15 14:32'
+        with pytest.raises(argparse.ArgumentTypeError):
+            recording_time_arg('soon')
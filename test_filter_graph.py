@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Tests for the cost-aware filter graph builder.
+
+Tests filter ordering (deinterlace, scale, then text), resolution-adjusted
+font sizes, scaler selection and filter thread options.
+"""
+
+import pytest
+from datetime import datetime
+
+
+FILMING_TIME = datetime(2024, 1, 15, 10, 30, 0)
+
+
+class TestBuildScaleFilter:
+    """Tests for build_scale_filter."""
+
+    def test_original_needs_no_scaling(self):
+        """'original' resolution should not produce a scale filter."""
+        from mts_converter import build_scale_filter
+
+        assert build_scale_filter('original') is None
+        assert build_scale_filter(None) is None
+
+    def test_default_scaler_has_no_flags(self):
+        """The default scaler should leave FFmpeg's flags untouched."""
+        from mts_converter import build_scale_filter
+
+        assert build_scale_filter('720p') == 'scale=1280:-2'
+        assert build_scale_filter('720p', 'bicubic') == 'scale=1280:-2'
+
+    def test_fast_scaler_sets_flags(self):
+        """A non-default scaler should be passed as sws flags."""
+        from mts_converter import build_scale_filter
+
+        assert build_scale_filter('480p', 'fast_bilinear') == 'scale=854:-2:flags=fast_bilinear'
+
+
+class TestBuildFilterGraph:
+    """Tests for build_filter_graph."""
+
+    def test_original_matches_legacy_filter(self):
+        """Unscaled output should produce the same drawtext as before."""
+        from mts_converter import build_filter_graph, build_drawtext_filter
+
+        args = build_filter_graph(FILMING_TIME, 32, 'bottom-right')
+
+        assert args == ['-vf', build_drawtext_filter(FILMING_TIME, 32, 'bottom-right')]
+
+    def test_scale_runs_before_drawtext(self):
+        """The frame should be scaled before the text is drawn."""
+        from mts_converter import build_filter_graph
+
+        vf = build_filter_graph(FILMING_TIME, 32, resolution='720p')[1]
+
+        assert vf.index('scale=') < vf.index('drawtext=')
+
+    def test_font_and_margin_follow_output_height(self):
+        """Font size and margin should be scaled for the output resolution."""
+        from mts_converter import build_filter_graph
+
+        vf = build_filter_graph(FILMING_TIME, 33, 'top-left', resolution='720p')[1]
+
+        assert 'fontsize=22' in vf
+        assert 'x=13:y=13' in vf
+
+    def test_deinterlace_runs_first(self):
+        """Deinterlacing should happen before scaling."""
+        from mts_converter import build_filter_graph
+
+        vf = build_filter_graph(FILMING_TIME, resolution='480p', deinterlace=True)[1]
+
+        assert vf.startswith('yadif,scale=854:-2,drawtext=')
+
+    def test_sprite_engine_scales_before_overlay(self):
+        """The sprite engine should composite onto the scaled frame."""
+        from mts_converter import build_filter_graph
+
+        args = build_filter_graph(
+            FILMING_TIME, resolution='720p', overlay_engine='sprite', scaler='fast_bilinear'
+        )
+
+        assert args[0] == '-filter_complex'
+        assert '[0:v]scale=1280:-2:flags=fast_bilinear[base]' in args[1]
+        assert '[base][ts]overlay=' in args[1]
+
+
+class TestFilterThreads:
+    """Tests for filter thread options on the burn-in command."""
+
+    def test_filter_threads_are_global_options(self):
+        """Filter thread options should precede the input."""
+        from mts_converter import build_burn_in_command
+
+        cmd = build_burn_in_command(
+            'ffmpeg', 'in.mts', 'out.mp4', FILMING_TIME, filter_threads=4
+        )
+
+        assert cmd[cmd.index('-filter_threads') + 1] == '4'
+        assert cmd[cmd.index('-filter_complex_threads') + 1] == '4'
+        assert cmd.index('-filter_threads') < cmd.index('-i')
+
+    def test_no_filter_threads_by_default(self):
+        """FFmpeg's own filter threading should be used by default."""
+        from mts_converter import build_burn_in_command
+
+        cmd = build_burn_in_command('ffmpeg', 'in.mts', 'out.mp4', FILMING_TIME)
+
+        assert '-filter_threads' not in cmd
+
+    def test_parse_args_filter_options(self):
+        """CLI should accept scaler, deinterlace and filter thread options."""
+        from mts_converter import parse_args
+
+        args = parse_args([
+            'input.mts', '--scaler', 'fast_bilinear', '--deinterlace', '--filter-threads', '2'
+        ])
+
+        assert args.scaler == 'fast_bilinear'
+        assert args.deinterlace is True
+        assert args.filter_threads == 2
+
+    def test_batch_converter_passes_filter_options(self, tmp_path, mocker):
+        """BatchConverter should forward filter options to convert_video."""
+        from batch_converter import BatchConverter
+
+        mts_file = tmp_path / "video.mts"
+        mts_file.touch()
+        mock_convert = mocker.patch('batch_converter.convert_video', return_value=True)
+
+        BatchConverter(scaler='lanczos', deinterlace=True, filter_threads=3).convert_batch([mts_file])
+
+        call_kwargs = mock_convert.call_args[1]
+        assert call_kwargs['scaler'] == 'lanczos'
+        assert call_kwargs['deinterlace'] is True
+        assert call_kwargs['filter_threads'] == 3
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Tests for font_resolver module.
+
+Tests the font search order, the remembered font path, quoting for
+drawtext and the fontfile option in the timestamp filter.
+"""
+
+import json
+import pytest
+from datetime import datetime
+
+
+@pytest.fixture
+def resolver(tmp_path, monkeypatch):
+    """font_resolver with an empty data directory and no system fonts."""
+    import font_resolver
+
+    monkeypatch.setenv('MTS_CONVERTER_DATA_DIR', str(tmp_path / "data"))
+    monkeypatch.delenv(font_resolver.FONT_ENV_VAR, raising=False)
+    monkeypatch.setattr(font_resolver, '_resolved', None)
+    monkeypatch.setattr(font_resolver, 'get_base_path', lambda: str(tmp_path / "app"))
+    monkeypatch.setattr(font_resolver, 'get_system_font_candidates', lambda: [])
+    monkeypatch.setattr(font_resolver, 'find_fontconfig_font', lambda: None)
+    return font_resolver
+
+
+def make_font(path):
+    """Create an (empty) font file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b'\x00\x01\x00\x00')
+    return path
+
+
+class TestResolution:
+    """Tests for find_font and get_font_file."""
+
+    def test_search_order(self, tmp_path, resolver, monkeypatch):
+        """The override beats bundled fonts, which beat system fonts."""
+        system = make_font(tmp_path / "system" / "arial.ttf")
+        bundled = make_font(tmp_path / "app" / "fonts" / "Clock.ttf")
+        override = make_font(tmp_path / "mine.otf")
+        monkeypatch.setattr(resolver, 'get_system_font_candidates', lambda: [str(system)])
+
+        monkeypatch.setenv(resolver.FONT_ENV_VAR, str(override))
+        assert resolver.find_font() == str(override)
+        monkeypatch.delenv(resolver.FONT_ENV_VAR)
+        assert resolver.find_font() == str(bundled)
+        bundled.unlink()
+        assert resolver.find_font() == str(system)
+
+    def test_resolved_once_and_remembered(self, tmp_path, resolver, mocker):
+        """A resolution is remembered in the data directory for later runs."""
+        font = make_font(tmp_path / "system" / "arial.ttf")
+        find = mocker.patch.object(resolver, 'find_font', return_value=str(font))
+
+        assert resolver.get_font_file() == str(font)
+        assert resolver.get_font_file() == str(font)
+        find.assert_called_once()
+
+        cache = tmp_path / "data" / resolver.FONT_CACHE_FILE
+        assert json.loads(cache.read_text())['path'] == str(font)
+
+        # A new process uses the remembered path without searching
+        resolver._resolved = None
+        find.reset_mock()
+        assert resolver.get_font_file() == str(font)
+        find.assert_not_called()
+
+    def test_missing_remembered_font_is_resolved_again(self, tmp_path, resolver, mocker):
+        """A remembered font that was removed is replaced."""
+        replacement = make_font(tmp_path / "system" / "dejavu.ttf")
+        (tmp_path / "data").mkdir()
+        (tmp_path / "data" / resolver.FONT_CACHE_FILE).write_text(
+            json.dumps({'path': str(tmp_path / "gone.ttf")})
+        )
+        mocker.patch.object(resolver, 'find_font', return_value=str(replacement))
+
+        assert resolver.get_font_file() == str(replacement)
+
+    def test_no_font(self, resolver):
+        """Without any font, the choice is left to fontconfig."""
+        assert resolver.get_font_file() is None
+        assert resolver.get_fontfile_option() == ''
+
+    def test_quoted_paths_are_skipped(self, tmp_path, resolver, monkeypatch):
+        """Paths that cannot be quoted in a filter graph are not used."""
+        font = make_font(tmp_path / "it's" / "arial.ttf")
+        monkeypatch.setenv(resolver.FONT_ENV_VAR, str(font))
+
+        assert resolver.find_font() is None
+
+
+class TestFontfileOption:
+    """Tests for escape_font_path and the timestamp filter."""
+
+    def test_windows_path(self):
+        """Backslashes become slashes and the drive colon is escaped."""
+        from font_resolver import escape_font_path
+
+        assert escape_font_path('C:\\Windows\\Fonts\\arial.ttf') == "'C\\:/Windows/Fonts/arial.ttf'"
+
+    def test_drawtext_names_font_file(self):
+        """The timestamp filter passes the font file to drawtext."""
+        from mts_converter import build_drawtext_filter
+
+        vf = build_drawtext_filter(datetime(2024, 1, 15), font_file='/fonts/DejaVuSans.ttf')
+
+        assert vf.startswith("drawtext=fontfile='/fonts/DejaVuSans.ttf':text='")
+
+    def test_drawtext_without_font(self, mocker):
+        """Without a resolved font the filter is unchanged."""
+        from mts_converter import build_drawtext_filter
+
+        mocker.patch('font_resolver.get_font_file', return_value=None)
+
+        assert build_drawtext_filter(datetime(2024, 1, 15)).startswith("drawtext=text='")
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""Tests for footage_catalog module.
+
+Tests the camera folder of a clip, recording and scanning clips, overlap
+queries and their index, query time parsing and the --catalog option of
+batches.
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from pathlib import Path
+
+
+MORNING = datetime(2024, 12, 15, 14, 0, 0)
+
+
+def fake_span(spans):
+    """Build a read_recording_span replacement from {file name: (start, duration)}."""
+    def read(source_path):
+        return spans.get(Path(source_path).name)
+    return read
+
+
+class TestCameraFolder:
+    """Tests for get_camera_folder."""
+
+    @pytest.mark.parametrize('path,camera', [
+        ('/footage/CamA/PRIVATE/AVCHD/BDMV/STREAM/00001.MTS', 'CamA'),
+        ('/footage/CamB/AVCHD/BDMV/STREAM/00001.MTS', 'CamB'),
+        ('/footage/wedding/00001.MTS', 'wedding'),
+    ])
+    def test_folder_above_avchd_tree(self, path, camera):
+        """The camera is the folder holding the AVCHD tree, else the clip's folder."""
+        from footage_catalog import get_camera_folder
+
+        assert get_camera_folder(path) == camera
+
+
+class TestCatalog:
+    """Tests for FootageCatalog."""
+
+    def _make_clips(self, tmp_path, mocker):
+        """Create three clips on two cameras with known recording times."""
+        for folder, name in (('CamA', 'a1.mts'), ('CamA', 'a2.mts'), ('CamB', 'b1.mts')):
+            (tmp_path / folder).mkdir(exist_ok=True)
+            (tmp_path / folder / name).write_bytes(name.encode() * 100)
+        spans = {
+            'a1.mts': (MORNING, 600.0),                          # 14:00-14:10
+            'a2.mts': (MORNING + timedelta(minutes=30), 900.0),  # 14:30-14:45
+            'b1.mts': (MORNING + timedelta(minutes=5), 3600.0),  # 14:05-15:05
+        }
+        return mocker.patch('footage_catalog.read_recording_span', side_effect=fake_span(spans))
+
+    def test_query_finds_overlapping_clips(self, tmp_path, mocker):
+        """Clips running at any point of the range are found, with their offsets."""
+        from footage_catalog import FootageCatalog
+
+        self._make_clips(tmp_path, mocker)
+        catalog = FootageCatalog(tmp_path / "catalog.db")
+        assert catalog.scan([tmp_path]) == (3, 0, 0)
+
+        clips = catalog.query(MORNING + timedelta(minutes=20), MORNING + timedelta(minutes=35))
+
+        assert [clip.source_path.name for clip in clips] == ['b1.mts', 'a2.mts']
+        assert clips[0].camera == 'CamB'
+        assert clips[0].offsets(MORNING + timedelta(minutes=20), MORNING + timedelta(minutes=35)) == (900.0, 1800.0)
+        assert clips[1].offsets(MORNING + timedelta(minutes=20), MORNING + timedelta(minutes=35)) == (0.0, 300.0)
+
+    def test_range_edges_and_camera_filter(self, tmp_path, mocker):
+        """A clip ending at the range start is not found; --camera narrows the search."""
+        from footage_catalog import FootageCatalog
+
+        self._make_clips(tmp_path, mocker)
+        catalog = FootageCatalog(tmp_path / "catalog.db")
+        catalog.scan([tmp_path])
+
+        assert [c.source_path.name for c in catalog.query(MORNING + timedelta(minutes=10),
+                                                          MORNING + timedelta(minutes=20))] == ['b1.mts']
+        assert [c.source_path.name for c in catalog.query(MORNING, MORNING + timedelta(hours=2),
+                                                          camera='CamA')] == ['a1.mts', 'a2.mts']
+        assert catalog.query(MORNING - timedelta(hours=2), MORNING - timedelta(hours=1)) == []
+
+    def test_scan_skips_unchanged_clips(self, tmp_path, mocker):
+        """A second scan reads only new or changed clips."""
+        from footage_catalog import FootageCatalog
+
+        read = self._make_clips(tmp_path, mocker)
+        catalog = FootageCatalog(tmp_path / "catalog.db")
+        catalog.scan([tmp_path])
+        (tmp_path / "CamA" / "a1.mts").write_bytes(b'changed')
+        (tmp_path / "CamB" / "undated.mts").write_bytes(b'x')
+        read.reset_mock()
+
+        assert catalog.scan([tmp_path]) == (1, 2, 1)
+        assert read.call_count == 2
+        assert catalog.count() == 3
+
+    def test_record_keeps_output_and_checksums(self, tmp_path, mocker):
+        """A conversion records its output and its hash; a later scan keeps them."""
+        from footage_catalog import FootageCatalog, hash_file
+
+        self._make_clips(tmp_path, mocker)
+        output = tmp_path / "a1.mp4"
+        output.write_bytes(b'mp4 data')
+        catalog = FootageCatalog(tmp_path / "catalog.db")
+
+        assert catalog.record(tmp_path / "CamA" / "a1.mts", output) is True
+        catalog.scan([tmp_path], force=True)
+
+        clip = catalog.query(MORNING, MORNING + timedelta(minutes=1))[0]
+        assert clip.output_path == output.resolve()
+        assert clip.output_checksum == hash_file(output)
+        assert clip.source_checksum
+
+    def test_connections_are_closed(self, tmp_path, mocker):
+        """Every database connection the catalog opens should be closed."""
+        import sqlite3
+        from footage_catalog import FootageCatalog
+
+        opened = []
+
+        class TrackedConnection(sqlite3.Connection):
+            closed = False
+
+            def close(self):
+                self.closed = True
+                super().close()
+
+        connect = sqlite3.connect
+
+        def tracked_connect(*args, **kwargs):
+            opened.append(connect(*args, factory=TrackedConnection, **kwargs))
+            return opened[-1]
+
+        self._make_clips(tmp_path, mocker)
+        mocker.patch('footage_catalog.sqlite3.connect', side_effect=tracked_connect)
+        catalog = FootageCatalog(tmp_path / "catalog.db")
+        catalog.scan([tmp_path])
+        catalog.query(MORNING, MORNING + timedelta(hours=1))
+        catalog.get_cameras()
+
+        assert catalog.count() == 3
+        assert opened and all(conn.closed for conn in opened)
+
+    def test_query_uses_interval_index(self, tmp_path):
+        """Range lookups search the (start, end) index instead of the whole table."""
+        from footage_catalog import FootageCatalog
+
+        catalog = FootageCatalog(tmp_path / "catalog.db")
+        with catalog._connect() as conn:
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM clips "
+                "WHERE start_time >= ? AND start_time < ? AND end_time > ?", (0, 1, 0)
+            ).fetchall()
+
+        assert 'idx_clips_interval' in ' '.join(row['detail'] for row in plan)
+
+
+class TestQueryTime:
+    """Tests for parse_query_time."""
+
+    def test_formats(self):
+        """Date and time, a date alone, or a time on the start's day."""
+        from footage_catalog import parse_query_time
+
+        assert parse_query_time('2024-12-15 14:20') == datetime(2024, 12, 15, 14, 20)
+        assert parse_query_time('2024-12-15') == datetime(2024, 12, 15)
+        assert parse_query_time('14:50', MORNING) == datetime(2024, 12, 15, 14, 50)
+
+    @pytest.mark.parametrize('value', ['14:50', 'soon', '2024-13-01'])
+    def test_invalid(self, value):
+        """A time of day without a start date, or garbage, raises ValueError."""
+        from footage_catalog import parse_query_time
+
+        with pytest.raises(ValueError):
+            parse_query_time(value)
+
+
+class TestBatchCatalog:
+    """Tests for BatchConverter(catalog=...) and the --catalog option."""
+
+    def test_batch_records_converted_files(self, tmp_path, mocker):
+        """Successful conversions are recorded with their outputs; failures are not."""
+        from batch_converter import BatchConverter
+        from footage_catalog import FootageCatalog
+
+        good = tmp_path / "good.mts"
+        bad = tmp_path / "bad.mts"
+        for clip in (good, bad):
+            clip.write_bytes(b'x')
+        mocker.patch('batch_converter.convert_video', side_effect=[True, False])
+        mocker.patch('footage_catalog.read_recording_span', return_value=(MORNING, 60.0))
+        catalog = FootageCatalog(tmp_path / "catalog.db")
+
+        BatchConverter(catalog=catalog).convert_batch([good, bad])
+
+        clips = catalog.query(MORNING, MORNING + timedelta(minutes=1))
+        assert [clip.source_path for clip in clips] == [good.resolve()]
+        assert clips[0].output_path == (tmp_path / "good.mp4").resolve()
+
+    def test_parse_args(self):
+        """--catalog is off by default."""
+        from mts_converter import parse_args
+
+        assert parse_args(['clip.mts', '--catalog']).catalog is True
+        assert parse_args(['clip.mts']).catalog is False
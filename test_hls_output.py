@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Tests for hls_output module.
+
+Tests the HLS FFmpeg command (segments, keyframe alignment, rendition
+ladder) and the CLI/batch wiring of --output-format hls.
+"""
+
+import pytest
+from unittest.mock import MagicMock
+from datetime import datetime
+from pathlib import Path
+
+
+FILMING_TIME = datetime(2024, 1, 15, 10, 30, 0)
+
+
+class TestBuildHlsCommand:
+    """Tests for build_hls_command."""
+
+    def test_single_rendition_fmp4(self):
+        """One rendition writes a media playlist with fMP4 segments."""
+        from hls_output import build_hls_command
+
+        cmd = build_hls_command('ffmpeg', 'in.mts', Path('/out/clip.m3u8'), FILMING_TIME)
+
+        assert cmd[cmd.index('-f') + 1] == 'hls'
+        assert cmd[cmd.index('-hls_segment_type') + 1] == 'fmp4'
+        assert cmd[cmd.index('-hls_fmp4_init_filename') + 1] == 'clip_init.mp4'
+        assert cmd[cmd.index('-hls_segment_filename') + 1] == str(Path('/out/clip_%05d.m4s'))
+        assert cmd[-1] == str(Path('/out/clip.m3u8'))
+        assert 'drawtext=' in cmd[cmd.index('-filter_complex') + 1]
+        assert '+faststart' not in cmd
+
+    def test_keyframes_align_with_segments(self):
+        """Keyframes are forced at every segment boundary, without scene cuts."""
+        from hls_output import build_hls_command
+
+        cmd = build_hls_command('ffmpeg', 'in.mts', 'clip.m3u8', FILMING_TIME, segment_seconds=4)
+
+        assert cmd[cmd.index('-hls_time') + 1] == '4'
+        assert cmd[cmd.index('-force_key_frames') + 1] == 'expr:gte(t,n_forced*4)'
+        assert cmd[cmd.index('-sc_threshold') + 1] == '0'
+
+    def test_mpegts_segments(self):
+        """MPEG-TS segments have no init segment."""
+        from hls_output import build_hls_command
+
+        cmd = build_hls_command('ffmpeg', 'in.mts', 'clip.m3u8', FILMING_TIME, segment_type='mpegts')
+
+        assert cmd[cmd.index('-hls_segment_filename') + 1] == 'clip_%05d.ts'
+        assert '-hls_fmp4_init_filename' not in cmd
+
+    def test_ladder_writes_master_playlist(self):
+        """A ladder splits one decode into renditions listed by a master playlist."""
+        from hls_output import build_hls_command
+
+        cmd = build_hls_command(
+            'ffmpeg', 'in.mts', Path('clip.m3u8'), FILMING_TIME, ladder=['720p', '480p', '720p']
+        )
+
+        graph = cmd[cmd.index('-filter_complex') + 1]
+        assert graph.startswith('[0:v]split=2[d0][d1]')
+        assert 'scale=1280:-2' in graph and 'scale=854:-2' in graph
+        assert cmd.count('-i') == 1
+        assert cmd[cmd.index('-var_stream_map') + 1] == 'v:0,a:0,name:720p v:1,a:1,name:480p'
+        assert cmd[cmd.index('-master_pl_name') + 1] == 'clip.m3u8'
+        assert cmd[-1] == 'clip_%v.m3u8'
+
+    def test_ladder_without_audio(self):
+        """Sources without audio map only video into the renditions."""
+        from hls_output import build_hls_command
+
+        cmd = build_hls_command(
+            'ffmpeg', 'in.mts', 'clip.m3u8', FILMING_TIME, ladder=['720p', '480p'],
+            has_audio=False
+        )
+
+        assert '0:a:0' not in cmd
+        assert cmd[cmd.index('-var_stream_map') + 1] == 'v:0,name:720p v:1,name:480p'
+
+    def test_invalid_segment_type(self):
+        """Unknown segment types are rejected."""
+        from hls_output import build_hls_command
+
+        with pytest.raises(ValueError, match='Invalid segment type'):
+            build_hls_command('ffmpeg', 'in.mts', 'clip.m3u8', FILMING_TIME, segment_type='webm')
+
+
+class TestConvertVideoHls:
+    """Tests for convert_video with output_format='hls'."""
+
+    def _mock_ffmpeg(self, mocker):
+        mock_popen = mocker.patch('mts_converter.subprocess.Popen')
+        mock_process = MagicMock()
+        mock_process.stdout = iter([])
+        mock_process.returncode = 0
+        mock_popen.return_value = mock_process
+        mocker.patch('mts_converter.get_video_creation_time', return_value=FILMING_TIME)
+        return mock_popen
+
+    def test_writes_playlist_next_to_output(self, tmp_path, mocker):
+        """The playlist replaces the MP4 extension of the output path."""
+        from mts_converter import convert_video
+
+        test_mts = tmp_path / "clip.mts"
+        test_mts.touch()
+        mock_popen = self._mock_ffmpeg(mocker)
+
+        assert convert_video(str(test_mts), str(tmp_path / "clip.mp4"), output_format='hls') is True
+
+        cmd = mock_popen.call_args[0][0]
+        assert cmd[-1] == str(tmp_path / "clip.m3u8")
+
+    def test_subtitle_mode_is_rejected(self, tmp_path, mocker):
+        """HLS needs burn-in mode."""
+        from mts_converter import convert_video
+
+        test_mts = tmp_path / "clip.mts"
+        test_mts.touch()
+        mock_popen = self._mock_ffmpeg(mocker)
+
+        assert convert_video(str(test_mts), output_format='hls', timestamp_mode='subtitle') is False
+        mock_popen.assert_not_called()
+
+
+class TestBatchHls:
+    """Tests for HLS output in BatchConverter and the CLI."""
+
+    def test_batch_outputs_playlists(self, tmp_path, mocker):
+        """Batch outputs get .m3u8 names and are encoded in place."""
+        from batch_converter import BatchConverter
+
+        clip = tmp_path / "clip.mts"
+        clip.touch()
+        mock_convert = mocker.patch('batch_converter.convert_video', return_value=True)
+
+        results = BatchConverter(
+            output_format='hls', hls_ladder=['720p', '480p'], scratch_dir=tmp_path / "scratch"
+        ).convert_batch([clip])
+
+        assert results[0].output_file == tmp_path / "clip.m3u8"
+        assert mock_convert.call_args[0][1] == str(tmp_path / "clip.m3u8")
+        assert mock_convert.call_args[1]['hls_ladder'] == ['720p', '480p']
+
+    def test_parse_args_hls(self):
+        """HLS options should be parsed."""
+        from mts_converter import parse_args
+
+        args = parse_args([
+            'a.mts', '--output-format', 'hls', '--hls-ladder', '1080p', '480p',
+            '--hls-segment-type', 'mpegts'
+        ])
+
+        assert args.output_format == 'hls'
+        assert args.hls_ladder == ['1080p', '480p']
+        assert args.hls_segment_type == 'mpegts'
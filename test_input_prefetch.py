@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Tests for input_prefetch module.
+
+Tests the prefetch window, the byte budget, cleanup of copies and input
+prefetching in BatchConverter.
+"""
+
+import time
+from pathlib import Path
+
+
+def make_clips(tmp_path, count, size=1000):
+    """Create count input files of size bytes."""
+    clips = []
+    for i in range(count):
+        clip = tmp_path / f"clip{i}.mts"
+        clip.write_bytes(bytes([i]) * size)
+        clips.append(clip)
+    return clips
+
+
+def wait_for(condition, timeout=5.0):
+    """Poll until condition() is true or the timeout expires."""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestInputPrefetcher:
+    """Tests for InputPrefetcher."""
+
+    def test_copies_files_after_the_first(self, tmp_path):
+        """Before the batch starts, the files after the first are fetched."""
+        from input_prefetch import InputPrefetcher
+
+        clips = make_clips(tmp_path, 4)
+        prefetcher = InputPrefetcher(clips, tmp_path / "local", depth=2)
+
+        assert wait_for(lambda: len(prefetcher._copies) == 2)
+        assert set(prefetcher._copies) == {clips[1], clips[2]}
+        prefetcher.close()
+
+    def test_acquire_returns_local_copy(self, tmp_path):
+        """A prefetched file is read from its local copy."""
+        from input_prefetch import InputPrefetcher
+
+        clips = make_clips(tmp_path, 3)
+        prefetcher = InputPrefetcher(clips, tmp_path / "local")
+
+        assert prefetcher.acquire(clips[0]) == clips[0]
+        prefetcher.release(clips[0])
+        assert wait_for(lambda: clips[1] in prefetcher._copies)
+        local = prefetcher.acquire(clips[1])
+
+        assert local.parent == prefetcher.prefetch_dir
+        assert local.read_bytes() == clips[1].read_bytes()
+        prefetcher.close()
+
+    def test_copy_deleted_after_release(self, tmp_path):
+        """Copies are deleted once used and the window moves on."""
+        from input_prefetch import InputPrefetcher
+
+        clips = make_clips(tmp_path, 3)
+        prefetcher = InputPrefetcher(clips, tmp_path / "local", depth=1)
+        prefetcher.acquire(clips[0])
+        prefetcher.release(clips[0])
+        assert wait_for(lambda: clips[1] in prefetcher._copies)
+
+        local = prefetcher.acquire(clips[1])
+        prefetcher.release(clips[1])
+
+        assert not local.exists()
+        prefetcher.close()
+
+    def test_budget_limits_copies(self, tmp_path):
+        """Copies never exceed the byte budget."""
+        from input_prefetch import InputPrefetcher
+
+        clips = make_clips(tmp_path, 4, size=1000)
+        prefetcher = InputPrefetcher(clips, tmp_path / "local", budget_gb=1500 / 1024 ** 3, depth=3)
+
+        assert wait_for(lambda: clips[1] in prefetcher._copies)
+        time.sleep(0.1)
+
+        assert set(prefetcher._copies) == {clips[1]}
+        assert prefetcher.used_bytes == 1000
+        prefetcher.close()
+
+    def test_oversized_file_is_read_through(self, tmp_path):
+        """Files larger than the budget are not copied."""
+        from input_prefetch import InputPrefetcher
+
+        clips = make_clips(tmp_path, 2, size=5000)
+        prefetcher = InputPrefetcher(clips, tmp_path / "local", budget_gb=1000 / 1024 ** 3)
+
+        assert wait_for(lambda: clips[1] in prefetcher._skipped)
+        assert prefetcher.acquire(clips[1]) == clips[1]
+        prefetcher.close()
+
+    def test_close_removes_directory(self, tmp_path):
+        """Closing deletes every copy and the private directory."""
+        from input_prefetch import InputPrefetcher
+
+        clips = make_clips(tmp_path, 3)
+        prefetcher = InputPrefetcher(clips, tmp_path / "local")
+        assert wait_for(lambda: len(prefetcher._copies) == 2)
+
+        prefetcher.close()
+
+        assert not prefetcher.prefetch_dir.exists()
+
+
+class TestBatchPrefetch:
+    """Tests for prefetching in BatchConverter."""
+
+    def test_converts_from_local_copies(self, tmp_path, mocker):
+        """Later files are converted from prefetched copies."""
+        from batch_converter import BatchConverter
+
+        clips = make_clips(tmp_path, 3)
+        local_dir = tmp_path / "local"
+        sources = []
+
+        def fake_convert(input_file, output_file, **kwargs):
+            sources.append(Path(input_file))
+            # Give the prefetch thread time to copy the next file
+            time.sleep(0.2)
+            return True
+
+        mocker.patch('batch_converter.convert_video', side_effect=fake_convert)
+
+        results = BatchConverter(scratch_dir=local_dir, prefetch=True).convert_batch(clips)
+
+        assert all(r.success for r in results)
+        assert [r.input_file for r in results] == clips
+        assert sources[0] == clips[0]
+        assert all(local_dir in s.parents for s in sources[1:])
+        assert list(local_dir.iterdir()) == []
+
+    def test_parse_args_prefetch(self):
+        """--prefetch and --prefetch-budget should be parsed."""
+        from mts_converter import parse_args
+
+        args = parse_args(['a.mts', '--prefetch', '--prefetch-budget', '2.5'])
+
+        assert args.prefetch is True
+        assert args.prefetch_budget == 2.5
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""Tests for job_queue module.
+
+Tests priorities, leases, retries and machine-wide concurrency of the
+shared SQLite job queue, the QueueWorker and the CLI --queue mode.
+"""
+
+import pytest
+import threading
+import time
+from pathlib import Path
+
+
+@pytest.fixture
+def queue(tmp_path):
+    """A JobQueue backed by a temporary database."""
+    from job_queue import JobQueue
+
+    return JobQueue(tmp_path / "jobs.db")
+
+
+def make_mts(tmp_path, name="video.mts"):
+    """Create an empty MTS file and return its path."""
+    mts = tmp_path / name
+    mts.touch()
+    return mts
+
+
+class TestJobQueue:
+    """Tests for JobQueue."""
+
+    def test_enqueue_and_lease(self, queue, tmp_path):
+        """A queued job should be leased with its options."""
+        mts = make_mts(tmp_path)
+        job_id = queue.enqueue(mts, options={'position': 'top-left'})
+
+        job = queue.lease("worker-1")
+
+        assert job.id == job_id
+        assert job.input_file == mts.resolve()
+        assert job.options == {'position': 'top-left'}
+        assert job.status == 'running'
+
+    def test_higher_priority_leased_first(self, queue, tmp_path):
+        """Jobs should be leased by priority, then submission order."""
+        queue.set_concurrency(3)
+        low = queue.enqueue(make_mts(tmp_path, "a.mts"))
+        high = queue.enqueue(make_mts(tmp_path, "b.mts"), priority=5)
+        low2 = queue.enqueue(make_mts(tmp_path, "c.mts"))
+
+        leased = [queue.lease("w").id for _ in range(3)]
+
+        assert leased == [high, low, low2]
+
+    def test_concurrency_limits_running_jobs(self, queue, tmp_path):
+        """No more jobs than the configured concurrency should run at once."""
+        queue.set_concurrency(1)
+        queue.enqueue(make_mts(tmp_path, "a.mts"))
+        queue.enqueue(make_mts(tmp_path, "b.mts"))
+
+        first = queue.lease("worker-1")
+
+        assert queue.lease("worker-2") is None
+        queue.complete(first.id, "worker-1", tmp_path / "a.mp4")
+        assert queue.lease("worker-2") is not None
+
+    def test_concurrency_defaults_to_one(self, queue):
+        """An unconfigured queue should run one job at a time."""
+        assert queue.get_concurrency() == 1
+
+    def test_failed_job_is_retried(self, queue, tmp_path):
+        """A failure should requeue the job until max_attempts is reached."""
+        job_id = queue.enqueue(make_mts(tmp_path), max_attempts=2)
+
+        queue.fail(queue.lease("w").id, "w", "boom")
+        assert queue.get_jobs([job_id])[0].status == 'queued'
+
+        queue.fail(queue.lease("w").id, "w", "boom again")
+        job = queue.get_jobs([job_id])[0]
+        assert job.status == 'failed'
+        assert job.attempts == 2
+        assert job.error == "boom again"
+
+    def test_expired_lease_is_reclaimed(self, queue, tmp_path):
+        """A job whose lease expired should be leased again."""
+        job_id = queue.enqueue(make_mts(tmp_path))
+        queue.lease("crashed", lease_seconds=-1)
+
+        job = queue.lease("survivor")
+
+        assert job.id == job_id
+        assert job.attempts == 1
+
+    def test_only_lease_owner_can_complete(self, queue, tmp_path):
+        """Completion by a worker that lost the lease should be ignored."""
+        job_id = queue.enqueue(make_mts(tmp_path))
+        queue.lease("owner")
+
+        queue.complete(job_id, "impostor", tmp_path / "video.mp4")
+
+        assert queue.get_jobs([job_id])[0].status == 'running'
+
+    def test_cancel_only_affects_queued_jobs(self, queue, tmp_path):
+        """Cancelling should skip jobs that are already running."""
+        queue.set_concurrency(2)
+        running = queue.enqueue(make_mts(tmp_path, "a.mts"))
+        waiting = queue.enqueue(make_mts(tmp_path, "b.mts"))
+        queue.lease("w")
+
+        assert queue.cancel([running, waiting]) == 1
+        statuses = [job.status for job in queue.get_jobs([running, waiting])]
+        assert statuses == ['running', 'cancelled']
+
+    def test_connections_are_closed(self, tmp_path, mocker):
+        """Every database connection the queue opens should be closed."""
+        import sqlite3
+        from job_queue import JobQueue
+
+        opened = []
+
+        class TrackedConnection(sqlite3.Connection):
+            closed = False
+
+            def close(self):
+                self.closed = True
+                super().close()
+
+        connect = sqlite3.connect
+
+        def tracked_connect(*args, **kwargs):
+            opened.append(connect(*args, factory=TrackedConnection, **kwargs))
+            return opened[-1]
+
+        mocker.patch('job_queue.sqlite3.connect', side_effect=tracked_connect)
+        queue = JobQueue(tmp_path / "jobs.db")
+        job_id = queue.enqueue(make_mts(tmp_path))
+        job = queue.lease("w")
+        queue.renew(job.id, "w")
+        queue.complete(job.id, "w", tmp_path / "video.mp4")
+        queue.get_jobs([job_id])
+        queue.counts()
+
+        assert opened and all(conn.closed for conn in opened)
+
+    def test_queue_persists_across_instances(self, tmp_path):
+        """Jobs should survive reopening the database."""
+        from job_queue import JobQueue
+
+        job_id = JobQueue(tmp_path / "jobs.db").enqueue(make_mts(tmp_path))
+
+        assert JobQueue(tmp_path / "jobs.db").get_jobs([job_id])[0].status == 'queued'
+
+
+class TestQueueWorker:
+    """Tests for QueueWorker and run_workers."""
+
+    def test_worker_converts_job_with_options(self, queue, tmp_path, mocker):
+        """The worker should call convert_video with the job's options."""
+        from job_queue import QueueWorker
+
+        job_id = queue.enqueue(make_mts(tmp_path), options={'position': 'top-left'})
+        mock_convert = mocker.patch('job_queue.convert_video', return_value=True)
+
+        QueueWorker(queue, poll_interval=0.01).run(job_ids=[job_id])
+
+        assert mock_convert.call_args[1]['position'] == 'top-left'
+        job = queue.get_jobs([job_id])[0]
+        assert job.status == 'done'
+        assert job.output_file == tmp_path.resolve() / "video.mp4"
+
+    def test_worker_reports_job_stats(self, queue, tmp_path, mocker):
+        """FFmpeg progress should reach on_job_stats tagged with its job."""
+        from job_queue import run_workers
+
+        job_id = queue.enqueue(make_mts(tmp_path))
+
+        def fake_convert(*args, stats_callback=None, **kwargs):
+            stats_callback({'time': 5.0})
+            return True
+
+        mocker.patch('job_queue.convert_video', side_effect=fake_convert)
+        seen = []
+
+        run_workers(queue, 1, job_ids=[job_id], poll_interval=0.01,
+                    on_job_stats=lambda job, stats: seen.append((job.id, stats['time'])))
+
+        assert seen == [(job_id, 5.0)]
+
+    def test_failed_conversion_is_retried_then_failed(self, queue, tmp_path, mocker):
+        """A job should be attempted max_attempts times before failing."""
+        from job_queue import QueueWorker
+
+        job_id = queue.enqueue(make_mts(tmp_path), max_attempts=3)
+        mock_convert = mocker.patch('job_queue.convert_video', return_value=False)
+
+        QueueWorker(queue, poll_interval=0.01).run(job_ids=[job_id])
+
+        assert mock_convert.call_count == 3
+        assert queue.get_jobs([job_id])[0].to_result().success is False
+        assert not (tmp_path / "video.mp4").exists()
+
+    def test_workers_respect_machine_concurrency(self, queue, tmp_path, mocker):
+        """Extra workers should idle while the concurrency limit is reached."""
+        from job_queue import run_workers
+
+        queue.set_concurrency(2)
+        job_ids = [queue.enqueue(make_mts(tmp_path, f"v{i}.mts")) for i in range(5)]
+
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def fake_convert(input_file, output_file, **kwargs):
+            with lock:
+                active.append(input_file)
+                peak.append(len(active))
+            time.sleep(0.02)
+            with lock:
+                active.remove(input_file)
+            return True
+
+        mocker.patch('job_queue.convert_video', side_effect=fake_convert)
+
+        run_workers(queue, 4, job_ids=job_ids, poll_interval=0.005)
+
+        assert max(peak) == 2
+        assert all(job.status == 'done' for job in queue.get_jobs(job_ids))
+
+    def test_stop_releases_running_job(self, queue, tmp_path, mocker):
+        """Stopping a worker should put its running job back in the queue."""
+        from job_queue import QueueWorker
+
+        job_id = queue.enqueue(make_mts(tmp_path))
+        stop_event = threading.Event()
+
+        def fake_convert(input_file, output_file, cancel_event=None, **kwargs):
+            stop_event.set()
+            return False
+
+        mocker.patch('job_queue.convert_video', side_effect=fake_convert)
+
+        QueueWorker(queue, poll_interval=0.01).run(job_ids=[job_id], stop_event=stop_event)
+
+        job = queue.get_jobs([job_id])[0]
+        assert job.status == 'queued'
+        assert job.attempts == 0
+
+    def test_workers_have_distinct_owners(self, queue, tmp_path, mocker):
+        """Workers built on one thread still hold leases under their own ids."""
+        from job_queue import QueueWorker, run_workers
+
+        owners = set()
+        init = QueueWorker.__init__
+
+        def record_owner(worker, *args, **kwargs):
+            init(worker, *args, **kwargs)
+            owners.add(worker.owner)
+
+        mocker.patch.object(QueueWorker, '__init__', record_owner)
+        mocker.patch('job_queue.convert_video', return_value=True)
+        job_id = queue.enqueue(make_mts(tmp_path))
+
+        run_workers(queue, 3, job_ids=[job_id], poll_interval=0.005)
+
+        assert len(owners) == 3
+
+
+class TestCliQueueMode:
+    """Tests for the --queue CLI mode."""
+
+    def test_parse_args_queue_options(self):
+        """--queue and --priority should be parsed."""
+        from mts_converter import parse_args
+
+        args = parse_args(['input.mts', '--queue', '--priority', '3'])
+
+        assert args.queue is True
+        assert args.priority == 3
+
+    def test_queue_excludes_other_schedulers(self):
+        """--queue should not combine with --two-tier."""
+        from mts_converter import parse_args
+
+        with pytest.raises(SystemExit):
+            parse_args(['input.mts', '--queue', '--two-tier'])
+
+    @pytest.mark.parametrize('option', [
+        ['--cache'], ['--scratch-dir', 'scratch'], ['--prefetch'], ['--check-space'], ['--verify']
+    ])
+    def test_queue_rejects_batch_only_options(self, option):
+        """Options the queued path does not apply are rejected, not dropped."""
+        from mts_converter import parse_args
+
+        with pytest.raises(SystemExit):
+            parse_args(['input.mts', '--queue', *option])
+
+    def test_run_cli_enqueues_and_works_through_jobs(self, tmp_path, mocker):
+        """run_cli --queue should enqueue files and report their results."""
+        from job_queue import JobQueue
+        from mts_converter import run_cli
+
+        mts = make_mts(tmp_path)
+        queue = JobQueue(tmp_path / "jobs.db")
+        mocker.patch('job_queue.JobQueue', return_value=queue)
+        mocker.patch('mts_converter.check_ffmpeg', return_value=True)
+        mock_convert = mocker.patch('job_queue.convert_video', return_value=True)
+
+        result = run_cli([str(mts), '--queue', '--position', 'top-left'])
+
+        assert result == (1, 0)
+        assert mock_convert.call_args[1]['position'] == 'top-left'
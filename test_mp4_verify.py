@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""Tests for mp4_verify module.
+
+Tests the MP4 box reader, output verification against synthetic sources
+and the verification step of BatchConverter.
+"""
+
+import struct
+import pytest
+from pathlib import Path
+
+from test_clock_index import pes_header, ts_packet
+
+
+def box(box_type, payload=b''):
+    """Build an MP4 box."""
+    return struct.pack('>I4s', 8 + len(payload), box_type) + payload
+
+
+def full_box(box_type, payload, version=0):
+    """Build an MP4 full box (version and flags)."""
+    return box(box_type, bytes([version, 0, 0, 0]) + payload)
+
+
+def track(handler, duration, samples, timescale=1000, width=0, height=0):
+    """Build a trak box."""
+    tkhd = full_box(b'tkhd', struct.pack('>IIIII', 0, 0, 1, 0, duration) +
+                    b'\x00' * 52 + struct.pack('>II', width << 16, height << 16))
+    mdhd = full_box(b'mdhd', struct.pack('>IIII', 0, 0, timescale, duration * timescale // 1000) +
+                    b'\x00' * 4)
+    hdlr = full_box(b'hdlr', b'\x00' * 4 + handler + b'\x00' * 13)
+    stsz = full_box(b'stsz', struct.pack('>II', 0, samples))
+    stbl = box(b'stbl', stsz)
+    return box(b'trak', tkhd + box(b'mdia', mdhd + hdlr + box(b'minf', stbl)))
+
+
+def make_mp4(path, duration_ms=10000, tracks=None, with_moov=True, with_mdat=True):
+    """Write a minimal MP4 file and return its path."""
+    if tracks is None:
+        tracks = [
+            track(b'vide', duration_ms, 250, width=1920, height=1080),
+            track(b'soun', duration_ms, 470, timescale=48000),
+        ]
+    data = box(b'ftyp', b'isom' + b'\x00\x00\x02\x00' + b'isomiso2avc1mp41')
+    if with_mdat:
+        data += box(b'mdat', b'\x00' * 64)
+    if with_moov:
+        mvhd = full_box(b'mvhd', struct.pack('>IIII', 0, 0, 1000, duration_ms) + b'\x00' * 80)
+        data += box(b'moov', mvhd + b''.join(tracks))
+    path.write_bytes(data)
+    return path
+
+
+def make_source(path, seconds, audio=True):
+    """Write a synthetic MTS with video PES every 0.04s and optional audio."""
+    data = b''
+    for i in range(round(seconds / 0.04)):
+        data += ts_packet(pes_header(1.0 + i * 0.04), start=True)
+        if audio and i % 5 == 0:
+            audio_pes = b'\x00\x00\x01\xbd' + pes_header(1.0 + i * 0.04)[4:]
+            data += ts_packet(audio_pes, start=True, pid=0x1100)
+    path.write_bytes(data)
+    return path
+
+
+class TestReadMp4Info:
+    """Tests for read_mp4_info."""
+
+    def test_reads_movie_and_tracks(self, tmp_path):
+        """Movie duration, handlers, sample counts and size should be read."""
+        from mp4_verify import read_mp4_info
+
+        info = read_mp4_info(make_mp4(tmp_path / "out.mp4"))
+
+        assert info.major_brand == 'isom'
+        assert info.has_moov and info.has_mdat
+        assert info.duration == 10.0
+        assert [t.handler for t in info.tracks] == ['vide', 'soun']
+        assert info.tracks[0].sample_count == 250
+        assert (info.tracks[0].width, info.tracks[0].height) == (1920, 1080)
+        assert info.tracks[1].duration == 10.0
+
+    def test_truncated_file_raises(self, tmp_path):
+        """A box running past the end of the file is an error."""
+        from mp4_verify import read_mp4_info, Mp4FormatError
+
+        path = make_mp4(tmp_path / "out.mp4")
+        path.write_bytes(path.read_bytes()[:-20])
+
+        with pytest.raises(Mp4FormatError):
+            read_mp4_info(path)
+
+
+class TestSourceSummary:
+    """Tests for get_source_summary."""
+
+    def test_duration_and_audio(self, tmp_path):
+        """Duration should span the first to last video PTS plus a frame."""
+        from mp4_verify import get_source_summary
+
+        duration, has_audio = get_source_summary(make_source(tmp_path / "a.mts", 4.0))
+
+        assert duration == pytest.approx(4.0, abs=0.01)
+        assert has_audio is True
+
+    def test_tail_window_is_used(self, tmp_path):
+        """With a small window the last PTS comes from the file tail."""
+        from mp4_verify import get_source_summary
+
+        source = make_source(tmp_path / "a.mts", 4.0, audio=False)
+
+        duration, has_audio = get_source_summary(source, window=192 * 10)
+
+        assert duration == pytest.approx(4.0, abs=0.01)
+        assert has_audio is False
+
+    def test_non_ts_file(self, tmp_path):
+        """Files that are not transport streams give no duration."""
+        from mp4_verify import get_source_summary
+
+        path = tmp_path / "a.mts"
+        path.write_bytes(b'not a stream' * 100)
+
+        assert get_source_summary(path) == (None, False)
+
+
+class TestVerifyOutput:
+    """Tests for verify_output."""
+
+    def test_good_output_passes(self, tmp_path):
+        """A complete output matching the source should pass."""
+        from mp4_verify import verify_output
+
+        source = make_source(tmp_path / "a.mts", 10.0)
+        result = verify_output(make_mp4(tmp_path / "a.mp4"), source)
+
+        assert result.ok, result.problems
+        assert result.duration == 10.0
+
+    def test_missing_moov_fails(self, tmp_path):
+        """An output without moov (interrupted mux) should fail."""
+        from mp4_verify import verify_output
+
+        result = verify_output(make_mp4(tmp_path / "a.mp4", with_moov=False))
+
+        assert not result.ok
+        assert "Missing moov box" in result.problems
+
+    def test_duration_mismatch_fails(self, tmp_path):
+        """An output much shorter than its source should fail."""
+        from mp4_verify import verify_output
+
+        source = make_source(tmp_path / "a.mts", 10.0)
+        result = verify_output(make_mp4(tmp_path / "a.mp4", duration_ms=6000), source)
+
+        assert not result.ok
+        assert any("Duration" in p for p in result.problems)
+
+    def test_expected_duration_of_a_range(self, tmp_path):
+        """An output of part of the source is checked against the part's length."""
+        from mp4_verify import verify_output
+
+        source = make_source(tmp_path / "a.mts", 10.0)
+        output = make_mp4(tmp_path / "a.mp4", duration_ms=4000)
+
+        assert verify_output(output, source, expected_duration=4.0).ok
+        assert "Duration 4.00s does not match range 6.00s" in verify_output(
+            output, source, expected_duration=6.0
+        ).problems
+
+    def test_missing_audio_fails(self, tmp_path):
+        """Dropping the source audio should be reported."""
+        from mp4_verify import verify_output
+
+        source = make_source(tmp_path / "a.mts", 10.0)
+        output = make_mp4(tmp_path / "a.mp4", tracks=[track(b'vide', 10000, 250)])
+
+        assert not verify_output(output, source).ok
+
+    def test_subtitle_track_expected(self, tmp_path):
+        """Subtitle mode outputs need a subtitle track."""
+        from mp4_verify import verify_output
+
+        output = make_mp4(tmp_path / "a.mp4")
+
+        assert "No subtitle track" in verify_output(output, expect_subtitle=True).problems
+
+    def test_garbage_file_fails(self, tmp_path):
+        """Non-MP4 data should fail verification, not raise."""
+        from mp4_verify import verify_output
+
+        path = tmp_path / "a.mp4"
+        path.write_bytes(b'\xff' * 100)
+
+        assert not verify_output(path).ok
+
+    def test_verify_outputs_keeps_order(self, tmp_path):
+        """Parallel verification returns results in job order."""
+        from mp4_verify import verify_outputs
+
+        good = make_mp4(tmp_path / "good.mp4")
+        bad = make_mp4(tmp_path / "bad.mp4", with_moov=False)
+
+        results = verify_outputs([(good, None), (bad, None), (good, None)])
+
+        assert [r.ok for r in results] == [True, False, True]
+
+
+class TestBatchVerification:
+    """Tests for verification in BatchConverter."""
+
+    def test_results_record_verification(self, tmp_path, mocker):
+        """Each successful result should carry its verification."""
+        from batch_converter import BatchConverter
+
+        source = make_source(tmp_path / "a.mts", 10.0)
+        mocker.patch(
+            'batch_converter.convert_video',
+            side_effect=lambda i, o, **kw: make_mp4(Path(o)) and True
+        )
+
+        results = BatchConverter(verify=True).convert_batch([source])
+
+        assert results[0].success is True
+        assert results[0].verification.ok is True
+
+    def test_failed_verification_fails_result(self, tmp_path, mocker):
+        """An output that fails verification is reported as failed."""
+        from batch_converter import BatchConverter
+
+        source = make_source(tmp_path / "a.mts", 10.0)
+        mocker.patch(
+            'batch_converter.convert_video',
+            side_effect=lambda i, o, **kw: make_mp4(Path(o), with_moov=False) and True
+        )
+
+        results = BatchConverter(verify=True).convert_batch([source])
+
+        assert results[0].success is False
+        assert results[0].error.startswith("Verification failed")
+
+    def test_range_output_passes(self, tmp_path, mocker):
+        """Outputs of a --start/--end batch are checked against the range length."""
+        from batch_converter import BatchConverter
+
+        source = make_source(tmp_path / "a.mts", 10.0)
+        mocker.patch('mts_converter.get_video_duration', return_value=10.0)
+        mocker.patch(
+            'batch_converter.convert_video',
+            side_effect=lambda i, o, **kw: make_mp4(Path(o), duration_ms=7000) and True
+        )
+
+        results = BatchConverter(verify=True, start='3').convert_batch([source])
+
+        assert results[0].success is True, results[0].error
+
+    def test_cli_range_output_passes(self, tmp_path, mocker):
+        """--start/--end --verify passes outputs of the requested length."""
+        from mts_converter import run_cli
+
+        source = make_source(tmp_path / "a.mts", 10.0)
+        mocker.patch('mts_converter.check_ffmpeg', return_value=True)
+        mocker.patch('batch_plan.get_data_dir', return_value=str(tmp_path))
+        mocker.patch('mts_converter.get_video_duration', return_value=10.0)
+        mocker.patch('batch_converter.convert_video',
+                     side_effect=lambda i, o, **kw: make_mp4(Path(o), duration_ms=4000) and True)
+
+        assert run_cli([str(source), '--start', '2', '--end', '6', '--verify']) == (1, 0)
+
+    def test_no_verification_by_default(self, tmp_path, mocker):
+        """Without verify=True results carry no verification."""
+        from batch_converter import BatchConverter
+
+        source = tmp_path / "a.mts"
+        source.touch()
+        mocker.patch('batch_converter.convert_video', return_value=True)
+
+        results = BatchConverter().convert_batch([source])
+
+        assert results[0].verification is None
+
+    def test_parse_args_verify(self):
+        """--verify should be parsed."""
+        from mts_converter import parse_args
+
+        assert parse_args(['a.mts', '--verify']).verify is True
+        assert parse_args(['a.mts']).verify is False
@@ -262,35 +262,30 @@ class TestGUIPositionIntegration:
         assert 'self.position.get()' in source, \
             "GUI should read position value using self.position.get()"
 
-    def test_gui_conversion_has_position_mapping(self):
-        """GUI conversion should have positions mapping dictionary."""
+    def test_gui_conversion_uses_cli_drawtext_filter(self):
+        """GUI conversion should build its overlay with the CLI drawtext filter."""
         with open('mts_converter_gui.py', 'r') as f:
             source = f.read()
-        # Check that position mapping is defined in conversion code
-        assert 'positions = {' in source, \
-            "GUI should have positions dictionary for coordinate mapping"
+        assert 'build_drawtext_filter(filming_time' in source, \
+            "GUI should share build_drawtext_filter with the CLI"
+        assert 'localtime' not in source, \
+            "GUI should not keep its own copy of the drawtext expression"
 
     def test_gui_conversion_position_mapping_matches_cli(self):
         """GUI position mapping should match CLI position constants."""
         with open('mts_converter_gui.py', 'r') as f:
             source = f.read()
-        # Verify all four corner positions have correct x:y coordinates
-        assert '"top-left": "x=20:y=20"' in source, \
-            "top-left position should use correct coordinates"
-        assert '"top-right": "x=w-tw-20:y=20"' in source, \
-            "top-right position should use correct coordinates"
-        assert '"bottom-left": "x=20:y=h-th-20"' in source, \
-            "bottom-left position should use correct coordinates"
-        assert '"bottom-right": "x=w-tw-20:y=h-th-20"' in source, \
-            "bottom-right position should use correct coordinates"
+        assert 'position not in POSITIONS' in source, \
+            "GUI should validate positions against the CLI constants"
 
     def test_gui_conversion_default_fallback_is_bottom_right(self):
         """GUI conversion should fall back to bottom-right if position invalid."""
+        from mts_converter import DEFAULT_POSITION
         with open('mts_converter_gui.py', 'r') as f:
             source = f.read()
-        # Check the .get() fallback uses bottom-right
-        assert 'positions["bottom-right"]' in source, \
-            "GUI should use bottom-right as fallback position"
+        assert 'position = DEFAULT_POSITION' in source, \
+            "GUI should use the CLI default as fallback position"
+        assert DEFAULT_POSITION == 'bottom-right'
 
 
 class TestGUIMetadataErrorDisplay:
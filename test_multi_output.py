@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""Tests for single-decode multi-output conversions.
+
+Tests the split filter graph, extra output presets, the WebVTT storyboard
+and the CLI/batch wiring of --also.
+"""
+
+import pytest
+from unittest.mock import MagicMock
+from datetime import datetime
+from pathlib import Path
+
+
+FILMING_TIME = datetime(2024, 1, 15, 10, 30, 0)
+
+
+def mock_ffmpeg(mocker, returncode=0):
+    """Mock FFmpeg and the filming time lookup."""
+    mock_popen = mocker.patch('mts_converter.subprocess.Popen')
+    mock_process = MagicMock()
+    mock_process.stdout = iter([])
+    mock_process.returncode = returncode
+    mock_popen.return_value = mock_process
+    mocker.patch('mts_converter.get_video_creation_time', return_value=FILMING_TIME)
+    return mock_popen
+
+
+class TestBuildMultiOutputCommand:
+    """Tests for build_multi_output_command."""
+
+    def test_one_decode_split_per_output(self):
+        """Re-encoded outputs share one split; the copy reads packets directly."""
+        from mts_converter import build_multi_output_command, build_extra_outputs, OutputSpec
+
+        outputs = [OutputSpec('out.mp4')] + build_extra_outputs(
+            'out.mp4', ['proxy', 'original', 'thumbnails']
+        )
+
+        cmd = build_multi_output_command('ffmpeg', 'in.mts', FILMING_TIME, outputs)
+
+        assert cmd.count('-i') == 1
+        graph = cmd[cmd.index('-filter_complex') + 1]
+        assert graph.startswith('[0:v]split=3[d0][d1][d2]')
+        assert graph.count('drawtext=') == 3
+        assert 'scale=854:-2' in graph
+        assert 'fps=1/10,scale=320:180' in graph
+        assert graph.endswith('tile=5x5[o2]')
+        assert cmd[-1] == 'out_sheet_%03d.jpg'
+        assert cmd[cmd.index('out_original.mp4') - 5:cmd.index('out_original.mp4')] == [
+            '-c', 'copy', '-movflags', '+faststart', '-y'
+        ]
+
+    def test_per_output_overlay_and_encoder_settings(self):
+        """Each output gets its own font size, position and x264 settings."""
+        from mts_converter import build_multi_output_command, OutputSpec
+
+        outputs = [
+            OutputSpec('a.mp4', font_size=32, position='top-left'),
+            OutputSpec('b.mp4', resolution='720p', burn_in=False, preset='fast', crf=30),
+        ]
+
+        cmd = build_multi_output_command('ffmpeg', 'in.mts', FILMING_TIME, outputs)
+
+        graph = cmd[cmd.index('-filter_complex') + 1]
+        first, second = graph.split(';')[1:]
+        assert 'fontsize=32' in first and 'x=20:y=20' in first
+        assert 'drawtext' not in second
+        b = cmd.index('b.mp4')
+        assert cmd[cmd.index('-preset', cmd.index('[o1]')) + 1] == 'fast'
+        assert cmd[cmd.index('-crf', cmd.index('[o1]')) + 1] == '30'
+        assert cmd.index('[o1]') < b
+
+    def test_deinterlace_runs_once_before_split(self):
+        """Deinterlacing is done once, ahead of the split."""
+        from mts_converter import build_multi_output_command, build_extra_outputs, OutputSpec
+
+        outputs = [OutputSpec('out.mp4')] + build_extra_outputs('out.mp4', ['proxy'])
+
+        cmd = build_multi_output_command(
+            'ffmpeg', 'in.mts', FILMING_TIME, outputs, deinterlace=True
+        )
+
+        graph = cmd[cmd.index('-filter_complex') + 1]
+        assert graph.startswith('[0:v]yadif,split=2')
+        assert graph.count('yadif') == 1
+
+    def test_unknown_extra_output(self):
+        """Unknown preset names are rejected."""
+        from mts_converter import build_extra_outputs
+
+        with pytest.raises(ValueError, match='Invalid extra output'):
+            build_extra_outputs('out.mp4', ['poster'])
+
+
+class TestStoryboard:
+    """Tests for build_storyboard_vtt."""
+
+    def test_cues_point_at_tiles(self):
+        """Cues walk the tiles of each sheet, then move to the next sheet."""
+        from mts_converter import build_storyboard_vtt
+
+        vtt = build_storyboard_vtt(265.0, '/out/clip_storyboard_%03d.jpg')
+
+        assert vtt.startswith('WEBVTT\n\n')
+        assert vtt.count(' --> ') == 27
+        assert ('00:00:10.000 --> 00:00:20.000\n'
+                'clip_storyboard_001.jpg#xywh=320,0,320,180') in vtt
+        assert 'clip_storyboard_001.jpg#xywh=0,180,320,180' in vtt
+        assert ('00:04:20.000 --> 00:04:25.000\n'
+                'clip_storyboard_002.jpg#xywh=320,0,320,180') in vtt
+
+
+class TestConvertVideoExtraOutputs:
+    """Tests for convert_video with extra_outputs."""
+
+    def test_runs_one_ffmpeg_and_writes_storyboard(self, tmp_path, mocker):
+        """All outputs come from a single FFmpeg run; the VTT is written after."""
+        from mts_converter import convert_video
+
+        test_mts = tmp_path / "clip.mts"
+        test_mts.touch()
+        mock_popen = mock_ffmpeg(mocker)
+        mocker.patch('mts_converter.get_video_duration', return_value=30.0)
+
+        assert convert_video(
+            str(test_mts), str(tmp_path / "clip.mp4"), extra_outputs=['proxy', 'storyboard']
+        ) is True
+
+        assert mock_popen.call_count == 1
+        cmd = mock_popen.call_args[0][0]
+        assert 'drawtext=' in ' '.join(cmd)
+        assert str(tmp_path / "clip_proxy.mp4") in cmd
+        vtt = (tmp_path / "clip_storyboard.vtt").read_text(encoding='utf-8')
+        assert vtt.count(' --> ') == 3
+
+    def test_subtitle_mode_is_rejected(self, tmp_path, mocker):
+        """Extra outputs need burn-in mode."""
+        from mts_converter import convert_video
+
+        test_mts = tmp_path / "clip.mts"
+        test_mts.touch()
+        mock_popen = mock_ffmpeg(mocker)
+
+        assert convert_video(
+            str(test_mts), timestamp_mode='subtitle', extra_outputs=['proxy']
+        ) is False
+        mock_popen.assert_not_called()
+
+
+class TestAlsoOption:
+    """Tests for --also and BatchConverter extra outputs."""
+
+    def test_parse_args_also(self):
+        """--also should be repeatable."""
+        from mts_converter import parse_args
+
+        args = parse_args(['a.mts', '--also', 'proxy', '--also', 'storyboard'])
+
+        assert args.also == ['proxy', 'storyboard']
+
+    def test_batch_names_extras_after_final_output(self, tmp_path, mocker):
+        """With scratch staging, extras are still written next to the output."""
+        from batch_converter import BatchConverter
+
+        clip = tmp_path / "clip.mts"
+        clip.touch()
+        out_dir = tmp_path / "out"
+        out_dir.mkdir()
+        mock_convert = mocker.patch('batch_converter.convert_video', return_value=False)
+
+        BatchConverter(
+            output_dir=out_dir, scratch_dir=tmp_path / "scratch", extra_outputs=['proxy']
+        ).convert_batch([clip])
+
+        extras = mock_convert.call_args[1]['extra_outputs']
+        assert Path(extras[0].path) == out_dir / "clip_proxy.mp4"
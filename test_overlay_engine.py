@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""Tests for the burn-in overlay engines.
+
+Tests the pre-rendered sprite overlay graph and its selection through
+convert_video, BatchConverter and the CLI.
+"""
+
+import pytest
+from unittest.mock import MagicMock
+from datetime import datetime
+
+
+FILMING_TIME = datetime(2024, 1, 15, 10, 30, 0)
+
+
+class TestOverlayCoordinates:
+    """Tests for get_overlay_coordinates."""
+
+    def test_bottom_right_uses_overlay_dimensions(self):
+        """Bottom-right should use main W/H minus overlay w/h."""
+        from mts_converter import get_overlay_coordinates
+
+        assert get_overlay_coordinates('bottom-right') == 'x=W-w-20:y=H-h-20'
+
+    def test_top_left_unchanged(self):
+        """Top-left only uses the margin."""
+        from mts_converter import get_overlay_coordinates
+
+        assert get_overlay_coordinates('top-left') == 'x=20:y=20'
+
+    def test_invalid_position_raises(self):
+        """Invalid positions should raise ValueError."""
+        from mts_converter import get_overlay_coordinates
+
+        with pytest.raises(ValueError):
+            get_overlay_coordinates('center')
+
+
+class TestSpriteOverlayGraph:
+    """Tests for build_sprite_overlay_graph."""
+
+    def test_renders_label_at_one_fps(self):
+        """The label canvas should run at 1 fps with an alpha channel."""
+        from mts_converter import build_sprite_overlay_graph
+
+        graph = build_sprite_overlay_graph(FILMING_TIME)
+
+        assert 'color=c=black@0.0' in graph
+        assert ':r=1,' in graph
+        assert 'format=rgba' in graph
+
+    def test_composites_with_overlay(self):
+        """The label should be composited onto the video with overlay."""
+        from mts_converter import build_sprite_overlay_graph
+
+        graph = build_sprite_overlay_graph(FILMING_TIME, position='top-right')
+
+        assert '[0:v][ts]overlay=x=W-w-20:y=20' in graph
+        assert graph.endswith('[vout]')
+
+    def test_label_uses_recording_clock(self):
+        """The sprite text should be driven by the filming time."""
+        from mts_converter import build_sprite_overlay_graph
+
+        graph = build_sprite_overlay_graph(FILMING_TIME)
+
+        assert str(int(FILMING_TIME.timestamp())) in graph
+
+    def test_base_filters_run_before_overlay(self):
+        """Base filters should be applied to the video before compositing."""
+        from mts_converter import build_sprite_overlay_graph
+
+        graph = build_sprite_overlay_graph(FILMING_TIME, base_filters=['scale=1280:-2'])
+
+        assert '[0:v]scale=1280:-2[base]' in graph
+        assert '[base][ts]overlay=' in graph
+
+    def test_sprite_size_is_even(self):
+        """Sprite canvas dimensions should be even."""
+        from mts_converter import get_sprite_size
+
+        width, height = get_sprite_size(33)
+
+        assert width % 2 == 0
+        assert height % 2 == 0
+
+
+class TestBurnInCommand:
+    """Tests for build_burn_in_command."""
+
+    def test_drawtext_engine_uses_vf(self):
+        """The drawtext engine should use a simple -vf chain."""
+        from mts_converter import build_burn_in_command
+
+        cmd = build_burn_in_command('ffmpeg', 'in.mts', 'out.mp4', FILMING_TIME)
+
+        assert '-vf' in cmd
+        assert '-filter_complex' not in cmd
+
+    def test_sprite_engine_maps_filter_output(self):
+        """The sprite engine should map the graph output and source audio."""
+        from mts_converter import build_burn_in_command
+
+        cmd = build_burn_in_command(
+            'ffmpeg', 'in.mts', 'out.mp4', FILMING_TIME, overlay_engine='sprite'
+        )
+
+        assert '-filter_complex' in cmd
+        assert cmd[cmd.index('-map') + 1] == '[vout]'
+        assert '0:a?' in cmd
+        assert cmd[-1] == 'out.mp4'
+
+    def test_convert_video_passes_overlay_engine(self, tmp_path, mocker):
+        """convert_video should build a sprite graph when requested."""
+        from mts_converter import convert_video
+
+        test_mts = tmp_path / "test.mts"
+        test_mts.touch()
+
+        mock_popen = mocker.patch('mts_converter.subprocess.Popen')
+        mock_process = MagicMock()
+        mock_process.stdout = iter([])
+        mock_process.returncode = 0
+        mock_popen.return_value = mock_process
+        mocker.patch('mts_converter.get_video_creation_time', return_value=FILMING_TIME)
+
+        convert_video(str(test_mts), overlay_engine='sprite')
+
+        cmd = mock_popen.call_args[0][0]
+        assert '-filter_complex' in cmd
+
+    def test_parse_args_overlay_engine(self):
+        """--overlay-engine should default to drawtext and accept sprite."""
+        from mts_converter import parse_args
+
+        assert parse_args(['input.mts']).overlay_engine == 'drawtext'
+        assert parse_args(['input.mts', '--overlay-engine', 'sprite']).overlay_engine == 'sprite'
+
+
+class TestBenchmarkHelpers:
+    """Tests for benchmark command rewriting."""
+
+    def test_to_null_output_discards_file(self):
+        """to_null_output should replace the MP4 output with the null muxer."""
+        from benchmark import to_null_output
+        from mts_converter import build_burn_in_command
+
+        cmd = build_burn_in_command('ffmpeg', 'in.mts', 'out.mp4', FILMING_TIME)
+        null_cmd = to_null_output(cmd)
+
+        assert null_cmd[-3:] == ['-f', 'null', '-']
+        assert 'out.mp4' not in null_cmd
+        assert '-movflags' not in null_cmd
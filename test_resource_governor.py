@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""Tests for resource_governor module.
+
+Tests governor profiles, the thread and lookahead caps applied to FFmpeg
+commands, the dispatch throttle and the wiring into conversions.
+"""
+
+import pytest
+from unittest.mock import MagicMock
+from datetime import datetime
+
+
+FILMING_TIME = datetime(2024, 1, 15, 10, 30, 0)
+
+
+class TestGovernCommand:
+    """Tests for get_governor, cap_threads and govern_command."""
+
+    def test_unknown_governor(self):
+        """Unknown profile names are rejected; None means no governor."""
+        from resource_governor import get_governor
+
+        assert get_governor(None) is None
+        assert get_governor('idle').name == 'idle'
+        with pytest.raises(ValueError, match='Invalid governor'):
+            get_governor('turbo')
+
+    def test_cap_threads(self):
+        """All-cores requests get the profile's share; smaller ones are kept."""
+        from resource_governor import cap_threads, GOVERNORS
+
+        background = GOVERNORS['background']
+        assert cap_threads(None, background, cpu_count=16) == 8
+        assert cap_threads(0, background, cpu_count=16) == 8
+        assert cap_threads(4, background, cpu_count=16) == 4
+        assert cap_threads(None, GOVERNORS['idle'], cpu_count=2) == 1
+
+    def test_burn_in_command(self):
+        """Threads are capped everywhere and x264 gets a shorter lookahead."""
+        from mts_converter import build_burn_in_command
+        from resource_governor import GOVERNORS, govern_command
+
+        cmd = build_burn_in_command('ffmpeg', 'in.mts', 'out.mp4', FILMING_TIME)
+        governed = govern_command(cmd, GOVERNORS['background'], cpu_count=8)
+
+        assert governed[governed.index('-filter_threads') + 1] == '4'
+        assert governed[governed.index('-filter_complex_threads') + 1] == '4'
+        decoder = governed.index('-threads')
+        assert governed[decoder + 1] == '4' and decoder < governed.index('-i')
+        encoder = governed.index('-threads', decoder + 1)
+        assert governed[encoder + 1] == '4'
+        x264 = governed.index('libx264')
+        assert governed[x264 + 1:x264 + 3] == ['-rc-lookahead', '20']
+        assert governed[-1] == 'out.mp4'
+
+    def test_every_encoder_output_is_capped(self):
+        """Single-decode commands cap each libx264 output; copies are untouched."""
+        from mts_converter import build_multi_output_command, OutputSpec
+        from resource_governor import GOVERNORS, govern_command
+
+        cmd = build_multi_output_command(
+            'ffmpeg', 'in.mts', FILMING_TIME,
+            [OutputSpec('a.mp4'), OutputSpec('b.mp4', resolution='480p'),
+             OutputSpec('c.mts', kind='copy')]
+        )
+        governed = govern_command(cmd, GOVERNORS['idle'], cpu_count=8)
+
+        assert governed.count('-rc-lookahead') == 2
+        assert governed.count('-filter_complex_threads') == 1
+        assert '0' not in [governed[i + 1] for i, a in enumerate(governed) if a == '-threads']
+
+
+class TestDispatchThrottle:
+    """Tests for DispatchThrottle."""
+
+    def test_pressure(self, mocker):
+        """Load and memory limits are reported; unknown readings are ignored."""
+        from resource_governor import DispatchThrottle
+
+        mocker.patch('resource_governor.get_load_per_core', return_value=1.5)
+        memory = mocker.patch('resource_governor.get_free_memory_mb', return_value=4096)
+
+        assert DispatchThrottle(max_load=1.0).pressure() == 'load 1.50 per core'
+        assert DispatchThrottle(max_load=2.0, min_free_memory_mb=1024).pressure() is None
+        assert DispatchThrottle(min_free_memory_mb=8192).pressure() == '4096 MB free memory'
+        memory.return_value = None
+        assert DispatchThrottle(min_free_memory_mb=8192).pressure() is None
+
+    def test_wait_until_headroom(self, mocker):
+        """Waiting ends once the pressure is gone."""
+        from resource_governor import DispatchThrottle
+
+        throttle = DispatchThrottle(max_load=1.0, poll_seconds=0)
+        check = mocker.patch.object(throttle, 'pressure', side_effect=['load', 'load', None])
+
+        throttle.wait()
+
+        assert check.call_count == 3
+
+    def test_wait_is_bounded(self, mocker):
+        """A job never waits longer than max_wait_seconds."""
+        from resource_governor import DispatchThrottle
+
+        throttle = DispatchThrottle(max_load=1.0, poll_seconds=0, max_wait_seconds=0)
+        mocker.patch.object(throttle, 'pressure', return_value='load')
+
+        assert throttle.wait() >= 0
+
+
+class TestGovernedConversion:
+    """Tests for the governor in convert_video, batches and the queue."""
+
+    def test_convert_video_governs_ffmpeg(self, tmp_path, mocker):
+        """The command is capped and the child is started at lower priority."""
+        import sys
+        from mts_converter import convert_video
+
+        clip = tmp_path / "clip.mts"
+        clip.touch()
+        mock_popen = mocker.patch('mts_converter.subprocess.Popen')
+        mock_process = MagicMock()
+        mock_process.stdout = iter([])
+        mock_process.returncode = 0
+        mock_popen.return_value = mock_process
+        mocker.patch('mts_converter.get_video_creation_time', return_value=FILMING_TIME)
+
+        assert convert_video(str(clip), str(tmp_path / "clip.mp4"), governor='background') is True
+
+        cmd = mock_popen.call_args[0][0]
+        assert '-rc-lookahead' in cmd
+        assert 'drawtext=' in ' '.join(cmd)
+        if sys.platform != 'win32':
+            assert mock_popen.call_args[1]['preexec_fn'] is not None
+
+    def test_batch_waits_for_throttle(self, tmp_path, mocker):
+        """Each batch job waits on the throttle and passes the governor on."""
+        from batch_converter import BatchConverter
+
+        clip = tmp_path / "clip.mts"
+        clip.touch()
+        mock_convert = mocker.patch('batch_converter.convert_video', return_value=True)
+        throttle = MagicMock()
+
+        BatchConverter(governor='idle', throttle=throttle).convert_batch([clip])
+
+        throttle.wait.assert_called_once()
+        assert mock_convert.call_args[1]['governor'] == 'idle'
+
+    def test_worker_governor_overrides_job(self, tmp_path, mocker):
+        """The machine running a queued job decides its governor."""
+        from job_queue import JobQueue, QueueWorker
+
+        clip = tmp_path / "clip.mts"
+        clip.touch()
+        queue = JobQueue(tmp_path / "jobs.db")
+        queue.enqueue(clip, options={'governor': 'background'})
+        mock_convert = mocker.patch('job_queue.convert_video', return_value=True)
+
+        QueueWorker(queue, governor='idle').run(exit_when_idle=True)
+
+        assert mock_convert.call_args[1]['governor'] == 'idle'
+
+    def test_parse_args_governor(self):
+        """Governor and throttle options should be parsed."""
+        from mts_converter import parse_args
+
+        args = parse_args([
+            'a.mts', '--governor', 'idle', '--max-load', '0.8', '--min-free-memory', '2048'
+        ])
+
+        assert args.governor == 'idle'
+        assert args.max_load == 0.8
+        assert args.min_free_memory == 2048.0
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""Tests for scratch_staging module.
+
+Tests atomic moves across filesystems, the bounded background transfer
+queue, and scratch staging in BatchConverter.
+"""
+
+import errno
+import os
+import threading
+import pytest
+from pathlib import Path
+
+
+def exdev_once(mocker):
+    """Make the first os.replace call fail as a cross-device rename."""
+    real_replace = os.replace
+    calls = []
+
+    def replace(src, dst):
+        calls.append((src, dst))
+        if len(calls) == 1:
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+        return real_replace(src, dst)
+
+    mocker.patch('scratch_staging.os.replace', side_effect=replace)
+    return calls
+
+
+class TestMoveIntoPlace:
+    """Tests for move_into_place."""
+
+    def test_same_filesystem_rename(self, tmp_path):
+        """Within one filesystem the file is renamed."""
+        from scratch_staging import move_into_place
+
+        source = tmp_path / "stage.mp4"
+        source.write_bytes(b'video')
+        destination = tmp_path / "out.mp4"
+
+        move_into_place(source, destination)
+
+        assert destination.read_bytes() == b'video'
+        assert not source.exists()
+
+    def test_cross_device_copies_then_renames(self, tmp_path, mocker):
+        """Across filesystems the copy is renamed over the destination."""
+        from scratch_staging import move_into_place, TRANSFER_PREFIX
+
+        calls = exdev_once(mocker)
+        source = tmp_path / "stage.mp4"
+        source.write_bytes(b'video')
+        destination = tmp_path / "nas" / "out.mp4"
+        destination.parent.mkdir()
+        destination.touch()
+
+        move_into_place(source, destination)
+
+        assert destination.read_bytes() == b'video'
+        assert not source.exists()
+        assert Path(calls[1][0]).name == TRANSFER_PREFIX + "out.mp4"
+        assert list(destination.parent.iterdir()) == [destination]
+
+    def test_failed_copy_leaves_destination(self, tmp_path, mocker):
+        """A failed copy leaves no temporary file and keeps the source."""
+        from scratch_staging import move_into_place
+
+        exdev_once(mocker)
+        mocker.patch('scratch_staging.shutil.copyfile', side_effect=OSError("disk full"))
+        source = tmp_path / "stage.mp4"
+        source.write_bytes(b'video')
+        destination = tmp_path / "out.mp4"
+
+        with pytest.raises(OSError):
+            move_into_place(source, destination)
+
+        assert source.exists()
+        assert not destination.exists()
+        assert not any(p.name.startswith('.transfer_') for p in tmp_path.iterdir())
+
+
+class TestScratchStager:
+    """Tests for ScratchStager."""
+
+    def test_stage_reserves_destination(self, tmp_path):
+        """Staging creates a placeholder at the destination."""
+        from scratch_staging import ScratchStager
+
+        stager = ScratchStager(tmp_path / "scratch")
+        destination = tmp_path / "out.mp4"
+
+        scratch_file = stager.stage(destination)
+
+        assert destination.exists() and destination.stat().st_size == 0
+        assert scratch_file.parent == tmp_path / "scratch"
+        stager.close()
+
+    def test_submit_moves_in_background(self, tmp_path):
+        """Submitted files reach their destination by the time finish returns."""
+        from scratch_staging import ScratchStager
+
+        stager = ScratchStager(tmp_path / "scratch")
+        destination = tmp_path / "out.mp4"
+        scratch_file = stager.stage(destination)
+        scratch_file.write_bytes(b'video')
+
+        stager.submit(scratch_file, destination)
+
+        assert stager.finish() == {}
+        assert destination.read_bytes() == b'video'
+        assert stager.pending_bytes == 0
+        stager.close()
+
+    def test_discard_removes_placeholder(self, tmp_path):
+        """Discarding a failed conversion frees the reserved name."""
+        from scratch_staging import ScratchStager
+
+        stager = ScratchStager(tmp_path / "scratch")
+        destination = tmp_path / "out.mp4"
+        scratch_file = stager.stage(destination)
+
+        stager.discard(scratch_file, destination)
+
+        assert not destination.exists()
+        assert not scratch_file.exists()
+        stager.close()
+
+    def test_stage_waits_when_scratch_is_full(self, tmp_path, mocker):
+        """New encodes wait while staged bytes over the limit await transfer."""
+        from scratch_staging import ScratchStager, move_into_place
+
+        release = threading.Event()
+
+        def slow_move(source, destination):
+            release.wait(5)
+            move_into_place(source, destination)
+
+        mocker.patch('scratch_staging.move_into_place', side_effect=slow_move)
+        stager = ScratchStager(tmp_path / "scratch", limit_gb=1e-9)
+        first = stager.stage(tmp_path / "a.mp4")
+        first.write_bytes(b'x' * 100)
+        stager.submit(first, tmp_path / "a.mp4")
+
+        staged = []
+        waiter = threading.Thread(target=lambda: staged.append(stager.stage(tmp_path / "b.mp4")))
+        waiter.start()
+        waiter.join(0.2)
+        assert staged == []
+
+        release.set()
+        waiter.join(5)
+        assert len(staged) == 1
+        stager.close()
+
+    def test_failed_transfer_is_reported(self, tmp_path, mocker):
+        """Transfer errors are returned by finish and the name is freed."""
+        from scratch_staging import ScratchStager
+
+        mocker.patch('scratch_staging.move_into_place', side_effect=OSError("share offline"))
+        stager = ScratchStager(tmp_path / "scratch")
+        destination = tmp_path / "out.mp4"
+        scratch_file = stager.stage(destination)
+        scratch_file.write_bytes(b'video')
+        stager.submit(scratch_file, destination)
+
+        errors = stager.finish()
+
+        assert "share offline" in errors[destination]
+        assert not destination.exists()
+        assert not scratch_file.exists()
+        stager.close()
+
+
+class TestBatchScratch:
+    """Tests for scratch staging in BatchConverter."""
+
+    def test_encodes_to_scratch_and_moves(self, tmp_path, mocker):
+        """convert_video writes to scratch; the output ends up in output_dir."""
+        from batch_converter import BatchConverter
+
+        clip = tmp_path / "clip.mts"
+        clip.touch()
+        scratch = tmp_path / "scratch"
+        out_dir = tmp_path / "out"
+        out_dir.mkdir()
+        targets = []
+
+        def fake_convert(input_file, output_file, **kwargs):
+            targets.append(Path(output_file))
+            Path(output_file).write_bytes(b'video')
+            return True
+
+        mocker.patch('batch_converter.convert_video', side_effect=fake_convert)
+
+        results = BatchConverter(output_dir=out_dir, scratch_dir=scratch).convert_batch([clip])
+
+        assert targets[0].parent == scratch
+        assert results[0].success is True
+        assert results[0].output_file == out_dir / "clip.mp4"
+        assert (out_dir / "clip.mp4").read_bytes() == b'video'
+        assert list(scratch.iterdir()) == []
+
+    def test_failed_transfer_fails_result(self, tmp_path, mocker):
+        """A file that cannot be moved is reported as failed."""
+        from batch_converter import BatchConverter
+
+        clip = tmp_path / "clip.mts"
+        clip.touch()
+        mocker.patch(
+            'batch_converter.convert_video',
+            side_effect=lambda i, o, **kw: Path(o).write_bytes(b'video') > 0
+        )
+        mocker.patch('scratch_staging.move_into_place', side_effect=OSError("share offline"))
+
+        results = BatchConverter(scratch_dir=tmp_path / "scratch").convert_batch([clip])
+
+        assert results[0].success is False
+        assert "share offline" in results[0].error
+
+    def test_failed_conversion_frees_name(self, tmp_path, mocker):
+        """A failed conversion leaves neither a placeholder nor a scratch file."""
+        from batch_converter import BatchConverter
+
+        clip = tmp_path / "clip.mts"
+        clip.touch()
+        scratch = tmp_path / "scratch"
+        mocker.patch('batch_converter.convert_video', return_value=False)
+
+        results = BatchConverter(scratch_dir=scratch).convert_batch([clip])
+
+        assert results[0].success is False
+        assert not (tmp_path / "clip.mp4").exists()
+        assert list(scratch.iterdir()) == []
+
+    def test_parse_args_scratch(self):
+        """--scratch-dir and --scratch-limit should be parsed."""
+        from mts_converter import parse_args
+
+        args = parse_args(['a.mts', '--scratch-dir', '/ssd', '--scratch-limit', '5'])
+
+        assert args.scratch_dir == '/ssd'
+        assert args.scratch_limit == 5.0
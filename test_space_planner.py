@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""Tests for space_planner module.
+
+Tests output size prediction, the learned bitrate history, free-space
+checks and space-aware dispatch in BatchConverter.
+"""
+
+import pytest
+from collections import namedtuple
+from pathlib import Path
+
+from test_mp4_verify import make_source
+
+
+DiskUsage = namedtuple('DiskUsage', ['total', 'used', 'free'])
+
+
+def planner_for(tmp_path, **kwargs):
+    """Create a SpacePlanner with a private history file."""
+    from space_planner import SizeHistory, SpacePlanner
+
+    return SpacePlanner(SizeHistory(tmp_path / "sizes.json"), **kwargs)
+
+
+def fake_free(mocker, free):
+    """Report the same free space on every volume."""
+    mocker.patch(
+        'space_planner.shutil.disk_usage',
+        return_value=DiskUsage(free * 2, free, free)
+    )
+
+
+class TestEstimate:
+    """Tests for SpacePlanner.estimate."""
+
+    def test_default_bitrate_by_resolution(self, tmp_path):
+        """Without history the resolution's default bitrate is used."""
+        from space_planner import DEFAULT_BITRATES
+
+        source = make_source(tmp_path / "a.mts", 10.0)
+        planner = planner_for(tmp_path, margin=1.0)
+
+        size = planner.estimate(source, {'resolution': '720p'})
+
+        assert size == pytest.approx(DEFAULT_BITRATES['720p'] / 8 * 10.0, rel=0.01)
+
+    def test_higher_crf_predicts_smaller_output(self, tmp_path):
+        """Six CRF steps up should halve the estimate."""
+        source = make_source(tmp_path / "a.mts", 10.0)
+        planner = planner_for(tmp_path)
+
+        default = planner.estimate(source, {'resolution': '1080p'})
+        smaller = planner.estimate(source, {'resolution': '1080p', 'crf': 29})
+
+        assert smaller == pytest.approx(default / 2, rel=0.01)
+
+    def test_subtitle_mode_follows_source_size(self, tmp_path):
+        """Copied video should be predicted at the source's size."""
+        source = make_source(tmp_path / "a.mts", 10.0)
+        planner = planner_for(tmp_path, margin=1.0)
+
+        size = planner.estimate(source, {'timestamp_mode': 'subtitle'})
+
+        assert size == pytest.approx(source.stat().st_size, rel=0.01)
+
+    def test_learns_from_observed_outputs(self, tmp_path):
+        """Observed output sizes replace the default bitrate."""
+        source = make_source(tmp_path / "a.mts", 10.0)
+        output = tmp_path / "a.mp4"
+        output.write_bytes(b'\x00' * 50000)
+        planner = planner_for(tmp_path, margin=1.0)
+
+        planner.observe(source, {}, output)
+
+        assert planner.estimate(source, {}) == pytest.approx(50000, rel=0.01)
+
+    def test_range_counts_converted_seconds_only(self, tmp_path):
+        """A --start/--end range is estimated and learned by its own length."""
+        from space_planner import profile_key
+
+        source = make_source(tmp_path / "a.mts", 10.0)
+        output = tmp_path / "a.mp4"
+        output.write_bytes(b'\x00' * 20000)
+        planner = planner_for(tmp_path, margin=1.0)
+        options = {'start': '2', 'end': '6'}
+
+        planner.observe(source, options, output)
+
+        assert planner.history.get(profile_key(options)) == pytest.approx(5000, rel=0.01)
+        assert planner.estimate(source, options) == pytest.approx(20000, rel=0.01)
+        assert planner.estimate(source, {}) == pytest.approx(50000, rel=0.01)
+
+    def test_history_moving_average(self, tmp_path):
+        """Later observations are blended into the average."""
+        from space_planner import SizeHistory
+
+        history = SizeHistory(tmp_path / "sizes.json")
+        history.record('p', 100.0)
+        history.record('p', 200.0)
+
+        assert history.get('p') == 150.0
+        assert history.get('other') is None
+
+
+class TestCheck:
+    """Tests for SpacePlanner.check and reservations."""
+
+    def test_fits(self, tmp_path, mocker):
+        """Outputs smaller than the free space fit."""
+        fake_free(mocker, 10000)
+        planner = planner_for(tmp_path, reserve_bytes=0)
+
+        assert planner.check([tmp_path], 5000) is None
+
+    def test_reservations_count_against_free_space(self, tmp_path, mocker):
+        """Space held for running jobs is not available to new ones."""
+        fake_free(mocker, 10000)
+        planner = planner_for(tmp_path, reserve_bytes=0)
+
+        token = planner.reserve([tmp_path], 6000)
+        error = planner.check([tmp_path], 5000)
+        planner.release(token)
+
+        assert "Not enough disk space" in error
+        assert planner.check([tmp_path], 5000) is None
+
+    def test_committed_bytes_and_missing_directory(self, tmp_path, mocker):
+        """Pending transfers count, and missing output directories are allowed."""
+        fake_free(mocker, 10000)
+        planner = planner_for(tmp_path, reserve_bytes=0)
+        missing = tmp_path / "not" / "yet"
+
+        assert planner.check([missing], 5000, {missing: 6000}) is not None
+
+
+class TestBatchSpaceChecks:
+    """Tests for space-aware dispatch in BatchConverter."""
+
+    def test_job_that_does_not_fit_is_postponed_then_failed(self, tmp_path, mocker):
+        """Jobs that fit run first; one that never fits fails without encoding."""
+        from batch_converter import BatchConverter
+
+        big = tmp_path / "big.mts"
+        big.write_bytes(b'\x00' * 3000)
+        small = tmp_path / "small.mts"
+        small.write_bytes(b'\x00' * 1000)
+        fake_free(mocker, 2000)
+        mock_convert = mocker.patch('batch_converter.convert_video', return_value=True)
+
+        converter = BatchConverter(
+            timestamp_mode='subtitle',
+            space_planner=planner_for(tmp_path, margin=1.0, reserve_bytes=0)
+        )
+        results = converter.convert_batch([big, small])
+
+        assert mock_convert.call_count == 1
+        assert mock_convert.call_args[0][0] == str(small)
+        assert [r.input_file for r in results] == [big, small]
+        assert results[0].success is False
+        assert "Not enough disk space" in results[0].error
+        assert results[1].success is True
+
+    def test_no_planner_no_checks(self, tmp_path, mocker):
+        """Without a planner free space is not looked at."""
+        from batch_converter import BatchConverter
+
+        clip = tmp_path / "clip.mts"
+        clip.touch()
+        usage = mocker.patch('space_planner.shutil.disk_usage')
+        mocker.patch('batch_converter.convert_video', return_value=True)
+
+        BatchConverter().convert_batch([clip])
+
+        usage.assert_not_called()
+
+    def test_parse_args_check_space(self):
+        """--check-space should be parsed."""
+        from mts_converter import parse_args
+
+        assert parse_args(['a.mts', '--check-space']).check_space is True
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""Tests for streaming input and output.
+
+Tests DPM parsing from a peek buffer, piping streams through FFmpeg's
+stdin/stdout, and stream handling in convert_video and the CLI.
+"""
+
+import io
+import sys
+import pytest
+from datetime import datetime
+
+
+# DPM marker followed by a BCD timestamp of 2024-01-15 10:30:00
+DPM_BYTES = b'DPM' + bytes([0x00, 0x00, 0x00, 0x20, 0x24, 0x01, 0x00, 0x15, 0x10, 0x30, 0x00])
+CLIP = b'\x47' * 1000 + DPM_BYTES + b'\x47' * 200000
+
+# Stand-in for FFmpeg: copies stdin to stdout and reports progress on stderr
+PASSTHROUGH = [
+    sys.executable, '-c',
+    "import shutil, sys; shutil.copyfileobj(sys.stdin.buffer, sys.stdout.buffer); "
+    "sys.stderr.write('frame=1 fps=30 time=00:00:01.00 speed=2.0x\\n')"
+]
+
+
+class TestParseDpmTimestamp:
+    """Tests for parse_dpm_timestamp."""
+
+    def test_parses_buffer(self):
+        """The timestamp should be parsed from an in-memory buffer."""
+        from mts_converter import parse_dpm_timestamp
+
+        assert parse_dpm_timestamp(CLIP[:65536]) == datetime(2024, 1, 15, 10, 30, 0)
+
+    def test_missing_marker_returns_none(self):
+        """Buffers without a DPM marker should return None."""
+        from mts_converter import parse_dpm_timestamp
+
+        assert parse_dpm_timestamp(b'\x47' * 1000) is None
+
+
+class TestPeekedStream:
+    """Tests for PeekedStream."""
+
+    def test_head_and_rest_are_fed_in_order(self):
+        """Feeding should reproduce the whole stream."""
+        from mts_converter import PeekedStream
+
+        peeked = PeekedStream(io.BytesIO(CLIP), peek_size=4096)
+        sink = io.BytesIO()
+        sink.close = lambda: None
+        peeked.feed(sink)
+
+        assert peeked.head == CLIP[:4096]
+        assert sink.getvalue() == CLIP
+
+    def test_short_stream(self):
+        """Streams shorter than the peek size are read completely."""
+        from mts_converter import PeekedStream
+
+        assert PeekedStream(io.BytesIO(b'abc'), peek_size=10).head == b'abc'
+
+
+class TestRunFFmpegStreams:
+    """Tests for _run_ffmpeg with streams."""
+
+    def test_pipes_input_to_output_stream(self):
+        """Media should flow stdin to stdout without touching disk."""
+        from mts_converter import PeekedStream, _run_ffmpeg
+
+        output = io.BytesIO()
+        stats = []
+
+        success = _run_ffmpeg(
+            PASSTHROUGH, '<stdout>',
+            stats_callback=stats.append,
+            input_stream=PeekedStream(io.BytesIO(CLIP)),
+            output_stream=output
+        )
+
+        assert success is True
+        assert output.getvalue() == CLIP
+        assert stats[0]['speed'] == 2.0
+
+    def test_writes_to_file_descriptor(self, tmp_path):
+        """Streams with a file descriptor are handed to FFmpeg directly."""
+        from mts_converter import PeekedStream, _run_ffmpeg
+
+        with open(tmp_path / "out.bin", 'wb') as output:
+            _run_ffmpeg(
+                PASSTHROUGH, '<stdout>',
+                stats_callback=lambda s: None,
+                input_stream=PeekedStream(io.BytesIO(CLIP)),
+                output_stream=output
+            )
+
+        assert (tmp_path / "out.bin").read_bytes() == CLIP
+
+
+class TestStreamCommand:
+    """Tests for stream options of build_burn_in_command."""
+
+    def test_fragmented_output(self):
+        """Pipe output should use fragmented MP4 without faststart."""
+        from mts_converter import build_burn_in_command, FRAGMENTED_MOVFLAGS
+
+        cmd = build_burn_in_command(
+            'ffmpeg', 'pipe:0', 'pipe:1', datetime(2024, 1, 15),
+            input_format='mpegts', fragmented=True
+        )
+
+        assert cmd[cmd.index('-movflags') + 1] == FRAGMENTED_MOVFLAGS
+        assert '+faststart' not in cmd
+        assert cmd[cmd.index('-f') + 1] == 'mpegts'
+        assert cmd.index('-f') < cmd.index('-i')
+        assert cmd[-1] == 'pipe:1'
+
+
+class TestConvertVideoStreams:
+    """Tests for convert_video with stream arguments."""
+
+    def test_stream_in_stream_out(self, mocker):
+        """A readable stream should be peeked and piped to FFmpeg."""
+        from mts_converter import convert_video
+
+        mock_run = mocker.patch('mts_converter._run_ffmpeg', return_value=True)
+        output = io.BytesIO()
+
+        assert convert_video(io.BytesIO(CLIP), output, position='top-left') is True
+
+        cmd = mock_run.call_args[0][0]
+        kwargs = mock_run.call_args[1]
+        assert cmd[cmd.index('-i') + 1] == 'pipe:0'
+        assert cmd[-1] == 'pipe:1'
+        assert any('drawtext=' in arg and 'x=20' in arg for arg in cmd)
+        assert kwargs['input_stream'].head == CLIP[:65536]
+        assert kwargs['output_stream'] is output
+
+    def test_stream_without_dpm_fails(self, mocker):
+        """Streams cannot be probed, so a missing DPM marker is an error."""
+        from mts_converter import convert_video
+
+        mock_run = mocker.patch('mts_converter._run_ffmpeg')
+
+        assert convert_video(io.BytesIO(b'\x47' * 5000), io.BytesIO()) is False
+        mock_run.assert_not_called()
+
+    def test_subtitle_mode_rejects_streams(self, mocker):
+        """Subtitle mode needs a seekable file."""
+        from mts_converter import convert_video
+
+        mock_run = mocker.patch('mts_converter._run_ffmpeg')
+
+        assert convert_video(io.BytesIO(CLIP), io.BytesIO(), timestamp_mode='subtitle') is False
+        mock_run.assert_not_called()
+
+    def test_file_to_stream(self, tmp_path, mocker):
+        """A file input can be streamed to an output stream."""
+        from mts_converter import convert_video
+
+        clip = tmp_path / "clip.mts"
+        clip.write_bytes(CLIP)
+        mock_run = mocker.patch('mts_converter._run_ffmpeg', return_value=True)
+
+        convert_video(str(clip), io.BytesIO())
+
+        cmd = mock_run.call_args[0][0]
+        assert cmd[cmd.index('-i') + 1] == str(clip)
+        assert mock_run.call_args[1]['input_stream'] is None
+
+    def test_cli_dash_output_is_legacy_mode(self):
+        """'input -' should stream a single file to stdout."""
+        from mts_converter import parse_args
+
+        args = parse_args(['-', '-'])
+
+        assert args.legacy_mode is True
+        assert args.output_file == '-'
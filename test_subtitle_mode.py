@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""Tests for the stream-copy subtitle timestamp mode.
+
+Tests SRT cue generation, the stream-copy FFmpeg command and the CLI/batch
+wiring of the timestamp mode and audio codec options.
+"""
+
+import pytest
+from unittest.mock import MagicMock
+from datetime import datetime
+from pathlib import Path
+
+
+class TestBuildTimestampSubtitles:
+    """Tests for build_timestamp_subtitles."""
+
+    def test_one_cue_per_second(self):
+        """Should emit one cue for every second of media."""
+        from mts_converter import build_timestamp_subtitles
+
+        srt = build_timestamp_subtitles(datetime(2024, 12, 15, 14, 35, 0), 3.0)
+
+        assert srt.count(' --> ') == 3
+
+    def test_cues_track_recording_clock(self):
+        """Each cue should show the filming time plus its media offset."""
+        from mts_converter import build_timestamp_subtitles
+
+        srt = build_timestamp_subtitles(datetime(2024, 12, 15, 14, 35, 58), 3.0)
+
+        assert '2024-12-15 14:35:58' in srt
+        assert '2024-12-15 14:35:59' in srt
+        assert '2024-12-15 14:36:00' in srt
+
+    def test_cue_times_are_srt_formatted(self):
+        """Cue times should use the HH:MM:SS,mmm format."""
+        from mts_converter import build_timestamp_subtitles
+
+        srt = build_timestamp_subtitles(datetime(2024, 1, 1, 0, 0, 0), 2.0)
+
+        assert '00:00:00,000 --> 00:00:01,000' in srt
+        assert '00:00:01,000 --> 00:00:02,000' in srt
+
+    def test_partial_last_second_is_clamped_to_duration(self):
+        """The final cue should end at the media duration."""
+        from mts_converter import build_timestamp_subtitles
+
+        srt = build_timestamp_subtitles(datetime(2024, 1, 1, 0, 0, 0), 1.5)
+
+        assert srt.count(' --> ') == 2
+        assert '00:00:01,000 --> 00:00:01,500' in srt
+
+
+class TestBuildSubtitleCommand:
+    """Tests for build_subtitle_command."""
+
+    def test_copies_video_and_adds_mov_text(self):
+        """Command should stream-copy video and encode mov_text subtitles."""
+        from mts_converter import build_subtitle_command
+
+        cmd = build_subtitle_command('ffmpeg', 'in.mts', 'ts.srt', 'out.mp4')
+
+        assert cmd[cmd.index('-c:v') + 1] == 'copy'
+        assert cmd[cmd.index('-c:s') + 1] == 'mov_text'
+        assert 'drawtext' not in ' '.join(cmd)
+
+    def test_audio_copy(self):
+        """audio_codec='copy' should copy the audio stream."""
+        from mts_converter import build_subtitle_command
+
+        cmd = build_subtitle_command('ffmpeg', 'in.mts', 'ts.srt', 'out.mp4', audio_codec='copy')
+
+        assert cmd[cmd.index('-c:a') + 1] == 'copy'
+
+
+class TestConvertVideoSubtitleMode:
+    """Tests for convert_video with timestamp_mode='subtitle'."""
+
+    def _mock_ffmpeg(self, mocker, returncode=0):
+        mock_popen = mocker.patch('mts_converter.subprocess.Popen')
+        mock_process = MagicMock()
+        mock_process.stdout = iter([])
+        mock_process.returncode = returncode
+        mock_popen.return_value = mock_process
+        mocker.patch(
+            'mts_converter.get_video_creation_time',
+            return_value=datetime(2024, 1, 15, 10, 30, 0)
+        )
+        return mock_popen
+
+    def test_subtitle_mode_stream_copies(self, tmp_path, mocker):
+        """Subtitle mode should run a stream-copy command."""
+        from mts_converter import convert_video
+
+        test_mts = tmp_path / "test.mts"
+        test_mts.touch()
+        mock_popen = self._mock_ffmpeg(mocker)
+        mocker.patch('mts_converter.get_video_duration', return_value=10.0)
+
+        assert convert_video(str(test_mts), timestamp_mode='subtitle') is True
+
+        cmd = mock_popen.call_args[0][0]
+        assert cmd[cmd.index('-c:v') + 1] == 'copy'
+        assert '-vf' not in cmd
+
+    def test_subtitle_file_is_removed(self, tmp_path, mocker):
+        """The temporary SRT file should be deleted after conversion."""
+        from mts_converter import convert_video
+
+        test_mts = tmp_path / "test.mts"
+        test_mts.touch()
+        mock_popen = self._mock_ffmpeg(mocker)
+        mocker.patch('mts_converter.get_video_duration', return_value=10.0)
+
+        convert_video(str(test_mts), timestamp_mode='subtitle')
+
+        cmd = mock_popen.call_args[0][0]
+        srt_path = Path(cmd[cmd.index('-i', 3) + 1])
+        assert srt_path.suffix == '.srt'
+        assert not srt_path.exists()
+
+    def test_subtitle_mode_fails_without_duration(self, tmp_path, mocker):
+        """Subtitle mode should fail cleanly when duration is unknown."""
+        from mts_converter import convert_video
+
+        test_mts = tmp_path / "test.mts"
+        test_mts.touch()
+        mock_popen = self._mock_ffmpeg(mocker)
+        mocker.patch('mts_converter.get_video_duration', return_value=0.0)
+
+        assert convert_video(str(test_mts), timestamp_mode='subtitle') is False
+        mock_popen.assert_not_called()
+
+    def test_burn_in_is_default(self, tmp_path, mocker):
+        """Default mode should still burn the timestamp in with drawtext."""
+        from mts_converter import convert_video
+
+        test_mts = tmp_path / "test.mts"
+        test_mts.touch()
+        mock_popen = self._mock_ffmpeg(mocker)
+
+        convert_video(str(test_mts))
+
+        cmd = mock_popen.call_args[0][0]
+        assert any('drawtext=' in arg for arg in cmd)
+        assert cmd[cmd.index('-c:v') + 1] == 'libx264'
+
+
+class TestTimestampModeCLI:
+    """Tests for CLI and batch wiring of the timestamp mode."""
+
+    def test_parse_args_timestamp_mode_defaults_to_burn_in(self):
+        """--timestamp-mode should default to burn-in."""
+        from mts_converter import parse_args
+
+        args = parse_args(['input.mts'])
+
+        assert args.timestamp_mode == 'burn-in'
+        assert args.audio_codec == 'aac'
+
+    def test_parse_args_accepts_subtitle_mode(self):
+        """--timestamp-mode subtitle should be accepted."""
+        from mts_converter import parse_args
+
+        args = parse_args(['input.mts', '-t', 'subtitle', '--audio-codec', 'copy'])
+
+        assert args.timestamp_mode == 'subtitle'
+        assert args.audio_codec == 'copy'
+
+    def test_legacy_mode_has_timestamp_mode(self):
+        """Legacy mode should default the timestamp mode too."""
+        from mts_converter import parse_args
+
+        args = parse_args(['input.mts', 'output.mp4'])
+
+        assert args.timestamp_mode == 'burn-in'
+
+    def test_batch_converter_passes_timestamp_mode(self, tmp_path, mocker):
+        """BatchConverter should pass timestamp_mode to convert_video."""
+        from batch_converter import BatchConverter
+
+        mts_file = tmp_path / "video.mts"
+        mts_file.touch()
+        mock_convert = mocker.patch('batch_converter.convert_video', return_value=True)
+
+        BatchConverter(timestamp_mode='subtitle', audio_codec='copy').convert_batch([mts_file])
+
+        call_kwargs = mock_convert.call_args[1]
+        assert call_kwargs.get('timestamp_mode') == 'subtitle'
+        assert call_kwargs.get('audio_codec') == 'copy'
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""Tests for time_range module.
+
+Tests parsing of --start/--end values, resolution of recording times
+through the clock index, range checks, the clock of a cut and the seek
+in the conversion command.
+"""
+
+import pytest
+from unittest.mock import MagicMock
+from datetime import datetime, time, timedelta
+
+
+FILMING_TIME = datetime(2024, 7, 4, 14, 30, 0)
+
+
+class TestParsing:
+    """Tests for parse_time_spec."""
+
+    def test_media_offsets(self):
+        """Seconds and [HH:]MM:SS are media offsets."""
+        from time_range import parse_time_spec
+
+        assert parse_time_spec('90').seconds == 90.0
+        assert parse_time_spec('1:30').seconds == 90.0
+        assert parse_time_spec('1:02:30.5').seconds == 3750.5
+        assert parse_time_spec(12).seconds == 12.0
+
+    def test_recording_times(self):
+        """'@' marks a time of day or a full recording date and time."""
+        from time_range import parse_time_spec
+
+        assert parse_time_spec('@14:35').time_of_day == time(14, 35)
+        assert parse_time_spec('@14:35:20').time_of_day == time(14, 35, 20)
+        assert parse_time_spec('@2024-07-04 14:35:20').wall_clock == datetime(2024, 7, 4, 14, 35, 20)
+
+    @pytest.mark.parametrize('value', ['', 'abc', '1::2', '-5', '1:2:3:4', '@25:00', '@soon'])
+    def test_invalid(self, value):
+        """Values that are not times raise ValueError."""
+        from time_range import parse_time_spec
+
+        with pytest.raises(ValueError):
+            parse_time_spec(value)
+
+
+class TestResolution:
+    """Tests for resolve_range."""
+
+    def test_media_range(self):
+        """A media range resolves to its start and length."""
+        from time_range import resolve_range
+
+        assert resolve_range('1:00', '2:30', FILMING_TIME, 600.0) == (60.0, 90.0)
+        assert resolve_range(None, '30', FILMING_TIME, 600.0) == (0.0, 30.0)
+
+    def test_end_past_file_runs_to_end(self):
+        """An end at or past the end of the file leaves the length open."""
+        from time_range import resolve_range
+
+        assert resolve_range('60', '9:00:00', FILMING_TIME, 600.0) == (60.0, None)
+
+    def test_recording_time(self):
+        """Recording times are offsets from the DPM start time."""
+        from time_range import resolve_range
+
+        assert resolve_range('@14:35', '@2024-07-04 14:40:30', FILMING_TIME, 3600.0) == (300.0, 330.0)
+
+    def test_time_of_day_after_midnight(self):
+        """A time of day earlier than the start falls on the next day."""
+        from time_range import resolve_range
+
+        late = datetime(2024, 7, 4, 23, 50, 0)
+
+        assert resolve_range('@00:05', None, late, 3600.0) == (900.0, None)
+
+    def test_recording_time_after_clock_restart(self):
+        """Recording times land on the stretch of media that showed them."""
+        from time_range import resolve_range
+        from clock_index import ClockSegment
+
+        restart = datetime(2024, 7, 4, 16, 0, 0)
+        segments = [ClockSegment(0.0, FILMING_TIME), ClockSegment(400.0, restart)]
+
+        assert resolve_range('@16:01', None, FILMING_TIME, 900.0, segments) == (460.0, None)
+        # Between the two recordings: the start of the later one
+        assert resolve_range('@15:00', None, FILMING_TIME, 900.0, segments) == (400.0, None)
+
+    @pytest.mark.parametrize('start,end', [
+        ('@14:00', None),      # before the recording
+        ('20:00', None),       # after the end of the file
+        ('2:00', '1:00'),      # end before start
+    ])
+    def test_invalid_ranges(self, start, end):
+        """Ranges outside the recording or empty raise ValueError."""
+        from time_range import resolve_range
+
+        with pytest.raises(ValueError):
+            resolve_range(start, end, FILMING_TIME, 600.0)
+
+
+class TestClock:
+    """Tests for shift_clock_segments and offset_clock."""
+
+    def test_clock_segments_follow_offset(self):
+        """The clock running at the offset is advanced; later ones move back."""
+        from time_range import shift_clock_segments
+        from clock_index import ClockSegment
+
+        restart = datetime(2024, 7, 4, 16, 0, 0)
+        segments = [ClockSegment(0.0, FILMING_TIME), ClockSegment(400.0, restart)]
+
+        assert shift_clock_segments(segments, 300) == [
+            ClockSegment(0.0, FILMING_TIME + timedelta(seconds=300)),
+            ClockSegment(100.0, restart),
+        ]
+        assert shift_clock_segments(segments, 600) == [
+            ClockSegment(0.0, restart + timedelta(seconds=200))
+        ]
+        assert shift_clock_segments(None, 300) is None
+
+    def test_offset_clock(self):
+        """A cut starts at the clock shown at its offset."""
+        from time_range import offset_clock
+        from clock_index import ClockSegment
+
+        restart = datetime(2024, 7, 4, 16, 0, 0)
+        segments = [ClockSegment(0.0, FILMING_TIME), ClockSegment(400.0, restart)]
+
+        assert offset_clock(FILMING_TIME, None, 90) == (FILMING_TIME + timedelta(seconds=90), None)
+        # Past the restart, a single clock remains
+        assert offset_clock(FILMING_TIME, segments, 500) == (restart + timedelta(seconds=100), None)
+        start, shifted = offset_clock(FILMING_TIME, segments, 300)
+        assert start == FILMING_TIME + timedelta(seconds=300)
+        assert shifted[1] == ClockSegment(100.0, restart)
+
+
+class TestRangeConversion:
+    """Tests for convert_video(start=..., end=...) and the CLI options."""
+
+    def _mock_ffmpeg(self, tmp_path, mocker):
+        """Mock FFmpeg and the clip's metadata."""
+        process = MagicMock()
+        process.stdout = iter([])
+        process.returncode = 0
+        (tmp_path / "clip.mts").write_bytes(b'x')
+        popen = mocker.patch('mts_converter.subprocess.Popen', return_value=process)
+        mocker.patch('mts_converter.get_video_creation_time', return_value=FILMING_TIME)
+        mocker.patch('mts_converter.get_video_duration', return_value=3600.0)
+        return popen
+
+    def test_input_seek_and_shifted_clock(self, tmp_path, mocker):
+        """The range is seeked before -i and the clock starts at the range start."""
+        from mts_converter import convert_video
+
+        popen = self._mock_ffmpeg(tmp_path, mocker)
+
+        assert convert_video(str(tmp_path / "clip.mts"), str(tmp_path / "clip.mp4"),
+                             start='@14:40', end='@14:45') is True
+
+        cmd = popen.call_args[0][0]
+        assert cmd.index('-ss') < cmd.index('-i')
+        assert cmd[cmd.index('-ss') + 1] == '600.0'
+        assert cmd[cmd.index('-t') + 1] == '300.0'
+        clock = int((FILMING_TIME + timedelta(minutes=10)).timestamp())
+        assert f"localtime\\:{clock}" in ' '.join(cmd)
+
+    def test_fractional_start_keeps_clock_exact(self, tmp_path, mocker):
+        """A start between whole seconds is not truncated off the clock."""
+        from mts_converter import convert_video
+
+        popen = self._mock_ffmpeg(tmp_path, mocker)
+
+        assert convert_video(str(tmp_path / "clip.mts"), str(tmp_path / "clip.mp4"),
+                             start='10:00.5') is True
+
+        cmd = popen.call_args[0][0]
+        clock = (FILMING_TIME + timedelta(seconds=600.5)).timestamp()
+        assert f"localtime\\:{clock:.3f}\\:" in ' '.join(cmd)
+
+    def test_storyboard_covers_range(self, tmp_path, mocker):
+        """A storyboard of a range has cues for the range only."""
+        from mts_converter import convert_video, THUMBNAIL_INTERVAL
+
+        self._mock_ffmpeg(tmp_path, mocker)
+
+        assert convert_video(str(tmp_path / "clip.mts"), str(tmp_path / "clip.mp4"),
+                             start='10:00', end='15:00', extra_outputs=['storyboard']) is True
+        assert convert_video(str(tmp_path / "clip.mts"), str(tmp_path / "tail.mp4"),
+                             start='50:00', extra_outputs=['storyboard']) is True
+
+        vtt = (tmp_path / "clip_storyboard.vtt").read_text(encoding='utf-8')
+        assert vtt.count(' --> ') == 300 // THUMBNAIL_INTERVAL
+        vtt = (tmp_path / "tail_storyboard.vtt").read_text(encoding='utf-8')
+        assert vtt.count(' --> ') == 600 // THUMBNAIL_INTERVAL
+
+    def test_invalid_range_fails(self, tmp_path, mocker):
+        """A range outside the recording fails without running FFmpeg."""
+        from mts_converter import convert_video
+
+        popen = self._mock_ffmpeg(tmp_path, mocker)
+
+        assert convert_video(str(tmp_path / "clip.mts"), str(tmp_path / "clip.mp4"),
+                             start='2:00:00') is False
+        popen.assert_not_called()
+
+    def test_parse_args(self):
+        """--start/--end are validated and kept as given."""
+        from mts_converter import parse_args
+
+        parsed = parse_args(['clip.mts', '--start', '1:30', '--end', '@14:35:20'])
+
+        assert (parsed.start, parsed.end) == ('1:30', '@14:35:20')
+        with pytest.raises(SystemExit):
+            parse_args(['clip.mts', '--start', 'soon'])
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""Tests for ts_integrity module.
+
+Tests the checks on synthetic AVCHD transport streams (sync loss,
+continuity counters, program tables, truncated tails), the repaired copy
+and the pre-flight option of conversions and batches.
+"""
+
+import pytest
+
+
+PMT_PID = 0x0100
+VIDEO_PID = 0x1011
+PACKET_SIZE = 192
+
+
+def ts_packet(pid, cc, payload=b'', start=False, prefix=True):
+    """Build a TS packet, with the AVCHD timecode prefix by default."""
+    header = bytes([0x47, (0x40 if start else 0x00) | (pid >> 8), pid & 0xFF, 0x10 | (cc & 0x0F)])
+    return (b'\x00\x00\x00\x00' if prefix else b'') + header + payload.ljust(184, b'\xff')
+
+
+def pat_payload(pmt_pid=PMT_PID):
+    """Build a PAT section listing one program."""
+    return b'\x00' + bytes([
+        0x00, 0xB0, 0x0D, 0x00, 0x01, 0xC1, 0x00, 0x00,
+        0x00, 0x01, 0xE0 | (pmt_pid >> 8), pmt_pid & 0xFF,
+    ]) + b'\x00' * 4
+
+
+def make_stream(count, prefix=True, tables=True):
+    """Build a stream of count video packets with PAT/PMT every 50 packets."""
+    counters = {}
+    packets = []
+
+    def add(pid, payload=b'', start=False):
+        counters[pid] = counters.get(pid, -1) + 1
+        packets.append(ts_packet(pid, counters[pid], payload, start, prefix))
+
+    for index in range(count):
+        if tables and index % 50 == 0:
+            add(0x0000, pat_payload(), start=True)
+            add(PMT_PID, b'\x00\x02', start=True)
+        add(VIDEO_PID)
+    return b''.join(packets)
+
+
+class TestCheckBuffer:
+    """Tests for check_buffer."""
+
+    def test_clean_stream(self):
+        """A clean stream is ok, with its packets and tables found."""
+        from ts_integrity import check_buffer, STATUS_OK
+
+        data = make_stream(200)
+        report = check_buffer(data)
+
+        assert report.status == STATUS_OK
+        assert report.packet_size == PACKET_SIZE
+        assert report.packets == len(data) // PACKET_SIZE
+        assert report.has_pat and report.has_pmt
+        assert report.good_ranges == [(0, len(data))]
+
+    def test_plain_188_byte_packets(self):
+        """Plain transport streams without the timecode prefix are checked too."""
+        from ts_integrity import check_buffer, STATUS_OK
+
+        report = check_buffer(make_stream(200, prefix=False))
+
+        assert report.status == STATUS_OK
+        assert report.packet_size == 188
+
+    def test_sync_loss_is_skipped(self):
+        """Garbage between packets is skipped and the scan resynchronises."""
+        from ts_integrity import check_buffer, STATUS_REPAIRABLE
+
+        data = make_stream(400)
+        cut = 100 * PACKET_SIZE
+        damaged = data[:cut] + b'\x00' * 1000 + data[cut:]
+        # Small chunks: the loss falls in the middle of the scan
+        report = check_buffer(damaged, chunk_packets=64)
+
+        assert report.status == STATUS_REPAIRABLE
+        assert report.sync_losses == 1
+        assert report.unsynced_bytes == 1000
+        assert report.good_ranges == [(0, cut), (cut + 1000, len(damaged))]
+        assert report.cc_errors == 0
+
+    def test_truncated_tail(self):
+        """A partial last packet makes the file repairable."""
+        from ts_integrity import check_buffer, STATUS_REPAIRABLE
+
+        data = make_stream(200)
+        report = check_buffer(data + data[:100])
+
+        assert report.status == STATUS_REPAIRABLE
+        assert report.truncated_bytes == 100
+
+    def test_lost_packet_is_a_warning(self):
+        """A missing packet is a continuity error FFmpeg can conceal."""
+        from ts_integrity import check_buffer, STATUS_OK
+
+        data = make_stream(400)
+        lost = 200 * PACKET_SIZE
+        report = check_buffer(data[:lost] + data[lost + PACKET_SIZE:])
+
+        assert report.status == STATUS_OK
+        assert report.cc_errors == 1
+        assert report.warnings
+
+    @pytest.mark.parametrize('data,problem', [
+        (b'not a transport stream' * 100, 'Not an MPEG transport stream'),
+        (make_stream(200, tables=False), 'No program association table (PAT)'),
+    ])
+    def test_corrupt(self, data, problem):
+        """Files FFmpeg cannot read are corrupt."""
+        from ts_integrity import check_buffer, STATUS_CORRUPT
+
+        report = check_buffer(data)
+
+        assert report.status == STATUS_CORRUPT
+        assert problem in report.problems
+
+    def test_mostly_garbage_is_corrupt(self):
+        """Beyond the unsynced limit a file is rejected instead of repaired."""
+        from ts_integrity import check_buffer, STATUS_CORRUPT
+
+        data = make_stream(100)
+        report = check_buffer(data[:50 * PACKET_SIZE] + b'\x00' * len(data) + data[50 * PACKET_SIZE:])
+
+        assert report.status == STATUS_CORRUPT
+
+
+class TestFiles:
+    """Tests for check_file, check_files and repair_file."""
+
+    def test_repair_keeps_readable_packets(self, tmp_path):
+        """The repaired copy holds every packet in sync and nothing else."""
+        from ts_integrity import check_file, repair_file, STATUS_OK
+
+        data = make_stream(400)
+        cut = 100 * PACKET_SIZE
+        clip = tmp_path / "clip.mts"
+        clip.write_bytes(data[:cut] + b'\x00' * 1000 + data[cut:] + data[:100])
+
+        repaired = repair_file(clip, tmp_path / "repaired" / "clip.mts")
+
+        assert repaired.read_bytes() == data
+        assert check_file(repaired).status == STATUS_OK
+
+    def test_check_files_in_order(self, tmp_path):
+        """Reports come back in input order with a throughput."""
+        from ts_integrity import check_files, STATUS_CORRUPT, STATUS_OK
+
+        good = tmp_path / "good.mts"
+        good.write_bytes(make_stream(200))
+        empty = tmp_path / "empty.mts"
+        empty.write_bytes(b'')
+
+        reports = check_files([good, empty, tmp_path / "missing.mts"])
+
+        assert [r.status for r in reports] == [STATUS_OK, STATUS_CORRUPT, STATUS_CORRUPT]
+        assert reports[0].bytes_per_second > 0
+
+    def test_report_reused_until_file_changes(self, tmp_path, mocker):
+        """get_report checks a file once while it is unchanged."""
+        import ts_integrity
+
+        clip = tmp_path / "clip.mts"
+        clip.write_bytes(make_stream(200))
+        check = mocker.spy(ts_integrity, 'check_file')
+
+        ts_integrity.get_report(clip)
+        ts_integrity.get_report(clip)
+        assert check.call_count == 1
+
+        clip.write_bytes(make_stream(300))
+        ts_integrity.get_report(clip)
+        assert check.call_count == 2
+
+
+class TestPreflight:
+    """Tests for convert_video(preflight=...) and batches."""
+
+    def test_corrupt_input_is_not_encoded(self, tmp_path, mocker):
+        """A corrupt file is rejected before FFmpeg runs."""
+        from mts_converter import convert_video
+
+        clip = tmp_path / "clip.mts"
+        clip.write_bytes(b'\x00' * 10000)
+        popen = mocker.patch('mts_converter.subprocess.Popen')
+
+        assert convert_video(str(clip), str(tmp_path / "clip.mp4"), preflight='check') is False
+        popen.assert_not_called()
+
+    def test_repair_converts_from_copy(self, tmp_path, mocker):
+        """In repair mode a damaged file is converted from its repaired copy."""
+        from mts_converter import convert_video
+
+        clip = tmp_path / "clip.mts"
+        clip.write_bytes(make_stream(200) + b'\x47\x00')
+        creation = mocker.patch('mts_converter.get_video_creation_time',
+                                side_effect=RuntimeError('stop'))
+
+        with pytest.raises(RuntimeError):
+            convert_video(str(clip), str(tmp_path / "out" / "clip.mp4"), preflight='repair')
+
+        # The copy is written first; the recording time comes from the original
+        repaired = tmp_path / "out" / "repaired" / "clip.mts"
+        assert repaired.read_bytes() == make_stream(200)
+        assert creation.call_args[0][0] == str(clip)
+
+    def test_batch_skips_corrupt_files(self, tmp_path, mocker):
+        """A batch flags corrupt files and converts the rest."""
+        from batch_converter import BatchConverter
+
+        good = tmp_path / "good.mts"
+        good.write_bytes(make_stream(200))
+        bad = tmp_path / "bad.mts"
+        bad.write_bytes(b'\x00' * 10000)
+        convert = mocker.patch('batch_converter.convert_video', return_value=True)
+
+        results = BatchConverter(preflight='check').convert_batch([good, bad])
+
+        assert results[0].success and results[0].preflight.ok
+        assert not results[1].success
+        assert results[1].error.startswith("Pre-flight check failed")
+        convert.assert_called_once()
+        assert convert.call_args[1]['preflight'] == 'check'
+
+    def test_parse_args(self):
+        """--preflight takes a mode."""
+        from mts_converter import parse_args
+
+        assert parse_args(['clip.mts', '--preflight', 'repair']).preflight == 'repair'
+        assert parse_args(['clip.mts']).preflight is None
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Range-limited conversion: --start/--end by media time or recording time.
+
+A range end is either a media offset into the file or a wall-clock time
+of the recording, marked with '@':
+
+    90            90 seconds into the file
+    1:30          1 minute 30 seconds
+    1:02:30.5     1 hour 2 minutes 30.5 seconds
+    @14:35        14:35:00 on the day the recording started (the next
+                  day if the recording started later than that)
+    @14:35:20     the same with seconds
+    @2024-07-04 14:35:20
+                  a full date and time
+
+Wall-clock times are resolved through the recording's start time (the
+DPM timestamp) and, for files whose camera clock restarts, through the
+clock index, so they land on the frame that showed that time.
+
+The conversion seeks on the input side: the demuxer jumps to the
+keyframe before the range start and FFmpeg decodes from there, so encode
+time follows the length of the range, not of the file. Output timestamps
+start at zero at the range start, so the burned-in clock is moved to the
+range start as well.
+"""
+
+from dataclasses import dataclass, replace
+from datetime import datetime, time as dtime, timedelta
+from typing import Optional, Tuple
+
+
+# Prefix marking a wall-clock time
+WALL_CLOCK_PREFIX = '@'
+
+# Accepted wall-clock formats: full date and time, or time of day
+WALL_CLOCK_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M')
+TIME_OF_DAY_FORMATS = ('%H:%M:%S', '%H:%M')
+
+
+@dataclass(frozen=True)
+class TimeSpec:
+    """One end of a conversion range, as given by the user.
+
+    Exactly one attribute is set.
+
+    Attributes:
+        seconds: Media offset in seconds.
+        wall_clock: Recording date and time.
+        time_of_day: Recording time of day (date from the recording).
+    """
+    seconds: Optional[float] = None
+    wall_clock: Optional[datetime] = None
+    time_of_day: Optional[dtime] = None
+
+
+def parse_time_spec(value) -> TimeSpec:
+    """Parse a --start/--end value.
+
+    Args:
+        value: Media offset ('90', '1:30', '1:02:30.5' or a number) or a
+               wall-clock time prefixed with '@'.
+
+    Returns:
+        TimeSpec.
+
+    Raises:
+        ValueError: If the value cannot be parsed or is negative.
+    """
+    if isinstance(value, TimeSpec):
+        return value
+    if isinstance(value, (int, float)):
+        if value < 0:
+            raise ValueError(f"Invalid time '{value}': must not be negative")
+        return TimeSpec(seconds=float(value))
+
+    text = str(value).strip()
+    if text.startswith(WALL_CLOCK_PREFIX):
+        clock = text[len(WALL_CLOCK_PREFIX):].strip()
+        for fmt in WALL_CLOCK_FORMATS:
+            try:
+                return TimeSpec(wall_clock=datetime.strptime(clock, fmt))
+            except ValueError:
+                pass
+        for fmt in TIME_OF_DAY_FORMATS:
+            try:
+                return TimeSpec(time_of_day=datetime.strptime(clock, fmt).time())
+            except ValueError:
+                pass
+        raise ValueError(
+            f"Invalid recording time '{text}'. Use @HH:MM[:SS] or @YYYY-MM-DD HH:MM[:SS]"
+        )
+
+    parts = text.split(':')
+    try:
+        if len(parts) > 3 or not all(parts):
+            raise ValueError
+        numbers = [float(part) for part in parts]
+    except ValueError:
+        raise ValueError(
+            f"Invalid time '{text}'. Use seconds, [HH:]MM:SS, or @ and a recording time"
+        ) from None
+    if any(number < 0 for number in numbers):
+        raise ValueError(f"Invalid time '{text}': must not be negative")
+    seconds = 0.0
+    for number in numbers:
+        seconds = seconds * 60 + number
+    return TimeSpec(seconds=seconds)
+
+
+def _wall_clock_to_media(wall_clock: datetime, filming_time: datetime,
+                         clock_segments=None) -> float:
+    """Find the media offset at which the recording showed a wall-clock time.
+
+    A time in a gap between two recordings of a file resolves to the start
+    of the later recording.
+    """
+    if not clock_segments:
+        return (wall_clock - filming_time).total_seconds()
+    for index, segment in enumerate(clock_segments):
+        following = clock_segments[index + 1] if index + 1 < len(clock_segments) else None
+        offset = (wall_clock - segment.wall_clock).total_seconds()
+        if offset < 0:
+            # Before this segment's clock (and after the previous one's end)
+            return segment.start if index else offset
+        if following is None or segment.start + offset < following.start:
+            return segment.start + offset
+    return clock_segments[-1].start
+
+
+def resolve_time_spec(spec: TimeSpec, filming_time: datetime, clock_segments=None) -> float:
+    """Resolve a TimeSpec to a media offset.
+
+    Args:
+        spec: TimeSpec from parse_time_spec.
+        filming_time: datetime of the first frame of the recording.
+        clock_segments: Optional list of clock_index.ClockSegment objects.
+
+    Returns:
+        Media offset in seconds (negative if before the recording).
+    """
+    if spec.seconds is not None:
+        return spec.seconds
+    wall_clock = spec.wall_clock
+    if wall_clock is None:
+        wall_clock = datetime.combine(filming_time.date(), spec.time_of_day)
+        if wall_clock < filming_time.replace(microsecond=0):
+            # A recording running past midnight
+            wall_clock += timedelta(days=1)
+    return _wall_clock_to_media(wall_clock, filming_time, clock_segments)
+
+
+def resolve_range(start, end, filming_time: datetime, duration: float = 0.0,
+                  clock_segments=None) -> Tuple[float, Optional[float]]:
+    """Resolve --start/--end values to a media range.
+
+    Args:
+        start: Range start (see parse_time_spec), or None for the beginning.
+        end: Range end, or None for the end of the file.
+        filming_time: datetime of the first frame of the recording.
+        duration: File duration in seconds, or 0 if unknown (no bound check).
+        clock_segments: Optional list of clock_index.ClockSegment objects.
+
+    Returns:
+        Tuple of (start offset, length). The length is None when the range
+        runs to the end of the file.
+
+    Raises:
+        ValueError: If a value is invalid or the range is empty or outside
+                    the recording.
+    """
+    first = 0.0
+    if start is not None:
+        first = resolve_time_spec(parse_time_spec(start), filming_time, clock_segments)
+    last = None
+    if end is not None:
+        last = resolve_time_spec(parse_time_spec(end), filming_time, clock_segments)
+
+    if first < 0:
+        raise ValueError(f"Range start '{start}' is before the recording starts")
+    if duration > 0 and first >= duration:
+        raise ValueError(f"Range start '{start}' is after the recording ends")
+    if last is not None:
+        if last <= first:
+            raise ValueError(f"Range end '{end}' is not after its start")
+        if duration > 0 and last >= duration:
+            last = None
+    return first, (last - first if last is not None else None)
+
+
+def shift_clock_segments(clock_segments, offset: float):
+    """Move clock segments to the timeline of a cut starting at offset.
+
+    Args:
+        clock_segments: Optional list of clock_index.ClockSegment objects.
+        offset: Media offset (seconds) where the cut starts.
+
+    Returns:
+        Clock segments relative to the offset, starting with the one
+        running at the offset, or None if there were none.
+    """
+    if not clock_segments:
+        return None
+    shifted = []
+    for index, segment in enumerate(clock_segments):
+        following = clock_segments[index + 1].start if index + 1 < len(clock_segments) else None
+        if following is not None and following <= offset:
+            continue
+        if segment.start <= offset:
+            # The segment running at the offset, advanced to it
+            shifted.append(replace(
+                segment, start=0.0,
+                wall_clock=segment.wall_clock + timedelta(seconds=offset - segment.start)
+            ))
+        else:
+            shifted.append(replace(segment, start=segment.start - offset))
+    return shifted
+
+
+def offset_clock(filming_time: datetime, clock_segments, offset: float):
+    """Get the clock of a cut starting at a media offset.
+
+    Args:
+        filming_time: datetime of the first frame of the recording.
+        clock_segments: Optional list of clock_index.ClockSegment objects.
+        offset: Media offset (seconds) where the cut starts.
+
+    Returns:
+        Tuple of (filming_time, clock_segments) for the cut. The clock
+        segments are None unless the camera clock restarts within it.
+    """
+    if not offset:
+        return filming_time, clock_segments
+    shifted = shift_clock_segments(clock_segments, offset)
+    if not shifted:
+        return filming_time + timedelta(seconds=offset), None
+    return shifted[0].wall_clock, (shifted if len(shifted) > 1 else None)
+
+
+def describe_range(start: float, length: Optional[float]) -> str:
+    """Format a media range for messages, e.g. '0:01:30-0:11:30'."""
+    def clock(seconds):
+        return str(timedelta(seconds=round(seconds)))
+    end = clock(start + length) if length is not None else 'end'
+    return f"{clock(start)}-{end}"
@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+"""
+Pre-flight integrity check for MPEG-TS (MTS) files.
+
+Clips from a failing card are often discovered only after FFmpeg has
+spent minutes on them, or they convert into garbage. This module checks a
+file's packet structure first, at close to disk speed:
+
+- sync bytes: every packet starts with 0x47; where they stop, the scan
+  resynchronises on the next run of good packets and counts the bytes
+  skipped
+- continuity counters: each PID's 4-bit counter advances by one per
+  packet with payload; a jump means packets were lost
+- PAT/PMT: the program tables FFmpeg needs to find the streams
+- truncated tails: a last packet cut short by a recording that was
+  never closed
+
+The file is memory-mapped and walked in chunks. Sync bytes are checked a
+chunk at a time with strided slices, and packet headers are unpacked with
+struct.iter_unpack, so the per-packet Python work is a few integer
+operations.
+
+A file is 'ok', 'repairable' (lost sync or a truncated tail: a copy of
+its good packets converts cleanly) or 'corrupt' (not a transport stream,
+no program tables, or mostly unreadable). Lost packets alone are
+reported as warnings: FFmpeg conceals them.
+
+Usage:
+    python ts_integrity.py clip.MTS [more.MTS ...] [--repair DIR]
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from clock_index import PACKET_LAYOUTS, TS_SYNC_BYTE, detect_packet_layout
+
+
+# Outcome of a check
+STATUS_OK = 'ok'
+STATUS_REPAIRABLE = 'repairable'
+STATUS_CORRUPT = 'corrupt'
+
+# Program association table and null packet PIDs
+PAT_PID = 0x0000
+NULL_PID = 0x1FFF
+
+# Packets checked per chunk (about 8 MB of 192-byte packets)
+CHUNK_PACKETS = 43690
+
+# Consecutive sync bytes needed to trust a resynchronisation point
+RESYNC_PACKETS = 5
+
+# Bytes searched for the first packet when the file does not start with one
+SYNC_SEARCH_WINDOW = 1024 * 1024
+
+# Above these shares the file is rejected rather than repaired
+MAX_UNSYNCED_FRACTION = 0.05
+MAX_CC_ERROR_FRACTION = 0.01
+
+# Files checked at once by check_files (one stream each on the same disk)
+DEFAULT_CHECK_WORKERS = 4
+
+# Folder, next to the output, receiving repaired copies
+REPAIR_DIR_NAME = 'repaired'
+
+
+@dataclass
+class IntegrityReport:
+    """Outcome of checking one file.
+
+    Attributes:
+        input_file: Path of the checked file.
+        status: STATUS_OK, STATUS_REPAIRABLE or STATUS_CORRUPT.
+        problems: Descriptions of what makes the file repairable or corrupt.
+        warnings: Descriptions of damage FFmpeg copes with.
+        packet_size: Detected packet size (0 if not a transport stream).
+        packets: Number of packets checked.
+        unsynced_bytes: Bytes skipped while out of sync.
+        sync_losses: Number of times sync was lost.
+        cc_errors: Number of continuity counter jumps.
+        error_packets: Number of packets flagged with transport errors.
+        truncated_bytes: Bytes of a partial packet at the end.
+        has_pat: Whether a program association table was found.
+        has_pmt: Whether a program map table it lists was found.
+        size: File size in bytes.
+        seconds: Time the check took.
+        good_ranges: Byte ranges of packets in sync, in file order.
+    """
+    input_file: Path
+    status: str = STATUS_OK
+    problems: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    packet_size: int = 0
+    packets: int = 0
+    unsynced_bytes: int = 0
+    sync_losses: int = 0
+    cc_errors: int = 0
+    error_packets: int = 0
+    truncated_bytes: int = 0
+    has_pat: bool = False
+    has_pmt: bool = False
+    size: int = 0
+    seconds: float = 0.0
+    good_ranges: List[Tuple[int, int]] = field(default_factory=list, repr=False)
+
+    @property
+    def ok(self) -> bool:
+        """Whether the file can be converted as it is."""
+        return self.status == STATUS_OK
+
+    @property
+    def bytes_per_second(self) -> float:
+        """Check throughput in bytes per second."""
+        return self.size / self.seconds if self.seconds > 0 else 0.0
+
+    def describe(self) -> str:
+        """Summarise the outcome in one line."""
+        details = self.problems + self.warnings
+        summary = f"{self.input_file.name}: {self.status}"
+        if details:
+            summary += " (" + "; ".join(details) + ")"
+        return summary
+
+
+def find_sync(data, begin: int, layout: Tuple[int, int],
+              limit: Optional[int] = None) -> Optional[int]:
+    """Find the next packet start from which sync bytes repeat.
+
+    Args:
+        data: File contents (bytes or mmap).
+        begin: Byte offset to search from.
+        layout: (packet_size, sync_offset) of the stream.
+        limit: Optional offset beyond which no packet start is accepted.
+
+    Returns:
+        Offset of the packet start (the sync byte minus the sync offset),
+        or None if there is none.
+    """
+    packet_size, sync_offset = layout
+    size = len(data)
+    end = size if limit is None else min(size, limit + sync_offset + 1)
+    candidate = data.find(b'\x47', begin + sync_offset, end)
+    while candidate != -1:
+        start = candidate - sync_offset
+        if start + packet_size > size:
+            return None
+        checks = [candidate + k * packet_size for k in range(1, RESYNC_PACKETS)]
+        checks = [p for p in checks if p < size]
+        if all(data[p] == TS_SYNC_BYTE for p in checks):
+            return start
+        candidate = data.find(b'\x47', candidate + 1, end)
+    return None
+
+
+def find_layout(data) -> Optional[Tuple[Tuple[int, int], int]]:
+    """Detect the packet layout, allowing for garbage at the start.
+
+    Args:
+        data: File contents (bytes or mmap).
+
+    Returns:
+        Tuple of (layout, offset of the first packet), or None if no
+        layout fits within SYNC_SEARCH_WINDOW.
+    """
+    layout = detect_packet_layout(data)
+    if layout is not None:
+        return layout, 0
+    found = []
+    for candidate in PACKET_LAYOUTS:
+        start = find_sync(data, 0, candidate, SYNC_SEARCH_WINDOW)
+        if start is not None and start + RESYNC_PACKETS * candidate[0] <= len(data):
+            found.append((start, candidate))
+    if not found:
+        return None
+    start, layout = min(found)
+    return layout, start
+
+
+def parse_pat(packet: bytes, sync_offset: int) -> Optional[List[int]]:
+    """Get the PMT PIDs listed in a PAT packet.
+
+    Args:
+        packet: One TS packet starting a PAT section.
+        sync_offset: Offset of the sync byte within the packet.
+
+    Returns:
+        List of PMT PIDs, or None if the packet holds no readable PAT.
+    """
+    header = packet[sync_offset:]
+    payload = 4
+    adaptation = (header[3] >> 4) & 0x03
+    if adaptation & 0x02:
+        payload += 1 + header[4]
+    if not adaptation & 0x01 or payload >= len(header):
+        return None
+    section = payload + 1 + header[payload]
+    if section + 8 > len(header) or header[section] != 0x00:
+        return None
+    section_end = min(section + 3 + (((header[section + 1] & 0x0F) << 8) | header[section + 2]) - 4,
+                      len(header))
+    pids = []
+    for entry in range(section + 8, section_end - 3, 4):
+        program = (header[entry] << 8) | header[entry + 1]
+        if program:
+            pids.append(((header[entry + 2] & 0x1F) << 8) | header[entry + 3])
+    return pids
+
+
+def check_buffer(data, input_file='', chunk_packets: int = CHUNK_PACKETS) -> IntegrityReport:
+    """Check the packet structure of a transport stream in memory.
+
+    Args:
+        data: File contents (bytes or mmap).
+        input_file: Path the data came from, for the report.
+        chunk_packets: Packets checked per chunk.
+
+    Returns:
+        IntegrityReport (seconds is left at 0).
+    """
+    report = IntegrityReport(Path(input_file), size=len(data))
+    found = find_layout(data)
+    if found is None:
+        report.status = STATUS_CORRUPT
+        report.problems.append("Not an MPEG transport stream")
+        return report
+    (packet_size, sync_offset), pos = found
+    report.packet_size = packet_size
+    if pos:
+        report.unsynced_bytes += pos
+        report.sync_losses += 1
+
+    size = len(data)
+    # Header bytes after the sync byte: PID word, flags, adaptation flags
+    header = struct.Struct(f'>{sync_offset + 1}xHBxB{packet_size - sync_offset - 6}x')
+    last_cc: Dict[int, int] = {}
+    pmt_pids: Optional[List[int]] = None
+    run_start = pos
+
+    while pos + packet_size <= size:
+        count = min(chunk_packets, (size - pos) // packet_size)
+        chunk = data[pos:pos + count * packet_size]
+        syncs = chunk[sync_offset::packet_size]
+        good = count if syncs.count(TS_SYNC_BYTE) == count else len(syncs) - len(syncs.lstrip(b'\x47'))
+
+        block = chunk[:good * packet_size]
+        for word, flags, adaptation_flags in header.iter_unpack(block):
+            if word & 0x8000:
+                report.error_packets += 1
+            pid = word & 0x1FFF
+            if pid == NULL_PID or not flags & 0x10:
+                continue
+            cc = flags & 0x0F
+            last = last_cc.get(pid)
+            if (last is not None and cc != last and cc != (last + 1) & 0x0F
+                    and not (flags & 0x20 and adaptation_flags & 0x80)):
+                report.cc_errors += 1
+            last_cc[pid] = cc
+        report.packets += good
+
+        if pmt_pids is None and PAT_PID in last_cc:
+            for start in range(0, len(block), packet_size):
+                word = (block[start + sync_offset + 1] << 8) | block[start + sync_offset + 2]
+                if word & 0x5FFF == (0x4000 | PAT_PID):
+                    pmt_pids = parse_pat(block[start:start + packet_size], sync_offset)
+                    if pmt_pids is not None:
+                        break
+
+        pos += good * packet_size
+        if good < count:
+            # Lost sync: skip to the next run of packets
+            if pos > run_start:
+                report.good_ranges.append((run_start, pos))
+            resync = find_sync(data, pos + 1, (packet_size, sync_offset))
+            report.sync_losses += 1
+            if resync is None:
+                report.unsynced_bytes += size - pos
+                pos = run_start = size
+                break
+            report.unsynced_bytes += resync - pos
+            # Continuity across a gap says nothing about the packets around it
+            last_cc.clear()
+            pos = run_start = resync
+
+    if pos > run_start:
+        report.good_ranges.append((run_start, pos))
+    report.truncated_bytes = size - pos
+
+    report.has_pat = pmt_pids is not None or PAT_PID in last_cc
+    report.has_pmt = bool(pmt_pids) and any(pid in last_cc for pid in pmt_pids)
+    _classify(report)
+    return report
+
+
+def _classify(report: IntegrityReport):
+    """Set a report's status, problems and warnings from its counts."""
+    corrupt = []
+    repairable = []
+    if not report.packets:
+        corrupt.append("No complete packets")
+    elif not report.has_pat:
+        corrupt.append("No program association table (PAT)")
+    elif not report.has_pmt:
+        corrupt.append("No program map table (PMT)")
+
+    if report.unsynced_bytes > MAX_UNSYNCED_FRACTION * report.size:
+        corrupt.append(
+            f"{report.unsynced_bytes / report.size:.0%} of the file is not valid packets"
+        )
+    elif report.unsynced_bytes:
+        repairable.append(
+            f"Lost sync {report.sync_losses} time(s), {report.unsynced_bytes} bytes unreadable"
+        )
+    if report.truncated_bytes:
+        repairable.append(f"Last packet truncated ({report.truncated_bytes} bytes)")
+
+    if report.cc_errors > MAX_CC_ERROR_FRACTION * max(report.packets, 1):
+        corrupt.append(f"{report.cc_errors} continuity errors: too many packets lost")
+    elif report.cc_errors:
+        report.warnings.append(f"{report.cc_errors} continuity error(s): packets lost")
+    if report.error_packets:
+        report.warnings.append(f"{report.error_packets} packet(s) flagged with transport errors")
+
+    report.problems = corrupt + repairable
+    if corrupt:
+        report.status = STATUS_CORRUPT
+    elif repairable:
+        report.status = STATUS_REPAIRABLE
+    else:
+        report.status = STATUS_OK
+
+
+def check_file(input_file, chunk_packets: int = CHUNK_PACKETS) -> IntegrityReport:
+    """Check a file's packet structure using a memory map.
+
+    Args:
+        input_file: Path to the MTS file.
+        chunk_packets: Packets checked per chunk.
+
+    Returns:
+        IntegrityReport; unreadable and empty files are corrupt.
+    """
+    input_file = Path(input_file)
+    started = time.perf_counter()
+    try:
+        with open(input_file, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                report = check_buffer(data, input_file, chunk_packets)
+    except ValueError:
+        # Empty files cannot be mapped
+        report = IntegrityReport(input_file, STATUS_CORRUPT, ["Empty file"])
+    except OSError as e:
+        report = IntegrityReport(input_file, STATUS_CORRUPT, [f"Cannot read file: {e}"])
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+_checked: Dict[Tuple[str, int, int], IntegrityReport] = {}
+_checked_lock = threading.Lock()
+
+
+def get_report(input_file) -> IntegrityReport:
+    """Check a file once; later calls reuse the report until it changes.
+
+    Lets a batch check all of its files up front while each conversion
+    still checks its own input.
+
+    Args:
+        input_file: Path to the MTS file.
+
+    Returns:
+        IntegrityReport.
+    """
+    try:
+        stat = os.stat(input_file)
+    except OSError:
+        return check_file(input_file)
+    key = (os.path.abspath(input_file), stat.st_size, stat.st_mtime_ns)
+    with _checked_lock:
+        report = _checked.get(key)
+    if report is None:
+        report = check_file(input_file)
+        with _checked_lock:
+            _checked[key] = report
+    return report
+
+
+def check_files(files, max_workers: int = DEFAULT_CHECK_WORKERS) -> List[IntegrityReport]:
+    """Check several files in parallel.
+
+    Args:
+        files: Paths to MTS files.
+        max_workers: Files checked at once.
+
+    Returns:
+        List of IntegrityReport objects in the order of files.
+    """
+    files = list(files)
+    if not files:
+        return []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(get_report, files))
+
+
+def get_repair_path(input_file, output_dir) -> Path:
+    """Get where the repaired copy of a file is written.
+
+    Args:
+        input_file: Path to the damaged MTS file.
+        output_dir: Directory of the conversion's output.
+
+    Returns:
+        Path in the REPAIR_DIR_NAME folder of output_dir, named like the input.
+    """
+    return Path(output_dir) / REPAIR_DIR_NAME / Path(input_file).name
+
+
+def repair_file(input_file, output_file, report: Optional[IntegrityReport] = None) -> Path:
+    """Write a copy of a file holding only its packets in sync.
+
+    Drops unreadable stretches and a truncated last packet. Lost packets
+    cannot be recovered; FFmpeg conceals them.
+
+    Args:
+        input_file: Path to the damaged MTS file.
+        output_file: Path of the copy to write.
+        report: Optional report of input_file (default: checked now).
+
+    Returns:
+        Path of the repaired copy.
+    """
+    report = report or check_file(input_file)
+    output_file = Path(output_file)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    copy_size = CHUNK_PACKETS * max(report.packet_size, 1)
+    with open(input_file, 'rb') as src, open(output_file, 'wb') as dst:
+        with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for start, end in report.good_ranges:
+                for offset in range(start, end, copy_size):
+                    dst.write(data[offset:min(offset + copy_size, end)])
+    return output_file
+
+
+def main():
+    """Check files, print each outcome and the throughput."""
+    parser = argparse.ArgumentParser(description='Check MTS files for corruption')
+    parser.add_argument('files', nargs='+', help='MTS files to check')
+    parser.add_argument(
+        '--repair',
+        metavar='DIR',
+        default=None,
+        help='Write repaired copies of repairable files into DIR'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=DEFAULT_CHECK_WORKERS,
+        help=f'Files checked at once (default: {DEFAULT_CHECK_WORKERS})'
+    )
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    reports = check_files([Path(f) for f in args.files], args.workers)
+    elapsed = time.perf_counter() - started
+
+    for report in reports:
+        print(f"{report.describe()}  [{report.bytes_per_second / (1024 * 1024):.0f} MB/s]")
+        if args.repair and report.status == STATUS_REPAIRABLE:
+            repaired = repair_file(report.input_file, Path(args.repair) / report.input_file.name,
+                                   report)
+            print(f"  repaired copy: {repaired}")
+    total_mb = sum(report.size for report in reports) / (1024 * 1024)
+    print(f"Checked {len(reports)} file(s), {total_mb:.1f} MB in {elapsed:.2f}s "
+          f"({total_mb / max(elapsed, 1e-9):.0f} MB/s)")
+    if any(report.status == STATUS_CORRUPT for report in reports):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()